@@ -663,6 +663,7 @@ div[data-testid="stAppViewContainer"] {
 # UI 모듈 임포트
 from ui.staged_code_analysis_tab import render_code_analysis_tab
 from ui.qa_tab import render_qa_tab
+from ui.usage_panel import render_usage_sidebar
 
 def main():
     logo_b64 = ""
@@ -779,6 +780,11 @@ def main():
         
         st.divider()
         
+        # LLM 토큰/비용
+        render_usage_sidebar()
+        
+        st.divider()
+        
         # 시스템 관리 - 최소화
         st.markdown("### 시스템")
         
@@ -53,9 +53,191 @@ class RAGConfig:
     CHUNK_SIZE = 1000
     OVERLAP = 200
     TOP_K = 5
+    EVIDENCE_CACHE_SIZE = 128   # 취약점 근거 검색 LRU 캐시 크기
+    EVIDENCE_TABLE_FILE = "kisia_evidence_table.json"  # 벡터 DB 폴더 내 사전 계산 근거 테이블
+    CLASSIFIER_CACHE_SIZE = 1024  # 취약점 타입 분류 결과 LRU 캐시 크기
+    RELEVANCE_VIEW_CACHE_SIZE = 512  # 관련성 점수 계산용 문서 뷰 LRU 캐시 크기
+    QUERY_EMBEDDING_CACHE_SIZE = 256  # Q&A 질문 임베딩 LRU 캐시 크기 (정규화된 질문 기준)
+    QUERY_RESULT_CACHE_SIZE = 256     # Q&A 벡터 검색 결과 LRU 캐시 크기 (임베딩 + top_k + 필터 기준)
+    STRUCTURED_DATA_FILE = "data/processed/kisia_structured.json"  # BM25 색인 원본 (04 스크립트 출력)
+    SEARCH_MODE = "hybrid"   # 근거 폴백 검색: hybrid(BM25 + 벡터 RRF) / lexical(BM25만) / vector(벡터만)
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+    RRF_K = 60               # RRF 순위 감쇠 상수
+    RRF_DEPTH = 10           # 결합 전 BM25 / 벡터 검색에서 각각 가져올 후보 수
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # "chroma" | "numpy" (메모리 맵 행렬 정확 검색)
+    NUMPY_VECTOR_DIR = "numpy"  # 벡터 DB 폴더 내 numpy 백엔드 파일 폴더 (python -m rag.vector_backend로 내보내기)
+    BENCHMARK_QUERIES_FILE = "data/benchmarks/rag_queries.json"  # 검색 품질/지연 벤치마크 정답 질의 세트
+    BENCHMARK_RESULTS_DIR = "data/benchmarks/results"            # scripts/06_benchmark_rag.py 결과 JSON 저장 폴더
+
+@dataclass
+class QAContextConfig:
+    """Q&A 프롬프트 컨텍스트 설정 (세션별 증분 유지 + 토큰 예산)"""
+    MAX_PROMPT_TOKENS = 12000    # 템플릿/질문/가이드 문서 포함 전체 프롬프트 토큰 예산
+    HISTORY_WINDOW = 6           # 원문으로 유지할 최근 대화 메시지 수 (질문/답변 각 1개)
+    SUMMARY_MAX_TOKENS = 800     # 창 밖으로 밀려난 대화 요약 최대 토큰 (넘으면 오래된 줄부터 제거)
+    SUMMARY_QUESTION_CHARS = 150 # 요약 줄에 남길 질문 길이
+    SUMMARY_ANSWER_CHARS = 300   # 요약 줄에 남길 답변 앞부분 길이
+    CODE_TOP_K = 6               # 질문 관련 코드 청크 검색 수 (취약점 위치 청크는 별도 포함)
+    CODE_CHUNK_MAX_LINES = 80    # 코드 청크 최대 줄 수 (긴 함수는 나눠서 색인)
+    CODE_INLINE_TOKENS = 1500    # 분석 코드 전체가 이 이하면 검색 없이 그대로 포함
+    CODE_INDEX_EMBEDDINGS = os.getenv("CODE_INDEX_EMBEDDINGS", "false").lower() == "true"  # 코드 청크 임베딩 검색 결합 (로컬 ONNX 모델 필요)
+    # 섹션별 예산 비중 (남는 몫은 다른 섹션에 재분배)
+    SECTION_SHARES: Dict[str, float] = None
+    
+    def __post_init__(self):
+        if self.SECTION_SHARES is None:
+            self.SECTION_SHARES = {
+                'vulnerabilities_detail': 0.35,
+                'code_context': 0.25,
+                'conversation_history': 0.2,
+                'analysis_info': 0.1,
+                'sbom_info': 0.1
+            }
+
+@dataclass
+class EmbeddingConfig:
+    """벡터 DB 빌드 임베딩 설정 (onnxruntime CPU, Chroma 기본 임베딩과 같은 모델)"""
+    MODEL_NAME = "all-MiniLM-L6-v2"  # 캐시 키에 포함 (모델을 바꾸면 다시 계산)
+    MODEL_DIR = os.getenv(
+        "EMBEDDING_MODEL_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "chroma", "onnx_models", "all-MiniLM-L6-v2", "onnx")
+    )  # model.onnx + tokenizer.json (빌드 중 내려받지 않음)
+    MAX_TOKENS = 256       # 문서당 최대 토큰 (초과분 절단, Chroma 기본 임베딩과 동일)
+    BATCH_SIZE = 32        # 추론 배치 크기
+    THREADS = 0            # onnxruntime intra-op 스레드 수 (0: 코어 수 자동)
+    CACHE_PATH = "data/cache/embeddings.sqlite3"  # 문서 해시 → 임베딩 캐시 (재빌드 시 바뀐 문서만 계산)
+
+@dataclass
+class PDFExtractConfig:
+    """가이드라인 PDF 페이지 텍스트 추출 설정 (scripts 01/02/04 공용 캐시)"""
+    CACHE_DIR = "data/cache/pdf_pages"  # PDF 해시별 페이지 텍스트 + 레이아웃 JSONL
+    WORKERS = 0            # 추출 프로세스 수 (0: CPU 코어 수)
+    PAGES_PER_TASK = 16    # 프로세스 작업 1건의 최소 페이지 범위 (작업마다 PDF를 다시 엶)
+
+@dataclass
+class PrefilterConfig:
+    """AST 사전 필터 설정"""
+    ENABLED = True
+    MIN_UNIT_SCORE = 5       # LLM에 보낼 함수/모듈 단위 최소 점수
+    MAX_UNITS_PER_FILE = 20  # 파일당 최대 포함 함수 수
+
+@dataclass
+class CompactionConfig:
+    """프롬프트 압축 설정"""
+    ENABLED = True
+    STRIP_DOCSTRINGS = True
+    STRIP_COMMENTS = True
+    MAX_CODE_TOKENS = 12000          # 프롬프트 내 코드에 할당할 토큰 예산
+    TOKEN_ENCODING = "cl100k_base"   # tiktoken 인코딩
+
+@dataclass
+class DiscoveryConfig:
+    """AI 취약점 발견 설정"""
+    TWO_PHASE = False          # 1단계: 위치/유형만, 2단계: 수정 코드 등은 요청 시 생성 (요청 경로가 있는 UI만 켬)
+    DETAIL_WORKERS = 4         # 상세 정보 병렬 생성 스레드 수
+    DETAIL_MAX_TOKENS = 2000   # 취약점 1건 상세 응답 최대 토큰
+    DETAIL_CONTEXT_LINES = 20  # 상세 생성 시 취약 라인 앞뒤로 포함할 코드 라인 수
+    PROMPT_CACHE = True        # 발견 프롬프트의 고정 지시문에 Anthropic cache_control 표시
+    # 모델 계열별 최소 캐시 길이 (모델명에 키가 포함되면 적용, 고정 지시문이 이보다 짧으면 cache_control 생략)
+    PROMPT_CACHE_MIN_TOKENS = {"haiku": 2048, "default": 1024}
+    PROMPT_CACHE_TOKEN_MARGIN = 1.3  # 토큰 수 API를 못 쓸 때 추정치(tiktoken/문자 수)에 요구하는 여유 배수
+    GUIDELINE_REFERENCE = False  # 고정 지시문에 KISIA 항목별 근거 표 포함 (청크가 접두부를 공유하는 배치 분석에서 켬)
+
+@dataclass
+class DedupConfig:
+    """취약점 중복 제거 설정"""
+    ENABLED = True
+    NUM_PERM = 64               # MinHash 서명 길이
+    BANDS = 16                  # LSH 밴드 수 (밴드당 NUM_PERM / BANDS 행)
+    SIMILARITY = 0.7            # 근접 중복으로 병합할 추정 Jaccard 유사도
+    SHINGLE_SIZE = 3            # 스니펫 토큰 shingle 길이
+    MAX_BUCKET_CANDIDATES = 8   # LSH 버킷당 비교할 최근 후보 수
+    LINE_WINDOW = 3             # 같은 함수 안에서 병합할 라인 차이 (엔진/청크별 라인 오차 허용)
+
+@dataclass
+class HedgingConfig:
+    """멀티 프로바이더 헤징 설정"""
+    ENABLED = False                # 옵트인: 1순위 엔진 지연 시 2순위 엔진 동시 호출
+    PERCENTILE = 0.9               # 1순위 엔진 응답 시간의 이 백분위를 넘기면 헤징
+    DEFAULT_DEADLINE = 30.0        # 표본이 부족할 때 헤징 시점 (초)
+    MIN_DEADLINE = 3.0             # 헤징 시점 하한 (초)
+    MIN_SAMPLES = 5                # 히스토그램으로 기한을 정하기 위한 최소 표본 수
+    MAX_SAMPLES = 200              # 초과 시 히스토그램 감쇠
+    SAVE_EVERY = 5                 # 기록 n회마다 파일 저장
+    HISTOGRAM_PATH = "data/cache/provider_latency.json"
+
+@dataclass
+class TelemetryConfig:
+    """파이프라인 추적 설정"""
+    ENABLED = os.getenv("TELEMETRY_ENABLED", "true").lower() != "false"
+    EXPORTER = os.getenv("TELEMETRY_EXPORTER", "jsonl")            # "jsonl" | "otlp" | "none"
+    OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")   # 비우면 OTLP 기본값 (localhost:4317)
+    JSONL_PATH = "data/traces/spans.jsonl"
+    JSONL_MAX_BYTES = int(os.getenv("TELEMETRY_JSONL_MAX_MB", "20")) * 1024 * 1024  # 초과 시 회전
+    JSONL_BACKUPS = 3                                               # 보관할 회전 파일 수 (spans.jsonl.1 ~ .3)
+    SERVICE_NAME = "sbom-security-analyzer"
+
+@dataclass
+class LedgerConfig:
+    """LLM 토큰/비용 원장 설정"""
+    ENABLED = os.getenv("USAGE_LEDGER_ENABLED", "true").lower() != "false"
+    DB_PATH = "data/usage/usage_ledger.db"
+    DEFAULT_PROJECT = "(미지정)"     # 분석 컨텍스트 밖의 호출 (Q&A 등)
+    # 모델명 접두사 → 100만 토큰당 USD (입력, 출력, 캐시 읽기, 캐시 쓰기), 가장 긴 접두사 우선
+    PRICING: Dict[str, tuple] = None
+    
+    def __post_init__(self):
+        if self.PRICING is None:
+            self.PRICING = {
+                "claude-3-opus": (15.0, 75.0, 1.5, 18.75),
+                "claude-opus-4": (15.0, 75.0, 1.5, 18.75),
+                "claude-3-5-sonnet": (3.0, 15.0, 0.3, 3.75),
+                "claude-3-7-sonnet": (3.0, 15.0, 0.3, 3.75),
+                "claude-sonnet-4": (3.0, 15.0, 0.3, 3.75),
+                "claude-3-haiku": (0.25, 1.25, 0.03, 0.3),
+                "claude-3-5-haiku": (0.8, 4.0, 0.08, 1.0),
+                "claude-haiku-4": (1.0, 5.0, 0.1, 1.25),
+                "gpt-4-turbo": (10.0, 30.0, 10.0, 10.0),
+                "gpt-4-1106": (10.0, 30.0, 10.0, 10.0),
+                "gpt-4-0125": (10.0, 30.0, 10.0, 10.0),
+                "gpt-4": (30.0, 60.0, 30.0, 30.0),
+                "gpt-4o": (2.5, 10.0, 1.25, 2.5),
+                "gpt-4o-mini": (0.15, 0.6, 0.075, 0.15),
+                "gpt-4.1": (2.0, 8.0, 0.5, 2.0),
+                "gpt-4.1-mini": (0.4, 1.6, 0.1, 0.4),
+                "gpt-3.5-turbo": (0.5, 1.5, 0.5, 0.5),
+            }
+
+@dataclass
+class BatchConfig:
+    """야간 일괄 스캔 (공급자 배치 API) 설정"""
+    JOB_DIR = "data/batch"                # 배치 작업 상태 파일 (작업 ID별 JSON)
+    CHUNK_TOKENS = 12000                  # 요청 1건에 담을 코드 토큰 수
+    POLL_INTERVAL = 60                    # 상태 확인 간격 (초)
+    MAX_WAIT = 24 * 60 * 60               # 최대 대기 시간 (배치 API 처리 기한)
+    COST_MULTIPLIER = 0.5                 # 배치 API 할인 요금 (원장 비용 계산)
+
+@dataclass
+class RegistryConfig:
+    """공용 리소스 레지스트리 설정"""
+    HEALTH_CHECK_INTERVAL = 60.0   # 상태 점검 최소 간격 (초)
+    RETRY_INTERVAL = 30.0          # 초기화 실패 후 재시도 대기 (초)
 
 # 싱글톤 인스턴스들
 app_config = AppConfig()
 analyzer_config = AnalyzerConfig()
 vulnerability_config = VulnerabilityConfig()
-rag_config = RAGConfig()
\ No newline at end of file
+rag_config = RAGConfig()
+prefilter_config = PrefilterConfig()
+compaction_config = CompactionConfig()
+discovery_config = DiscoveryConfig()
+hedging_config = HedgingConfig()
+dedup_config = DedupConfig()
+registry_config = RegistryConfig()
+telemetry_config = TelemetryConfig()
+ledger_config = LedgerConfig()
+batch_config = BatchConfig()
+embedding_config = EmbeddingConfig()
+pdf_extract_config = PDFExtractConfig()
+qa_context_config = QAContextConfig()
\ No newline at end of file
@@ -1,20 +1,18 @@
 import os
 import json
 import re
+import time
 from typing import Dict, Optional
 
-from openai import OpenAI
-from anthropic import Anthropic
+from core.resource_registry import get_openai_client, get_anthropic_client
+from core.usage_ledger import record_llm_usage
 
 
 class AgentSlotFiller:
     def __init__(self):
-        self.openai_client = None
-        self.anthropic_client = None
-        if os.getenv("OPENAI_API_KEY"):
-            self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        if os.getenv("ANTHROPIC_API_KEY"):
-            self.anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        # 프로세스 공용 클라이언트 재사용 (키 미설정 시 None)
+        self.openai_client = get_openai_client()
+        self.anthropic_client = get_anthropic_client()
 
     def parse_to_slots(self, text: str) -> Dict[str, Optional[str]]:
         prompt = self._build_prompt(text)
@@ -22,12 +20,14 @@ class AgentSlotFiller:
         if self.anthropic_client:
             try:
                 model = os.getenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")
+                start = time.perf_counter()
                 resp = self.anthropic_client.messages.create(
                     model=model,
                     max_tokens=500,
                     temperature=0,
                     messages=[{"role": "user", "content": prompt}],
                 )
+                record_llm_usage("anthropic", model, resp, time.perf_counter() - start, "slot_filling")
                 raw = resp.content[0].text if resp and resp.content else None
             except Exception:
                 raw = None
@@ -45,7 +45,9 @@ class AgentSlotFiller:
                 }
                 if "gpt-4" in model:
                     kwargs["response_format"] = {"type": "json_object"}
+                start = time.perf_counter()
                 resp = self.openai_client.chat.completions.create(**kwargs)
+                record_llm_usage("openai", model, resp, time.perf_counter() - start, "slot_filling")
                 raw = resp.choices[0].message.content
             except Exception:
                 raw = None
@@ -8,6 +8,7 @@ from typing import List, Dict, Optional
 from config import analyzer_config
 from core.models import AnalysisResult, PackageInfo
 from core.environment_scanner import EnvironmentScanner  # 새로 추가
+from core.telemetry import trace_span
 
 class SBOMAnalyzer:
     """SBOM 분석기 - 환경 스캔 기능 통합"""
@@ -87,7 +88,22 @@ class SBOMAnalyzer:
 
     def analyze(self, code: str, requirements: str = None, scan_environment: bool = True) -> Dict:
         """메인 분석 함수 - 환경 스캔 옵션 추가"""
-        
+        with trace_span('sbom.extract', {
+            'code.bytes': len(code.encode('utf-8')),
+            'requirements.bytes': len(requirements.encode('utf-8')) if requirements else 0,
+            'scan_environment': scan_environment
+        }) as span:
+            result = self._analyze(code, requirements, scan_environment)
+            summary = result.get("summary", {})
+            span.set_attributes({
+                'sbom.success': result.get("success", False),
+                'sbom.imports': summary.get("total_imports"),
+                'sbom.packages': summary.get("external_packages"),
+                'sbom.indirect_dependencies': summary.get("indirect_dependencies")
+            })
+        return result
+
+    def _analyze(self, code: str, requirements: str, scan_environment: bool) -> Dict:
         # import 추출
         imports = self.extract_imports(code)
         
@@ -114,7 +130,9 @@ class SBOMAnalyzer:
         
         if scan_environment:
             try:
-                installed_packages = self.env_scanner.scan_installed_packages()
+                with trace_span('sbom.environment_scan') as span:
+                    installed_packages = self.env_scanner.scan_installed_packages()
+                    span.set_attribute('packages.installed', len(installed_packages))
                 if req_versions:
                     env_comparison = self.env_scanner.compare_with_requirements(req_versions)
             except Exception as e:
@@ -0,0 +1,576 @@
+# core/ast_prefilter.py
+"""
+AST 기반 규칙 엔진 사전 필터
+- 파일/함수 단위로 보안 관련 싱크·소스를 찾아 점수화
+- 점수가 높은 단위만 LLM 발견 프롬프트로 전달
+"""
+import ast
+import re
+import textwrap
+from typing import Dict, List, Optional, Tuple
+
+from config import prefilter_config
+
+# 결합 코드의 파일 구분자 (memory_file_selector, github_branch_analyzer, project_downloader 공통)
+FILE_MARKER_PATTERN = re.compile(r"^# ===== File: (.*?) =====[ \t]*$", re.MULTILINE)
+
+# project_downloader가 붙이는 " (카테고리)" 접미사
+_CATEGORY_SUFFIX = re.compile(r"\s+\([^()/]*\)$")
+
+# 호출 싱크: 정규화된 호출 이름 → (KISIA 타입, 가중치)
+CALL_SINKS = {
+    # 코드 삽입
+    'eval': ('Code_Injection', 10),
+    'exec': ('Code_Injection', 10),
+    'compile': ('Code_Injection', 4),
+    '__import__': ('Code_Injection', 4),
+    # 운영체제 명령어 삽입
+    'os.system': ('Command_Injection', 10),
+    'os.popen': ('Command_Injection', 10),
+    'os.spawnl': ('Command_Injection', 6),
+    'os.spawnlp': ('Command_Injection', 6),
+    'os.execl': ('Command_Injection', 6),
+    'os.execvp': ('Command_Injection', 6),
+    'commands.getoutput': ('Command_Injection', 8),
+    # 역직렬화
+    'pickle.loads': ('Unsafe_Deserialization', 9),
+    'pickle.load': ('Unsafe_Deserialization', 9),
+    'cPickle.loads': ('Unsafe_Deserialization', 9),
+    'cPickle.load': ('Unsafe_Deserialization', 9),
+    'dill.loads': ('Unsafe_Deserialization', 9),
+    'marshal.loads': ('Unsafe_Deserialization', 8),
+    'shelve.open': ('Unsafe_Deserialization', 6),
+    'jsonpickle.decode': ('Unsafe_Deserialization', 9),
+    'yaml.unsafe_load': ('Unsafe_Deserialization', 9),
+    'yaml.load_all': ('Unsafe_Deserialization', 6),
+    # 암호화 / 난수
+    'hashlib.md5': ('Weak_Cryptography', 5),
+    'hashlib.sha1': ('Weak_Cryptography', 5),
+    'Crypto.Cipher.DES.new': ('Weak_Cryptography', 5),
+    'Crypto.Cipher.ARC4.new': ('Weak_Cryptography', 5),
+    'Crypto.Cipher.Blowfish.new': ('Weak_Cryptography', 4),
+    'random.random': ('Weak_Random', 2),
+    'random.randint': ('Weak_Random', 2),
+    'random.choice': ('Weak_Random', 2),
+    # XSS
+    'flask.render_template_string': ('XSS', 6),
+    'render_template_string': ('XSS', 6),
+    'markupsafe.Markup': ('XSS', 4),
+    'flask.Markup': ('XSS', 4),
+    'django.utils.safestring.mark_safe': ('XSS', 5),
+    'mark_safe': ('XSS', 5),
+    # 경로 조작
+    'flask.send_file': ('Path_Traversal', 3),
+    'flask.send_from_directory': ('Path_Traversal', 2),
+    'tarfile.open': ('Path_Traversal', 2),
+    'zipfile.ZipFile': ('Path_Traversal', 2),
+    # 자동접속 연결 / SSRF
+    'flask.redirect': ('Open_Redirect', 2),
+    'django.shortcuts.redirect': ('Open_Redirect', 2),
+    'urllib.request.urlopen': ('SSRF', 3),
+    # XML
+    'xml.etree.ElementTree.parse': ('XXE', 4),
+    'xml.etree.ElementTree.fromstring': ('XXE', 4),
+    'xml.dom.minidom.parse': ('XXE', 4),
+    'xml.dom.minidom.parseString': ('XXE', 4),
+    'xml.sax.parse': ('XXE', 4),
+    'lxml.etree.parse': ('XXE', 5),
+    'lxml.etree.fromstring': ('XXE', 5),
+    # 경쟁조건
+    'tempfile.mktemp': ('TOCTOU', 3),
+}
+
+# subprocess 계열: shell=True면 높은 점수
+SUBPROCESS_CALLS = {
+    'subprocess.call', 'subprocess.run', 'subprocess.Popen',
+    'subprocess.check_call', 'subprocess.check_output',
+    'subprocess.getoutput', 'subprocess.getstatusoutput',
+}
+
+# SQL 실행 메소드 (호출 대상 객체와 무관하게 메소드명으로 판단)
+SQL_METHODS = {'execute', 'executemany', 'executescript', 'raw', 'extra'}
+
+# requests 계열 (verify=False 확인, URL이 외부 입력이면 SSRF)
+HTTP_CLIENT_CALLS = {
+    'requests.get', 'requests.post', 'requests.put', 'requests.delete',
+    'requests.patch', 'requests.head', 'requests.request',
+    'httpx.get', 'httpx.post',
+}
+
+# LDAP 검색 메소드
+LDAP_METHODS = {'search_s', 'search_ext_s', 'search'}
+
+# 외부 입력 소스: request.<attr>
+REQUEST_SOURCE_ATTRS = {
+    'args', 'form', 'values', 'json', 'cookies', 'files', 'headers', 'data',
+    'get_json', 'get_data', 'stream', 'GET', 'POST', 'COOKIES', 'FILES', 'META', 'body', 'query_params',
+}
+
+SECRET_NAME_PATTERN = re.compile(
+    r'(passw(or)?d|passwd|pwd|secret|api_?key|access_?key|private_?key|auth_?token|token|credential)',
+    re.IGNORECASE
+)
+
+# 소스 점수 상한 (소스만 많은 단위가 과대평가되지 않도록)
+MAX_SOURCE_SCORE = 6
+# 같은 단위에 소스와 싱크가 함께 있으면 가산
+SOURCE_SINK_BONUS = 4
+
+
+def split_code_by_file(code: str) -> List[Tuple[str, str]]:
+    """'# ===== File: path =====' 구분자로 결합된 코드를 (경로, 코드) 목록으로 분리"""
+    matches = list(FILE_MARKER_PATTERN.finditer(code))
+    if not matches:
+        return [('code.py', code)]
+
+    files = []
+    for i, match in enumerate(matches):
+        start = match.end() + 1
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(code)
+        path = _CATEGORY_SUFFIX.sub('', match.group(1).strip())
+        files.append((path, code[start:end]))
+    return files
+
+
+def join_code_files(files: List[Tuple[str, str]]) -> str:
+    """(경로, 코드) 목록을 다시 구분자 형식으로 결합"""
+    parts = []
+    for path, content in files:
+        parts.append(f"# ===== File: {path} =====")
+        parts.append(content.rstrip('\n'))
+        parts.append("")
+    return "\n".join(parts)
+
+
+def get_call_name(node: ast.AST) -> str:
+    """호출 대상의 점 표기 이름 추출 (예: os.path.join)"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        base = get_call_name(node.value)
+        return f"{base}.{node.attr}" if base else node.attr
+    if isinstance(node, ast.Call):
+        return get_call_name(node.func)
+    return ''
+
+
+def collect_import_aliases(tree: ast.AST) -> Dict[str, str]:
+    """import 별칭 맵 생성 (예: sp → subprocess, loads → pickle.loads)"""
+    aliases = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            for alias in node.names:
+                aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+    return aliases
+
+
+def resolve_call_name(name: str, aliases: Dict[str, str]) -> str:
+    """별칭을 적용해 호출 이름을 정규화"""
+    if not name:
+        return name
+    head, _, rest = name.partition('.')
+    if head in aliases:
+        return f"{aliases[head]}.{rest}" if rest else aliases[head]
+    return name
+
+
+def is_formatted_string(node: ast.AST) -> bool:
+    """f-string, % 포맷, + 결합, .format() 으로 만든 문자열인지"""
+    if isinstance(node, ast.JoinedStr):
+        return any(isinstance(v, ast.FormattedValue) for v in node.values)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mod, ast.Add)):
+        return True
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        return node.func.attr == 'format'
+    return False
+
+
+def is_request_source(node: ast.AST) -> bool:
+    """Flask/Django request.* 접근인지"""
+    if not isinstance(node, ast.Attribute):
+        return False
+    return (isinstance(node.value, ast.Name)
+            and node.value.id == 'request'
+            and node.attr in REQUEST_SOURCE_ATTRS)
+
+
+def _keyword_value(call: ast.Call, name: str) -> Optional[ast.AST]:
+    for kw in call.keywords:
+        if kw.arg == name:
+            return kw.value
+    return None
+
+
+def _is_true(node: Optional[ast.AST]) -> bool:
+    return isinstance(node, ast.Constant) and node.value is True
+
+
+def _is_false(node: Optional[ast.AST]) -> bool:
+    return isinstance(node, ast.Constant) and node.value is False
+
+
+class _RuleVisitor(ast.NodeVisitor):
+    """단위(최상위 함수/메소드)별로 규칙 적중을 수집"""
+
+    def __init__(self, aliases: Dict[str, str]):
+        self.aliases = aliases
+        self.units: List[Dict] = []
+        self.module_hits: List[Dict] = []
+        self.module_hit_nodes: List[ast.stmt] = []
+        self._class_stack: List[str] = []
+        self._unit: Optional[Dict] = None
+        self._stmt: Optional[ast.stmt] = None
+        # 함수 내에서 포맷 문자열로 만든 변수 (SQL 판정용)
+        self._formatted_names = set()
+
+    # ---- 단위 관리 ----
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        if self._unit is not None:
+            self.generic_visit(node)
+            return
+        self._class_stack.append(node.name)
+        for child in node.body:
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.visit(child)
+            else:
+                self._visit_module_stmt(child)
+        self._class_stack.pop()
+
+    def visit_FunctionDef(self, node):
+        if self._unit is not None:
+            # 중첩 함수는 바깥 단위에 포함
+            self.generic_visit(node)
+            return
+
+        start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+        unit = {
+            'name': '.'.join(self._class_stack + [node.name]),
+            'line': start,
+            'end_line': getattr(node, 'end_lineno', node.lineno),
+            'score': 0,
+            'hits': []
+        }
+        self._unit = unit
+        self._formatted_names = set()
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        for child in node.body:
+            self._stmt = child
+            self.visit(child)
+        self._unit = None
+        self._stmt = None
+        self.units.append(unit)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _visit_module_stmt(self, stmt: ast.stmt):
+        before = len(self.module_hits)
+        self._stmt = stmt
+        self.visit(stmt)
+        self._stmt = None
+        if len(self.module_hits) > before:
+            self.module_hit_nodes.append(stmt)
+
+    def scan_module(self, tree: ast.Module):
+        for stmt in tree.body:
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.visit(stmt)
+            else:
+                self._visit_module_stmt(stmt)
+
+    def _hit(self, node: ast.AST, rule: str, kisia_type: str, weight: int, kind: str = 'sink'):
+        hit = {
+            'rule': rule,
+            'kisia_type': kisia_type,
+            'weight': weight,
+            'kind': kind,
+            'line': getattr(node, 'lineno', 0)
+        }
+        if self._unit is not None:
+            self._unit['hits'].append(hit)
+        else:
+            self.module_hits.append(hit)
+
+    # ---- 규칙 ----
+
+    def visit_Assign(self, node: ast.Assign):
+        for target in node.targets:
+            self._check_secret_assignment(target, node.value)
+            if isinstance(target, ast.Name) and is_formatted_string(node.value):
+                self._formatted_names.add(target.id)
+            if isinstance(target, ast.Name) and target.id == 'DEBUG' and _is_true(node.value):
+                self._hit(node, 'DEBUG = True', 'Debug_Code', 4)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        if node.value is not None:
+            self._check_secret_assignment(node.target, node.value)
+        self.generic_visit(node)
+
+    def visit_Dict(self, node: ast.Dict):
+        for key, value in zip(node.keys, node.values):
+            if isinstance(key, ast.Constant) and isinstance(key.value, str):
+                if SECRET_NAME_PATTERN.search(key.value) and self._is_secret_literal(value):
+                    self._hit(node, f"hardcoded '{key.value}'", 'Hardcoded_Secrets', 6)
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        if is_request_source(node):
+            self._hit(node, f"request.{node.attr}", 'Input_Validation', 3, kind='source')
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        raw_name = get_call_name(node.func)
+        name = resolve_call_name(raw_name, self.aliases)
+        method = raw_name.rsplit('.', 1)[-1] if raw_name else ''
+
+        if name in CALL_SINKS:
+            kisia_type, weight = CALL_SINKS[name]
+            self._hit(node, name, kisia_type, weight)
+        elif name == 'yaml.load':
+            loader = _keyword_value(node, 'Loader')
+            loader_name = get_call_name(loader) if loader is not None else ''
+            if 'Safe' not in loader_name:
+                self._hit(node, 'yaml.load', 'Unsafe_Deserialization', 9)
+        elif name in SUBPROCESS_CALLS:
+            if _is_true(_keyword_value(node, 'shell')):
+                self._hit(node, f"{name}(shell=True)", 'Command_Injection', 10)
+            else:
+                self._hit(node, name, 'Command_Injection', 3)
+        elif name in HTTP_CLIENT_CALLS:
+            if _is_false(_keyword_value(node, 'verify')):
+                self._hit(node, f"{name}(verify=False)", 'Improper_Certificate_Validation', 5)
+            elif node.args and not isinstance(node.args[0], ast.Constant):
+                self._hit(node, name, 'SSRF', 2)
+        elif name in ('open', 'io.open') and node.args and not isinstance(node.args[0], ast.Constant):
+            self._hit(node, 'open(<변수 경로>)', 'Path_Traversal', 3)
+        elif name == 'input':
+            self._hit(node, 'input()', 'Input_Validation', 2, kind='source')
+        elif method in SQL_METHODS and node.args:
+            query = node.args[0]
+            if is_formatted_string(query) or (
+                    isinstance(query, ast.Name) and query.id in self._formatted_names):
+                self._hit(node, f"{method}(<포맷 문자열>)", 'SQL_Injection', 9)
+            elif method in ('execute', 'executemany'):
+                self._hit(node, method, 'SQL_Injection', 1)
+        elif method in LDAP_METHODS and raw_name.count('.') >= 1 and len(node.args) >= 3:
+            if is_formatted_string(node.args[2]):
+                self._hit(node, f"{method}(<포맷 필터>)", 'LDAP_Injection', 6)
+
+        if method == 'save' and any(
+                isinstance(n, ast.Attribute) and n.attr == 'filename'
+                for arg in node.args for n in ast.walk(arg)):
+            self._hit(node, 'save(<업로드 파일명>)', 'File_Upload', 5)
+
+        if method == 'run' and _is_true(_keyword_value(node, 'debug')):
+            self._hit(node, 'run(debug=True)', 'Debug_Code', 4)
+
+        for kw in node.keywords:
+            if kw.arg and SECRET_NAME_PATTERN.search(kw.arg) and self._is_secret_literal(kw.value):
+                self._hit(node, f"hardcoded {kw.arg}=", 'Hardcoded_Secrets', 6)
+
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node: ast.Subscript):
+        if get_call_name(node.value) == 'sys.argv':
+            self._hit(node, 'sys.argv', 'Input_Validation', 2, kind='source')
+        self.generic_visit(node)
+
+    def _check_secret_assignment(self, target: ast.AST, value: ast.AST):
+        target_name = ''
+        if isinstance(target, ast.Name):
+            target_name = target.id
+        elif isinstance(target, ast.Attribute):
+            target_name = target.attr
+        elif isinstance(target, ast.Subscript) and isinstance(target.slice, ast.Constant):
+            target_name = str(target.slice.value)
+        if target_name and SECRET_NAME_PATTERN.search(target_name) and self._is_secret_literal(value):
+            self._hit(target, f"hardcoded {target_name}", 'Hardcoded_Secrets', 6)
+
+    @staticmethod
+    def _is_secret_literal(value: ast.AST) -> bool:
+        return (isinstance(value, ast.Constant)
+                and isinstance(value.value, str)
+                and len(value.value) >= 4
+                and ' ' not in value.value)
+
+
+def score_hits(hits: List[Dict]) -> int:
+    """적중 목록을 점수로 환산 (소스 상한 + 소스/싱크 동시 존재 가산)"""
+    sink_score = sum(h['weight'] for h in hits if h['kind'] == 'sink')
+    source_score = min(sum(h['weight'] for h in hits if h['kind'] == 'source'), MAX_SOURCE_SCORE)
+    score = sink_score + source_score
+    if sink_score >= 3 and source_score > 0:
+        score += SOURCE_SINK_BONUS
+    return score
+
+
+class ASTPreFilter:
+    """AST 규칙 엔진 사전 필터 - LLM에 보낼 코드 단위 선별"""
+
+    def __init__(self, min_unit_score: int = None, max_units_per_file: int = None):
+        """
+        Args:
+            min_unit_score: LLM 프롬프트에 포함할 최소 단위 점수
+            max_units_per_file: 파일당 포함할 최대 함수 수
+        """
+        self.min_unit_score = min_unit_score if min_unit_score is not None else prefilter_config.MIN_UNIT_SCORE
+        self.max_units_per_file = max_units_per_file or prefilter_config.MAX_UNITS_PER_FILE
+
+    def scan_file(self, path: str, content: str) -> Dict:
+        """단일 파일을 스캔하여 단위별 점수 계산"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            # 파싱 불가(diff 조각 등)면 안전하게 전체 포함
+            return {
+                'path': path,
+                'parsed': False,
+                'score': self.min_unit_score,
+                'units': [],
+                'module_hits': [],
+                'module_lines': []
+            }
+
+        visitor = _RuleVisitor(collect_import_aliases(tree))
+        visitor.scan_module(tree)
+
+        for unit in visitor.units:
+            unit['score'] = score_hits(unit['hits'])
+
+        module_score = score_hits(visitor.module_hits)
+        file_score = module_score + sum(u['score'] for u in visitor.units)
+
+        import_lines = []
+        for stmt in tree.body:
+            if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+                import_lines.append((stmt.lineno, getattr(stmt, 'end_lineno', stmt.lineno)))
+
+        return {
+            'path': path,
+            'parsed': True,
+            'score': file_score,
+            'module_score': module_score,
+            'units': visitor.units,
+            'module_hits': visitor.module_hits,
+            'module_lines': [
+                (s.lineno, getattr(s, 'end_lineno', s.lineno)) for s in visitor.module_hit_nodes
+            ],
+            'import_lines': import_lines
+        }
+
+    def filter_code(self, code: str) -> Dict:
+        """
+        결합 코드를 스캔하여 점수가 높은 단위만 남긴 코드 생성
+
+        Returns:
+            {
+                'code': 필터링된 코드 ('' 이면 LLM 분석 대상 없음),
+                'file_list': 선택된 파일 목록,
+                'line_maps': {경로: 필터링 코드 각 라인의 원본 라인 번호},
+                'files': 파일별 스캔 결과,
+                'stats': 통계
+            }
+        """
+        files = split_code_by_file(code)
+        scanned = []
+        selected_parts = []
+        file_list = []
+        line_maps: Dict[str, List[int]] = {}
+        total_units = 0
+        selected_units = 0
+
+        for path, content in files:
+            info = self.scan_file(path, content)
+            scanned.append(info)
+            total_units += max(len(info['units']), 1)
+
+            if not info['parsed']:
+                info['selected'] = True
+                selected_units += 1
+                selected_parts.append((path, content))
+                line_maps[path] = list(range(1, len(content.splitlines()) + 1))
+                file_list.append({'path': path, 'lines': len(content.splitlines())})
+                continue
+
+            chosen = [u for u in info['units'] if u['score'] >= self.min_unit_score]
+            chosen.sort(key=lambda u: u['score'], reverse=True)
+            chosen = sorted(chosen[:self.max_units_per_file], key=lambda u: u['line'])
+            include_module = info['module_score'] >= self.min_unit_score or (
+                chosen and info['module_hits'])
+
+            info['selected'] = bool(chosen) or include_module
+            if not info['selected']:
+                continue
+
+            selected_units += len(chosen) + (1 if include_module else 0)
+            filtered, line_maps[path] = self._render_units(content, info, chosen, include_module)
+            selected_parts.append((path, filtered))
+            file_list.append({'path': path, 'lines': len(filtered.splitlines())})
+
+        filtered_code = join_code_files(selected_parts) if selected_parts else ''
+        stats = {
+            'total_files': len(files),
+            'selected_files': len(selected_parts),
+            'total_units': total_units,
+            'selected_units': selected_units,
+            'original_chars': len(code),
+            'filtered_chars': len(filtered_code),
+            'reduction': round(1 - len(filtered_code) / len(code), 3) if code else 0.0
+        }
+
+        print(f"🧮 AST 사전 필터: {stats['selected_units']}/{stats['total_units']}개 단위, "
+              f"{stats['selected_files']}/{stats['total_files']}개 파일 선택 "
+              f"({stats['original_chars']:,} → {stats['filtered_chars']:,}자)")
+
+        return {
+            'code': filtered_code,
+            'file_list': file_list,
+            'line_maps': line_maps,
+            'files': scanned,
+            'stats': stats
+        }
+
+    def _render_units(self, content: str, info: Dict, chosen: List[Dict],
+                      include_module: bool) -> Tuple[str, List[int]]:
+        """
+        선택된 단위를 원본 라인 번호 주석과 함께 재구성
+
+        Returns:
+            (필터링된 코드, 각 라인의 원본 라인 번호 - 헤더 주석은 단위 시작 라인)
+        """
+        lines = content.splitlines()
+        out_lines: List[str] = []
+        line_map: List[int] = []
+
+        def add(start: int, end: int, header: str = None, dedent: bool = True):
+            if header:
+                out_lines.append(header)
+                line_map.append(start)
+            text = "\n".join(lines[start - 1:end])
+            segment = (textwrap.dedent(text) if dedent else text).split("\n")
+            out_lines.extend(segment)
+            line_map.extend(range(start, start + len(segment)))
+
+        for start, end in info.get('import_lines', []):
+            add(start, end, dedent=False)
+
+        if include_module:
+            for start, end in info['module_lines']:
+                add(start, end, f"# --- 모듈 레벨 (원본 {start}-{end}행) ---")
+
+        for unit in chosen:
+            add(unit['line'], unit['end_line'],
+                f"# --- {unit['name']} (원본 {unit['line']}-{unit['end_line']}행) ---")
+
+        return "\n".join(out_lines), line_map
+
+
+def prefilter_code(code: str, min_unit_score: int = None) -> Dict:
+    """코드 사전 필터 헬퍼 함수"""
+    return ASTPreFilter(min_unit_score=min_unit_score).filter_code(code)
@@ -0,0 +1,547 @@
+# core/batch_analyzer.py
+"""
+배치 API 일괄 보안 분석 (야간 조직 단위 스캔용)
+- 프로젝트별 코드를 사전 필터/압축 후 토큰 예산 단위 청크로 나눠 발견 프롬프트 생성
+- 모든 청크를 Anthropic Message Batches 또는 OpenAI Batch API로 한 번에 제출 (요금 50% 할인, 지연 무관)
+- 배치 ID와 청크별 라인 맵을 작업 파일(JSON)에 저장해 프로세스가 바뀌어도 상태 확인/결과 수집 가능
+- 결과는 프로젝트별 analyze_security 형식으로 조립 (중복 제거, RAG 근거, 점수 계산 동일)
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import batch_config
+from core.ast_prefilter import split_code_by_file, join_code_files
+from core.improved_llm_analyzer import ImprovedSecurityAnalyzer, CLAUDE_DISCOVERY_PREAMBLE
+from core.prompt_compactor import PromptCompactor
+from core.telemetry import trace_span
+from core.usage_ledger import usage_ledger, record_llm_usage
+
+# 동기 호출(_analyze_with_claude / _analyze_with_gpt)과 같은 응답 토큰 한도
+DISCOVERY_MAX_TOKENS = {'anthropic': 4000, 'openai': 3000}
+
+# 작업 상태
+SUBMITTED, ENDED, COLLECTED = 'submitted', 'ended', 'collected'
+
+
+class BatchJobStore:
+    """배치 작업 상태 파일 저장소 (작업 ID별 JSON)"""
+
+    def __init__(self, job_dir: str = None):
+        self.job_dir = Path(job_dir or batch_config.JOB_DIR)
+
+    def path(self, job_id: str) -> Path:
+        return self.job_dir / f"{job_id}.json"
+
+    def save(self, job: Dict):
+        """임시 파일에 쓴 뒤 교체 (중단되어도 이전 상태 유지)"""
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path(job['job_id'])
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str) -> Dict:
+        with open(self.path(job_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_jobs(self) -> List[Dict]:
+        """저장된 작업 요약 (최신순)"""
+        jobs = []
+        for path in self.job_dir.glob('*.json'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            jobs.append({
+                'job_id': job['job_id'],
+                'provider': job['provider'],
+                'batch_id': job.get('batch_id'),
+                'status': job['status'],
+                'created_at': job['created_at'],
+                'projects': len(job['projects']),
+                'requests': len(job['chunks'])
+            })
+        return sorted(jobs, key=lambda j: j['created_at'], reverse=True)
+
+
+class AnthropicBatchProvider:
+    """Anthropic Message Batches API"""
+
+    name = 'anthropic'
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests: List[Tuple[str, Dict]], metadata: Dict) -> str:
+        batch = self.client.messages.batches.create(
+            requests=[{'custom_id': custom_id, 'params': params} for custom_id, params in requests]
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> Dict:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            'ended': batch.processing_status == 'ended',
+            'provider_status': batch.processing_status,
+            'counts': {
+                'processing': counts.processing,
+                'succeeded': counts.succeeded,
+                'errored': counts.errored + counts.canceled + counts.expired
+            }
+        }
+
+    def results(self, batch_id: str) -> Dict[str, Dict]:
+        """custom_id → {'text', 'response'} 또는 {'error'}"""
+        outputs = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type == 'succeeded':
+                message = result.message
+                text = ''.join(block.text for block in message.content if getattr(block, 'type', None) == 'text')
+                outputs[entry.custom_id] = {'text': text, 'response': message}
+            else:
+                error = getattr(result, 'error', None)
+                outputs[entry.custom_id] = {'error': f"{result.type}: {error}" if error else result.type}
+        return outputs
+
+
+class OpenAIBatchProvider:
+    """OpenAI Batch API (JSONL 입력 파일 업로드 → 배치 생성 → 출력 파일 다운로드)"""
+
+    name = 'openai'
+    ENDPOINT = '/v1/chat/completions'
+    TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests: List[Tuple[str, Dict]], metadata: Dict) -> str:
+        lines = [
+            json.dumps({'custom_id': custom_id, 'method': 'POST', 'url': self.ENDPOINT, 'body': body},
+                       ensure_ascii=False)
+            for custom_id, body in requests
+        ]
+        input_file = self.client.files.create(
+            file=('batch_input.jsonl', ('\n'.join(lines) + '\n').encode('utf-8')),
+            purpose='batch'
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.ENDPOINT,
+            completion_window='24h',
+            metadata={key: str(value) for key, value in metadata.items()}
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> Dict:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        total = counts.total if counts else 0
+        completed = counts.completed if counts else 0
+        failed = counts.failed if counts else 0
+        return {
+            'ended': batch.status in self.TERMINAL_STATUSES,
+            'provider_status': batch.status,
+            'counts': {
+                'processing': max(total - completed - failed, 0),
+                'succeeded': completed,
+                'errored': failed
+            }
+        }
+
+    def results(self, batch_id: str) -> Dict[str, Dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        outputs = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                body = response.get('body') or {}
+                if response.get('status_code') == 200 and body.get('choices'):
+                    outputs[record['custom_id']] = {'text': body['choices'][0]['message']['content'],
+                                                    'response': body}
+                else:
+                    error = record.get('error') or body.get('error') or f"status {response.get('status_code')}"
+                    outputs[record['custom_id']] = {'error': str(error)}
+        return outputs
+
+
+class BatchSecurityAnalyzer:
+    """배치 API 기반 다중 프로젝트 보안 분석"""
+
+    def __init__(self, use_claude: bool = True, store: BatchJobStore = None, chunk_tokens: int = None):
+        """
+        Args:
+            use_claude: Anthropic 배치 우선 사용 (키가 없으면 OpenAI 배치)
+            store: 작업 상태 저장소 (기본: BatchConfig.JOB_DIR)
+            chunk_tokens: 요청 1건에 담을 코드 토큰 수
+        """
+        # 프롬프트 생성/응답 파싱/결과 조립은 동기 분석기와 같은 코드 사용
+        # (배치에서는 헤징 불필요, 상세 정보를 나중에 요청할 경로가 없으므로 1회 요청에 모두 포함)
+        # 모든 청크가 같은 고정 지시문을 공유하므로 KISIA 근거 표를 넣어 캐시된 접두부로 재사용
+        self.analyzer = ImprovedSecurityAnalyzer(use_claude=use_claude, two_phase=False, use_hedging=False,
+                                                 guideline_reference=True)
+        self.store = store or BatchJobStore()
+        self.chunk_tokens = chunk_tokens or batch_config.CHUNK_TOKENS
+        # 배치는 청크로 나눠 보내므로 압축 단계의 토큰 예산(잘라내기)은 프로젝트마다 전체 크기로 설정
+        if self.analyzer.use_compaction:
+            self.compactor = PromptCompactor()
+        else:
+            self.compactor = PromptCompactor(strip_docstrings=False, strip_comments=False)
+
+        if use_claude and self.analyzer.claude_client:
+            self.provider_name = 'anthropic'
+        elif self.analyzer.openai_client:
+            self.provider_name = 'openai'
+        else:
+            self.provider_name = 'anthropic'
+
+    def _provider(self, name: str):
+        if name == 'anthropic':
+            return AnthropicBatchProvider(self.analyzer.claude_client)
+        return OpenAIBatchProvider(self.analyzer.openai_client)
+
+    def _model(self, provider_name: str) -> str:
+        return self.analyzer._claude_model() if provider_name == 'anthropic' else self.analyzer._gpt_model()
+
+    # ------------------------------------------------------------------
+    # 제출
+    # ------------------------------------------------------------------
+
+    def submit(self, projects: Dict[str, object]) -> str:
+        """
+        프로젝트 일괄 제출
+
+        Args:
+            projects: {프로젝트명: 결합 코드 문자열 또는 {'code': ..., 'file_list': [...]}}
+
+        Returns:
+            작업 ID (poll / wait / collect에 사용)
+        """
+        provider_name = self.provider_name
+        model = self._model(provider_name)
+        job_id = datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        job = {
+            'job_id': job_id,
+            'provider': provider_name,
+            'model': model,
+            'created_at': time.time(),
+            'status': SUBMITTED,
+            'batch_id': None,
+            'projects': {},
+            'chunks': {}
+        }
+
+        requests = []
+        with trace_span('batch.prepare', {'batch.projects': len(projects)}) as span:
+            for project_index, (name, spec) in enumerate(projects.items()):
+                if isinstance(spec, dict):
+                    code, file_list = spec.get('code', ''), spec.get('file_list')
+                else:
+                    code, file_list = spec, None
+
+                entry, chunk_prompts = self._prepare_project(code, file_list)
+                job['projects'][name] = entry
+                for chunk_index, (prompt, compaction) in enumerate(chunk_prompts):
+                    # custom_id 규칙: 영문/숫자/-/_ 64자 이내
+                    custom_id = f"p{project_index:04d}-c{chunk_index:04d}"
+                    entry['chunks'].append(custom_id)
+                    job['chunks'][custom_id] = {'project': name, **compaction}
+                    requests.append((custom_id, self._request_body(provider_name, model, prompt)))
+            span.set_attribute('batch.requests', len(requests))
+
+        if requests:
+            with trace_span('batch.submit', {'llm.provider': provider_name, 'llm.model': model,
+                                             'batch.requests': len(requests)}):
+                job['batch_id'] = self._provider(provider_name).submit(requests, {'job_id': job_id})
+            print(f"📦 배치 제출: {len(job['projects'])}개 프로젝트, 요청 {len(requests)}건 "
+                  f"({provider_name} {job['batch_id']}, 작업 {job_id})")
+        else:
+            # 모든 프로젝트가 사전 필터에서 제외됨 - 제출 없이 바로 수집 가능
+            job['status'] = ENDED
+            print(f"📦 제출할 요청 없음 (작업 {job_id})")
+
+        self.store.save(job)
+        return job_id
+
+    def _prepare_project(self, code: str, file_list: Optional[List[Dict]]) -> Tuple[Dict, List[Tuple[str, Dict]]]:
+        """사전 필터 → 압축 → 청크 분할 → 발견 프롬프트"""
+        entry = {'source_code': code, 'prefilter': None, 'compaction': None, 'chunks': []}
+
+        prefilter_maps = None
+        if self.analyzer.use_prefilter:
+            code, file_list, entry['prefilter'], prefilter_maps = self.analyzer._apply_prefilter(code, file_list)
+            if not code:
+                entry['result'] = self.analyzer._prefilter_empty_result(entry['prefilter'])
+                return entry, []
+
+        # 파일 단위 토큰 합은 전체 토큰 수보다 파일 경계마다 1 정도 클 수 있음
+        self.compactor.max_tokens = self.compactor.count_tokens(code) + code.count('# ===== File:') + 1
+        compaction = self.compactor.compact(code, prefilter_maps)
+        chunks = self._chunk(compaction)
+        entry['compaction'] = {
+            **{key: compaction['stats'][key] for key in ('original_tokens', 'compact_tokens', 'duplicate_files')},
+            'chunks': len(chunks),
+            'chunk_tokens': self.chunk_tokens
+        }
+
+        prompts = []
+        for chunk_code, chunk_files, chunk_compaction in chunks:
+            # 청크는 이미 토큰 예산에 맞춰져 있으므로 프롬프트 빌더의 문자 수 절단은 생략
+            self.analyzer.last_compaction = chunk_compaction
+            prompts.append((self.analyzer._build_discovery_prompt(chunk_code, chunk_files), chunk_compaction))
+        self.analyzer.last_compaction = None
+        return entry, prompts
+
+    def _chunk(self, compaction: Dict) -> List[Tuple[str, List[Dict], Dict]]:
+        """압축 코드를 파일 경계 기준으로 토큰 예산 단위 청크로 묶기 (큰 파일은 라인 단위로 분할)"""
+        pieces = []
+        for path, content in split_code_by_file(compaction['code']):
+            line_map = compaction['line_maps'].get(path, [])
+            pieces.extend(self._split_file(path, content, line_map))
+
+        chunks = []
+        current: List[Tuple[str, str, List[int]]] = []
+        current_tokens = 0
+
+        def flush():
+            if not current:
+                return
+            paths = {path for path, _, _ in current}
+            chunk_compaction = {
+                'line_maps': {path: line_map for path, _, line_map in current},
+                'duplicates': {dup: origin for dup, origin in compaction['duplicates'].items() if origin in paths}
+            }
+            chunk_files = [{'path': path, 'lines': len(line_map)} for path, _, line_map in current]
+            chunks.append((join_code_files([(path, content) for path, content, _ in current]),
+                           chunk_files, chunk_compaction))
+
+        for path, content, line_map in pieces:
+            tokens = self.compactor.count_tokens(content)
+            # 같은 파일의 분할 조각은 라인 맵이 겹치지 않도록 항상 다른 청크로
+            if current and (current_tokens + tokens > self.chunk_tokens or any(p == path for p, _, _ in current)):
+                flush()
+                current, current_tokens = [], 0
+            current.append((path, content, line_map))
+            current_tokens += tokens
+        flush()
+        return chunks
+
+    def _split_file(self, path: str, content: str, line_map: List[int]) -> List[Tuple[str, str, List[int]]]:
+        if self.compactor.count_tokens(content) <= self.chunk_tokens:
+            return [(path, content, line_map)]
+
+        pieces = []
+        lines = content.splitlines()
+        start = 0
+        tokens = 0
+        for i, line in enumerate(lines):
+            line_tokens = self.compactor.count_tokens(line + "\n")
+            if i > start and tokens + line_tokens > self.chunk_tokens:
+                pieces.append((path, "\n".join(lines[start:i]), line_map[start:i]))
+                start, tokens = i, 0
+            tokens += line_tokens
+        pieces.append((path, "\n".join(lines[start:]), line_map[start:]))
+        return pieces
+
+    def _request_body(self, provider_name: str, model: str, prompt: str) -> Dict:
+        """동기 호출과 같은 요청 본문 (청크 간 공통 지시문은 프롬프트 캐시 대상)"""
+        max_tokens = DISCOVERY_MAX_TOKENS[provider_name]
+        if provider_name == 'anthropic':
+            return ImprovedSecurityAnalyzer._claude_request(CLAUDE_DISCOVERY_PREAMBLE + prompt, model, max_tokens,
+                                                            self.analyzer._claude_cache_prefix(model))
+        return ImprovedSecurityAnalyzer._gpt_request(prompt, model, max_tokens)
+
+    # ------------------------------------------------------------------
+    # 상태 확인 / 대기
+    # ------------------------------------------------------------------
+
+    def poll(self, job_id: str) -> Dict:
+        """배치 상태 1회 확인 (작업 파일 갱신)"""
+        job = self.store.load(job_id)
+        if job['status'] == SUBMITTED:
+            status = self._provider(job['provider']).status(job['batch_id'])
+            job['batch_status'] = status
+            if status['ended']:
+                job['status'] = ENDED
+                job['ended_at'] = time.time()
+            self.store.save(job)
+        return {
+            'job_id': job_id,
+            'status': job['status'],
+            'batch_id': job.get('batch_id'),
+            **(job.get('batch_status') or {})
+        }
+
+    def wait(self, job_id: str, poll_interval: float = None, max_wait: float = None) -> Dict:
+        """배치 종료까지 주기적으로 확인"""
+        poll_interval = batch_config.POLL_INTERVAL if poll_interval is None else poll_interval
+        max_wait = batch_config.MAX_WAIT if max_wait is None else max_wait
+        deadline = time.time() + max_wait
+        while True:
+            status = self.poll(job_id)
+            if status['status'] != SUBMITTED:
+                return status
+            if time.time() >= deadline:
+                raise TimeoutError(f"배치 대기 시간 초과: {job_id} ({status.get('provider_status')})")
+            counts = status.get('counts', {})
+            print(f"⏳ 배치 처리 중: {status.get('provider_status')} "
+                  f"(완료 {counts.get('succeeded', 0)}, 실패 {counts.get('errored', 0)}, 대기 {counts.get('processing', 0)})")
+            time.sleep(poll_interval)
+
+    # ------------------------------------------------------------------
+    # 결과 수집
+    # ------------------------------------------------------------------
+
+    def collect(self, job_id: str) -> Dict[str, Dict]:
+        """
+        배치 결과를 프로젝트별 analyze_security 형식으로 조립
+
+        Returns:
+            {프로젝트명: analyze_security 결과 + 'batch' 정보}
+        """
+        job = self.store.load(job_id)
+        if job['status'] == COLLECTED:
+            return job['results']
+        if job['status'] == SUBMITTED:
+            if self.poll(job_id)['status'] == SUBMITTED:
+                raise RuntimeError(f"배치가 아직 처리 중입니다: {job_id}")
+            job = self.store.load(job_id)
+
+        outputs = {}
+        if job.get('batch_id'):
+            with trace_span('batch.collect', {'llm.provider': job['provider'], 'batch.requests': len(job['chunks'])}):
+                outputs = self._provider(job['provider']).results(job['batch_id'])
+
+        turnaround = (job.get('ended_at') or time.time()) - job['created_at']
+        results = {}
+        for name, entry in job['projects'].items():
+            with usage_ledger.analysis(name, 'batch'):
+                results[name] = self._assemble_project(job, entry, outputs, turnaround)
+
+        job['results'] = results
+        job['status'] = COLLECTED
+        job['collected_at'] = time.time()
+        self.store.save(job)
+        return results
+
+    def _assemble_project(self, job: Dict, entry: Dict, outputs: Dict[str, Dict], turnaround: float) -> Dict:
+        if entry.get('result'):
+            return entry['result']
+
+        vulnerabilities = []
+        failed = []
+        for custom_id in entry['chunks']:
+            output = outputs.get(custom_id) or {'error': '결과 없음'}
+            if output.get('response') is not None:
+                record_llm_usage(job['provider'], job['model'], output['response'], turnaround,
+                                 'batch_discovery', batch_config.COST_MULTIPLIER)
+            if output.get('error'):
+                failed.append({'request': custom_id, 'error': output['error']})
+                continue
+
+            try:
+                found = self.analyzer._parse_json_response(output['text'] or '')
+            except json.JSONDecodeError as e:
+                failed.append({'request': custom_id, 'error': f"JSON 파싱 실패: {e}"})
+                continue
+            if any(v.get('parse_error') or v.get('token_error') for v in found):
+                failed.append({'request': custom_id, 'error': found[0].get('description', '응답 파싱 실패')})
+                continue
+            vulnerabilities.extend(self.compactor.remap_locations(found, job['chunks'][custom_id]))
+
+        batch_info = {
+            'job_id': job['job_id'],
+            'batch_id': job['batch_id'],
+            'provider': job['provider'],
+            'requests': len(entry['chunks']),
+            'failed_requests': failed
+        }
+
+        if failed and len(failed) == len(entry['chunks']):
+            return {
+                'success': False,
+                'vulnerabilities': [],
+                'security_score': 0,
+                'summary': f"⚠️ 배치 분석 오류: {failed[0]['error']}",
+                'analyzed_by': 'Error',
+                'has_error': True,
+                'error_type': 'Batch Failed',
+                'prefilter': entry['prefilter'],
+                'compaction': entry['compaction'],
+                'batch': batch_info
+            }
+
+        self.analyzer.last_engine = f"{'Claude' if job['provider'] == 'anthropic' else 'GPT'} Batch"
+        self.analyzer.last_hedge = None
+        result = self.analyzer._finalize_result(vulnerabilities, entry['source_code'],
+                                                entry['prefilter'], entry['compaction'])
+        result['batch'] = batch_info
+        if failed:
+            result['summary'] += f" (배치 요청 {len(failed)}/{len(entry['chunks'])}건 실패, 해당 코드 미분석)"
+        return result
+
+    def run(self, projects: Dict[str, object], poll_interval: float = None, max_wait: float = None) -> Dict[str, Dict]:
+        """제출 → 대기 → 수집"""
+        job_id = self.submit(projects)
+        self.wait(job_id, poll_interval, max_wait)
+        return self.collect(job_id)
+
+
+def load_project_dir(project_path: str) -> Dict:
+    """프로젝트 폴더를 배치 제출 형식({'code', 'file_list'})으로 읽기"""
+    from core.project_downloader import ProjectDownloader
+    result = ProjectDownloader().smart_analyze_project_files(Path(project_path))
+    return {'code': result['combined_code'], 'file_list': result['files']}
+
+
+# 간단한 사용 헬퍼 함수
+def run_batch_scan(projects: Dict[str, object], use_claude: bool = True) -> Dict[str, Dict]:
+    """배치 API 일괄 분석 헬퍼 함수 (완료까지 대기)"""
+    return BatchSecurityAnalyzer(use_claude=use_claude).run(projects)
+
+
+if __name__ == "__main__":
+    # 사용법:
+    #   python -m core.batch_analyzer submit <프로젝트들이 있는 폴더> [--gpt]
+    #   python -m core.batch_analyzer status <작업 ID>
+    #   python -m core.batch_analyzer collect <작업 ID> [결과 JSON 경로]
+    #   python -m core.batch_analyzer list
+    args = sys.argv[1:]
+    command = args[0] if args else 'list'
+
+    if command == 'list':
+        for job in BatchJobStore().list_jobs():
+            created = datetime.fromtimestamp(job['created_at']).strftime('%Y-%m-%d %H:%M')
+            print(f"{job['job_id']}  {job['status']:<10} {job['provider']:<9} "
+                  f"프로젝트 {job['projects']}개 / 요청 {job['requests']}건  ({created})")
+    elif command == 'submit':
+        root = Path(args[1])
+        projects = {p.name: load_project_dir(str(p)) for p in sorted(root.iterdir()) if p.is_dir()}
+        print(BatchSecurityAnalyzer(use_claude='--gpt' not in args).submit(projects))
+    elif command == 'status':
+        print(json.dumps(BatchSecurityAnalyzer().poll(args[1]), ensure_ascii=False, indent=2))
+    elif command == 'collect':
+        results = BatchSecurityAnalyzer().collect(args[1])
+        for name, result in results.items():
+            print(f"📁 {name}: 취약점 {len(result.get('vulnerabilities', []))}개, "
+                  f"점수 {result.get('security_score')} ({result.get('analyzed_by')})")
+        if len(args) > 2:
+            with open(args[2], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+            print(f"💾 결과 저장: {args[2]}")
+    else:
+        print(f"알 수 없는 명령: {command} (submit / status / collect / list)")
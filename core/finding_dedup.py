@@ -0,0 +1,310 @@
+# core/finding_dedup.py
+"""
+취약점 발견 결과 지문 및 중복 제거
+- 지문: 정규화된 취약점 타입 + 파일 경로 + 소속 함수 + 정규화된 코드 스니펫 해시
+- 같은 지문은 즉시 병합, 문구/라인만 다른 근접 중복은 스니펫 MinHash + LSH 밴딩으로 병합
+- 병합은 같은 함수 안에서 라인 차이가 LINE_WINDOW 이내인 결과끼리만 (같은 스니펫이 여러 곳에 있으면 별개 취약점)
+- 결과 수에 선형 시간 (청크 분할 분석, 폴백 엔진, 반복 실행 결과를 합쳐도 저렴)
+"""
+import ast
+import hashlib
+import re
+import struct
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from config import dedup_config
+from core.ast_prefilter import split_code_by_file
+
+SEVERITY_ORDER = {'CRITICAL': 4, 'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}
+CONFIDENCE_ORDER = {'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}
+
+# MinHash: blake2b 64바이트 다이제스트 1개 = 32비트 해시 16개
+_HASHES_PER_DIGEST = 16
+
+_LINE_NUMBER_PREFIX = re.compile(r'^\s*\d+\s*[:|]\s?', re.MULTILINE)
+_COMMENT = re.compile(r'#[^\n]*')
+_TOKEN = re.compile(r'\w+|[^\w\s]')
+_NON_WORD = re.compile(r'[^0-9a-z가-힣]+')
+
+
+def normalize_path(path: Optional[str]) -> str:
+    """파일 경로 정규화 (구분자, ./ 접두사, 대소문자)"""
+    if not path:
+        return ''
+    path = str(path).strip().replace('\\', '/')
+    while path.startswith('./'):
+        path = path[2:]
+    return path.lower()
+
+
+def normalize_snippet(code: Optional[str]) -> str:
+    """코드 스니펫 정규화 (라인 번호 접두사, 주석, 공백, 대소문자 제거)"""
+    if not code:
+        return ''
+    code = _LINE_NUMBER_PREFIX.sub('', str(code))
+    code = _COMMENT.sub('', code)
+    return ' '.join(_TOKEN.findall(code.lower()))
+
+
+def _shingle_hashes(shingle: str, digests: int) -> Tuple[int, ...]:
+    """shingle 하나를 서로 다른 해시 함수 digests * 16개로 해싱 (키로 해시 함수 구분)"""
+    data = shingle.encode('utf-8')
+    raw = b''.join(hashlib.blake2b(data, digest_size=64, key=bytes([k + 1])).digest() for k in range(digests))
+    return struct.unpack(f'<{digests * _HASHES_PER_DIGEST}I', raw)
+
+
+class FunctionResolver:
+    """결합 코드에서 (파일, 라인) → 소속 함수 이름 조회"""
+
+    def __init__(self, code: str):
+        self._ranges: Dict[str, List[Tuple[int, int, str]]] = {}
+        for path, content in split_code_by_file(code):
+            try:
+                tree = ast.parse(content)
+            except (SyntaxError, ValueError):
+                continue
+            ranges = []
+            self._collect(tree, [], ranges)
+            self._ranges[normalize_path(path)] = ranges
+
+    def _collect(self, node: ast.AST, stack: List[str], ranges: List[Tuple[int, int, str]]):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = '.'.join(stack + [child.name])
+                if not isinstance(child, ast.ClassDef):
+                    ranges.append((child.lineno, child.end_lineno or child.lineno, name))
+                self._collect(child, stack + [child.name], ranges)
+            else:
+                self._collect(child, stack, ranges)
+
+    def resolve(self, path: str, line: Optional[int]) -> str:
+        if not isinstance(line, int) or line <= 0:
+            return ''
+        ranges = self._ranges.get(normalize_path(path))
+        if ranges is None and len(self._ranges) == 1:
+            ranges = next(iter(self._ranges.values()))
+        best = ''
+        best_span = None
+        for start, end, name in ranges or []:
+            # 가장 안쪽(범위가 가장 좁은) 함수
+            if start <= line <= end and (best_span is None or end - start < best_span):
+                best, best_span = name, end - start
+        return best
+
+
+class FindingDeduplicator:
+    """지문 + MinHash/LSH 기반 취약점 중복 제거기"""
+
+    def __init__(self, num_perm: int = None, bands: int = None,
+                 similarity: float = None, shingle_size: int = None):
+        # 다이제스트 단위(16)로 올림
+        requested = num_perm or dedup_config.NUM_PERM
+        self.digests = max(1, -(-requested // _HASHES_PER_DIGEST))
+        self.num_perm = self.digests * _HASHES_PER_DIGEST
+        self.bands = bands or dedup_config.BANDS
+        self.rows = max(1, self.num_perm // self.bands)
+        self.similarity = dedup_config.SIMILARITY if similarity is None else similarity
+        self.shingle_size = shingle_size or dedup_config.SHINGLE_SIZE
+        self.max_candidates = dedup_config.MAX_BUCKET_CANDIDATES
+        self.line_window = dedup_config.LINE_WINDOW
+        self._classifier = None
+
+    # ------------------------------------------------------------------
+    # 지문
+    # ------------------------------------------------------------------
+
+    def normalize_type(self, vuln_type: str) -> str:
+        """취약점 타입 정규화 - KISIA 타입 → 표준 타입 → 문자열 정규화 순"""
+        if not vuln_type:
+            return 'unknown'
+        if self._classifier is None:
+            from rag.vulnerability_classifier import get_vulnerability_classifier
+            self._classifier = get_vulnerability_classifier()
+        result = self._classifier.classify(vuln_type)
+        if result['kisia_type']:
+            return result['kisia_type']
+        if result['standard_type'] != 'General':
+            return result['standard_type']
+        return _NON_WORD.sub('_', vuln_type.lower()).strip('_') or 'unknown'
+
+    @staticmethod
+    def _location(vuln: Dict) -> Tuple[str, Optional[int], str]:
+        """(파일, 라인, 함수) - 개선 분석기/레거시 결과 형식 모두 지원"""
+        location = vuln.get('location') if isinstance(vuln.get('location'), dict) else {}
+        path = location.get('file') or vuln.get('source_file') or vuln.get('file') or ''
+        line = location.get('line')
+        if not isinstance(line, int):
+            lines = vuln.get('line_numbers') or []
+            line = lines[0] if lines and isinstance(lines[0], int) else None
+        function = location.get('function') or vuln.get('function') or ''
+        if function in ('unknown', 'N/A', '<module>'):
+            function = ''
+        return path, line, function
+
+    def _snippet(self, vuln: Dict) -> str:
+        return normalize_snippet(vuln.get('vulnerable_code') or vuln.get('code_snippet')) \
+            or normalize_snippet(vuln.get('description'))
+
+    def _function(self, vuln: Dict, resolver: FunctionResolver = None) -> str:
+        """소속 함수 (결과에 없으면 AST로 보완)"""
+        path, line, function = self._location(vuln)
+        if not function and resolver:
+            function = resolver.resolve(path, line)
+        return function
+
+    def fingerprint(self, vuln: Dict, resolver: FunctionResolver = None) -> str:
+        """취약점 지문 (타입 | 파일 | 함수 | 스니펫 해시)"""
+        path, _, _ = self._location(vuln)
+        function = self._function(vuln, resolver)
+        snippet_hash = hashlib.sha1(self._snippet(vuln).encode('utf-8')).hexdigest()[:12]
+        key = '|'.join([self.normalize_type(vuln.get('type', '')), normalize_path(path), function, snippet_hash])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    # ------------------------------------------------------------------
+    # MinHash
+    # ------------------------------------------------------------------
+
+    def minhash(self, snippet: str) -> Optional[List[int]]:
+        """스니펫 토큰 shingle의 MinHash 서명 (토큰이 없으면 None)"""
+        tokens = snippet.split()
+        if not tokens:
+            return None
+        size = min(self.shingle_size, len(tokens))
+        shingles = {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+        # 고정 키 해시라 실행마다 같은 서명 (결과 안정)
+        rows = [_shingle_hashes(shingle, self.digests) for shingle in shingles]
+        return list(map(min, zip(*rows)))
+
+    @staticmethod
+    def estimate_similarity(sig1: List[int], sig2: List[int]) -> float:
+        return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+    # ------------------------------------------------------------------
+    # 병합
+    # ------------------------------------------------------------------
+
+    def deduplicate(self, vulnerabilities: List[Dict], code: str = None) -> List[Dict]:
+        """
+        중복 취약점 병합
+
+        Args:
+            vulnerabilities: 발견된 취약점 (청크/엔진/실행 결과를 이어 붙인 목록 가능)
+            code: 원본 결합 코드 (있으면 함수 이름이 없는 결과의 소속 함수를 AST로 보완)
+
+        Returns:
+            병합된 취약점 목록 (각 항목에 fingerprint, 병합 시 duplicate_count/related_lines 추가)
+        """
+        if not vulnerabilities:
+            return vulnerabilities
+        resolver = FunctionResolver(code) if code else None
+
+        # 1. 정확한 지문으로 그룹화 (같은 지문이라도 라인이 멀면 별개 취약점)
+        parent: List[int] = []
+        by_fingerprint: Dict[str, List[int]] = defaultdict(list)
+        infos = []
+        for index, vuln in enumerate(vulnerabilities):
+            fingerprint = self.fingerprint(vuln, resolver)
+            path, line, _ = self._location(vuln)
+            infos.append((fingerprint, self.normalize_type(vuln.get('type', '')), normalize_path(path),
+                          self._function(vuln, resolver), line))
+            roots = by_fingerprint[fingerprint]
+            root = next((r for r in roots if self._near(infos[r][4], line)), None)
+            if root is None:
+                roots.append(index)
+                root = index
+            parent.append(root)
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i: int, j: int):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)  # 먼저 나온 항목이 대표
+
+        # 2. 같은 타입·파일·함수 안에서 LSH 밴드 버킷이 겹치는 후보만 MinHash 유사도 비교
+        #    버킷당 비교 후보 수를 제한해 전체 비용을 결과 수에 선형으로 유지
+        signatures: Dict[int, List[int]] = {}
+        buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        for index in sorted(r for roots in by_fingerprint.values() for r in roots):
+            signature = self.minhash(self._snippet(vulnerabilities[index]))
+            if signature is None:
+                continue
+            signatures[index] = signature
+            _, vuln_type, path, function, line = infos[index]
+            for band in range(self.bands):
+                chunk = tuple(signature[band * self.rows:(band + 1) * self.rows])
+                bucket = buckets[(vuln_type, path, function, band, chunk)]
+                for other in bucket[-self.max_candidates:]:
+                    if find(other) != find(index) and self._near(infos[other][4], line) and \
+                            self.estimate_similarity(signature, signatures[other]) >= self.similarity:
+                        union(other, index)
+                bucket.append(index)
+
+        # 3. 그룹별 대표 선택 및 정보 병합 (그룹은 첫 등장 순서 유지)
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for index in range(len(vulnerabilities)):
+            groups[find(index)].append(index)
+
+        merged = []
+        for root in sorted(groups):
+            members = [(vulnerabilities[i], infos[i][0]) for i in groups[root]]
+            merged.append(self._merge(members))
+
+        removed = len(vulnerabilities) - len(merged)
+        if removed:
+            print(f"🧬 중복 취약점 병합: {len(vulnerabilities)}개 → {len(merged)}개")
+        return merged
+
+    def _near(self, line: Optional[int], other: Optional[int]) -> bool:
+        """라인 차이가 LINE_WINDOW 이내 (라인을 모르는 결과는 위치로 구분하지 않음)"""
+        if not isinstance(line, int) or not isinstance(other, int):
+            return True
+        return abs(line - other) <= self.line_window
+
+    def _merge(self, members: List[Tuple[Dict, str]]) -> Dict:
+        """
+        그룹 대표 선택 후 빈 필드 보완
+
+        대표는 심각도 → 확신도 → 지문 순으로 고르므로 입력 순서가 달라도 같은 대표와 지문이 나옴
+        """
+        def rank(member: Tuple[Dict, str]):
+            vuln, fingerprint = member
+            return (-SEVERITY_ORDER.get(str(vuln.get('severity', '')).upper(), 0),
+                    -CONFIDENCE_ORDER.get(str(vuln.get('confidence', '')).upper(), 0),
+                    fingerprint)
+
+        ordered = sorted(members, key=rank)
+        representative = dict(ordered[0][0])
+        representative['fingerprint'] = ordered[0][1]
+        if len(members) == 1:
+            return representative
+
+        ordered = [vuln for vuln, _ in ordered]
+        for other in ordered[1:]:
+            for field, value in other.items():
+                if value and not representative.get(field):
+                    representative[field] = value
+
+        lines = set()
+        for vuln in ordered:
+            _, line, _ = self._location(vuln)
+            if isinstance(line, int):
+                lines.add(line)
+        representative['duplicate_count'] = len(members) - 1
+        representative['related_lines'] = sorted(lines)
+        return representative
+
+
+# 프로세스 공용 인스턴스
+finding_deduplicator = FindingDeduplicator()
+
+
+# 간단한 사용 헬퍼 함수
+def deduplicate_findings(vulnerabilities: List[Dict], code: str = None) -> List[Dict]:
+    """취약점 중복 제거 헬퍼 함수"""
+    return finding_deduplicator.deduplicate(vulnerabilities, code)
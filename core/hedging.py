@@ -0,0 +1,299 @@
+# core/hedging.py
+"""
+멀티 프로바이더 헤징 요청
+- 프로바이더별 응답 지연 히스토그램 (프로세스 공용, 파일에 보존)
+- 1순위 엔진이 백분위 기준 시간 안에 응답하지 않으면 2순위 엔진을 동시에 호출
+- 먼저 유효하게 파싱된 응답을 채택하고 패배한 호출은 취소 핸들로 진행 중인 스트림을 닫음
+"""
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import hedging_config
+from core.telemetry import in_current_context
+
+# 로그 스케일 버킷: 0.25초부터 1.25배씩 증가 (약 0.25초 ~ 10분)
+BUCKET_BASE = 0.25
+BUCKET_GROWTH = 1.25
+BUCKET_COUNT = 36
+
+
+class LatencyHistogram:
+    """로그 스케일 버킷 기반 응답 시간 히스토그램"""
+
+    def __init__(self, counts: List[float] = None):
+        self.counts = list(counts) if counts else [0.0] * BUCKET_COUNT
+
+    @staticmethod
+    def bucket_of(seconds: float) -> int:
+        if seconds <= BUCKET_BASE:
+            return 0
+        index = int(math.log(seconds / BUCKET_BASE, BUCKET_GROWTH)) + 1
+        return min(index, BUCKET_COUNT - 1)
+
+    @staticmethod
+    def upper_bound(index: int) -> float:
+        return BUCKET_BASE * (BUCKET_GROWTH ** index)
+
+    @property
+    def total(self) -> float:
+        return sum(self.counts)
+
+    def record(self, seconds: float, max_samples: int):
+        self.counts[self.bucket_of(seconds)] += 1
+        # 최근 응답에 가중치를 두기 위해 표본이 많아지면 절반으로 감쇠
+        if self.total > max_samples:
+            self.counts = [c / 2 for c in self.counts]
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q 백분위 (0~1) 응답 시간의 버킷 상한값"""
+        total = self.total
+        if total <= 0:
+            return None
+        threshold = total * q
+        cumulative = 0.0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= threshold:
+                return self.upper_bound(index)
+        return self.upper_bound(BUCKET_COUNT - 1)
+
+
+class LatencyTracker:
+    """프로바이더별 응답 시간 기록 (스레드 안전, 프로세스 공용)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or hedging_config.HISTOGRAM_PATH
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._dirty = 0
+        self._load()
+
+    def record(self, provider: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.setdefault(provider, LatencyHistogram())
+            histogram.record(seconds, hedging_config.MAX_SAMPLES)
+            self._dirty += 1
+            if self._dirty >= hedging_config.SAVE_EVERY:
+                self._save()
+
+    def samples(self, provider: str) -> float:
+        with self._lock:
+            histogram = self._histograms.get(provider)
+            return histogram.total if histogram else 0
+
+    def deadline(self, provider: str, percentile: Optional[float] = None) -> float:
+        """헤징 요청을 보낼 시점 (초) - 표본이 부족하면 기본값"""
+        q = percentile or hedging_config.PERCENTILE
+        with self._lock:
+            histogram = self._histograms.get(provider)
+            if not histogram or histogram.total < hedging_config.MIN_SAMPLES:
+                return hedging_config.DEFAULT_DEADLINE
+            value = histogram.percentile(q)
+        return max(hedging_config.MIN_DEADLINE, value)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """UI/로그용 요약"""
+        with self._lock:
+            return {
+                provider: {
+                    'samples': round(h.total, 1),
+                    'p50': h.percentile(0.5),
+                    'p90': h.percentile(0.9),
+                    'p99': h.percentile(0.99)
+                }
+                for provider, h in self._histograms.items()
+            }
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for provider, counts in data.items():
+                if isinstance(counts, list) and len(counts) == BUCKET_COUNT:
+                    self._histograms[provider] = LatencyHistogram(counts)
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        # 호출자가 lock 보유
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({p: h.counts for p, h in self._histograms.items()}, f)
+            self._dirty = 0
+        except OSError as e:
+            print(f"⚠️ 지연 히스토그램 저장 실패: {e}")
+
+
+# 프로세스 공용 인스턴스
+latency_tracker = LatencyTracker()
+
+
+class HedgeCancelled(Exception):
+    """다른 엔진이 먼저 채택되어 취소된 헤징 시도"""
+
+
+class CancelHandle:
+    """
+    헤징 시도별 취소 핸들
+
+    호출 함수는 스트림/연결을 연 직후 on_cancel로 닫기 함수를 등록하고,
+    hedged_call은 패배한 시도의 cancel()로 진행 중인 요청을 실제로 끊음 (스레드는 강제 종료 불가)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+        self.cancelled = False
+
+    def on_cancel(self, callback: Callable[[], Any]):
+        """취소 시 실행할 함수 등록 (이미 취소됐으면 바로 실행)"""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        self._run(callback)
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._run(callback)
+
+    @staticmethod
+    def _run(callback: Callable[[], Any]):
+        try:
+            callback()
+        except Exception as e:
+            print(f"⚠️ 헤징 취소 처리 실패: {e}")
+
+
+_current_handle: "contextvars.ContextVar[Optional[CancelHandle]]" = contextvars.ContextVar(
+    'hedge_cancel_handle', default=None)
+
+
+def current_cancel_handle() -> Optional[CancelHandle]:
+    """현재 스레드에서 실행 중인 헤징 시도의 취소 핸들 (헤징 밖이면 None)"""
+    return _current_handle.get()
+
+
+def timed_call(provider: str, func: Callable[[], Any], tracker: LatencyTracker = None) -> Any:
+    """호출 시간을 측정해 히스토그램에 기록 (성공한 호출만)"""
+    tracker = tracker or latency_tracker
+    start = time.time()
+    result = func()
+    tracker.record(provider, time.time() - start)
+    return result
+
+
+def hedged_call(primary: Tuple[str, Callable[[], Any]],
+                secondary: Tuple[str, Callable[[], Any]],
+                is_valid: Callable[[Any], bool],
+                deadline: Optional[float] = None,
+                tracker: LatencyTracker = None,
+                record: bool = True) -> Tuple[str, Any, Dict]:
+    """
+    헤징 호출
+
+    Args:
+        primary: (이름, 호출 함수) - 먼저 호출
+        secondary: (이름, 호출 함수) - primary가 deadline 내 응답하지 않거나 실패하면 호출
+        is_valid: 결과가 채택 가능한지 판정
+        deadline: 헤징 시점 (None이면 primary의 백분위 응답 시간)
+        record: 호출 시간을 히스토그램에 기록할지 (호출 함수가 직접 기록하면 False)
+
+    각 호출은 current_cancel_handle()로 자기 취소 핸들을 얻을 수 있음 - 채택되지 못한 호출은 핸들이 취소되므로
+    스트림을 닫고 그때까지의 사용량을 기록한 뒤 HedgeCancelled를 올리면 됨
+
+    Returns:
+        (채택된 이름, 결과, 헤징 정보) - 유효한 결과가 없으면 마지막으로 받은 결과
+
+    Raises:
+        두 호출 모두 예외로 실패하면 마지막 예외
+    """
+    tracker = tracker or latency_tracker
+    primary_name, primary_func = primary
+    secondary_name, secondary_func = secondary
+    if deadline is None:
+        deadline = tracker.deadline(primary_name)
+
+    info = {'deadline': round(deadline, 2), 'hedged': False, 'winner': None}
+    start = time.time()
+
+    handles: Dict[Any, CancelHandle] = {}
+
+    def submit(name: str, func: Callable[[], Any]):
+        handle = CancelHandle()
+
+        def attempt():
+            _current_handle.set(handle)
+            return timed_call(name, func, tracker) if record else func()
+
+        future = executor.submit(in_current_context(attempt))
+        handles[future] = handle
+        return future
+
+    # 패배한 호출은 취소 핸들로 요청을 끊고 스레드 종료는 기다리지 않음
+    executor = ThreadPoolExecutor(max_workers=2)
+    futures = {submit(primary_name, primary_func): primary_name}
+    last_error: Optional[BaseException] = None
+    last_result = None
+    last_result_name = None
+
+    try:
+        pending = set(futures)
+        hedged = False
+        while pending:
+            timeout = None if hedged else max(0.0, deadline - (time.time() - start))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = futures[future]
+                try:
+                    result = future.result()
+                except HedgeCancelled:
+                    continue
+                except Exception as e:
+                    print(f"⚠️ {name} 호출 실패: {e}")
+                    last_error = e
+                    continue
+                if is_valid(result):
+                    info['winner'] = name
+                    info['elapsed'] = round(time.time() - start, 2)
+                    for loser in pending:
+                        print(f"✂️ {futures[loser]} 요청 취소")
+                        handles[loser].cancel()
+                        loser.cancel()
+                    return name, result, info
+                print(f"⚠️ {name} 응답이 유효하지 않음")
+                last_result, last_result_name = result, name
+
+            # 기한 초과 또는 primary 실패 → secondary 발사
+            if not hedged:
+                hedged = True
+                info['hedged'] = True
+                info['hedged_at'] = round(time.time() - start, 2)
+                print(f"⏱️ {primary_name} 응답 지연/실패, {secondary_name} 동시 요청 ({info['hedged_at']}초)")
+                future = submit(secondary_name, secondary_func)
+                futures[future] = secondary_name
+                pending.add(future)
+    finally:
+        for future, handle in handles.items():
+            if not future.done():
+                handle.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if last_result is not None:
+        info['elapsed'] = round(time.time() - start, 2)
+        info['winner'] = last_result_name
+        return last_result_name, last_result, info
+    raise last_error or ValueError("헤징 호출 결과 없음")
@@ -7,60 +7,130 @@
 import os
 import json
 import re
-from typing import Dict, List, Optional, Tuple
-from openai import OpenAI
-from anthropic import Anthropic
-from prompts.all_prompts import build_security_analysis_prompt
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from prompts.all_prompts import build_security_analysis_prompt, build_vulnerability_detail_prompt
+from core.hedging import timed_call, hedged_call, current_cancel_handle, HedgeCancelled, CancelHandle
+from core.resource_registry import get_anthropic_client, get_openai_client, get_improved_rag
+from core.telemetry import telemetry, trace_span, in_current_context
+from core.usage_ledger import extract_usage, record_llm_usage
+from rag.relevance_scorer import relevance_scorer
+from config import prefilter_config, compaction_config, discovery_config, hedging_config, dedup_config, rag_config
+
+# 2단계 모드에서 요청 시 생성하는 상세 필드
+DETAIL_FIELDS = ('fixed_code', 'fix_explanation', 'data_flow', 'exploit_scenario', 'recommendation')
+
+# 발견 단계 공급자별 지시문 (동기 호출과 배치 API가 같은 요청을 보내도록 공유)
+CLAUDE_DISCOVERY_PREAMBLE = """You are a senior security expert analyzing Python code.
+    Respond ONLY with valid JSON. No explanations, no markdown.
+
+    """
+GPT_SYSTEM_PROMPT = "You are a JSON API that analyzes Python code for vulnerabilities. Respond only with valid JSON. No markdown, no explanations."
+
+@lru_cache(maxsize=1)
+def guideline_reference() -> str:
+    """
+    배치 분석 고정 지시문에 넣는 KISIA 항목별 근거 표 (RAG 근거 테이블과 같은 구조화 데이터 기반)
+
+    청크마다 같은 접두부로 캐시되어, 모든 청크가 가이드 설명/안전 대책을 근거로 판단하고 설명을 쓰도록 함
+    """
+    from rag.kisia_vulnerability_mapping import KISIAVulnerabilityMapper
+
+    try:
+        with open(rag_config.STRUCTURED_DATA_FILE, 'r', encoding='utf-8') as f:
+            descriptions = {v['english_type']: v.get('description', '')
+                            for v in json.load(f)['vulnerabilities']}
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ 구조화 데이터 로드 실패, 근거 표는 항목명만 포함: {e}")
+        descriptions = {}
+
+    lines = []
+    for section, items in KISIAVulnerabilityMapper().GUIDELINE_STRUCTURE.items():
+        lines.append(f"    [{section}]")
+        for number, (korean_name, english_type, page) in items.items():
+            description = descriptions.get(english_type, '')
+            lines.append(f"    - {number}. {korean_name} / {english_type.replace('_', ' ')} ({page}쪽)"
+                         + (f": {description}" if description else ''))
+    return "\n".join(lines)
+
 
 class ImprovedSecurityAnalyzer:
     """AI 기반 보안 분석기 - Claude 우선"""
     
-    def __init__(self, use_claude: bool = True):
+    def __init__(self, use_claude: bool = True, use_prefilter: Optional[bool] = None,
+                 use_compaction: Optional[bool] = None, two_phase: Optional[bool] = None,
+                 use_hedging: Optional[bool] = None, guideline_reference: Optional[bool] = None):
         """
         Args:
             use_claude: Claude를 우선 사용할지 여부 (기본값: True)
+            use_prefilter: AST 사전 필터 사용 여부 (None이면 config 설정 따름)
+            use_compaction: 프롬프트 압축 사용 여부 (None이면 config 설정 따름)
+            two_phase: 상세 정보를 요청 시 생성하는 2단계 모드 (None이면 config 설정 따름)
+            use_hedging: 1순위 엔진 지연 시 2순위 엔진을 동시에 호출 (None이면 config 설정 따름)
+            guideline_reference: 고정 지시문에 KISIA 항목별 근거 표 포함 (None이면 config 설정 따름)
         """
         self.use_claude = use_claude
-        self.claude_client = None
-        self.openai_client = None
-        
-        # Claude 초기화 (우선순위 1)
-        if os.getenv("ANTHROPIC_API_KEY"):
-            try:
-                self.claude_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-                print("✅ Claude API 초기화 성공 (메인 엔진)")
-            except Exception as e:
-                print(f"⚠️ Claude 초기화 실패: {e}")
-        
-        # OpenAI 초기화 (우선순위 2 - 폴백)
-        if os.getenv("OPENAI_API_KEY"):
-            try:
-                self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-                print("✅ OpenAI API 초기화 성공 (폴백 엔진)")
-            except Exception as e:
-                print(f"⚠️ OpenAI 초기화 실패: {e}")
+        self.use_prefilter = prefilter_config.ENABLED if use_prefilter is None else use_prefilter
+        self.use_compaction = compaction_config.ENABLED if use_compaction is None else use_compaction
+        self.two_phase = discovery_config.TWO_PHASE if two_phase is None else two_phase
+        self.use_hedging = hedging_config.ENABLED if use_hedging is None else use_hedging
+        self.guideline_reference = (discovery_config.GUIDELINE_REFERENCE if guideline_reference is None
+                                    else guideline_reference)
+        self.last_engine = None
+        self.last_hedge = None
+        self.compactor = None
+        self.last_compaction = None
+        
+        # 클라이언트/RAG는 프로세스 공용 레지스트리에서 가져옴 (최초 1회만 생성)
+        # Claude (우선순위 1), OpenAI (우선순위 2 - 폴백)
+        self.claude_client = get_anthropic_client()
+        self.openai_client = get_openai_client()
         
         # API 가용성 확인
         if not self.claude_client and not self.openai_client:
             raise ValueError("❌ Claude와 OpenAI API 모두 사용 불가능합니다.")
         
-        # RAG 시스템 초기화 (선택적)
-        self.rag = None
-        try:
-            from rag.improved_rag_search import ImprovedRAGSearch
-            self.rag = ImprovedRAGSearch()
-            print("✅ RAG 시스템 로드 성공")
-        except Exception as e:
-            print(f"⚠️ RAG 시스템 로드 실패: {e}")
+        # RAG 시스템 (선택적)
+        self.rag = get_improved_rag()
+        if not self.rag:
+            print("⚠️ RAG 시스템 사용 불가 (벡터 DB 확인 필요)")
     
+    @telemetry.traced('analysis.llm')
     def analyze_security(self, code: str, file_list: List[Dict] = None) -> Dict:
         """코드 보안 분석 - 오류 처리 개선"""
         
         print("🔍 AI 보안 분석 시작...")
+        source_code = code
+        
+        # 0단계: AST 사전 필터로 보안 관련 단위만 선별
+        prefilter_stats = None
+        prefilter_maps = None
+        if self.use_prefilter:
+            code, file_list, prefilter_stats, prefilter_maps = self._apply_prefilter(code, file_list)
+            if not code:
+                return self._prefilter_empty_result(prefilter_stats)
+        
+        # 0-1단계: 주석/docstring 제거, 중복 파일 제거, 토큰 예산 적용
+        compaction = None
+        if self.use_compaction:
+            code, compaction = self._apply_compaction(code, prefilter_maps)
+        self.last_compaction = compaction
+        compaction_stats = self._compaction_report(compaction)
         
         # 1단계: AI가 취약점 발견 및 수정 코드 생성
         vulnerabilities = self._discover_vulnerabilities(code, file_list)
+        vulnerabilities = self._remap_locations(vulnerabilities, compaction, prefilter_maps)
         
+        return self._finalize_result(vulnerabilities, source_code, prefilter_stats, compaction_stats)
+    
+    def _finalize_result(self, vulnerabilities: List[Dict], source_code: str,
+                         prefilter_stats: Optional[Dict], compaction_stats: Optional[Dict]) -> Dict:
+        """
+        발견된 취약점으로 analyze_security 결과 구성
+        (오류 판정 → 중복 제거 → 2단계 표시 → RAG 근거 → 점수/요약, 배치 분석 결과 조립에도 사용)
+        """
         # 오류 체크
         has_error = False
         error_message = ""
@@ -81,7 +151,9 @@ class ImprovedSecurityAnalyzer:
                 'summary': f'⚠️ 분석 오류: {error_message}',
                 'analyzed_by': 'Error',
                 'has_error': True,
-                'error_type': vulnerabilities[0].get('type', 'Unknown Error')
+                'error_type': vulnerabilities[0].get('type', 'Unknown Error'),
+                'prefilter': prefilter_stats,
+                'compaction': compaction_stats
             }
         
         # 정상 처리
@@ -92,9 +164,23 @@ class ImprovedSecurityAnalyzer:
                 'security_score': 100,
                 'summary': '취약점이 발견되지 않았습니다.',
                 'analyzed_by': 'AI',
-                'has_error': False
+                'has_error': False,
+                'prefilter': prefilter_stats,
+                'compaction': compaction_stats
             }
         
+        # 중복 제거: 지문이 같거나 스니펫이 유사한 결과 병합
+        if dedup_config.ENABLED:
+            vulnerabilities = self._deduplicate(vulnerabilities, source_code)
+        
+        # 2단계 모드: 상세 필드는 비워두고 요청 시 generate_details로 채움
+        if self.two_phase:
+            for vuln in vulnerabilities:
+                if not all(vuln.get(field) for field in DETAIL_FIELDS):
+                    for field in DETAIL_FIELDS:
+                        vuln.setdefault(field, '')
+                    vuln['details_pending'] = True
+        
         # 2단계: RAG로 각 취약점에 대한 근거 찾기
         if self.rag:
             vulnerabilities = self._add_rag_evidence(vulnerabilities)
@@ -110,19 +196,102 @@ class ImprovedSecurityAnalyzer:
             'vulnerabilities': vulnerabilities,
             'security_score': security_score,
             'summary': summary,
-            'analyzed_by': 'Claude' if self.use_claude and self.claude_client else 'GPT',
-            'has_error': False
+            'analyzed_by': self.last_engine or ('Claude' if self.use_claude and self.claude_client else 'GPT'),
+            'has_error': False,
+            'prefilter': prefilter_stats,
+            'compaction': compaction_stats,
+            'hedging': self.last_hedge
         }
     
+    @staticmethod
+    def _prefilter_empty_result(prefilter_stats: Optional[Dict]) -> Dict:
+        """사전 필터 결과 보안 관련 코드가 없을 때의 결과"""
+        return {
+            'success': True,
+            'vulnerabilities': [],
+            'security_score': 100,
+            'summary': 'AST 사전 필터 결과 보안 관련 코드가 없어 AI 분석을 생략했습니다.',
+            'analyzed_by': 'AST Prefilter',
+            'has_error': False,
+            'prefilter': prefilter_stats
+        }
+    
+    def _apply_prefilter(self, code: str,
+                         file_list: List[Dict] = None) -> Tuple[str, List[Dict], Dict, Optional[Dict]]:
+        """AST 규칙 엔진으로 LLM에 보낼 코드 단위 선별 (필터링 코드, 파일 목록, 통계, 원본 라인 맵)"""
+        try:
+            from core.ast_prefilter import ASTPreFilter
+            result = ASTPreFilter().filter_code(code)
+        except Exception as e:
+            print(f"⚠️ AST 사전 필터 실패, 전체 코드 사용: {e}")
+            return code, file_list, None, None
+        
+        return result['code'], result['file_list'] or file_list, result['stats'], result['line_maps']
+    
+    def _apply_compaction(self, code: str, source_maps: Optional[Dict] = None) -> Tuple[str, Optional[Dict]]:
+        """프롬프트 압축 - 실패 시 원본 코드 사용 (source_maps: 사전 필터 원본 라인 맵)"""
+        try:
+            from core.prompt_compactor import PromptCompactor
+            if self.compactor is None:
+                self.compactor = PromptCompactor()
+            compaction = self.compactor.compact(code, source_maps)
+        except Exception as e:
+            print(f"⚠️ 프롬프트 압축 실패, 원본 코드 사용: {e}")
+            return code, None
+        
+        return compaction['code'], compaction
+    
+    def _remap_locations(self, vulnerabilities: List[Dict], compaction: Optional[Dict],
+                         prefilter_maps: Optional[Dict]) -> List[Dict]:
+        """LLM이 본 코드(압축 또는 사전 필터 결과)의 라인 번호를 원본 기준으로 복원"""
+        if any(v.get('parse_error') or v.get('token_error') for v in vulnerabilities):
+            return vulnerabilities
+        if compaction:
+            # 압축 라인 맵은 사전 필터 라인 맵을 이미 반영
+            return self.compactor.remap_locations(vulnerabilities, compaction)
+        if prefilter_maps:
+            from core.prompt_compactor import PromptCompactor
+            return PromptCompactor.remap_locations(vulnerabilities, {'line_maps': prefilter_maps})
+        return vulnerabilities
+    
+    def _deduplicate(self, vulnerabilities: List[Dict], code: str) -> List[Dict]:
+        """지문 + MinHash/LSH 중복 제거 - 실패 시 원본 목록 사용"""
+        try:
+            from core.finding_dedup import finding_deduplicator
+            return finding_deduplicator.deduplicate(vulnerabilities, code)
+        except Exception as e:
+            print(f"⚠️ 중복 제거 실패, 원본 결과 사용: {e}")
+            return vulnerabilities
+    
+    def _compaction_report(self, compaction: Optional[Dict]) -> Optional[Dict]:
+        """결과에 포함할 압축 통계 (라인 맵 제외)"""
+        if not compaction:
+            return None
+        return {**compaction['stats'], 'files': compaction['files']}
 
 
     def _discover_vulnerabilities(self, code: str, file_list: List[Dict] = None) -> List[Dict]:
         """AI를 사용하여 취약점 발견 - use_claude 파라미터 적용"""
         
-        prompt = self._build_discovery_prompt(code, file_list)
+        with trace_span('llm.prompt_build', {'code.bytes': len(code.encode('utf-8')),
+                                             'files': len(file_list or [])}) as span:
+            prompt = self._build_discovery_prompt(code, file_list)
+            prompt_tokens = self.compactor.count_tokens(prompt) if self.compactor else None
+            span.set_attributes({'prompt.bytes': len(prompt.encode('utf-8')), 'prompt.tokens': prompt_tokens})
         print(f"📝 프롬프트 길이: {len(prompt)} 문자")
+        if prompt_tokens is not None:
+            print(f"📝 프롬프트 토큰: {prompt_tokens:,}")
         print(f"📝 프롬프트 처음 500자:\\n{prompt[:500]}\\n")  # 프롬프트 내용 확인
         vulnerabilities = []
+        self.last_engine = None
+        self.last_hedge = None
+        
+        # 헤징 모드: 두 엔진이 모두 있으면 지연 시 동시 호출
+        if self.use_hedging and self.claude_client and self.openai_client:
+            try:
+                return self._discover_hedged(prompt)
+            except Exception as e:
+                print(f"❌ 헤징 분석 실패: {e}")
         
         # use_claude 설정에 따라 순서 결정
         if self.use_claude:
@@ -198,11 +367,29 @@ class ImprovedSecurityAnalyzer:
         return vulnerabilities
     
     
-    # core/improved_llm_analyzer.py 수정
+    def _discover_hedged(self, prompt: str) -> List[Dict]:
+        """
+        1순위 엔진이 백분위 기한 내 응답하지 않으면 2순위 엔진도 호출, 먼저 유효한 응답 채택
+        
+        헤징 중 호출은 스트리밍으로 보내며, 패배한 엔진은 스트림을 닫고 그때까지의 사용량을 원장에 기록
+        (지연 시간은 _analyze_with_* 안의 timed_call이 기록하므로 record=False)
+        """
+        engines = [('claude', lambda: self._analyze_with_claude(prompt)),
+                   ('gpt', lambda: self._analyze_with_gpt(prompt))]
+        if not self.use_claude:
+            engines.reverse()
+        
+        def is_valid(result) -> bool:
+            return isinstance(result, list) and not any(v.get('parse_error') for v in result)
+        
+        winner, vulnerabilities, info = hedged_call(engines[0], engines[1], is_valid, record=False)
+        print(f"🏁 헤징 결과: {winner} 채택 (기한 {info['deadline']}초, 헤징 {'발생' if info['hedged'] else '없음'})")
+        self.last_engine = 'Claude' if winner == 'claude' else 'GPT'
+        self.last_hedge = info
+        return vulnerabilities
     
-
     def _build_discovery_prompt(self, code: str, file_list: List[Dict] = None) -> str:
-        """취약점 발견 프롬프트 - 빌더 함수 활용"""
+        """취약점 발견 프롬프트 - 고정 지시문 뒤에 파일 목록/코드를 붙임"""
         
         file_info = ""
         if file_list:
@@ -210,18 +397,44 @@ class ImprovedSecurityAnalyzer:
             for f in file_list[:5]:
                 file_info += f"- {f['path']} ({f['lines']}줄)\n"
 
-                 # 코드 길이 제한
+                 # 코드 길이 제한 (압축 단계에서 토큰 예산을 적용하지 않은 경우)
         max_code_length = 25000  # 프롬프트 공간 확보
-        if len(code) > max_code_length:
+        if self.last_compaction is None and len(code) > max_code_length:
             code = code[:max_code_length] + "\n# ... (코드가 잘렸습니다)"
         
-        prompt = f"""Python 보안 전문가로서 코드를 분석하고 JSON으로만 응답하세요.
-
+        # 바뀌는 부분(파일 목록, 코드)은 항상 뒤에 - 앞부분이 매 호출 같아야 공급자 프롬프트 캐시가 적중
+        prompt = f"""{self._discovery_instructions()}
     {file_info}
 
     분석할 코드:
     {code}
 
+    주의: JSON만 출력. 다른 텍스트 없음."""
+    
+        return prompt
+    
+    def _discovery_instructions(self) -> str:
+        """발견 프롬프트의 고정 지시문 (코드와 무관, 2단계 모드 여부에 따라서만 달라짐)"""
+        
+        # 2단계 모드: 발견 단계에서는 위치/요약만 요청하고 수정 코드 등은 나중에 생성
+        if self.two_phase:
+            detail_fields = (
+                '                "description": "한국어설명(한두 문장)",\n'
+                '                "vulnerable_code": "취약한코드"'
+            )
+        else:
+            detail_fields = (
+                '                "description": "한국어설명",\n'
+                '                "vulnerable_code": "취약한코드",\n'
+                '                "fixed_code": "수정된코드",\n'
+                '                "fix_explanation": "수정설명",\n'
+                '                "data_flow": "데이터흐름",\n'
+                '                "exploit_scenario": "공격시나리오(PoC를 이용해서 작성하세요. 단계별로 작성하세요.)",\n'
+                '                "recommendation": "권장사항(종합적으로 분석하세요. 단계별로 작성하세요.)"'
+            )
+        
+        return f"""Python 보안 전문가로서 코드를 분석하고 JSON으로만 응답하세요.
+
     다음 JSON 형식으로만 응답하세요. 추가 설명이나 인사말 없이 JSON만 출력하세요:
 
     {{
@@ -236,13 +449,7 @@ class ImprovedSecurityAnalyzer:
                     "function": "함수명",
                     "code_snippet": "문제코드"
                 }},
-                "description": "한국어설명",
-                "vulnerable_code": "취약한코드",
-                "fixed_code": "수정된코드",
-                "fix_explanation": "수정설명",
-                "data_flow": "데이터흐름",
-                "exploit_scenario": "공격시나리오(PoC를 이용해서 작성하세요. 단계별로 작성하세요.)",
-                "recommendation": "권장사항(종합적으로 분석하세요. 단계별로 작성하세요.)"
+{detail_fields}
             }}
         ]
     }}
@@ -261,42 +468,75 @@ class ImprovedSecurityAnalyzer:
       * Information Disclosure (정보 노출)
       * Race Condition (경쟁 상태)
       * 기타 영어 표준 명칭
-
-    주의: JSON만 출력. 다른 텍스트 없음."""
+""" + self._guideline_reference_block()
     
-        return prompt
+    def _guideline_reference_block(self) -> str:
+        """KISIA 항목별 근거 표 (guideline_reference 설정 시에만, 명칭 규칙은 위 지시문 그대로)"""
+        if not self.guideline_reference:
+            return ""
+        return f"""
+    📚 KISIA Python 시큐어코딩 가이드 항목별 근거 (판단/설명/권장사항 작성 시 참고, type 명칭 규칙은 위와 동일):
+{guideline_reference()}
+"""
+    
+    # (2단계 모드, 근거 표 포함, 모델) → (고정 접두부, 최소 캐시 길이 이상 여부)
+    _cache_prefixes: Dict[Tuple[bool, bool, str], Tuple[str, bool]] = {}
+    
+    def _claude_cache_prefix(self, model: str) -> Optional[str]:
+        """
+        Claude 발견 요청에서 cache_control을 붙일 고정 접두부
+        
+        프롬프트 캐시 비활성화 또는 접두부가 모델 계열의 최소 캐시 길이보다 짧으면 None (표시해도 캐시되지 않음)
+        """
+        if not discovery_config.PROMPT_CACHE:
+            return None
+        key = (self.two_phase, self.guideline_reference, model)
+        cached = self._cache_prefixes.get(key)
+        if cached is None:
+            prefix = CLAUDE_DISCOVERY_PREAMBLE + self._discovery_instructions()
+            minimum = self._cache_min_tokens(model)
+            tokens, exact = self._count_prefix_tokens(prefix, model)
+            # 추정치는 Claude 토크나이저와 다르므로 여유 배수만큼 넘을 때만 캐시 가능으로 판단
+            required = minimum if exact else int(minimum * discovery_config.PROMPT_CACHE_TOKEN_MARGIN)
+            cacheable = tokens >= required
+            if not cacheable:
+                print(f"ℹ️ 고정 지시문 {tokens:,} 토큰{'' if exact else '(추정)'} < {model} 최소 캐시 길이 "
+                      f"{required:,}, 프롬프트 캐시 생략")
+            cached = self._cache_prefixes[key] = (prefix, cacheable)
+        return cached[0] if cached[1] else None
+    
+    @staticmethod
+    def _cache_min_tokens(model: str) -> int:
+        """모델 계열별 최소 캐시 길이"""
+        minimums = discovery_config.PROMPT_CACHE_MIN_TOKENS
+        for family, tokens in minimums.items():
+            if family != 'default' and family in model.lower():
+                return tokens
+        return minimums['default']
+    
+    def _count_prefix_tokens(self, prefix: str, model: str) -> Tuple[int, bool]:
+        """접두부 토큰 수 (공급자 토큰 수 API, 실패 시 추정치) → (토큰 수, 정확 여부)"""
+        try:
+            result = self.claude_client.messages.count_tokens(
+                model=model, messages=[{"role": "user", "content": prefix}])
+            return result.input_tokens, True
+        except Exception as e:
+            print(f"⚠️ 토큰 수 API 실패, 추정치 사용: {e}")
+        from core.prompt_compactor import PromptCompactor
+        return PromptCompactor().count_tokens(prefix), False
     
     def _analyze_with_claude(self, prompt: str) -> List[Dict]:
         """Claude로 분석 - Claude 특화 프롬프트"""
         try:
-            # 환경변수에서 모델명 가져오기
-            model = os.getenv("ANTHROPIC_MODEL")
-            if not model:
-                model = "claude-3-opus-20240229"
-                print(f"⚠️ ANTHROPIC_MODEL 미설정, 기본값 사용: {model}")
+            model = self._claude_model()
             print(f"모델: {model}")
             print(f"API 키 존재: {bool(os.getenv('ANTHROPIC_API_KEY'))}")
             # Claude는 system role이 없으므로 user 메시지에 통합
-            claude_prompt = """You are a senior security expert analyzing Python code.
-    Respond ONLY with valid JSON. No explanations, no markdown.
-
-    """ + prompt
+            claude_prompt = CLAUDE_DISCOVERY_PREAMBLE + prompt
             
             print(f"최종 프롬프트 길이: {len(claude_prompt)}")
-            response = self.claude_client.messages.create(
-                model=model,
-                max_tokens=4000,
-                temperature=0.2,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": claude_prompt
-                    }
-                ]
-            )
-            
-            # Claude 응답 추출 (content[0].text)
-            result_text = response.content[0].text
+            result_text = timed_call('claude', lambda: self._call_claude(claude_prompt, model, max_tokens=4000,
+                                                                       cache_prefix=self._claude_cache_prefix(model)))
             
             print(f"📝 Claude 응답 길이: {len(result_text)}")
             print(f"📝 Claude 응답 처음 500자:\\n{result_text[:500]}\\n")
@@ -311,12 +551,12 @@ class ImprovedSecurityAnalyzer:
         except AttributeError as e:
             # Claude 응답 형식 오류 처리
             print(f"❌ Claude 응답 형식 오류: {e}")
-            if 'response' in locals():
-                print(f"응답 구조: {type(response)}")
             raise
         except json.JSONDecodeError as e:
             print(f"❌ Claude JSON 파싱 실패: {e}")
             return self._create_parse_error(str(e), result_text[:500] if 'result_text' in locals() else "")
+        except HedgeCancelled:
+            raise
         except Exception as e:
             print(f"❌ Claude 호출 실패: {e}")
             raise
@@ -324,11 +564,7 @@ class ImprovedSecurityAnalyzer:
     def _analyze_with_gpt(self, prompt: str) -> List[Dict]:
         """GPT로 분석 - GPT 특화 설정"""
         try:
-            # 환경변수에서 모델명 가져오기
-            model = os.getenv("OPENAI_MODEL")
-            if not model:
-                model = "gpt-4-turbo-preview"
-                print(f"⚠️ OPENAI_MODEL 미설정, 기본값 사용: {model}")
+            model = self._gpt_model()
             
             # 토큰 길이 체크
             prompt_length = len(prompt)
@@ -337,31 +573,7 @@ class ImprovedSecurityAnalyzer:
             if estimated_tokens > 8000:
                 print(f"⚠️ 프롬프트가 깁니다 ({estimated_tokens} 토큰 예상)")
             
-            # GPT는 response_format 지원 확인
-            kwargs = {
-                "model": model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a JSON API that analyzes Python code for vulnerabilities. Respond only with valid JSON. No markdown, no explanations."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "temperature": 0.2,
-                "max_tokens": 3000
-            }
-            
-            # GPT-4 모델만 response_format 지원
-            if "gpt-4" in model:
-                kwargs["response_format"] = {"type": "json_object"}
-            
-            response = self.openai_client.chat.completions.create(**kwargs)
-            
-            # GPT 응답 추출 (choices[0].message.content)
-            result_text = response.choices[0].message.content
+            result_text = timed_call('gpt', lambda: self._call_gpt(prompt, model, max_tokens=3000))
             
             print(f"📝 GPT 응답 길이: {len(result_text)}")
             
@@ -371,16 +583,315 @@ class ImprovedSecurityAnalyzer:
         except AttributeError as e:
             # GPT 응답 형식 오류 처리
             print(f"❌ GPT 응답 형식 오류: {e}")
-            if 'response' in locals():
-                print(f"응답 구조: {type(response)}")
             raise
         except json.JSONDecodeError as e:
             print(f"❌ GPT JSON 파싱 실패: {e}")
             return self._create_parse_error(str(e), result_text[:500] if 'result_text' in locals() else "")
+        except HedgeCancelled:
+            raise
         except Exception as e:
             print(f"❌ GPT 호출 실패: {e}")
             raise
 
+    def generate_details(self, vuln: Dict, code: str) -> Dict:
+        """
+        2단계 모드에서 취약점 1건의 수정 코드/설명/데이터 흐름/공격 시나리오/권장사항 생성
+        
+        Args:
+            vuln: 1단계에서 발견된 취약점 (결과가 이 dict에 채워짐)
+            code: 분석 대상 원본 코드 (# ===== File: 구분자 형식 지원)
+        
+        Returns:
+            상세 필드가 채워진 vuln
+        """
+        if not vuln.get('details_pending'):
+            return vuln
+        
+        prompt = build_vulnerability_detail_prompt(vuln, self._extract_context(code, vuln.get('location') or {}))
+        
+        try:
+            details = self._parse_json_object(self._complete(prompt, discovery_config.DETAIL_MAX_TOKENS, stage='details'))
+        except Exception as e:
+            print(f"⚠️ 상세 정보 생성 실패 ({vuln.get('type', 'Unknown')}): {e}")
+            vuln['details_error'] = str(e)
+            return vuln
+        
+        for field in DETAIL_FIELDS:
+            value = details.get(field)
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value, ensure_ascii=False, indent=2)
+            if value:
+                vuln[field] = value
+        vuln['details_pending'] = False
+        vuln.pop('details_error', None)
+        return vuln
+    
+    def generate_details_batch(self, vulnerabilities: List[Dict], code: str,
+                               max_workers: Optional[int] = None) -> List[Dict]:
+        """상세 정보가 없는 취약점들을 병렬로 채움"""
+        pending = [v for v in vulnerabilities if v.get('details_pending')]
+        if not pending:
+            return vulnerabilities
+        
+        print(f"🔧 취약점 상세 정보 생성: {len(pending)}건")
+        workers = min(max_workers or discovery_config.DETAIL_WORKERS, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(in_current_context(self.generate_details), v, code) for v in pending]
+            for future in futures:
+                future.result()
+        
+        return vulnerabilities
+    
+    def _extract_context(self, code: str, location: Dict) -> str:
+        """취약 라인 주변 코드를 라인 번호와 함께 추출"""
+        from core.ast_prefilter import split_code_by_file
+        
+        files = split_code_by_file(code)
+        target = location.get('file')
+        content = next((c for p, c in files if p == target), None)
+        if content is None:
+            content = next((c for p, c in files if target and (p.endswith(target) or target.endswith(p))), None)
+        if content is None:
+            content = files[0][1] if len(files) == 1 else ''
+        if not content:
+            return location.get('code_snippet', '')
+        
+        lines = content.splitlines()
+        line = location.get('line') if isinstance(location.get('line'), int) else 0
+        radius = discovery_config.DETAIL_CONTEXT_LINES
+        start = max(1, line - radius) if line else 1
+        end = min(len(lines), line + radius) if line else min(len(lines), radius * 2)
+        return "\n".join(f"{i:4}: {lines[i - 1]}" for i in range(start, end + 1))
+    
+    def _complete(self, prompt: str, max_tokens: int, stage: str = 'discovery') -> str:
+        """use_claude 설정에 따른 순서로 엔진 호출 (실패 시 다른 엔진으로 폴백)"""
+        engines = []
+        if self.claude_client:
+            engines.append(('claude', lambda: self._call_claude(prompt, self._claude_model(), max_tokens, stage)))
+        if self.openai_client:
+            engines.append(('gpt', lambda: self._call_gpt(prompt, self._gpt_model(), max_tokens, stage)))
+        if not self.use_claude:
+            engines.reverse()
+        
+        last_error = None
+        for name, call in engines:
+            try:
+                return call()
+            except Exception as e:
+                print(f"⚠️ {name} 호출 실패: {e}")
+                last_error = e
+        raise last_error or ValueError("사용 가능한 AI 엔진이 없습니다")
+    
+    def _parse_json_object(self, text: str) -> Dict:
+        """단일 JSON 객체 응답 파싱"""
+        text = self._clean_json_text(text)
+        start = text.find('{')
+        end = text.rfind('}')
+        if start < 0 or end <= start:
+            raise json.JSONDecodeError("JSON 객체 없음", text, 0)
+        json_text = text[start:end + 1]
+        try:
+            return json.loads(json_text)
+        except json.JSONDecodeError:
+            return json.loads(re.sub(r',\s*([}\]])', r'\1', json_text), strict=False)
+    
+    def _claude_model(self) -> str:
+        """환경변수에서 Claude 모델명 가져오기"""
+        model = os.getenv("ANTHROPIC_MODEL")
+        if not model:
+            model = "claude-3-opus-20240229"
+            print(f"⚠️ ANTHROPIC_MODEL 미설정, 기본값 사용: {model}")
+        return model
+    
+    def _gpt_model(self) -> str:
+        """환경변수에서 GPT 모델명 가져오기"""
+        model = os.getenv("OPENAI_MODEL")
+        if not model:
+            model = "gpt-4-turbo-preview"
+            print(f"⚠️ OPENAI_MODEL 미설정, 기본값 사용: {model}")
+        return model
+    
+    def _call_claude(self, prompt: str, model: str, max_tokens: int, stage: str = 'discovery',
+                     cache_prefix: Optional[str] = None) -> str:
+        """Claude 호출 후 응답 텍스트 반환 (사용량은 원장에 기록, cache_prefix는 프롬프트 캐시 대상 접두부)"""
+        request = self._claude_request(prompt, model, max_tokens, cache_prefix)
+        handle = current_cancel_handle()
+        with trace_span('llm.call', self._llm_span_attributes('anthropic', model, prompt, max_tokens)) as span:
+            start = time.perf_counter()
+            if handle is None:
+                response = self.claude_client.messages.create(**request)
+                # Claude 응답 추출 (content[0].text)
+                text = response.content[0].text
+            else:
+                response, text = self._stream_claude(request, prompt, handle)
+            self._record_usage(span, 'anthropic', model, response, time.perf_counter() - start, stage, text)
+        if handle is not None and handle.cancelled:
+            raise HedgeCancelled('claude')
+        return text
+    
+    def _call_gpt(self, prompt: str, model: str, max_tokens: int, stage: str = 'discovery') -> str:
+        """GPT 호출 후 응답 텍스트 반환 (사용량은 원장에 기록)"""
+        kwargs = self._gpt_request(prompt, model, max_tokens)
+        handle = current_cancel_handle()
+        
+        with trace_span('llm.call', self._llm_span_attributes('openai', model, prompt, max_tokens)) as span:
+            start = time.perf_counter()
+            if handle is None:
+                response = self.openai_client.chat.completions.create(**kwargs)
+                # GPT 응답 추출 (choices[0].message.content)
+                text = response.choices[0].message.content
+            else:
+                response, text = self._stream_gpt(kwargs, prompt, handle)
+            self._record_usage(span, 'openai', model, response, time.perf_counter() - start, stage, text)
+        if handle is not None and handle.cancelled:
+            raise HedgeCancelled('gpt')
+        return text
+    
+    def _stream_claude(self, request: Dict, prompt: str, handle: CancelHandle) -> Tuple[Any, str]:
+        """
+        헤징 시도용 Claude 스트리밍 호출 - 패배하면 핸들이 스트림을 닫음
+
+        Returns:
+            (usage를 담은 응답, 텍스트) - 취소됐으면 그때까지의 사용량 (출력은 받은 텍스트 기준 추정 포함)
+        """
+        parts = []
+        with self.claude_client.messages.stream(**request) as stream:
+            handle.on_cancel(stream.close)
+            try:
+                for text in stream.text_stream:
+                    parts.append(text)
+            except Exception:
+                if not handle.cancelled:
+                    raise
+            text = ''.join(parts)
+            if not handle.cancelled:
+                return stream.get_final_message(), text
+            try:
+                usage = stream.current_message_snapshot.usage
+            except AssertionError:
+                usage = None  # message_start 전에 취소됨
+        
+        print(f"✂️ Claude 스트림 취소 ({len(text)}자 수신)")
+        return {'usage': {
+            'input_tokens': usage.input_tokens if usage else self._estimate_tokens(prompt),
+            'output_tokens': max(usage.output_tokens if usage else 0, self._estimate_tokens(text)),
+            'cache_read_input_tokens': getattr(usage, 'cache_read_input_tokens', 0) or 0,
+            'cache_creation_input_tokens': getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+        }}, text
+    
+    def _stream_gpt(self, kwargs: Dict, prompt: str, handle: CancelHandle) -> Tuple[Any, str]:
+        """
+        헤징 시도용 GPT 스트리밍 호출 - 패배하면 핸들이 스트림을 닫음
+
+        Returns:
+            (usage를 담은 응답, 텍스트) - usage는 마지막 청크에만 오므로 취소됐으면 문자 수로 추정
+        """
+        parts = []
+        usage_chunk = None
+        stream = self.openai_client.chat.completions.create(
+            **kwargs, stream=True, stream_options={"include_usage": True})
+        handle.on_cancel(stream.close)
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage_chunk = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        except Exception:
+            if not handle.cancelled:
+                raise
+        finally:
+            stream.close()
+        
+        text = ''.join(parts)
+        if usage_chunk is not None:
+            return usage_chunk, text
+        print(f"✂️ GPT 스트림 취소 ({len(text)}자 수신)")
+        return {'usage': {
+            'prompt_tokens': self._estimate_tokens(GPT_SYSTEM_PROMPT + prompt),
+            'completion_tokens': self._estimate_tokens(text),
+        }}, text
+    
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """usage를 받지 못한 취소 스트림의 토큰 수 추정 (문자 수 기준)"""
+        from core.prompt_compactor import CHARS_PER_TOKEN
+        return int(len(text) / CHARS_PER_TOKEN) + 1 if text else 0
+    
+    @staticmethod
+    def _claude_request(prompt: str, model: str, max_tokens: int, cache_prefix: Optional[str] = None) -> Dict:
+        """Claude messages.create 요청 본문 (배치 API params와 공유)"""
+        # 고정 접두부를 별도 블록으로 나눠 cache_control 표시 (두 블록을 이어 붙이면 원래 프롬프트와 같음)
+        # 접두부가 모델별 최소 캐시 길이(1024~4096 토큰)보다 짧으면 캐시 없이 그대로 처리됨
+        content = prompt
+        if cache_prefix and len(prompt) > len(cache_prefix) and prompt.startswith(cache_prefix):
+            content = [
+                {"type": "text", "text": cache_prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt[len(cache_prefix):]}
+            ]
+        return {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": 0.2,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ]
+        }
+    
+    @staticmethod
+    def _gpt_request(prompt: str, model: str, max_tokens: int) -> Dict:
+        """GPT chat.completions.create 요청 본문 (배치 API body와 공유)"""
+        # OpenAI는 1024 토큰 이상 같은 접두부를 자동 캐시 - 시스템 프롬프트와 고정 지시문이 항상 맨 앞에 오도록 유지
+        kwargs = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": GPT_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.2,
+            "max_tokens": max_tokens
+        }
+        
+        # GPT-4 모델만 response_format 지원
+        if "gpt-4" in model:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+    
+    @staticmethod
+    def _record_usage(span, provider: str, model: str, response, latency_s: float, stage: str, text: str):
+        """응답 usage를 span 속성과 사용량 원장에 기록"""
+        usage = extract_usage(provider, response)
+        span.set_attributes({
+            'llm.stage': stage,
+            'llm.input_tokens': usage['input_tokens'],
+            'llm.output_tokens': usage['output_tokens'],
+            'llm.cache_read_tokens': usage['cache_read_tokens'],
+            'llm.cache_write_tokens': usage['cache_write_tokens'],
+            'response.bytes': len((text or '').encode('utf-8'))
+        })
+        if usage['cache_read_tokens']:
+            print(f"💾 프롬프트 캐시 적중: {usage['cache_read_tokens']:,} 토큰")
+        record_llm_usage(provider, model, response, latency_s, stage)
+    
+    @staticmethod
+    def _llm_span_attributes(provider: str, model: str, prompt: str, max_tokens: int) -> Dict:
+        """LLM 호출 span 공통 속성"""
+        return {
+            'llm.provider': provider,
+            'llm.model': model,
+            'llm.max_tokens': max_tokens,
+            'prompt.bytes': len(prompt.encode('utf-8'))
+        }
+    
     def _create_parse_error(self, error_msg: str, response_snippet: str) -> List[Dict]:
         """파싱 에러 객체 생성"""
         return [{
@@ -623,14 +1134,21 @@ class ImprovedSecurityAnalyzer:
         
         print("📚 RAG로 공식 가이드라인 근거 찾는 중...")
         
+        # 1. 타입별 중복 제거 후 일괄 검색 (KISIA 타입 단위 캐시 + 배치 쿼리)
+        try:
+            evidence_by_type = self.rag.search_vulnerability_evidence_batch(
+                [v.get('type', '') for v in vulnerabilities]
+            )
+        except Exception as e:
+            print(f"⚠️ RAG 근거 검색 실패: {e}")
+            return vulnerabilities
+        
         for vuln in vulnerabilities:
             vuln_type = vuln.get('type', '')
             if not vuln_type:
                 continue
 
-            # 1. 개선된 RAG 검색 실행
-            # search_vulnerability_evidence가 매핑과 메타데이터 필터링을 모두 처리
-            results = self.rag.search_vulnerability_evidence(vuln_type)
+            results = evidence_by_type.get(vuln_type)
             
             # 2. 검색 결과가 있는지 확인
             if results and results.get('vulnerability'):
@@ -665,166 +1183,20 @@ class ImprovedSecurityAnalyzer:
 
     def _extract_description_only(self, text: str) -> str:
         """텍스트에서 코드 부분을 제거하고 설명만 추출"""
-        lines = text.split('\n')
-        cleaned_lines = []
-        in_code_block = False
-        
-        for line in lines:
-            # 코드 블록 시작/끝 표시 감지
-            if any(marker in line for marker in [
-                '[안전하지 않은 코드]', '[안전한 코드]', 
-                '안전하지 않은 코드 예시', '안전한 코드 예시',
-                '```python', '```', 'def ', 'class ', 'import '
-            ]):
-                in_code_block = True
-                continue
-            
-            # 코드 라인 번호 패턴 (예: "1:", "2:" 등)
-            if re.match(r'^\d+:', line.strip()):
-                in_code_block = True
-                continue
-            
-            # 권장사항이나 설명 섹션 시작
-            if any(marker in line for marker in ['[권장사항]', '[설명]', '[취약점']):
-                in_code_block = False
-            
-            # 코드 블록이 아닌 경우만 추가
-            if not in_code_block and line.strip():
-                # 추가 필터링: 코드처럼 보이는 라인 제외
-                if not any(pattern in line for pattern in ['__', 'self.', '()', '{}', '[]', '= ']):
-                    cleaned_lines.append(line.strip())
-        
-        # 연속된 텍스트로 결합
-        cleaned_text = ' '.join(cleaned_lines)
-        
-        # 중복 공백 제거
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
-        
-        # 섹션 제목과 설명 부분만 추출
-        if '[설명]' in cleaned_text:
-            parts = cleaned_text.split('[설명]')
-            if len(parts) > 1:
-                cleaned_text = parts[1].split('[')[0].strip()
-        
-        return cleaned_text
+        return relevance_scorer.extract_description(text)
 
     def _extract_keywords_from_description(self, description: str) -> List[str]:
         """설명에서 보안 관련 키워드 추출"""
-        keywords = []
-        
-        # 보안 관련 중요 키워드
-        security_terms = [
-            '암호화', '해시', '패스워드', '비밀번호', '시크릿', 'secret', 'key',
-            'SQL', 'XSS', 'CSRF', '인젝션', 'injection', '세션', 'session',
-            '인증', '인가', 'authentication', 'authorization', '토큰', 'token',
-            '파일', 'file', '경로', 'path', '명령어', 'command', 'os',
-            '직렬화', 'serialize', 'pickle', 'yaml', 'eval', 'exec'
-        ]
-        
-        description_lower = description.lower()
-        for term in security_terms:
-            if term.lower() in description_lower:
-                keywords.append(term)
-                if len(keywords) >= 3:  # 최대 3개
-                    break
-        
-        return keywords
+        return relevance_scorer.extract_keywords(description)
 
     def _find_most_relevant_document(self, documents: List[str], metadatas: List[Dict], 
                                     vuln_type: str, standard_type: str) -> Optional[int]:
         """가장 관련성 높은 문서 인덱스 찾기"""
-        if not documents:
-            return None
-        
-        best_score = -1
-        best_idx = 0
-        
-        for i, (doc, meta) in enumerate(zip(documents, metadatas if metadatas else [{}]*len(documents))):
-            score = 0
-            
-            # 1. 메타데이터의 vulnerability_types 확인
-            if meta and 'vulnerability_types' in meta:
-                doc_vuln_types = meta['vulnerability_types'].lower()
-                if standard_type.lower() in doc_vuln_types:
-                    score += 3  # 정확한 타입 매칭
-                elif vuln_type.lower() in doc_vuln_types:
-                    score += 2  # 원본 타입 매칭
-            
-            # 2. 문서 내용에 취약점 타입 언급 확인
-            doc_lower = doc.lower()
-            if vuln_type.lower() in doc_lower:
-                score += 1
-            
-            # 3. 특정 키워드 매칭 (취약점별)
-            if 'hardcoded' in vuln_type.lower() or 'secret' in vuln_type.lower():
-                if any(word in doc_lower for word in ['환경변수', '환경 변수', 'environment', 'env', '하드코딩', '노출']):
-                    score += 2
-                if any(word in doc_lower for word in ['rsa', '암호화 키', '대칭키']):
-                    score -= 1  # RSA 관련 내용은 감점 (Hardcoded Secret과 관련 낮음)
-            
-            elif 'sql' in vuln_type.lower():
-                if any(word in doc_lower for word in ['파라미터', 'parameter', '바인딩', 'binding', 'prepared']):
-                    score += 2
-            
-            elif 'xss' in vuln_type.lower():
-                if any(word in doc_lower for word in ['이스케이프', 'escape', 'sanitize', '삭제', 'html']):
-                    score += 2
-            
-            if score > best_score:
-                best_score = score
-                best_idx = i
-        
-        # 최소 점수 미달시 None 반환
-        if best_score < 1:
-            return None
-        
-        return best_idx
+        return relevance_scorer.find_most_relevant(documents, metadatas, vuln_type, standard_type)
 
     def _calculate_relevance_score(self, content: str, vuln_type: str, description: str) -> float:
         """컨텐츠와 취약점 간 관련성 점수 계산 (0~1)"""
-        score = 0.0
-        content_lower = content.lower()
-        
-        # 1. 취약점 타입 언급 확인 (30%)
-        if vuln_type.lower() in content_lower:
-            score += 0.3
-        
-        # 2. 취약점별 특정 키워드 확인 (50%)
-        keyword_score = 0.0
-        
-        if 'hardcoded' in vuln_type.lower() or 'secret' in vuln_type.lower():
-            keywords = ['환경변수', '환경 변수', 'environment', '.env', 'config', '설정 파일', '하드코딩']
-            matches = sum(1 for k in keywords if k in content_lower)
-            keyword_score = min(matches * 0.1, 0.5)
-        
-        elif 'sql' in vuln_type.lower() or 'injection' in vuln_type.lower():
-            keywords = ['파라미터', 'parameter', '바인딩', 'binding', 'prepared', 'statement', '?', '%s']
-            matches = sum(1 for k in keywords if k in content_lower)
-            keyword_score = min(matches * 0.1, 0.5)
-        
-        elif 'xss' in vuln_type.lower():
-            keywords = ['이스케이프', 'escape', 'sanitize', '삭제', 'html', 'script', '스크립트']
-            matches = sum(1 for k in keywords if k in content_lower)
-            keyword_score = min(matches * 0.1, 0.5)
-        
-        else:
-            # 일반적인 보안 키워드
-            keywords = ['취약', '공격', '방어', '보안', '안전', '위험', '검증', '확인']
-            matches = sum(1 for k in keywords if k in content_lower)
-            keyword_score = min(matches * 0.08, 0.5)
-        
-        score += keyword_score
-        
-        # 3. 설명과의 유사성 (20%)
-        if description:
-            desc_words = set(description.lower().split())
-            content_words = set(content_lower.split())
-            if desc_words and content_words:
-                intersection = desc_words & content_words
-                similarity = len(intersection) / min(len(desc_words), 20)  # 최대 20단어 비교
-                score += min(similarity * 0.2, 0.2)
-        
-        return min(score, 1.0)
+        return relevance_scorer.relevance_score(content, vuln_type, description)
         
     def _calculate_security_score(self, vulnerabilities: List[Dict]) -> int:
         """보안 점수 계산"""
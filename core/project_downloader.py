@@ -14,6 +14,8 @@ import re
 import subprocess
 import json
 
+from core.telemetry import telemetry, trace_span
+
 try:
     import git
     GIT_AVAILABLE = True
@@ -166,7 +168,11 @@ class SmartProjectDownloader:
             self.temp_dir = tempfile.mkdtemp(prefix="smart_analyzer_")
             
             # ZIP 다운로드 방법 사용 (더 빠르고 효율적)
-            return self._download_as_zip(owner, repo, branch, subpath)
+            with trace_span('ingest.download', {'repo.owner': owner, 'repo.name': repo,
+                                                'repo.branch': branch, 'repo.subpath': subpath}) as span:
+                result = self._download_as_zip(owner, repo, branch, subpath)
+                span.set_attribute('ingest.success', result[0])
+            return result
                 
         except Exception as e:
             return False, f"다운로드 실패: {str(e)}", None
@@ -317,6 +323,7 @@ class SmartProjectDownloader:
         
         return extract_path
     
+    @telemetry.traced('ingest.collect_files')
     def smart_analyze_project_files(self, project_path: Path, include_tests: bool = False) -> Dict:
         """스마트한 프로젝트 파일 분석 - 사용자 코드 중심"""
         
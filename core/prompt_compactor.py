@@ -0,0 +1,305 @@
+# core/prompt_compactor.py
+"""
+LLM 프롬프트용 코드 압축
+- docstring/주석 제거, 공백 라인 정리 (원본 라인 번호 맵 유지)
+- 동일 파일은 해시로 한 번만 전송
+- tiktoken으로 토큰 수를 세고 파일별 예산 사용량 보고
+"""
+import ast
+import hashlib
+import io
+import re
+import tokenize
+from typing import Dict, List, Optional, Tuple
+
+from config import compaction_config
+from core.ast_prefilter import split_code_by_file, join_code_files
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# AST 사전 필터가 남기는 단위 헤더: 다음 줄부터 원본 라인 번호가 이어짐
+UNIT_HEADER_PATTERN = re.compile(r'^\s*# --- .* \(원본 (\d+)-(\d+)행\) ---\s*$')
+
+# tiktoken이 없을 때의 문자당 토큰 추정치
+CHARS_PER_TOKEN = 3.5
+
+
+class PromptCompactor:
+    """프롬프트 코드 압축기"""
+
+    def __init__(self, max_tokens: Optional[int] = None,
+                 strip_docstrings: Optional[bool] = None,
+                 strip_comments: Optional[bool] = None):
+        """
+        Args:
+            max_tokens: 코드에 할당할 최대 토큰 수 (None이면 config 설정 따름)
+            strip_docstrings: docstring 제거 여부
+            strip_comments: 주석 제거 여부
+        """
+        self.max_tokens = max_tokens or compaction_config.MAX_CODE_TOKENS
+        self.strip_docstrings = compaction_config.STRIP_DOCSTRINGS if strip_docstrings is None else strip_docstrings
+        self.strip_comments = compaction_config.STRIP_COMMENTS if strip_comments is None else strip_comments
+        self.encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self.encoding = tiktoken.get_encoding(compaction_config.TOKEN_ENCODING)
+            except Exception as e:
+                print(f"⚠️ tiktoken 인코딩 로드 실패, 추정치 사용: {e}")
+
+    def count_tokens(self, text: str) -> int:
+        """토큰 수 계산 (tiktoken 미설치 시 문자 수 기반 추정)"""
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return int(len(text) / CHARS_PER_TOKEN) + 1
+
+    # ------------------------------------------------------------------
+    # 파일 단위 압축
+    # ------------------------------------------------------------------
+
+    def compact_file(self, content: str, source_lines: Optional[List[int]] = None) -> Tuple[str, List[int]]:
+        """
+        단일 파일 압축
+
+        Args:
+            content: 파일 코드
+            source_lines: content 각 라인의 원본 라인 번호 (AST 사전 필터 결과일 때, 없으면 단위 헤더로 추정)
+
+        Returns:
+            (압축된 코드, 압축 코드 각 라인의 원본 라인 번호 목록)
+        """
+        lines = content.splitlines()
+        drop_rows = set()
+        replace_rows: Dict[int, str] = {}
+        protected_rows = set()
+
+        try:
+            tokens = list(tokenize.generate_tokens(io.StringIO(content).readline))
+        except (tokenize.TokenError, IndentationError, SyntaxError):
+            tokens = None
+
+        if tokens is not None:
+            for token in tokens:
+                # 여러 줄 문자열 내부는 그대로 유지
+                if token.type == tokenize.STRING and token.end[0] > token.start[0]:
+                    protected_rows.update(range(token.start[0] + 1, token.end[0] + 1))
+                elif token.type == tokenize.COMMENT and self.strip_comments:
+                    if UNIT_HEADER_PATTERN.match(token.line):
+                        continue
+                    row, col = token.start
+                    replace_rows[row] = lines[row - 1][:col]
+        elif self.strip_comments:
+            for row, line in enumerate(lines, 1):
+                if line.lstrip().startswith('#') and not UNIT_HEADER_PATTERN.match(line):
+                    drop_rows.add(row)
+
+        if self.strip_docstrings:
+            for start, end, filler in self._docstring_ranges(content, lines):
+                rows = range(start, end + 1)
+                drop_rows.update(rows)
+                protected_rows.difference_update(rows)
+                if filler is not None:
+                    drop_rows.discard(start)
+                    replace_rows[start] = filler
+
+        out_lines = []
+        line_map = []
+        anchor = None  # (단위 헤더 라인, 원본 시작 라인)
+        for row, line in enumerate(lines, 1):
+            header = UNIT_HEADER_PATTERN.match(line)
+            if header:
+                anchor = (row, int(header.group(1)))
+                continue
+            if row in drop_rows:
+                continue
+            if row not in protected_rows:
+                line = replace_rows.get(row, line).rstrip()
+                if not line.strip():
+                    continue
+            out_lines.append(line)
+            if source_lines is not None and row <= len(source_lines):
+                line_map.append(source_lines[row - 1])
+            else:
+                line_map.append(anchor[1] + row - anchor[0] - 1 if anchor else row)
+
+        return "\n".join(out_lines), line_map
+
+    def _docstring_ranges(self, content: str, lines: List[str]) -> List[Tuple[int, int, Optional[str]]]:
+        """독립된 줄에 위치한 docstring 범위 (시작, 끝, 대체 문장)"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return []
+
+        ranges = []
+        for node in ast.walk(tree):
+            if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            if not node.body:
+                continue
+            first = node.body[0]
+            if not (isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant)
+                    and isinstance(first.value.value, str)):
+                continue
+            # 같은 줄에 다른 코드가 있으면 건드리지 않음
+            prefix = lines[first.lineno - 1][:first.col_offset]
+            suffix = lines[first.end_lineno - 1][first.end_col_offset:]
+            if prefix.strip() or suffix.strip().lstrip(';').strip():
+                continue
+            # 본문이 docstring뿐이면 구문 유지를 위해 ...로 대체
+            filler = None
+            if len(node.body) == 1 and not isinstance(node, ast.Module):
+                filler = prefix + "..."
+            ranges.append((first.lineno, first.end_lineno, filler))
+        return ranges
+
+    # ------------------------------------------------------------------
+    # 전체 코드 압축 + 예산 적용
+    # ------------------------------------------------------------------
+
+    def compact(self, code: str, source_maps: Optional[Dict[str, List[int]]] = None) -> Dict:
+        """
+        결합 코드 전체 압축
+
+        Args:
+            code: 결합 코드
+            source_maps: {경로: 각 라인의 원본 라인 번호} (AST 사전 필터의 line_maps)
+
+        Returns:
+            {
+                'code': 압축된 결합 코드,
+                'line_maps': {경로: [원본 라인 번호]},
+                'duplicates': {중복 경로: 대표 경로},
+                'files': [파일별 예산 보고],
+                'stats': {...}
+            }
+        """
+        has_markers = '# ===== File:' in code
+        files = split_code_by_file(code)
+
+        seen_hashes: Dict[str, str] = {}
+        duplicates: Dict[str, str] = {}
+        line_maps: Dict[str, List[int]] = {}
+        kept: List[Tuple[str, str]] = []
+        report = []
+        used_tokens = 0
+        original_tokens_total = 0
+
+        for path, content in files:
+            original_tokens = self.count_tokens(content)
+            original_tokens_total += original_tokens
+            compacted, line_map = self.compact_file(content, (source_maps or {}).get(path))
+            entry = {
+                'path': path,
+                'original_tokens': original_tokens,
+                'compact_tokens': 0,
+                'budget_share': 0.0,
+                'status': 'included'
+            }
+
+            digest = hashlib.sha1(compacted.encode('utf-8')).hexdigest()
+            if compacted and digest in seen_hashes:
+                duplicates[path] = seen_hashes[digest]
+                entry['status'] = 'duplicate'
+                entry['duplicate_of'] = seen_hashes[digest]
+                report.append(entry)
+                continue
+            seen_hashes[digest] = path
+
+            tokens = self.count_tokens(compacted)
+            remaining = self.max_tokens - used_tokens
+            if remaining <= 0:
+                entry['status'] = 'skipped'
+                entry['compact_tokens'] = tokens
+                report.append(entry)
+                continue
+            if tokens > remaining:
+                compacted, line_map = self._truncate(compacted, line_map, remaining)
+                tokens = self.count_tokens(compacted)
+                entry['status'] = 'truncated'
+
+            used_tokens += tokens
+            entry['compact_tokens'] = tokens
+            entry['budget_share'] = round(tokens / self.max_tokens, 3)
+            kept.append((path, compacted))
+            line_maps[path] = line_map
+            report.append(entry)
+
+        compact_code = join_code_files(kept) if has_markers else (kept[0][1] if kept else '')
+
+        stats = {
+            'original_chars': len(code),
+            'compact_chars': len(compact_code),
+            'original_tokens': original_tokens_total,
+            'compact_tokens': used_tokens,
+            'budget_tokens': self.max_tokens,
+            'budget_used': round(used_tokens / self.max_tokens, 3),
+            'duplicate_files': len(duplicates),
+            'truncated_files': sum(1 for e in report if e['status'] in ('truncated', 'skipped')),
+            'token_counter': 'tiktoken' if self.encoding is not None else 'estimate'
+        }
+        print(f"🗜️ 프롬프트 압축: {original_tokens_total:,} → {used_tokens:,} 토큰 "
+              f"(예산 {self.max_tokens:,}의 {stats['budget_used'] * 100:.0f}%, 중복 파일 {len(duplicates)}개)")
+
+        return {
+            'code': compact_code,
+            'line_maps': line_maps,
+            'duplicates': duplicates,
+            'files': report,
+            'stats': stats
+        }
+
+    def _truncate(self, code: str, line_map: List[int], budget: int) -> Tuple[str, List[int]]:
+        """토큰 예산에 맞게 라인 단위로 자르기"""
+        lines = code.splitlines()
+        total = 0
+        keep = 0
+        for line in lines:
+            total += self.count_tokens(line + "\n")
+            if total > budget:
+                break
+            keep += 1
+        return "\n".join(lines[:keep]) + "\n# ... (토큰 예산 초과로 잘림)", line_map[:keep]
+
+    # ------------------------------------------------------------------
+    # 결과 위치 복원
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def remap_locations(vulnerabilities: List[Dict], compaction: Dict) -> List[Dict]:
+        """
+        압축 코드 기준 라인 번호를 원본 기준으로 되돌리고 중복 파일에 결과 복제
+
+        압축 없이 사전 필터만 적용했다면 {'line_maps': 사전 필터 line_maps}를 넘김
+        """
+        line_maps = compaction.get('line_maps', {})
+        single_path = next(iter(line_maps)) if len(line_maps) == 1 else None
+
+        remapped = []
+        for vuln in vulnerabilities:
+            location = vuln.get('location')
+            if isinstance(location, dict):
+                path = location.get('file')
+                line_map = line_maps.get(path) or (line_maps.get(single_path) if single_path else None)
+                line = location.get('line')
+                if line_map and isinstance(line, int) and 0 < line <= len(line_map):
+                    location['line'] = line_map[line - 1]
+            remapped.append(vuln)
+
+            for dup_path, origin in compaction.get('duplicates', {}).items():
+                if isinstance(location, dict) and location.get('file') == origin:
+                    clone = dict(vuln)
+                    clone['location'] = dict(location, file=dup_path)
+                    remapped.append(clone)
+        return remapped
+
+
+# 간단한 사용 헬퍼 함수
+def compact_code(code: str, max_tokens: int = None) -> Dict:
+    """코드 압축 헬퍼 함수"""
+    return PromptCompactor(max_tokens=max_tokens).compact(code)
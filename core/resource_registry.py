@@ -0,0 +1,216 @@
+# core/resource_registry.py
+"""
+프로세스 공용 리소스 레지스트리
+- Anthropic/OpenAI 클라이언트, ImprovedRAGSearch, SimpleRAG를 최초 사용 시 한 번만 생성
+- Streamlit 세션과 헤드리스 호출자(브랜치 분석, 헬퍼 함수)가 같은 인스턴스를 공유
+- 주기적 상태 점검, 실패 시 재연결, API 키 변경 시 재생성
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import registry_config
+
+
+class _Entry:
+    """레지스트리 항목 상태"""
+
+    def __init__(self, factory: Callable[[], Any], health_check: Optional[Callable[[Any], bool]],
+                 version: Optional[Callable[[], str]]):
+        self.factory = factory
+        self.health_check = health_check
+        self.version = version
+        self.lock = threading.Lock()
+        self.instance = None
+        self.instance_version = None
+        self.created_at = None
+        self.last_check = 0.0
+        self.failed_at = None
+        self.last_error = None
+        self.reconnects = 0
+
+
+class ResourceRegistry:
+    """스레드 안전한 지연 초기화 레지스트리"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(self, name: str, factory: Callable[[], Any],
+                 health_check: Optional[Callable[[Any], bool]] = None,
+                 version: Optional[Callable[[], str]] = None):
+        """
+        Args:
+            name: 리소스 이름
+            factory: 인스턴스 생성 함수 (실패 시 예외)
+            health_check: 인스턴스가 정상인지 확인 (False/예외면 재생성)
+            version: 값이 바뀌면 재생성 (예: API 키 지문)
+        """
+        with self._lock:
+            self._entries[name] = _Entry(factory, health_check, version)
+
+    def get(self, name: str) -> Any:
+        """인스턴스 반환 (생성 실패 시 None, 재시도 간격 내에는 다시 시도하지 않음)"""
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"등록되지 않은 리소스: {name}")
+
+        with entry.lock:
+            version = entry.version() if entry.version else None
+            if entry.instance is not None:
+                if version != entry.instance_version:
+                    print(f"🔄 {name} 설정 변경 감지, 재생성")
+                    self._discard(entry)
+                elif not self._is_healthy(name, entry):
+                    print(f"🔄 {name} 상태 점검 실패, 재연결")
+                    self._discard(entry)
+                    entry.reconnects += 1
+                else:
+                    return entry.instance
+
+            if entry.failed_at and time.time() - entry.failed_at < registry_config.RETRY_INTERVAL \
+                    and version == entry.instance_version:
+                return None
+
+            started = time.time()
+            try:
+                entry.instance = entry.factory()
+            except Exception as e:
+                print(f"⚠️ {name} 초기화 실패: {e}")
+                entry.failed_at = time.time()
+                entry.last_error = str(e)
+                entry.instance_version = version
+                return None
+
+            entry.instance_version = version
+            entry.created_at = time.time()
+            entry.last_check = entry.created_at
+            entry.failed_at = None
+            entry.last_error = None
+            print(f"📦 {name} 초기화 ({entry.created_at - started:.2f}초, 프로세스 공용)")
+            return entry.instance
+
+    def invalidate(self, name: str = None):
+        """인스턴스 폐기 - 다음 get에서 재생성 (호출 오류 발생 시 사용)"""
+        names = [name] if name else list(self._entries)
+        for n in names:
+            entry = self._entries.get(n)
+            if entry:
+                with entry.lock:
+                    self._discard(entry)
+                    entry.failed_at = None
+
+    def status(self) -> Dict[str, Dict]:
+        """리소스별 상태 요약"""
+        return {
+            name: {
+                'initialized': entry.instance is not None,
+                'created_at': entry.created_at,
+                'reconnects': entry.reconnects,
+                'last_error': entry.last_error
+            }
+            for name, entry in self._entries.items()
+        }
+
+    def _is_healthy(self, name: str, entry: _Entry) -> bool:
+        if not entry.health_check:
+            return True
+        now = time.time()
+        if now - entry.last_check < registry_config.HEALTH_CHECK_INTERVAL:
+            return True
+        entry.last_check = now
+        try:
+            return bool(entry.health_check(entry.instance))
+        except Exception as e:
+            print(f"⚠️ {name} 상태 점검 오류: {e}")
+            entry.last_error = str(e)
+            return False
+
+    @staticmethod
+    def _discard(entry: _Entry):
+        # 다른 세션이 아직 사용 중일 수 있으므로 close하지 않고 참조만 끊음
+        entry.instance = None
+        entry.created_at = None
+
+
+# ============================================================================
+# 기본 리소스 등록
+# ============================================================================
+
+def _env_fingerprint(*names: str) -> Callable[[], str]:
+    """환경 변수 값이 바뀌었는지 판별할 지문 (키 자체는 보관하지 않음)"""
+    def fingerprint() -> str:
+        joined = "|".join(os.getenv(n, "") for n in names)
+        return hashlib.sha256(joined.encode('utf-8')).hexdigest()[:16]
+    return fingerprint
+
+
+def _create_anthropic():
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY 미설정")
+    from anthropic import Anthropic
+    return Anthropic(api_key=api_key)
+
+
+def _create_openai():
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY 미설정")
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+
+def _client_open(client) -> bool:
+    is_closed = getattr(client, 'is_closed', None)
+    return not is_closed() if callable(is_closed) else True
+
+
+def _create_improved_rag():
+    from rag.improved_rag_search import ImprovedRAGSearch
+    return ImprovedRAGSearch()
+
+
+def _improved_rag_alive(rag) -> bool:
+    return all(collection.count() >= 0 for collection in rag.collections.values())
+
+
+def _create_simple_rag():
+    from rag.simple_rag import SimpleRAG
+    return SimpleRAG()
+
+
+def _simple_rag_alive(rag) -> bool:
+    if rag.chroma_available and rag.collection is not None:
+        rag.collection.count()
+    return _client_open(rag.client)
+
+
+registry = ResourceRegistry()
+registry.register('anthropic', _create_anthropic, _client_open, _env_fingerprint("ANTHROPIC_API_KEY"))
+registry.register('openai', _create_openai, _client_open, _env_fingerprint("OPENAI_API_KEY"))
+registry.register('improved_rag', _create_improved_rag, _improved_rag_alive)
+registry.register('simple_rag', _create_simple_rag, _simple_rag_alive, _env_fingerprint("OPENAI_API_KEY"))
+
+
+def get_anthropic_client():
+    """공용 Anthropic 클라이언트 (키 미설정/실패 시 None)"""
+    return registry.get('anthropic')
+
+
+def get_openai_client():
+    """공용 OpenAI 클라이언트 (키 미설정/실패 시 None)"""
+    return registry.get('openai')
+
+
+def get_improved_rag():
+    """공용 ImprovedRAGSearch (벡터 DB 없으면 None)"""
+    return registry.get('improved_rag')
+
+
+def get_simple_rag():
+    """공용 SimpleRAG (초기화 실패 시 None)"""
+    return registry.get('simple_rag')
@@ -0,0 +1,869 @@
+# core/taint_analyzer.py
+"""
+오프라인 정적 오염(taint) 분석 엔진
+- ast 기반 함수 내/함수 간 데이터 흐름 추적
+- 소스/새니타이저/싱크 카탈로그는 KISIA 가이드라인 분류 기준
+- ImprovedSecurityAnalyzer와 동일한 결과 형식, 네트워크 불필요
+"""
+import ast
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from core.ast_prefilter import (
+    split_code_by_file,
+    get_call_name,
+    collect_import_aliases,
+    resolve_call_name,
+    is_request_source,
+)
+from config import rag_config
+from rag.kisia_vulnerability_mapping import KISIAVulnerabilityMapper
+
+# ============================================================================
+# 소스 / 새니타이저 / 싱크 카탈로그 (KISIA 타입 기준)
+# ============================================================================
+
+# 외부 입력을 반환하는 호출
+SOURCE_CALLS = {
+    'input': 'input()',
+    'raw_input': 'raw_input()',
+    'sys.stdin.read': 'sys.stdin',
+    'sys.stdin.readline': 'sys.stdin',
+}
+
+# 모든 취약점 유형에 대해 오염을 제거하는 형변환
+UNIVERSAL_SANITIZERS = {'int', 'float', 'bool', 'len', 'abs', 'round', 'uuid.UUID', 'hash'}
+
+# KISIA 타입별 카탈로그 (키는 KISIAVulnerabilityMapper의 KISIA 타입, 명칭/섹션/권장사항은 매퍼와 가이드라인에서 조회)
+#   sinks: 호출 이름(별칭 해석 후) → 검사할 인자 위치
+#   methods: 메소드명 → 검사할 인자 위치 (수신 객체와 무관)
+#   shell_sinks: shell=True이거나 명령이 문자열일 때만 싱크 (인자 목록이면 실행 파일 자리만 검사)
+#   sanitizers: 해당 유형에 대해서만 오염을 제거하는 호출
+TAINT_CATALOG = {
+    'SQL_Injection': {
+        'methods': {'execute': 0, 'executemany': 0, 'executescript': 0, 'raw': 0, 'extra': 0},
+        'sanitizers': set(),
+        'severity': 'CRITICAL',
+    },
+    'Code_Injection': {
+        'sinks': {'eval': 0, 'exec': 0, 'compile': 0, '__import__': 0, 'importlib.import_module': 0},
+        'sanitizers': {'ast.literal_eval'},
+        'severity': 'CRITICAL',
+    },
+    'Command_Injection': {
+        'sinks': {
+            'os.system': 0, 'os.popen': 0, 'os.execl': 0, 'os.execvp': 0,
+            'subprocess.getoutput': 0, 'subprocess.getstatusoutput': 0,
+        },
+        'shell_sinks': {
+            'subprocess.call', 'subprocess.run', 'subprocess.Popen',
+            'subprocess.check_call', 'subprocess.check_output',
+        },
+        'sanitizers': {'shlex.quote', 'pipes.quote'},
+        'severity': 'CRITICAL',
+    },
+    'Path_Traversal': {
+        'sinks': {
+            'open': 0, 'io.open': 0, 'os.remove': 0, 'os.unlink': 0, 'os.rmdir': 0,
+            'shutil.rmtree': 0, 'shutil.copy': 0, 'shutil.move': 0,
+            'flask.send_file': 0, 'flask.send_from_directory': 1,
+        },
+        'sanitizers': {
+            'os.path.basename', 'werkzeug.utils.secure_filename', 'secure_filename',
+        },
+        'severity': 'HIGH',
+    },
+    'XSS': {
+        'sinks': {
+            'flask.render_template_string': 0, 'render_template_string': 0,
+            'markupsafe.Markup': 0, 'flask.Markup': 0,
+            'django.utils.safestring.mark_safe': 0, 'mark_safe': 0,
+            'django.http.HttpResponse': 0, 'flask.make_response': 0,
+        },
+        'sanitizers': {
+            'html.escape', 'markupsafe.escape', 'flask.escape', 'cgi.escape',
+            'bleach.clean', 'django.utils.html.escape',
+        },
+        'severity': 'HIGH',
+    },
+    'Open_Redirect': {
+        'sinks': {'flask.redirect': 0, 'redirect': 0, 'django.shortcuts.redirect': 0,
+                  'django.http.HttpResponseRedirect': 0},
+        'sanitizers': set(),
+        'severity': 'MEDIUM',
+    },
+    'SSRF': {
+        'sinks': {
+            'requests.get': 0, 'requests.post': 0, 'requests.put': 0, 'requests.delete': 0,
+            'requests.head': 0, 'requests.request': 1, 'urllib.request.urlopen': 0,
+            'httpx.get': 0, 'httpx.post': 0,
+        },
+        'sanitizers': set(),
+        'severity': 'HIGH',
+    },
+    'Unsafe_Deserialization': {
+        'sinks': {
+            'pickle.loads': 0, 'pickle.load': 0, 'cPickle.loads': 0, 'dill.loads': 0,
+            'marshal.loads': 0, 'jsonpickle.decode': 0, 'yaml.load': 0, 'yaml.unsafe_load': 0,
+        },
+        'sanitizers': set(),
+        'severity': 'CRITICAL',
+    },
+    'XXE': {
+        'sinks': {
+            'lxml.etree.fromstring': 0, 'lxml.etree.parse': 0,
+            'xml.etree.ElementTree.fromstring': 0, 'xml.dom.minidom.parseString': 0,
+        },
+        'sanitizers': {'defusedxml.ElementTree.fromstring'},
+        'severity': 'HIGH',
+    },
+    'XML_Injection': {
+        'methods': {'xpath': 0},
+        'sanitizers': set(),
+        'severity': 'HIGH',
+    },
+    'LDAP_Injection': {
+        'methods': {'search_s': 2, 'search_ext_s': 2},
+        'sanitizers': {'ldap.filter.escape_filter_chars', 'escape_filter_chars'},
+        'severity': 'HIGH',
+    },
+    'HTTP_Response_Splitting': {
+        # 싱크는 응답 헤더 대입문 (_assign 에서 검사)
+        'sanitizers': set(),
+        'severity': 'MEDIUM',
+    },
+    'Format_String': {
+        # 외부 입력 자체가 포맷 문자열로 쓰이는 경우 (수신 객체 검사)
+        'receiver_methods': {'format', 'format_map'},
+        'sanitizers': set(),
+        'severity': 'MEDIUM',
+    },
+}
+
+# 수신 객체에 인자의 오염을 전파하는 컨테이너 메소드
+CONTAINER_MUTATORS = {'append', 'extend', 'insert', 'add', 'update', 'setdefault', 'write'}
+
+# 라우트 함수에서 오염된 값을 그대로 반환하면 XSS
+ROUTE_DECORATOR_ATTRS = {'route', 'get', 'post', 'put', 'delete', 'patch', 'api_view'}
+
+_PARAM_PREFIX = 'param:'
+_MAX_PATH = 8
+_MAX_SUMMARY_ROUNDS = 6  # 파일 간 요약 전파 반복 횟수 상한 (호출 체인 깊이)
+
+
+# ============================================================================
+# 오염 값 표현
+#   {(label, sanitized_types): path}
+#   label: 소스 설명 또는 'param:<이름>' (함수 요약용 기호 오염)
+#   sanitized_types: 이미 새니타이즈된 KISIA 타입 집합
+#   path: 데이터 흐름 경로 (변수/호출 이름 튜플)
+# ============================================================================
+
+def _merge(*taints: Dict) -> Dict:
+    merged = {}
+    for taint in taints:
+        for key, path in taint.items():
+            if key not in merged or len(path) < len(merged[key]):
+                merged[key] = path
+    return merged
+
+
+def _extend(taint: Dict, step: str) -> Dict:
+    return {key: (path + (step,))[-_MAX_PATH:] for key, path in taint.items()}
+
+
+def _sanitize(taint: Dict, kisia_types) -> Dict:
+    return {(label, sanitized | frozenset(kisia_types)): path
+            for (label, sanitized), path in taint.items()}
+
+
+def _live_for(taint: Dict, kisia_type: str) -> Dict:
+    return {key: path for key, path in taint.items() if kisia_type not in key[1]}
+
+
+def _new_source(label: str) -> Dict:
+    return {(label, frozenset()): (label,)}
+
+
+class _SummaryTable:
+    """함수 요약 표 (모듈 정규화 이름 → 요약, 예: 'app.utils.get_data')"""
+
+    def __init__(self, summaries: Dict[str, Dict] = None):
+        self.summaries: Dict[str, Dict] = {}
+        self._by_short: Dict[str, set] = defaultdict(set)
+        for key, summary in (summaries or {}).items():
+            self.set(key, summary)
+
+    def set(self, key: str, summary: Dict) -> bool:
+        """요약 저장 (바뀌었으면 True)"""
+        changed = self.summaries.get(key) != summary
+        self.summaries[key] = summary
+        self._by_short[key.rsplit('.', 1)[-1]].add(key)
+        return changed
+
+    def lookup(self, dotted: str) -> Optional[str]:
+        """정확히 일치하거나 점 경계에서 끝부분이 유일하게 일치하는 키 (프로젝트 루트 경로 차이 허용)"""
+        if dotted in self.summaries:
+            return dotted
+        matches = [key for key in self._by_short.get(dotted.rsplit('.', 1)[-1], ()) if key.endswith('.' + dotted)]
+        return matches[0] if len(matches) == 1 else None
+
+    def unique(self, short: str) -> Optional[str]:
+        """이름이 같은 함수가 프로젝트 전체에 하나뿐일 때 그 키"""
+        keys = self._by_short.get(short, ())
+        return next(iter(keys)) if len(keys) == 1 else None
+
+
+class _FunctionTaint(ast.NodeVisitor):
+    """단일 함수(또는 모듈 본문)의 오염 전파 분석"""
+
+    def __init__(self, func_name: str, aliases: Dict[str, str], summaries: _SummaryTable,
+                 params: List[str] = None, route_params_are_sources: bool = False,
+                 is_route: bool = False, lines: List[str] = None, path: str = '',
+                 module: str = '', imports: Dict[str, str] = None):
+        self.func_name = func_name
+        self.aliases = aliases
+        self.summaries = summaries
+        self.module = module
+        self.imports = imports or {}
+        self.is_route = is_route
+        self.lines = lines or []
+        self.path = path
+        self.state: Dict[str, Dict] = {}
+        self.sequences: Dict[str, ast.AST] = {}  # 리스트/튜플 리터럴이 대입된 변수 (명령 인자 목록)
+        self.findings: List[Dict] = []
+        # 함수 요약
+        self.param_to_return = set()
+        self.return_sources: Dict = {}
+        self.param_sinks: Dict[str, List[Dict]] = {}
+
+        for name in params or []:
+            if route_params_are_sources:
+                self.state[name] = _new_source(f"URL 파라미터 '{name}'")
+            else:
+                self.state[name] = {(f"{_PARAM_PREFIX}{name}", frozenset()): (name,)}
+
+    # ---- 실행 ----
+
+    def run(self, body: List[ast.stmt]):
+        # 반복문 전파를 위해 두 번 실행 (흐름 비민감 근사)
+        for _ in range(2):
+            for stmt in body:
+                self.visit(stmt)
+
+    # ---- 식 평가 ----
+
+    def taint_of(self, node: Optional[ast.AST]) -> Dict:
+        if node is None:
+            return {}
+        if isinstance(node, ast.Name):
+            return self.state.get(node.id, {})
+        if isinstance(node, ast.Attribute):
+            if is_request_source(node):
+                return _new_source(f"request.{node.attr}")
+            dotted = get_call_name(node)
+            if dotted in self.state:
+                return self.state[dotted]
+            return self.taint_of(node.value)
+        if isinstance(node, ast.Subscript):
+            if get_call_name(node.value) == 'sys.argv':
+                return _new_source('sys.argv')
+            return self.taint_of(node.value)
+        if isinstance(node, ast.Call):
+            return self._call_taint(node)
+        if isinstance(node, ast.Constant):
+            return {}
+        if isinstance(node, (ast.Lambda, ast.FunctionDef)):
+            return {}
+        # JoinedStr, BinOp, BoolOp, IfExp, 컨테이너 등: 하위 식 합집합
+        return _merge(*(self.taint_of(child) for child in ast.iter_child_nodes(node)
+                        if isinstance(child, ast.expr)))
+
+    def _call_taint(self, node: ast.Call) -> Dict:
+        raw_name = get_call_name(node.func)
+        name = resolve_call_name(raw_name, self.aliases)
+        short = raw_name.rsplit('.', 1)[-1] if raw_name else ''
+        arg_nodes = list(node.args) + [kw.value for kw in node.keywords]
+
+        if name in SOURCE_CALLS:
+            return _new_source(SOURCE_CALLS[name])
+        if is_request_source(node.func):
+            return _new_source(f"request.{node.func.attr}()")
+        if name in UNIVERSAL_SANITIZERS:
+            return {}
+
+        arg_taint = _merge(*(self.taint_of(a) for a in arg_nodes))
+
+        for kisia_type, spec in TAINT_CATALOG.items():
+            if name in spec.get('sanitizers', ()):
+                return _extend(_sanitize(arg_taint, [kisia_type]), short)
+
+        # 다른 함수의 요약 적용 (함수 간 분석)
+        summary = self._callee(node)
+        if summary:
+            result = _new_source_path(summary.get('return_sources', {}), short)
+            for index, param in enumerate(summary['params']):
+                if param in summary['param_to_return']:
+                    result = _merge(result, _extend(self._arg_for(node, index, param), short))
+            return result
+
+        receiver = self.taint_of(node.func.value) if isinstance(node.func, ast.Attribute) else {}
+        return _extend(_merge(receiver, arg_taint), short or 'call') if (receiver or arg_taint) else {}
+
+    def _callee(self, node: ast.Call) -> Optional[Dict]:
+        """
+        호출 대상 함수 요약 (다른 파일의 같은 이름 함수와 섞이지 않도록 모듈 기준으로 해석)
+
+        중첩/같은 모듈 함수 → self 메소드 → import 경로 → 출처 불명(star import 등)이면 유일한 정의
+        """
+        func = node.func
+        scopes = [] if self.func_name == '<module>' else self.func_name.split('.')
+        table = self.summaries
+
+        if isinstance(func, ast.Name):
+            for depth in range(len(scopes), -1, -1):
+                key = '.'.join([self.module] + scopes[:depth] + [func.id])
+                if key in table.summaries:
+                    return table.summaries[key]
+            if func.id in self.imports:
+                key = table.lookup(self.imports[func.id])
+            else:
+                key = table.unique(func.id)
+            return table.summaries.get(key) if key else None
+
+        if isinstance(func, ast.Attribute):
+            base = get_call_name(func.value)
+            if base in ('self', 'cls'):
+                # 메소드 'Class.method' 안의 self.attr → 'Class.attr'
+                for depth in range(len(scopes) - 1, 0, -1):
+                    key = '.'.join([self.module] + scopes[:depth] + [func.attr])
+                    if key in table.summaries:
+                        return table.summaries[key]
+                return None
+            if base and base.split('.')[0] in self.imports:
+                key = table.lookup(resolve_call_name(get_call_name(func), self.imports))
+                return table.summaries.get(key) if key else None
+        return None
+
+    def _arg_for(self, node: ast.Call, index: int, param: str) -> Dict:
+        for kw in node.keywords:
+            if kw.arg == param:
+                return self.taint_of(kw.value)
+        if index < len(node.args):
+            return self.taint_of(node.args[index])
+        return {}
+
+    # ---- 문장 ----
+
+    def _assign(self, target: ast.AST, taint: Dict):
+        if isinstance(target, ast.Name):
+            self.state[target.id] = _extend(taint, target.id) if taint else {}
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for element in target.elts:
+                self._assign(element, taint)
+        elif isinstance(target, ast.Attribute):
+            dotted = get_call_name(target)
+            self.state[dotted] = _extend(taint, dotted) if taint else {}
+        elif isinstance(target, ast.Subscript):
+            # response.headers['X'] = 오염값 → HTTP 응답 분할
+            if isinstance(target.value, ast.Attribute) and target.value.attr == 'headers' and taint:
+                self._report('HTTP_Response_Splitting', target, taint, 'headers[...]')
+            base = target.value
+            if isinstance(base, ast.Name) and taint:
+                self.state[base.id] = _merge(self.state.get(base.id, {}), _extend(taint, base.id))
+
+    def visit_Assign(self, node: ast.Assign):
+        self.generic_visit(node)
+        taint = self.taint_of(node.value)
+        for target in node.targets:
+            self._assign(target, taint)
+            if isinstance(target, ast.Name):
+                if isinstance(node.value, (ast.List, ast.Tuple)):
+                    self.sequences[target.id] = node.value
+                else:
+                    self.sequences.pop(target.id, None)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        self.generic_visit(node)
+        if node.value is not None:
+            self._assign(node.target, self.taint_of(node.value))
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        self.generic_visit(node)
+        if isinstance(node.target, ast.Name):
+            current = self.state.get(node.target.id, {})
+            self.state[node.target.id] = _merge(current, _extend(self.taint_of(node.value), node.target.id))
+
+    def visit_For(self, node: ast.For):
+        self._assign(node.target, self.taint_of(node.iter))
+        self.generic_visit(node)
+
+    visit_AsyncFor = visit_For
+
+    def visit_With(self, node: ast.With):
+        for item in node.items:
+            if item.optional_vars is not None:
+                self._assign(item.optional_vars, self.taint_of(item.context_expr))
+        self.generic_visit(node)
+
+    visit_AsyncWith = visit_With
+
+    def visit_NamedExpr(self, node: ast.NamedExpr):
+        self.generic_visit(node)
+        self._assign(node.target, self.taint_of(node.value))
+
+    def visit_Return(self, node: ast.Return):
+        self.generic_visit(node)
+        taint = self.taint_of(node.value)
+        for (label, sanitized), path in taint.items():
+            if label.startswith(_PARAM_PREFIX):
+                self.param_to_return.add(label[len(_PARAM_PREFIX):])
+            else:
+                self.return_sources[(label, sanitized)] = path
+        if self.is_route and node.value is not None and not isinstance(node.value, ast.Call):
+            # 라우트 함수가 오염된 문자열을 그대로 응답
+            if isinstance(node.value, (ast.JoinedStr, ast.BinOp, ast.Name)):
+                self._report('XSS', node, taint, 'return <응답 본문>')
+
+    def visit_FunctionDef(self, node):
+        # 중첩 함수는 별도 단위로 분석됨
+        return
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_ClassDef = visit_FunctionDef
+
+    def visit_Call(self, node: ast.Call):
+        self.generic_visit(node)
+        raw_name = get_call_name(node.func)
+        name = resolve_call_name(raw_name, self.aliases)
+        method = raw_name.rsplit('.', 1)[-1] if raw_name else ''
+
+        if method in CONTAINER_MUTATORS and isinstance(node.func, ast.Attribute) \
+                and isinstance(node.func.value, ast.Name):
+            container = node.func.value.id
+            arg_taint = _merge(*(self.taint_of(a) for a in node.args))
+            if arg_taint:
+                self.state[container] = _merge(self.state.get(container, {}), _extend(arg_taint, container))
+
+        for kisia_type, spec in TAINT_CATALOG.items():
+            index = None
+            if name in spec.get('sinks', {}):
+                index = spec['sinks'][name]
+            elif isinstance(node.func, ast.Attribute) and method in spec.get('methods', {}):
+                index = spec['methods'][method]
+            elif isinstance(node.func, ast.Attribute) and method in spec.get('receiver_methods', ()):
+                receiver = node.func.value
+                if not isinstance(receiver, ast.Constant):
+                    self._report(kisia_type, node, self.taint_of(receiver), f"<입력>.{method}()")
+                continue
+            elif name in spec.get('shell_sinks', ()):
+                command = self._command_arg(node)
+                if command is not None:
+                    self._report(kisia_type, node, self.taint_of(command), name)
+                continue
+
+            if index is None:
+                continue
+            if kisia_type == 'Unsafe_Deserialization' and name == 'yaml.load':
+                loader = next((kw.value for kw in node.keywords if kw.arg == 'Loader'), None)
+                if loader is not None and 'Safe' in get_call_name(loader):
+                    continue
+            if index < len(node.args):
+                self._report(kisia_type, node, self.taint_of(node.args[index]), name or method)
+
+        # 요약된 함수 호출: 인자가 callee 내부 싱크로 흐르는지
+        summary = self._callee(node)
+        if summary:
+            for index, param in enumerate(summary['params']):
+                for sink in summary['param_sinks'].get(param, []):
+                    taint = _extend(self._arg_for(node, index, param), f"{method}({param})")
+                    self._report(sink['kisia_type'], node, taint,
+                                 sink['sink'], via=f"{method}() {sink['line']}행")
+
+    def _command_arg(self, node: ast.Call) -> Optional[ast.AST]:
+        """
+        subprocess 호출에서 명령 주입을 검사할 식
+
+        shell=True면 명령 전체, 아니면 셸 해석이 없으므로 실행 파일 자리(문자열 명령 / 인자 목록의 첫 원소)만
+        """
+        command = node.args[0] if node.args else next(
+            (kw.value for kw in node.keywords if kw.arg == 'args'), None)
+        shell = next((kw.value for kw in node.keywords if kw.arg == 'shell'), None)
+        if shell is not None and not (isinstance(shell, ast.Constant) and not shell.value):
+            return command
+        if isinstance(command, ast.Name) and command.id in self.sequences:
+            command = self.sequences[command.id]
+        if isinstance(command, (ast.List, ast.Tuple)):
+            return command.elts[0] if command.elts else None
+        return command
+
+    # ---- 보고 ----
+
+    def _report(self, kisia_type: str, node: ast.AST, taint: Dict, sink: str, via: str = None):
+        live = _live_for(taint, kisia_type)
+        if not live:
+            return
+        line = getattr(node, 'lineno', 0)
+        for (label, _), path in live.items():
+            if label.startswith(_PARAM_PREFIX):
+                param = label[len(_PARAM_PREFIX):]
+                entry = {'kisia_type': kisia_type, 'sink': sink, 'line': line}
+                if entry not in self.param_sinks.setdefault(param, []):
+                    self.param_sinks[param].append(entry)
+                continue
+            self.findings.append({
+                'kisia_type': kisia_type,
+                'file': self.path,
+                'line': line,
+                'function': self.func_name,
+                'source': label,
+                'sink': sink,
+                'path': list(path),
+                'via': via,
+                'code_snippet': self.lines[line - 1].strip() if 0 < line <= len(self.lines) else ''
+            })
+
+
+def _new_source_path(sources: Dict, step: str) -> Dict:
+    return {key: (path + (step,))[-_MAX_PATH:] for key, path in sources.items()}
+
+
+def _is_route(node: ast.AST) -> bool:
+    for decorator in getattr(node, 'decorator_list', []):
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(target, ast.Attribute) and target.attr in ROUTE_DECORATOR_ATTRS:
+            return True
+        if isinstance(target, ast.Name) and target.id in ROUTE_DECORATOR_ATTRS:
+            return True
+    return False
+
+
+def _iter_functions(tree: ast.Module):
+    """(정규화 이름, 함수 노드) 목록 - 클래스 메소드와 중첩 함수 포함"""
+    def walk(body, prefix):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                yield prefix + node.name, node
+                yield from walk(node.body, prefix + node.name + '.')
+            elif isinstance(node, ast.ClassDef):
+                yield from walk(node.body, prefix + node.name + '.')
+    yield from walk(tree.body, '')
+
+
+def _module_name(path: str) -> Tuple[str, bool]:
+    """파일 경로 → (모듈 이름, 패키지 여부) - app/utils.py → app.utils, app/__init__.py → app"""
+    parts = [p for p in path.replace('\\', '/').split('/') if p and p != '.']
+    if parts and parts[-1].endswith('.py'):
+        parts[-1] = parts[-1][:-3]
+    is_package = bool(parts) and parts[-1] == '__init__'
+    if is_package:
+        parts.pop()
+    return '.'.join(parts) or '<module>', is_package
+
+
+def _import_targets(tree: ast.Module, module: str, is_package: bool) -> Dict[str, str]:
+    """import로 바인딩된 이름 → 정규화 경로 (상대 import 포함, 함수 요약 해석용)"""
+    package = module.split('.') if is_package else module.split('.')[:-1]
+    targets = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    targets[alias.asname] = alias.name
+                else:
+                    head = alias.name.split('.')[0]
+                    targets[head] = head
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package[:max(len(package) - (node.level - 1), 0)]
+            else:
+                base = []
+            base = base + (node.module.split('.') if node.module else [])
+            for alias in node.names:
+                if alias.name != '*':
+                    targets[alias.asname or alias.name] = '.'.join(base + [alias.name])
+    return targets
+
+
+def _param_names(node) -> List[str]:
+    args = node.args
+    names = [a.arg for a in args.posonlyargs + args.args + args.kwonlyargs]
+    return [n for n in names if n not in ('self', 'cls')]
+
+
+def _analyze_file(path: str, content: str, summaries: Dict[str, Dict]) -> Dict:
+    """
+    단일 파일 분석 (프로세스 풀 작업 단위)
+
+    Returns:
+        {'path', 'parsed', 'summaries': {모듈.함수 정규화 이름: 요약}, 'findings': [...]}
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return {'path': path, 'parsed': False, 'summaries': {}, 'findings': []}
+
+    aliases = collect_import_aliases(tree)
+    module, is_package = _module_name(path)
+    imports = _import_targets(tree, module, is_package)
+    lines = content.splitlines()
+    local_summaries = _SummaryTable(summaries)
+    file_summaries = {}
+    findings = []
+
+    functions = list(_iter_functions(tree))
+
+    # 파일 내 요약을 고정점까지 갱신 (호출 순서와 무관하게 전파)
+    for _ in range(3):
+        changed = False
+        findings = []
+        for qualname, node in functions:
+            params = _param_names(node)
+            is_route = _is_route(node)
+            analysis = _FunctionTaint(
+                qualname, aliases, local_summaries, params=params,
+                route_params_are_sources=is_route, is_route=is_route,
+                lines=lines, path=path, module=module, imports=imports
+            )
+            analysis.run(node.body)
+            findings.extend(analysis.findings)
+
+            summary = {
+                'params': params,
+                'param_to_return': sorted(analysis.param_to_return),
+                'return_sources': analysis.return_sources,
+                'param_sinks': analysis.param_sinks,
+            }
+            key = f"{module}.{qualname}"
+            if local_summaries.set(key, summary):
+                changed = True
+            file_summaries[key] = summary
+        if not changed:
+            break
+
+    # 모듈 본문 (스크립트 형태 코드)
+    module_body = [s for s in tree.body
+                   if not isinstance(s, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+    module_taint = _FunctionTaint('<module>', aliases, local_summaries, lines=lines, path=path,
+                                  module=module, imports=imports)
+    module_taint.run(module_body)
+    findings.extend(module_taint.findings)
+
+    return {'path': path, 'parsed': True, 'summaries': file_summaries, 'findings': findings}
+
+
+def _summarize_file(args: Tuple[str, str, Dict]) -> Dict:
+    path, content, summaries = args
+    return _analyze_file(path, content, summaries)['summaries']
+
+
+def _scan_file(args: Tuple[str, str, Dict]) -> Dict:
+    path, content, summaries = args
+    return _analyze_file(path, content, summaries)
+
+
+@lru_cache(maxsize=4)
+def _guideline_remedies(path: str) -> Dict[str, str]:
+    """KISIA 타입 → 가이드라인 설명의 안전 대책 문장 (구조화 데이터가 없으면 빈 dict)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            vulnerabilities = json.load(f)['vulnerabilities']
+    except (OSError, ValueError, KeyError):
+        return {}
+    remedies = {}
+    for vuln in vulnerabilities:
+        # 설명은 '위험 설명. 안전 대책.' 순서 - 첫 문장(위험 설명)을 제외한 나머지
+        sentences = re.split(r'(?<=다\.)\s+', vuln.get('description', '').strip())
+        remedy = ' '.join(sentences[1:]) or sentences[0]
+        if remedy:
+            remedies[vuln['english_type']] = remedy
+    return remedies
+
+
+class TaintAnalyzer:
+    """정적 오염 분석기 - 빠른 분석 모드용 (네트워크/LLM 불필요)"""
+
+    def __init__(self, max_workers: Optional[int] = None, parallel_threshold: int = 4):
+        """
+        Args:
+            max_workers: 프로세스 풀 크기 (None이면 CPU 수)
+            parallel_threshold: 이 개수 이상의 파일일 때만 병렬 처리
+        """
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.parallel_threshold = parallel_threshold
+        self.mapper = KISIAVulnerabilityMapper()
+
+        # 카탈로그 키는 매퍼의 KISIA 타입이어야 함 (오타/가이드라인 개정 시 조용히 누락되지 않도록)
+        unknown = sorted(set(TAINT_CATALOG) - set(self.mapper.get_all_kisia_types()))
+        if unknown:
+            raise ValueError(f"KISIA 가이드라인에 없는 오염 분석 타입: {', '.join(unknown)}")
+        self.display_types = {kisia_type: self._display_name(kisia_type) for kisia_type in TAINT_CATALOG}
+
+    def analyze_security(self, code: str, file_list: List[Dict] = None) -> Dict:
+        """ImprovedSecurityAnalyzer.analyze_security와 동일한 형식으로 결과 반환"""
+        start_time = time.time()
+        files = split_code_by_file(code)
+
+        # 1단계: 파일별 함수 요약 (병렬, 키는 모듈 정규화 이름이라 파일 간 같은 함수명도 충돌 없음)
+        #   지금까지의 요약을 넘겨 다시 요약 - 반복마다 파일 간 호출 한 단계씩 전파 (a → b.wrap → c.run → 싱크)
+        summaries = {}
+        for _ in range(_MAX_SUMMARY_ROUNDS):
+            updated = dict(summaries)
+            for file_summaries in self._map(_summarize_file, [(p, c, summaries) for p, c in files]):
+                updated.update(file_summaries)
+            if updated == summaries:
+                break
+            summaries = updated
+
+        # 2단계: 전역 요약을 적용해 파일별 오염 분석 (병렬)
+        results = list(self._map(_scan_file, [(p, c, summaries) for p, c in files]))
+
+        findings = []
+        seen = set()
+        for result in results:
+            for finding in result['findings']:
+                key = (finding['file'], finding['line'], finding['kisia_type'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                findings.append(finding)
+
+        vulnerabilities = [self._to_vulnerability(f) for f in findings]
+        vulnerabilities.sort(key=lambda v: (v['location']['file'], v['location']['line']))
+
+        elapsed = time.time() - start_time
+        unparsed = [r['path'] for r in results if not r['parsed']]
+        print(f"🧪 정적 오염 분석 완료: {len(files)}개 파일, {len(vulnerabilities)}개 취약점 ({elapsed:.2f}초)")
+
+        security_score = self._calculate_security_score(vulnerabilities)
+        summary = self._generate_summary(vulnerabilities)
+        if unparsed:
+            summary += f" (구문 분석 불가 파일 {len(unparsed)}개 제외)"
+
+        return {
+            'success': True,
+            'vulnerabilities': vulnerabilities,
+            'security_score': security_score,
+            'summary': summary,
+            'analyzed_by': 'Static Taint',
+            'has_error': False,
+            'static_analysis': {
+                'files': len(files),
+                'unparsed_files': unparsed,
+                'functions': len(summaries),
+                'elapsed': round(elapsed, 3)
+            }
+        }
+
+    def _map(self, func, items: List):
+        if len(items) < self.parallel_threshold or self.max_workers <= 1:
+            return map(func, items)
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                return list(executor.map(func, items, chunksize=max(1, len(items) // (self.max_workers * 4))))
+        except Exception as e:
+            print(f"⚠️ 병렬 처리 실패, 순차 처리로 전환: {e}")
+            return map(func, items)
+
+    def _calculate_security_score(self, vulnerabilities: List[Dict]) -> int:
+        """보안 점수 계산 (ImprovedSecurityAnalyzer와 동일한 감점 기준)"""
+        score = 100
+        for vuln in vulnerabilities:
+            severity_penalty = {
+                'CRITICAL': 24,
+                'HIGH': 14,
+                'MEDIUM': 6,
+                'LOW': 2
+            }.get(vuln.get('severity', 'MEDIUM'), 6)
+            confidence_weight = {
+                'HIGH': 1.0,
+                'MEDIUM': 0.7,
+                'LOW': 0.4
+            }.get(vuln.get('confidence', 'MEDIUM'), 0.7)
+            score -= int(severity_penalty * confidence_weight)
+        return max(0, score)
+
+    def _generate_summary(self, vulnerabilities: List[Dict]) -> str:
+        """분석 요약 생성"""
+        if not vulnerabilities:
+            return "정적 오염 분석 결과 외부 입력이 위험 함수로 전달되는 흐름이 발견되지 않았습니다."
+
+        critical = sum(1 for v in vulnerabilities if v.get('severity') == 'CRITICAL')
+        high = sum(1 for v in vulnerabilities if v.get('severity') == 'HIGH')
+        summary = f"정적 오염 분석으로 총 {len(vulnerabilities)}개의 취약한 데이터 흐름이 발견되었습니다"
+        if critical > 0:
+            summary += f" (CRITICAL: {critical}개)"
+        if high > 0:
+            summary += f" (HIGH: {high}개)"
+        vuln_types = list(dict.fromkeys(v['type'] for v in vulnerabilities))
+        summary += f". 주요 유형: {', '.join(vuln_types[:3])}"
+        return summary
+
+    def _display_name(self, kisia_type: str) -> str:
+        """결과 표기용 영어 명칭 - 매퍼가 인식하는 AI 명칭 중 첫 영어 명칭 (없으면 KISIA 타입명)"""
+        for ai_type, mapped in self.mapper.AI_TO_KISIA_MAPPING.items():
+            if mapped == kisia_type and ai_type.isascii():
+                return ai_type
+        return kisia_type.replace('_', ' ')
+
+    def _recommendation(self, kisia_type: str, section: Dict) -> str:
+        """가이드라인 안전 대책 + 참고 위치"""
+        remedy = _guideline_remedies(rag_config.STRUCTURED_DATA_FILE).get(
+            kisia_type, '외부 입력을 검증한 뒤 사용하세요.')
+        if not section:
+            return remedy
+        return (f"{remedy}\n(KISIA 가이드 {section['section']} {section['number']}. "
+                f"{section['korean_name']}, {section['page']}쪽 안전한 코드 예시 참고)")
+
+    def _to_vulnerability(self, finding: Dict) -> Dict:
+        """내부 결과를 ImprovedSecurityAnalyzer 취약점 형식으로 변환"""
+        kisia_type = finding['kisia_type']
+        section = self.mapper.get_section_info(kisia_type) or {}
+        korean_name = section.get('korean_name', kisia_type)
+        spec = TAINT_CATALOG.get(kisia_type, {})
+        flow = ' → '.join(finding['path'] + [finding['sink']])
+        via = f" {finding['via']}을 거쳐" if finding.get('via') else ''
+
+        return {
+            'type': self.display_types[kisia_type],
+            'severity': spec.get('severity', 'MEDIUM'),
+            'confidence': 'MEDIUM' if finding.get('via') or finding['source'].startswith('URL') else 'HIGH',
+            'location': {
+                'file': finding['file'],
+                'line': finding['line'],
+                'function': finding['function'],
+                'code_snippet': finding['code_snippet']
+            },
+            'description': (f"외부 입력({finding['source']})이 검증 없이{via} "
+                            f"{finding['sink']}에 전달됩니다. "
+                            f"[KISIA {section.get('section', '')} {korean_name}]").replace('  ', ' '),
+            'vulnerable_code': finding['code_snippet'],
+            'fixed_code': '',
+            'fix_explanation': '정적 분석은 수정 코드를 생성하지 않습니다. 권장사항을 참고하세요.',
+            'data_flow': flow,
+            'exploit_scenario': '',
+            'recommendation': self._recommendation(kisia_type, section),
+            'kisia_type': kisia_type,
+            'detected_by': 'static_taint'
+        }
+
+
+# 간단한 사용 헬퍼 함수
+def analyze_code_offline(code: str, file_list: List[Dict] = None) -> Dict:
+    """
+    LLM 없이 정적 오염 분석으로 코드를 분석하는 헬퍼 함수
+
+    Args:
+        code: 분석할 Python 코드 (# ===== File: 구분자 결합 형식 지원)
+        file_list: 파일 목록
+
+    Returns:
+        분석 결과 (ImprovedSecurityAnalyzer.analyze_security 형식)
+    """
+    return TaintAnalyzer().analyze_security(code, file_list)
@@ -0,0 +1,273 @@
+# core/telemetry.py
+"""
+파이프라인 단계별 추적 (OpenTelemetry)
+- 수집, SBOM 추출, 환경 스캔, OSV 조회, 프롬프트 생성, LLM 호출, RAG 검색, 리포트 생성 구간을 span으로 기록
+- 내보내기: OTLP 수집기 또는 로컬 JSONL 파일 (TelemetryConfig.EXPORTER)
+- opentelemetry 미설치 시 같은 형식의 JSONL을 직접 기록하는 경량 span으로 대체
+"""
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from config import telemetry_config
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+
+def _clean_attributes(attributes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """span 속성은 기본 타입만 허용 (None 제외, 그 외는 문자열로)"""
+    cleaned = {}
+    for key, value in (attributes or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (bool, int, float, str)):
+            cleaned[key] = value
+        else:
+            cleaned[key] = str(value)
+    return cleaned
+
+
+class _JsonlWriter:
+    """span 레코드를 JSONL 파일에 추가 (스레드 안전, 최대 크기 초과 시 회전)"""
+
+    def __init__(self, path: str, max_bytes: int = None, backups: int = None):
+        self.path = path
+        self.max_bytes = telemetry_config.JSONL_MAX_BYTES if max_bytes is None else max_bytes
+        self.backups = telemetry_config.JSONL_BACKUPS if backups is None else backups
+        self._lock = threading.Lock()
+        self._size = None  # 현재 파일 크기 (첫 기록 시 확인)
+
+    def _rotate(self):
+        """spans.jsonl → spans.jsonl.1 → ... (가장 오래된 파일 삭제)"""
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if self.backups <= 0 and os.path.exists(self.path):
+            os.remove(self.path)
+        self._size = 0
+
+    def write(self, records):
+        if not records:
+            return
+        data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        size = len(data.encode('utf-8'))
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with self._lock:
+                if self._size is None:
+                    self._size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+                if self.max_bytes and self._size and self._size + size > self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(data)
+                self._size += size
+        except OSError as e:
+            print(f"⚠️ 추적 기록 실패: {e}")
+
+
+def _record(name: str, trace_id: str, span_id: str, parent_id: Optional[str], start_ns: int, end_ns: int,
+            attributes: Dict[str, Any], status: str, error: Optional[str] = None) -> Dict:
+    return {
+        'name': name,
+        'trace_id': trace_id,
+        'span_id': span_id,
+        'parent_id': parent_id,
+        'start': start_ns / 1e9,
+        'duration_ms': round((end_ns - start_ns) / 1e6, 3),
+        'attributes': attributes,
+        'status': status,
+        'error': error,
+        'service': telemetry_config.SERVICE_NAME,
+        'thread': threading.current_thread().name
+    }
+
+
+if OTEL_AVAILABLE:
+    class JsonlSpanExporter(SpanExporter):
+        """OpenTelemetry span을 로컬 JSONL 파일로 내보내는 exporter"""
+
+        def __init__(self, path: str):
+            self.writer = _JsonlWriter(path)
+
+        def export(self, spans) -> "SpanExportResult":
+            records = []
+            for span in spans:
+                context = span.get_span_context()
+                parent = span.parent
+                error = None
+                for event in span.events:
+                    if event.name == 'exception':
+                        error = event.attributes.get('exception.message')
+                records.append(_record(
+                    span.name, format(context.trace_id, '032x'), format(context.span_id, '016x'),
+                    format(parent.span_id, '016x') if parent else None,
+                    span.start_time, span.end_time, dict(span.attributes or {}),
+                    span.status.status_code.name, error
+                ))
+            self.writer.write(records)
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+
+class _LocalSpan:
+    """opentelemetry 미설치 시 사용하는 경량 span"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["_LocalSpan"]):
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.status = 'UNSET'
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes.update(_clean_attributes({key: value}))
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(_clean_attributes(attributes))
+
+    def record_exception(self, exc: BaseException):
+        self.status = 'ERROR'
+        self.error = str(exc)
+
+    def to_record(self) -> Dict:
+        return _record(self.name, self.trace_id, self.span_id, self.parent_id,
+                       self.start_ns, time.time_ns(), self.attributes, self.status, self.error)
+
+
+class _NoopSpan:
+    """추적 비활성화 시 사용"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_local_span: "contextvars.ContextVar[Optional[_LocalSpan]]" = contextvars.ContextVar('local_span', default=None)
+
+
+class Telemetry:
+    """추적 초기화 및 span 생성"""
+
+    def __init__(self):
+        self.enabled = telemetry_config.ENABLED and telemetry_config.EXPORTER != 'none'
+        self.backend = 'disabled'
+        self._tracer = None
+        self._writer = None
+        if not self.enabled:
+            return
+
+        if OTEL_AVAILABLE:
+            try:
+                self._tracer = self._setup_otel()
+                self.backend = f'opentelemetry/{telemetry_config.EXPORTER}'
+                return
+            except Exception as e:
+                print(f"⚠️ OpenTelemetry 초기화 실패, 로컬 JSONL 기록 사용: {e}")
+
+        self._writer = _JsonlWriter(telemetry_config.JSONL_PATH)
+        self.backend = 'local/jsonl'
+
+    def _setup_otel(self):
+        if telemetry_config.EXPORTER == 'otlp':
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter(endpoint=telemetry_config.OTLP_ENDPOINT) \
+                if telemetry_config.OTLP_ENDPOINT else OTLPSpanExporter()
+        else:
+            exporter = JsonlSpanExporter(telemetry_config.JSONL_PATH)
+
+        provider = TracerProvider(resource=Resource.create({'service.name': telemetry_config.SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        # 이미 전역 provider가 설정된 경우(다른 계측 도구)에도 자체 provider로 기록
+        try:
+            trace.set_tracer_provider(provider)
+        except Exception:
+            pass
+        return provider.get_tracer(__name__)
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """
+        구간 추적
+
+        Example:
+            with telemetry.span('llm.call', {'llm.model': model}) as span:
+                ...
+                span.set_attribute('llm.output_tokens', n)
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        attributes = _clean_attributes(attributes)
+        if self._tracer is not None:
+            with self._tracer.start_as_current_span(name, attributes=attributes,
+                                                    record_exception=True, set_status_on_exception=True) as span:
+                yield span
+            return
+
+        span = _LocalSpan(name, attributes, _current_local_span.get())
+        token = _current_local_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_local_span.reset(token)
+            if span.status == 'UNSET':
+                span.status = 'OK'
+            self._writer.write([span.to_record()])
+
+    def traced(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Callable:
+        """함수 전체를 span으로 감싸는 데코레이터"""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, attributes):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def in_current_context(func: Callable) -> Callable:
+    """
+    현재 컨텍스트(활성 span)를 복사해 func를 실행하는 callable 반환
+    - 스레드 풀 작업의 span이 제출한 쪽 span의 자식으로 기록되도록 submit 직전에 감쌈
+    - 호출마다 새로 복사해야 함 (같은 컨텍스트를 여러 스레드에서 동시에 실행할 수 없음)
+    """
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+# 프로세스 공용 인스턴스
+telemetry = Telemetry()
+
+
+# 간단한 사용 헬퍼 함수
+def trace_span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """구간 추적 헬퍼 함수 (with 문에 사용)"""
+    return telemetry.span(name, attributes)
@@ -0,0 +1,293 @@
+# core/usage_ledger.py
+"""
+LLM 토큰/비용 원장 (SQLite)
+- 모든 LLM 호출의 입력/출력/캐시 토큰, 지연 시간, 모델, 비용을 기록
+- 분석 ID와 단계(discovery, details, qa 등)로 묶어 프로젝트별/단계별/일별 비용 조회
+- 현재 분석은 contextvar로 전달되므로 in_current_context로 감싼 작업 스레드의 호출도 같은 분석에 기록됨
+"""
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import ledger_config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis_id TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    mode TEXT,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    analysis_id TEXT,
+    project TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_write_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    day TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_analysis ON llm_calls(analysis_id);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_project ON llm_calls(project);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_day ON llm_calls(day);
+"""
+
+# 집계 컬럼 (조회 결과 공통)
+_TOTALS = """
+    COUNT(*) AS calls,
+    COALESCE(SUM(input_tokens), 0) AS input_tokens,
+    COALESCE(SUM(output_tokens), 0) AS output_tokens,
+    COALESCE(SUM(cache_read_tokens), 0) AS cache_read_tokens,
+    COALESCE(SUM(cache_write_tokens), 0) AS cache_write_tokens,
+    COALESCE(SUM(cost_usd), 0) AS cost_usd,
+    COALESCE(AVG(latency_ms), 0) AS avg_latency_ms
+"""
+
+_current_analysis: "contextvars.ContextVar[Optional[Tuple[str, str]]]" = contextvars.ContextVar('usage_analysis', default=None)
+
+
+def _field(obj: Any, name: str) -> Any:
+    """SDK 응답 객체 또는 dict(배치 결과 JSON)에서 필드 조회"""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def extract_usage(provider: str, response: Any) -> Dict[str, int]:
+    """
+    공급자 응답의 usage를 공통 형식으로 변환
+
+    - Anthropic: input_tokens는 캐시 제외 입력, cache_read/cache_creation은 별도
+    - OpenAI: prompt_tokens에 캐시 적중분이 포함되므로 cached_tokens를 빼서 입력으로 기록
+    """
+    usage = _field(response, 'usage')
+    if usage is None:
+        return {'input_tokens': 0, 'output_tokens': 0, 'cache_read_tokens': 0, 'cache_write_tokens': 0}
+
+    if provider == 'anthropic':
+        return {
+            'input_tokens': _field(usage, 'input_tokens') or 0,
+            'output_tokens': _field(usage, 'output_tokens') or 0,
+            'cache_read_tokens': _field(usage, 'cache_read_input_tokens') or 0,
+            'cache_write_tokens': _field(usage, 'cache_creation_input_tokens') or 0
+        }
+
+    prompt_tokens = _field(usage, 'prompt_tokens') or 0
+    cached = _field(_field(usage, 'prompt_tokens_details'), 'cached_tokens') or 0
+    return {
+        'input_tokens': prompt_tokens - cached,
+        'output_tokens': _field(usage, 'completion_tokens') or 0,
+        'cache_read_tokens': cached,
+        'cache_write_tokens': 0
+    }
+
+
+def estimate_cost(model: str, usage: Dict[str, int]) -> Optional[float]:
+    """모델 단가표(100만 토큰당 USD)로 비용 계산 - 단가 미등록 모델은 None"""
+    model_lower = (model or '').lower()
+    prefix = max((p for p in ledger_config.PRICING if model_lower.startswith(p)), key=len, default=None)
+    if prefix is None:
+        return None
+    input_price, output_price, cache_read_price, cache_write_price = ledger_config.PRICING[prefix]
+    return (
+        usage.get('input_tokens', 0) * input_price
+        + usage.get('output_tokens', 0) * output_price
+        + usage.get('cache_read_tokens', 0) * cache_read_price
+        + usage.get('cache_write_tokens', 0) * cache_write_price
+    ) / 1_000_000
+
+
+class UsageLedger:
+    """LLM 호출 사용량 원장"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or ledger_config.DB_PATH
+        self.enabled = ledger_config.ENABLED
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._unpriced_models = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+        return [dict(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # 기록
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def analysis(self, project: str, mode: str = None, analysis_id: str = None):
+        """
+        분석 컨텍스트 - 블록 안의 LLM 호출을 같은 분석 ID로 기록
+
+        analysis_id를 넘기면 기존 분석을 이어서 기록 (예: 2단계 모드의 상세 정보 생성)
+
+        Example:
+            with usage_ledger.analysis('my-repo', 'AI 보안 분석') as analysis_id:
+                analyzer.analyze_security(code)
+        """
+        project = project or ledger_config.DEFAULT_PROJECT
+        if analysis_id is None:
+            analysis_id = uuid.uuid4().hex
+            if self.enabled:
+                try:
+                    self._execute(
+                        "INSERT INTO analyses (analysis_id, project, mode, started_at) VALUES (?, ?, ?, ?)",
+                        (analysis_id, project, mode, time.time())
+                    )
+                except sqlite3.Error as e:
+                    print(f"⚠️ 사용량 원장 기록 실패: {e}")
+
+        token = _current_analysis.set((analysis_id, project))
+        try:
+            yield analysis_id
+        finally:
+            _current_analysis.reset(token)
+
+    def record(self, provider: str, model: str, response: Any, latency_s: float, stage: str,
+               cost_multiplier: float = 1.0) -> Optional[Dict]:
+        """
+        LLM 응답 1건의 사용량 기록 (기록 실패는 분석에 영향을 주지 않음)
+
+        cost_multiplier: 할인 요금 적용 (예: 배치 API 0.5)
+        """
+        if not self.enabled:
+            return None
+
+        usage = extract_usage(provider, response)
+        cost = estimate_cost(model, usage)
+        if cost is None and model not in self._unpriced_models:
+            self._unpriced_models.add(model)
+            print(f"⚠️ 단가 미등록 모델, 비용 0으로 기록: {model}")
+
+        analysis_id, project = _current_analysis.get() or (None, ledger_config.DEFAULT_PROJECT)
+        now = time.time()
+        entry = {
+            'analysis_id': analysis_id,
+            'project': project,
+            'stage': stage,
+            'provider': provider,
+            'model': model,
+            **usage,
+            'latency_ms': round(latency_s * 1000, 1),
+            'cost_usd': (cost or 0.0) * cost_multiplier,
+            'created_at': now,
+            'day': datetime.fromtimestamp(now).strftime('%Y-%m-%d')
+        }
+        try:
+            columns = ', '.join(entry)
+            self._execute(
+                f"INSERT INTO llm_calls ({columns}) VALUES ({', '.join('?' * len(entry))})",
+                tuple(entry.values())
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️ 사용량 원장 기록 실패: {e}")
+        return entry
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+
+    def cost_by_project(self, limit: int = 20) -> List[Dict]:
+        """프로젝트별 누적 사용량 (비용 내림차순)"""
+        return self._execute(
+            f"SELECT project, COUNT(DISTINCT analysis_id) AS analyses, {_TOTALS} "
+            "FROM llm_calls GROUP BY project ORDER BY cost_usd DESC LIMIT ?",
+            (limit,)
+        )
+
+    def cost_by_stage(self, project: str = None, analysis_id: str = None) -> List[Dict]:
+        """단계별 사용량 (프로젝트 또는 분석 ID로 필터)"""
+        where, params = self._filters(project=project, analysis_id=analysis_id)
+        return self._execute(
+            f"SELECT stage, {_TOTALS} FROM llm_calls{where} GROUP BY stage ORDER BY cost_usd DESC",
+            params
+        )
+
+    def cost_by_day(self, days: int = 30, project: str = None) -> List[Dict]:
+        """일별 사용량 (최근 days일, 날짜 오름차순)"""
+        since = (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        where, params = self._filters(project=project, since=since)
+        return self._execute(
+            f"SELECT day, {_TOTALS} FROM llm_calls{where} GROUP BY day ORDER BY day",
+            params
+        )
+
+    def analysis_summary(self, analysis_id: str) -> Dict:
+        """분석 1건의 합계 + 단계별 내역"""
+        totals = self._execute(f"SELECT {_TOTALS} FROM llm_calls WHERE analysis_id = ?", (analysis_id,))[0]
+        info = self._execute("SELECT project, mode, started_at FROM analyses WHERE analysis_id = ?", (analysis_id,))
+        return {
+            'analysis_id': analysis_id,
+            **(info[0] if info else {}),
+            **totals,
+            'stages': self.cost_by_stage(analysis_id=analysis_id)
+        }
+
+    def recent_analyses(self, limit: int = 10) -> List[Dict]:
+        """최근 분석 목록과 분석별 비용"""
+        return self._execute(
+            "SELECT a.analysis_id, a.project, a.mode, a.started_at, "
+            "COUNT(c.id) AS calls, COALESCE(SUM(c.cost_usd), 0) AS cost_usd "
+            "FROM analyses a LEFT JOIN llm_calls c ON c.analysis_id = a.analysis_id "
+            "GROUP BY a.analysis_id ORDER BY a.started_at DESC LIMIT ?",
+            (limit,)
+        )
+
+    def totals(self, project: str = None, since: str = None) -> Dict:
+        """전체(또는 프로젝트/기간) 합계"""
+        where, params = self._filters(project=project, since=since)
+        return self._execute(f"SELECT {_TOTALS} FROM llm_calls{where}", params)[0]
+
+    @staticmethod
+    def _filters(project: str = None, analysis_id: str = None, since: str = None) -> Tuple[str, Tuple]:
+        clauses, params = [], []
+        if project:
+            clauses.append("project = ?")
+            params.append(project)
+        if analysis_id:
+            clauses.append("analysis_id = ?")
+            params.append(analysis_id)
+        if since:
+            clauses.append("day >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+
+# 프로세스 공용 인스턴스
+usage_ledger = UsageLedger()
+
+
+# 간단한 사용 헬퍼 함수
+def record_llm_usage(provider: str, model: str, response: Any, latency_s: float, stage: str,
+                     cost_multiplier: float = 1.0) -> Optional[Dict]:
+    """LLM 호출 사용량 기록 헬퍼 함수"""
+    return usage_ledger.record(provider, model, response, latency_s, stage, cost_multiplier)
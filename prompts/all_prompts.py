@@ -188,7 +188,7 @@ SECURITY_PROMPTS = {
 70. Memory Leak - 메모리 누수
 
 이전에 발견하지 못한 취약점이 있다면 모두 추가로 보고하세요.
-각 취약점에 대해 실제 코드에서 해당 패턴을 찾아 보고하세요.""" #,
+각 취약점에 대해 실제 코드에서 해당 패턴을 찾아 보고하세요.""",
 
 #     "vulnerability_discovery": """Python 보안 전문가로서 코드를 분석하고 JSON으로만 응답하세요.
 
@@ -267,6 +267,30 @@ SECURITY_PROMPTS = {
 # 주의: JSON만 출력. 다른 텍스트 없음.
 
 # """
+
+    "vulnerability_details": """Python 보안 전문가로서 아래에서 이미 발견된 취약점 1건에 대한 상세 정보를 작성하세요.
+
+[취약점]
+- 유형: {vuln_type}
+- 심각도: {severity}
+- 위치: {file}:{line} ({function})
+- 설명: {description}
+- 문제 코드: {code_snippet}
+
+[주변 코드]
+{code_context}
+
+다음 JSON 형식으로만 응답하세요. 추가 설명 없이 JSON만 출력하세요:
+
+{{
+    "fixed_code": "수정된코드",
+    "fix_explanation": "수정설명",
+    "data_flow": "데이터흐름",
+    "exploit_scenario": "공격시나리오(PoC를 이용해서 작성하세요. 단계별로 작성하세요.)",
+    "recommendation": "권장사항(종합적으로 분석하세요. 단계별로 작성하세요.)"
+}}
+
+⚠️ 모든 필드는 한국어로 작성 (코드 제외). 주의: JSON만 출력.""",
 }
 
 # ============================================================================
@@ -334,7 +358,7 @@ RAG_PROMPTS = {
 [SBOM 정보]
 {sbom_info}
 
-[이전 대화 전체]
+[이전 대화 (요약 + 최근 대화)]
 {conversation_history}
 
 [현재 질문]
@@ -417,6 +441,20 @@ def build_security_analysis_prompt(code: str, file_list: List[Dict] = None) -> s
         code=code
     )
 
+def build_vulnerability_detail_prompt(vuln: Dict, code_context: str) -> str:
+    """발견된 취약점 1건의 수정 코드/공격 시나리오 생성 프롬프트"""
+    location = vuln.get('location') or {}
+    return SECURITY_PROMPTS["vulnerability_details"].format(
+        vuln_type=vuln.get('type', 'Unknown'),
+        severity=vuln.get('severity', 'MEDIUM'),
+        file=location.get('file', 'unknown'),
+        line=location.get('line', '?'),
+        function=location.get('function', 'unknown'),
+        description=vuln.get('description', ''),
+        code_snippet=location.get('code_snippet') or vuln.get('vulnerable_code', ''),
+        code_context=code_context
+    )
+
 def build_principle_based_prompt(code: str) -> str:
     """원리 기반 분석 프롬프트 생성"""
     # 라인 번호 추가
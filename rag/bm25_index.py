@@ -0,0 +1,207 @@
+# rag/bm25_index.py
+"""
+KISIA 가이드라인 BM25 역색인 (프로세스 내, 임베딩 모델 불필요)
+- 구조화 데이터(kisia_structured.json)에서 벡터 DB와 같은 취약점 섹션 문서/ID로 색인
+- 한글은 음절 bigram, 영문/숫자는 단어(언더스코어·CamelCase 분리) 단위로 토큰화
+- 벡터 검색 순위와 RRF(reciprocal rank fusion)로 결합
+"""
+import json
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import rag_config
+from rag.kisia_vulnerability_mapping import KISIAVulnerabilityMapper
+
+_HANGUL_RUN = re.compile(r'[가-힣]+')
+_WORD_RUN = re.compile(r'[A-Za-z0-9]+')
+_CAMEL_SPLIT = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    한국어 인지 토큰화
+
+    - 한글 연속 구간: 음절 bigram (1음절 단어는 그대로) - 형태소 분석기 없이 조사/어미 변화에 강함
+    - 영문/숫자: 소문자 단어, CamelCase와 언더스코어는 분리 (SQL_Injection → sql, injection)
+    """
+    tokens = []
+    for run in _HANGUL_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    for word in _WORD_RUN.findall(text):
+        tokens.extend(part.lower() for part in _CAMEL_SPLIT.split(word) if part)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 역색인"""
+
+    def __init__(self, k1: float = None, b: float = None):
+        self.k1 = rag_config.BM25_K1 if k1 is None else k1
+        self.b = rag_config.BM25_B if b is None else b
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._idf: Dict[str, float] = {}
+        self._doc_norms: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict] = None,
+              index_texts: Sequence[str] = None) -> "BM25Index":
+        """
+        문서 목록으로 색인 생성 (문서 길이 정규화 항은 미리 계산)
+
+        index_texts: 색인에 사용할 텍스트 (기본: 문서 본문) - 검색 결과로는 documents를 반환
+        """
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas) if metadatas is not None else [{} for _ in self.ids]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+        postings = defaultdict(list)
+        lengths = []
+        for doc_index, text in enumerate(index_texts if index_texts is not None else self.documents):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                postings[token].append((doc_index, tf))
+
+        total = len(self.documents)
+        avg_length = (sum(lengths) / total) if total else 0.0
+        self._postings = dict(postings)
+        self._idf = {
+            token: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for token, docs in self._postings.items()
+        }
+        self._doc_norms = [
+            self.k1 * (1 - self.b + self.b * (length / avg_length if avg_length else 0.0))
+            for length in lengths
+        ]
+        return self
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """질의 → [(문서 ID, BM25 점수)] (점수 내림차순, 일치 토큰 없는 문서 제외)"""
+        scores: Dict[int, float] = defaultdict(float)
+        for token, qtf in Counter(tokenize(query)).items():
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = self._idf[token]
+            for doc_index, tf in postings:
+                scores[doc_index] += qtf * idf * tf * (self.k1 + 1) / (tf + self._doc_norms[doc_index])
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [(self.ids[doc_index], score) for doc_index, score in ranked]
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        """문서 ID → {'content', 'metadata'}"""
+        doc_index = self._positions.get(doc_id)
+        if doc_index is None:
+            return None
+        return {'content': self.documents[doc_index], 'metadata': self.metadatas[doc_index]}
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = None) -> List[Tuple[str, float]]:
+    """
+    순위 목록들을 RRF로 결합: score(d) = Σ 1 / (k + rank)
+
+    점수 척도가 다른 BM25와 벡터 거리를 정규화 없이 합칠 수 있음
+    """
+    k = rag_config.RRF_K if k is None else k
+    scores: Dict[str, float] = defaultdict(float)
+    first_seen: Dict[str, int] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] += 1.0 / (k + rank)
+            first_seen.setdefault(doc_id, len(first_seen))
+    return sorted(scores.items(), key=lambda item: (-item[1], first_seen[item[0]]))
+
+
+# ============================================================================
+# KISIA 구조화 데이터 → 취약점 섹션 문서 (scripts/05_build_improved_vector_db.py와 공유)
+# ============================================================================
+
+def _format_code_examples(code_list: List[Dict]) -> str:
+    """코드 예제 포맷팅"""
+    if not code_list:
+        return "코드 예제 없음"
+
+    formatted = []
+    for code_info in code_list[:2]:  # 최대 2개만
+        formatted.append(f"```python\n{code_info['code']}\n```")
+
+    return '\n\n'.join(formatted)
+
+
+def vulnerability_document(vuln: Dict) -> str:
+    """취약점 섹션 문서 (전체 내용)"""
+    return f"""
+[취약점: {vuln['korean_name']}]
+섹션: {vuln['section']}
+
+[설명]
+{vuln['description']}
+
+[안전하지 않은 코드 예시]
+{_format_code_examples(vuln['unsafe_codes'])}
+
+[안전한 코드 예시]
+{_format_code_examples(vuln['safe_codes'])}
+
+[권장사항]
+{' '.join(vuln['recommendations'])}
+"""
+
+
+def vulnerability_metadata(vuln: Dict) -> Dict:
+    """취약점 섹션 메타데이터 (ChromaDB 호환)"""
+    return {
+        "section": vuln['section'],
+        "section_number": str(vuln['number']),  # 문자열로 변환
+        "korean_name": vuln['korean_name'],
+        "english_type": vuln['english_type'],
+        "start_page": vuln['start_page'],
+        "end_page": vuln['end_page'],
+        "has_unsafe_code": len(vuln['unsafe_codes']) > 0,
+        "has_safe_code": len(vuln['safe_codes']) > 0,
+        "unsafe_code_count": len(vuln['unsafe_codes']),
+        "safe_code_count": len(vuln['safe_codes'])
+    }
+
+
+# 간단한 사용 헬퍼 함수
+def build_guideline_index(path: str = None) -> BM25Index:
+    """구조화 데이터로 취약점 섹션 BM25 색인 생성 (ID는 벡터 DB와 같은 vuln_<english_type>)"""
+    path = Path(path or rag_config.STRUCTURED_DATA_FILE)
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        vulnerabilities = json.load(f)['vulnerabilities']
+
+    # 본문은 한국어라 영문 취약점 명칭 질의가 잘 맞지 않음 - 타입명/AI 명칭 별칭을 색인 텍스트 앞에 추가
+    aliases = defaultdict(list)
+    for alias, kisia_type in KISIAVulnerabilityMapper().AI_TO_KISIA_MAPPING.items():
+        aliases[kisia_type].append(alias)
+
+    documents = [vulnerability_document(vuln) for vuln in vulnerabilities]
+    index = BM25Index().build(
+        [f"vuln_{vuln['english_type']}" for vuln in vulnerabilities],
+        documents,
+        [vulnerability_metadata(vuln) for vuln in vulnerabilities],
+        index_texts=[
+            f"{vuln['english_type']} {vuln['korean_name']} {' '.join(aliases[vuln['english_type']])}\n{document}"
+            for vuln, document in zip(vulnerabilities, documents)
+        ]
+    )
+    print(f"🔤 BM25 색인 생성: {len(index)}개 섹션, {len(index._postings):,}개 토큰 "
+          f"({(time.perf_counter() - start) * 1000:.1f}ms)")
+    return index
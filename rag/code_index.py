@@ -0,0 +1,281 @@
+# rag/code_index.py
+"""
+분석 코드 청크 색인 (Q&A 세션용, 분석 1건당 1회 생성해 메모리에 유지)
+- 결합 코드('# ===== File: path =====')를 파일 → 함수/메소드 단위 청크로 분할 (파싱 불가 파일은 줄 단위)
+- BM25 색인(rag.bm25_index)으로 질문 관련 청크 검색, 설정 시 로컬 ONNX 임베딩 순위와 RRF 결합
+- 질문에서 언급한 취약점(번호/타입/파일/함수)의 위치 청크를 함께 포함
+"""
+import ast
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import qa_context_config
+from core.ast_prefilter import split_code_by_file
+from rag.bm25_index import BM25Index, reciprocal_rank_fusion
+
+SEVERITY_ORDER = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
+# "취약점 2", "2번" 같은 취약점 번호 언급
+_FINDING_NUMBER = re.compile(r'취약점\s*#?(\d+)|(?<!\d)(\d+)\s*번')
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]{2,}')
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def _get_embedder():
+    """코드 청크 임베딩용 공용 ONNX 임베더 (모델 없으면 None)"""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            try:
+                from rag.onnx_embedder import OnnxEmbedder
+                _embedder = OnnxEmbedder()
+            except Exception as e:
+                print(f"⚠️ 코드 청크 임베딩 비활성화 (BM25만 사용): {e}")
+                _embedder = False
+    return _embedder or None
+
+
+def _line_windows(start: int, end: int, max_lines: int) -> List[Tuple[int, int]]:
+    return [(s, min(s + max_lines - 1, end)) for s in range(start, end + 1, max_lines)]
+
+
+def chunk_file(path: str, content: str, max_lines: int = None) -> List[Dict]:
+    """
+    파일 → 청크 목록 [{'path', 'name', 'start_line', 'end_line', 'text'}]
+
+    최상위 함수와 클래스 메소드는 각각 1개 청크(데코레이터 포함), 그 사이의 모듈/클래스 코드는
+    연속 구간별로 묶음. max_lines보다 긴 구간은 나눔 (줄 번호는 파일 기준 1부터)
+    """
+    max_lines = max_lines or qa_context_config.CODE_CHUNK_MAX_LINES
+    lines = content.splitlines()
+    if not lines:
+        return []
+
+    units: List[Tuple[int, int, str]] = []   # (시작, 끝, 이름)
+    classes: List[Tuple[int, int, str]] = []
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        tree = None
+
+    def add_function(node, prefix: str = ''):
+        start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+        units.append((start, getattr(node, 'end_lineno', node.lineno), prefix + node.name))
+
+    if tree is not None:
+        for stmt in tree.body:
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                add_function(stmt)
+            elif isinstance(stmt, ast.ClassDef):
+                classes.append((stmt.lineno, getattr(stmt, 'end_lineno', stmt.lineno), stmt.name))
+                for child in stmt.body:
+                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        add_function(child, f"{stmt.name}.")
+
+    # 함수 밖 구간 (모듈 코드 / 클래스 본문)
+    covered = set()
+    for start, end, _ in units:
+        covered.update(range(start, end + 1))
+    gaps = []
+    line_no = 1
+    while line_no <= len(lines):
+        if line_no in covered or not lines[line_no - 1].strip():
+            line_no += 1
+            continue
+        start = line_no
+        while line_no <= len(lines) and line_no not in covered:
+            line_no += 1
+        end = line_no - 1
+        while end > start and not lines[end - 1].strip():
+            end -= 1
+        owner = next((name for c_start, c_end, name in classes if c_start <= start <= c_end), '<module>')
+        gaps.append((start, end, owner))
+
+    chunks = []
+    for start, end, name in sorted(units + gaps):
+        for w_start, w_end in _line_windows(start, end, max_lines):
+            text = "\n".join(lines[w_start - 1:w_end])
+            if text.strip():
+                chunks.append({'path': path, 'name': name, 'start_line': w_start, 'end_line': w_end, 'text': text})
+    return chunks
+
+
+def _same_file(chunk_path: str, finding_path: str) -> bool:
+    if not finding_path:
+        return False
+    chunk_path = chunk_path.replace('\\', '/')
+    finding_path = re.sub(r'^\./', '', finding_path.replace('\\', '/'))
+    return chunk_path == finding_path or chunk_path.endswith('/' + finding_path) \
+        or finding_path.endswith('/' + chunk_path) or chunk_path.rsplit('/', 1)[-1] == finding_path.rsplit('/', 1)[-1]
+
+
+class CodeIndex:
+    """
+    분석 코드 청크 검색
+
+    Example:
+        index = CodeIndex(analysis_code)
+        text, stats = index.context("login 함수 SQL 삽입 어떻게 고치나요?", vulnerabilities)
+    """
+
+    def __init__(self, code: str, use_embeddings: bool = None):
+        start = time.perf_counter()
+        self.chunks: List[Dict] = []
+        for path, content in split_code_by_file(code):
+            self.chunks.extend(chunk_file(path, content))
+        for i, chunk in enumerate(self.chunks):
+            chunk['id'] = f"chunk_{i}"
+        self._by_id = {chunk['id']: chunk for chunk in self.chunks}
+        self.paths = list(dict.fromkeys(chunk['path'] for chunk in self.chunks))
+        # 함수/메소드 이름 → 청크 (BM25 토큰화는 언더스코어에서 나뉘므로 정확한 이름은 따로 찾기)
+        self._by_name: Dict[str, List[Dict]] = {}
+        for chunk in self.chunks:
+            if chunk['name'] != '<module>':
+                self._by_name.setdefault(chunk['name'].rsplit('.', 1)[-1], []).append(chunk)
+
+        # 경로/함수명을 색인 텍스트에 포함 (파일명·함수명으로 묻는 질문)
+        self.bm25 = BM25Index().build(
+            [chunk['id'] for chunk in self.chunks],
+            [chunk['text'] for chunk in self.chunks],
+            index_texts=[f"{chunk['path']} {chunk['name']}\n{chunk['text']}" for chunk in self.chunks]
+        )
+
+        self.embeddings = None
+        use_embeddings = qa_context_config.CODE_INDEX_EMBEDDINGS if use_embeddings is None else use_embeddings
+        embedder = _get_embedder() if use_embeddings and self.chunks else None
+        if embedder is not None:
+            import numpy as np
+            self.embeddings = np.asarray(
+                embedder.embed([f"{chunk['path']} {chunk['name']}\n{chunk['text']}" for chunk in self.chunks]),
+                dtype=np.float32
+            )
+
+        print(f"🗂️ 코드 청크 색인: {len(self.paths)}개 파일, {len(self.chunks)}개 청크"
+              f"{' + 임베딩' if self.embeddings is not None else ''} "
+              f"({(time.perf_counter() - start) * 1000:.1f}ms)")
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, top_k: int = None) -> List[Dict]:
+        """질문 관련 청크 (BM25, 임베딩 사용 시 RRF 결합)"""
+        top_k = top_k or qa_context_config.CODE_TOP_K
+        depth = max(top_k * 2, 10)
+        lexical = [doc_id for doc_id, _ in self.bm25.search(query, top_k=depth)]
+        if self.embeddings is None:
+            return [self._by_id[doc_id] for doc_id in lexical[:top_k]]
+
+        import numpy as np
+        query_vector = np.asarray(_get_embedder().embed([query])[0], dtype=np.float32)
+        scores = self.embeddings @ query_vector
+        order = np.argsort(-scores)[:depth]
+        semantic = [self.chunks[i]['id'] for i in order]
+        fused = reciprocal_rank_fusion([lexical, semantic])
+        return [self._by_id[doc_id] for doc_id, _ in fused[:top_k]]
+
+    def chunk_at(self, path: str, line: Optional[int] = None, function: str = None) -> Optional[Dict]:
+        """취약점 위치(파일/라인, 없으면 함수명) → 청크"""
+        candidates = [chunk for chunk in self.chunks if _same_file(chunk['path'], path)]
+        # 경로 없는 취약점 / 단일 파일 분석(경로 구분자 없음)은 전체에서 찾기
+        if not candidates and (not path or len(self.paths) == 1):
+            candidates = self.chunks
+        try:
+            line = int(line)
+        except (TypeError, ValueError):
+            line = None
+        if line:
+            for chunk in candidates:
+                if chunk['start_line'] <= line <= chunk['end_line']:
+                    return chunk
+        if function and function != 'unknown':
+            for chunk in candidates:
+                if chunk['name'] == function or chunk['name'].endswith('.' + function):
+                    return chunk
+        return None
+
+    @staticmethod
+    def referenced_findings(text: str, vulnerabilities: Sequence[Dict]) -> List[int]:
+        """질문에서 언급한 취약점 인덱스 (번호 / 타입 / 파일명 / 함수명)"""
+        referenced = []
+        numbers = {int(a or b) for a, b in _FINDING_NUMBER.findall(text)}
+        lowered = text.lower()
+        for i, vuln in enumerate(vulnerabilities):
+            location = vuln.get('location', {}) or {}
+            file_name = (location.get('file') or '').replace('\\', '/').rsplit('/', 1)[-1]
+            function = location.get('function') or ''
+            vuln_type = (vuln.get('type') or '').lower()
+            if (i + 1) in numbers \
+                    or (vuln_type and (vuln_type in lowered or vuln_type.replace('_', ' ') in lowered)) \
+                    or (file_name and file_name.lower() in lowered) \
+                    or (len(function) >= 3 and function != 'unknown'
+                        and re.search(rf'\b{re.escape(function.lower())}\b', lowered)):
+                referenced.append(i)
+        return referenced
+
+    # ------------------------------------------------------------------
+    # 프롬프트용 텍스트
+    # ------------------------------------------------------------------
+
+    def context(self, question: str, vulnerabilities: Sequence[Dict] = (), recent_question: str = None,
+                top_k: int = None) -> Tuple[str, Dict]:
+        """
+        질문에 맞는 코드 컨텍스트 텍스트와 통계
+
+        - 언급된 취약점 위치 청크 + 질문 검색 상위 청크 (중복 제거, 파일/줄 순)
+        - 후속 질문("그럼 어떻게 고쳐요?")은 직전 질문까지 함께 보고 취약점 언급을 찾음
+        - 언급도 검색 결과도 없으면 심각도 높은 취약점 위치 청크
+        """
+        top_k = top_k or qa_context_config.CODE_TOP_K
+        mention_text = f"{recent_question or ''}\n{question}"
+        referenced = self.referenced_findings(mention_text, vulnerabilities)
+
+        finding_chunks = []
+        for i in referenced:
+            location = vulnerabilities[i].get('location', {}) or {}
+            chunk = self.chunk_at(location.get('file'), location.get('line'), location.get('function'))
+            if chunk:
+                finding_chunks.append(chunk)
+
+        # 질문에 그대로 쓴 함수/클래스 이름은 바로 포함, 취약점 번호는 검색어에서 제외 (숫자 상수와 오일치)
+        named = [chunk for word in dict.fromkeys(_IDENTIFIER.findall(question))
+                 for chunk in self._by_name.get(word, [])][:top_k]
+        searched = self.search(_FINDING_NUMBER.sub(' ', question), top_k=top_k)
+        source = 'search'
+        if not finding_chunks and not named and not searched:
+            source = 'severity'
+            ranked = sorted(range(len(vulnerabilities)),
+                            key=lambda i: SEVERITY_ORDER.get(str(vulnerabilities[i].get('severity', '')).upper(), 9))
+            for i in ranked:
+                location = vulnerabilities[i].get('location', {}) or {}
+                chunk = self.chunk_at(location.get('file'), location.get('line'), location.get('function'))
+                if chunk and chunk not in finding_chunks:
+                    finding_chunks.append(chunk)
+                if len(finding_chunks) >= top_k:
+                    break
+
+        selected = {}
+        for chunk in finding_chunks + named + searched:
+            selected.setdefault(chunk['id'], chunk)
+        chunks = sorted(selected.values(), key=lambda c: (c['path'], c['start_line']))
+
+        stats = {
+            'chunks': len(self.chunks), 'selected': len(chunks),
+            'findings': len(finding_chunks), 'named': len(named), 'searched': len(searched), 'source': source
+        }
+        if not chunks:
+            return "질문과 관련된 코드 청크 없음", stats
+
+        parts = []
+        finding_ids = {chunk['id'] for chunk in finding_chunks}
+        for chunk in chunks:
+            tag = " · 취약점 위치" if chunk['id'] in finding_ids else ""
+            parts.append(f"### {chunk['path']}:{chunk['start_line']}-{chunk['end_line']} ({chunk['name']}){tag}\n"
+                         f"```python\n{chunk['text']}\n```")
+        return "\n\n".join(parts), stats
@@ -3,25 +3,46 @@
 개선된 RAG 검색 시스템
 KISIA 구조화 데이터 활용
 """
-import chromadb
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
 from typing import Dict, List, Optional
 import sys
 sys.path.append('.')
 from rag.kisia_vulnerability_mapping import KISIAVulnerabilityMapper
+from rag.bm25_index import BM25Index, build_guideline_index, reciprocal_rank_fusion
+from rag.vector_backend import open_collections
+from config import rag_config
+from core.telemetry import trace_span
 
 class ImprovedRAGSearch:
     """개선된 RAG 검색"""
     
     def __init__(self, vector_db_path: str = "data/vector_db_v2"):
-        self.client = chromadb.PersistentClient(path=vector_db_path)
         self.mapper = KISIAVulnerabilityMapper()
+        self.evidence_table_path = Path(vector_db_path) / rag_config.EVIDENCE_TABLE_FILE
         
-        # 컬렉션 로드
-        self.collections = {
-            'vulnerabilities': self.client.get_collection("kisia_vulnerabilities"),
-            'code_examples': self.client.get_collection("kisia_code_examples"),
-            'recommendations': self.client.get_collection("kisia_recommendations")
+        # 컬렉션 로드 (VECTOR_BACKEND: chroma / numpy)
+        names = {
+            'vulnerabilities': "kisia_vulnerabilities",
+            'code_examples': "kisia_code_examples",
+            'recommendations': "kisia_recommendations"
         }
+        loaded = open_collections(vector_db_path, list(names.values()))
+        self.collections = {key: loaded[name] for key, name in names.items()}
+        
+        # 근거 검색 결과 LRU 캐시 (KISIA 타입 또는 폴백 검색어 기준, 분석 실행 간 공유)
+        self._evidence_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_size = rag_config.EVIDENCE_CACHE_SIZE
+        
+        # 사전 계산 근거 테이블 (매핑된 KISIA 타입은 벡터 DB 조회 없이 제공)
+        self.evidence_table: Dict[str, Dict] = self._load_evidence_table()
+        
+        # BM25 색인 (구조화 데이터로 1회 생성, 폴백 검색에서 벡터 순위와 RRF로 결합)
+        self.search_mode = rag_config.SEARCH_MODE
+        self.bm25: Optional[BM25Index] = self._load_bm25_index()
     
         # search_vulnerability_evidence 메소드 전체를 아래 코드로 교체
     def search_vulnerability_evidence(self, ai_vuln_type: str, top_k: int = 3) -> Dict:
@@ -37,7 +58,9 @@ class ImprovedRAGSearch:
         
         results = None
 
-        # 2. 매핑 성공 시: get()으로 정확한 정보 우선 조회
+        # 2. 매핑 성공 시: 근거 테이블 → get() 순으로 정확한 정보 조회
+        if kisia_type in self.evidence_table:
+            return self.evidence_table[kisia_type]
         if kisia_type:
             print(f"✅ 매핑 성공: '{ai_vuln_type}' → '{kisia_type}'. get()으로 직접 조회 시도...")
             results = self._get_exact_evidence(kisia_type)
@@ -55,6 +78,218 @@ class ImprovedRAGSearch:
         print(f"✅ '{kisia_type}'에 대한 정확한 가이드라인을 찾았습니다.")
         return results
 
+    def search_vulnerability_evidence_batch(self, ai_vuln_types: List[str], top_k: int = 3) -> Dict[str, Dict]:
+        """
+        여러 취약점 타입의 근거를 한 번에 검색
+        
+        1. 각 타입을 KISIA 타입으로 매핑해 중복 제거
+        2. 근거 테이블에 있는 타입은 바로 사용, LRU 캐시에 있으면 재사용
+        3. 나머지 매핑 타입은 컬렉션별 get() 1회 ($in 필터)로 조회
+        4. 매핑 실패/조회 실패 타입은 query_texts 배치 1회로 유사도 검색
+        
+        Returns:
+            {AI 취약점 타입: search_vulnerability_evidence와 같은 형식의 결과}
+        """
+        with trace_span('rag.evidence_batch', {'rag.types': len(ai_vuln_types), 'rag.top_k': top_k}) as span:
+            # 타입별 캐시 키: 매핑 성공 시 KISIA 타입, 실패 시 검색어
+            keys = {}
+            for ai_type in dict.fromkeys(t for t in ai_vuln_types if t):
+                kisia_type = self.mapper.get_kisia_type(ai_type)
+                keys[ai_type] = (kisia_type, f"kisia:{kisia_type}" if kisia_type else f"query:{ai_type.strip().lower()}")
+            
+            resolved: Dict[str, Dict] = {}
+            table_hits = cache_hits = 0
+            for kisia_type, cache_key in keys.values():
+                if kisia_type in self.evidence_table:
+                    resolved[cache_key] = self.evidence_table[kisia_type]
+                    table_hits += 1
+                    continue
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    resolved[cache_key] = cached
+                    cache_hits += 1
+            
+            # 매핑된 타입은 get() 배치 조회
+            exact_types = sorted({k for k, key in keys.values() if k and key not in resolved})
+            if exact_types:
+                print(f"✅ KISIA 타입 {len(exact_types)}종 근거 일괄 조회: {', '.join(exact_types)}")
+                for kisia_type, result in self._get_exact_evidence_batch(exact_types).items():
+                    if result.get('vulnerability'):
+                        resolved[f"kisia:{kisia_type}"] = result
+                        self._cache_put(f"kisia:{kisia_type}", result)
+            
+            # 남은 타입은 query() 배치 유사도 검색 (AI 타입 원문을 검색어로 사용)
+            fallback_queries = {}
+            for ai_type, (_, cache_key) in keys.items():
+                if cache_key not in resolved:
+                    fallback_queries.setdefault(ai_type.strip().lower(), []).append(ai_type)
+            if fallback_queries:
+                # 검색어는 원문 표기를 그대로 사용 (대소문자만 다른 타입은 1건으로)
+                queries = [types[0] for types in fallback_queries.values()]
+                print(f"📝 텍스트 검색 폴백 (배치 {len(queries)}건): {', '.join(queries)}")
+                for same_types, result in zip(fallback_queries.values(), self._fallback_text_search_batch(queries, top_k)):
+                    for ai_type in same_types:
+                        kisia_type, cache_key = keys[ai_type]
+                        resolved[cache_key] = result
+                        # get() 조회에 실패한 매핑 타입도 폴백 결과를 캐시
+                        self._cache_put(cache_key, result)
+            
+            span.set_attributes({
+                'rag.unique_types': len(keys),
+                'rag.table_hits': table_hits,
+                'rag.cache_hits': cache_hits,
+                'rag.exact_lookups': len(exact_types),
+                'rag.fallback_queries': len(fallback_queries)
+            })
+            
+        return {ai_type: resolved.get(cache_key) for ai_type, (_, cache_key) in keys.items()}
+    
+    def clear_evidence_cache(self):
+        """근거 캐시 비우기 + 근거 테이블 다시 로드 (벡터 DB 재구축 후 호출)"""
+        with self._cache_lock:
+            self._evidence_cache.clear()
+        self.evidence_table = self._load_evidence_table()
+    
+    def _load_evidence_table(self) -> Dict[str, Dict]:
+        """05_build_improved_vector_db.py가 생성한 근거 테이블 로드 (없으면 빈 테이블)"""
+        try:
+            with open(self.evidence_table_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print(f"⚠️ 근거 테이블 없음 ({self.evidence_table_path}), 벡터 DB 조회 사용")
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 근거 테이블 로드 실패, 벡터 DB 조회 사용: {e}")
+            return {}
+        
+        table = {}
+        for kisia_type, entry in data.get('types', {}).items():
+            if not entry.get('vulnerability'):
+                continue
+            table[kisia_type] = {
+                'vulnerability': entry['vulnerability'],
+                'unsafe_codes': entry.get('unsafe_codes', []),
+                'safe_codes': entry.get('safe_codes', []),
+                'recommendations': entry.get('recommendations'),
+                'metadata': self.mapper.get_section_info(kisia_type) or {}
+            }
+        print(f"🗂️ 근거 테이블 로드: {len(table)}개 타입 (빌드 {data.get('built_at', 'N/A')})")
+        return table
+    
+    def _load_bm25_index(self) -> Optional[BM25Index]:
+        """구조화 데이터로 BM25 색인 생성 (없으면 벡터 검색만 사용)"""
+        if self.search_mode == 'vector':
+            return None
+        try:
+            return build_guideline_index()
+        except FileNotFoundError:
+            print(f"⚠️ 구조화 데이터 없음 ({rag_config.STRUCTURED_DATA_FILE}), 벡터 검색만 사용")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ BM25 색인 생성 실패, 벡터 검색만 사용: {e}")
+        return None
+    
+    def _cache_get(self, key: str) -> Optional[Dict]:
+        with self._cache_lock:
+            if key in self._evidence_cache:
+                self._evidence_cache.move_to_end(key)
+                return self._evidence_cache[key]
+        return None
+    
+    def _cache_put(self, key: str, value: Dict):
+        with self._cache_lock:
+            self._evidence_cache[key] = value
+            self._evidence_cache.move_to_end(key)
+            while len(self._evidence_cache) > self.cache_size:
+                self._evidence_cache.popitem(last=False)
+    
+    def _get_exact_evidence_batch(self, kisia_types: List[str]) -> Dict[str, Dict]:
+        """여러 KISIA 타입을 컬렉션별 get() 1회로 조회"""
+        batch = {
+            t: {'vulnerability': None, 'unsafe_codes': [], 'safe_codes': [],
+                'recommendations': None, 'metadata': self.mapper.get_section_info(t) or {}}
+            for t in kisia_types
+        }
+        where_type = lambda field: {field: {"$in": kisia_types}} if len(kisia_types) > 1 else {field: kisia_types[0]}
+        
+        # 취약점 섹션 (타입별 첫 문서)
+        vuln_results = self.collections['vulnerabilities'].get(where=where_type("english_type"))
+        for doc, meta in zip(vuln_results['documents'], vuln_results['metadatas']):
+            result = batch.get(meta.get('english_type'))
+            if result is not None and result['vulnerability'] is None:
+                result['vulnerability'] = {'content': doc, 'metadata': meta}
+        
+        # 코드 예제 (타입별 최대 4개)
+        code_results = self.collections['code_examples'].get(where=where_type("vulnerability_type"))
+        for doc, meta in zip(code_results['documents'], code_results['metadatas']):
+            result = batch.get(meta.get('vulnerability_type'))
+            if result is None or len(result['unsafe_codes']) + len(result['safe_codes']) >= 4:
+                continue
+            item = {'code': doc, 'metadata': meta}
+            (result['unsafe_codes'] if meta.get('code_type') == 'unsafe' else result['safe_codes']).append(item)
+        
+        # 권장사항 (타입별 첫 문서)
+        rec_results = self.collections['recommendations'].get(where=where_type("vulnerability_type"))
+        for doc, meta in zip(rec_results['documents'], rec_results['metadatas']):
+            result = batch.get(meta.get('vulnerability_type'))
+            if result is not None and result['recommendations'] is None:
+                result['recommendations'] = {'content': doc, 'metadata': meta}
+        
+        return batch
+    
+    def _fallback_text_search_batch(self, queries: List[str], top_k: int = 3) -> List[Dict]:
+        """
+        여러 검색어 폴백 검색 (SEARCH_MODE)
+        - hybrid: BM25 순위와 벡터 순위(query_texts 배치 1회)를 RRF로 결합
+        - lexical: BM25만 사용 (임베딩 모델 호출 없음, 일치 토큰이 없는 검색어만 벡터 검색)
+        - vector: 벡터 검색만 사용
+        """
+        mode = self.search_mode if self.bm25 is not None else 'vector'
+        depth = max(top_k, rag_config.RRF_DEPTH)
+        
+        with trace_span('rag.fallback_search', {'rag.mode': mode, 'rag.queries': len(queries),
+                                                'rag.backend': self.collections['vulnerabilities'].backend}) as span:
+            lexical = [[doc_id for doc_id, _ in self.bm25.search(q, depth)] for q in queries] \
+                if mode != 'vector' else [[] for _ in queries]
+            
+            # 벡터 검색 대상: lexical 모드에서는 BM25 결과가 없는 검색어만
+            vector_targets = [i for i in range(len(queries)) if mode != 'lexical' or not lexical[i]]
+            vector_ids = [[] for _ in queries]
+            vector_docs = [{} for _ in queries]
+            if vector_targets:
+                vuln_results = self.collections['vulnerabilities'].query(
+                    query_texts=[queries[i] for i in vector_targets],
+                    n_results=depth if mode == 'hybrid' else top_k
+                )
+                for row, i in enumerate(vector_targets):
+                    ids = vuln_results['ids'][row] if vuln_results['ids'] else []
+                    documents = vuln_results['documents'][row] if vuln_results['documents'] else []
+                    metadatas = vuln_results['metadatas'][row] if vuln_results['metadatas'] else []
+                    vector_ids[i] = list(ids)
+                    vector_docs[i] = {
+                        doc_id: {'content': doc, 'metadata': meta or {}}
+                        for doc_id, doc, meta in zip(ids, documents, metadatas or [None] * len(ids))
+                    }
+            span.set_attribute('rag.vector_queries', len(vector_targets))
+        
+        results = []
+        for i in range(len(queries)):
+            result = {
+                'vulnerability': None,
+                'unsafe_codes': [],
+                'safe_codes': [],
+                'recommendations': None,
+                'metadata': {'fallback': True, 'retrieval': mode}
+            }
+            if mode == 'hybrid':
+                ranking = [doc_id for doc_id, _ in reciprocal_rank_fusion([lexical[i], vector_ids[i]])]
+            else:
+                ranking = lexical[i] or vector_ids[i]
+            if ranking:
+                top = ranking[0]
+                result['vulnerability'] = vector_docs[i].get(top) or (self.bm25.get(top) if self.bm25 else None)
+            results.append(result)
+        return results
+    
     def _get_exact_evidence(self, kisia_type: str) -> Dict:
         """메타데이터(kisia_type)를 기반으로 get()을 사용해 문서를 직접 조회"""
         
@@ -93,56 +328,10 @@ class ImprovedRAGSearch:
 
         return results
 
-    # _fallback_text_search 메소드는 query를 사용하므로 그대로 유지
-    def _fallback_text_search(self, query: str, top_k: int = 3) -> Dict:
-        """텍스트 기반 폴백 검색 (유사도 기반 query 사용)"""
-        # (이 메소드의 코드는 변경할 필요 없습니다)
-        print(f"📝 텍스트 검색 폴백: {query}")
-        
-        results = {
-            'vulnerability': None, 'unsafe_codes': [], 'safe_codes': [],
-            'recommendations': None, 'metadata': {'fallback': True}
-        }
-        
-        # 텍스트 유사도로 검색
-        vuln_results = self.collections['vulnerabilities'].query(
-            query_texts=[query],
-            n_results=top_k
-        )
-        
-        if vuln_results['documents'] and vuln_results['documents'][0]:
-            results['vulnerability'] = {
-                'content': vuln_results['documents'][0][0],
-                'metadata': vuln_results['metadatas'][0][0] if vuln_results['metadatas'][0] else {}
-            }
-        
-        return results
-    
     def _fallback_text_search(self, query: str, top_k: int = 3) -> Dict:
-        """텍스트 기반 폴백 검색"""
+        """텍스트 기반 폴백 검색 (BM25 + 벡터 결합)"""
         print(f"📝 텍스트 검색 폴백: {query}")
-        
-        results = {
-            'vulnerability': None,
-            'unsafe_codes': [],
-            'safe_codes': [],
-            'recommendations': None,
-            'metadata': {'fallback': True}
-        }
-        
-        # 텍스트 유사도로 검색
-        vuln_results = self.collections['vulnerabilities'].query(
-            query_texts=[query],
-            n_results=top_k
-        )
-        
-        if vuln_results['documents'][0]:
-            results['vulnerability'] = {
-                'content': vuln_results['documents'][0][0],
-                'metadata': vuln_results['metadatas'][0][0] if vuln_results['metadatas'][0] else {}
-            }
-        
-        return results
+        return self._fallback_text_search_batch([query], top_k)[0]
     
     def format_evidence_for_llm(self, search_results: Dict) -> str:
         """검색 결과를 LLM용 텍스트로 포맷팅"""
@@ -150,9 +150,26 @@ class KISIAVulnerabilityMapper:
             "Debug Mode": "Debug_Code",
             "디버그 모드": "Debug_Code",
         }
+        
+        # 부분 매칭 실패 시 키워드 기반 추측 규칙 (순서 = 우선순위)
+        # (키워드 목록, KISIA 타입[, (보조 키워드, 보조 키워드 포함 시 타입)])
+        self.KEYWORD_RULES = [
+            (['sql', 'query', 'database'], "SQL_Injection"),
+            (['xss', 'script', 'cross-site'], "XSS"),
+            (['command', 'os', 'shell', 'exec'], "Command_Injection"),
+            (['path', 'directory', 'traversal', '../'], "Path_Traversal"),
+            (['hardcode', 'secret', 'password', 'api'], "Hardcoded_Secrets"),
+            (['deserial', 'pickle', 'yaml'], "Unsafe_Deserialization"),
+            (['auth'], "Improper_Authorization", ('missing', "Missing_Authentication")),
+        ]
     
     def get_kisia_type(self, ai_vuln_type: str) -> str:
-        """AI가 생성한 취약점 타입을 KISIA 표준 타입으로 변환"""
+        """AI가 생성한 취약점 타입을 KISIA 표준 타입으로 변환 (컴파일된 공용 분류기 사용)"""
+        from rag.vulnerability_classifier import get_vulnerability_classifier
+        return get_vulnerability_classifier().get_kisia_type(ai_vuln_type)
+    
+    def _get_kisia_type_linear(self, ai_vuln_type: str) -> str:
+        """기존 선형 스캔 구현 (분류기 일치 검증용 기준)"""
         # 정확한 매칭 시도
         if ai_vuln_type in self.AI_TO_KISIA_MAPPING:
             return self.AI_TO_KISIA_MAPPING[ai_vuln_type]
@@ -164,20 +181,11 @@ class KISIAVulnerabilityMapper:
                 return kisia_type
         
         # 키워드 기반 추측
-        if any(keyword in ai_lower for keyword in ['sql', 'query', 'database']):
-            return "SQL_Injection"
-        elif any(keyword in ai_lower for keyword in ['xss', 'script', 'cross-site']):
-            return "XSS"
-        elif any(keyword in ai_lower for keyword in ['command', 'os', 'shell', 'exec']):
-            return "Command_Injection"
-        elif any(keyword in ai_lower for keyword in ['path', 'directory', 'traversal', '../']):
-            return "Path_Traversal"
-        elif any(keyword in ai_lower for keyword in ['hardcode', 'secret', 'password', 'api']):
-            return "Hardcoded_Secrets"
-        elif any(keyword in ai_lower for keyword in ['deserial', 'pickle', 'yaml']):
-            return "Unsafe_Deserialization"
-        elif any(keyword in ai_lower for keyword in ['auth']):
-            return "Missing_Authentication" if 'missing' in ai_lower else "Improper_Authorization"
+        for rule in self.KEYWORD_RULES:
+            if any(keyword in ai_lower for keyword in rule[0]):
+                if len(rule) > 2 and rule[2][0] in ai_lower:
+                    return rule[2][1]
+                return rule[1]
         
         # 매칭 실패 시 None
         return None
@@ -0,0 +1,171 @@
+# rag/onnx_embedder.py
+"""
+벡터 DB 빌드용 로컬 ONNX 배치 임베딩
+- Chroma 기본 임베딩(all-MiniLM-L6-v2 ONNX)과 같은 토큰화 / mean pooling / L2 정규화 → 질의 시 임베딩과 호환
+- 로컬 모델 폴더(EmbeddingConfig.MODEL_DIR)만 사용 - 빌드 중 모델을 내려받지 않고 없으면 바로 실패
+- onnxruntime CPU 세션 스레드 수 / 배치 크기 설정, 길이순 정렬 + 배치 내 최장 길이까지만 패딩
+- 문서 해시 키 SQLite 캐시 → 재빌드 시 바뀐 문서만 새로 계산
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import embedding_config
+
+MODEL_FILES = ("model.onnx", "tokenizer.json")
+
+
+class EmbeddingCache:
+    """문서 해시 → 임베딩(float32 BLOB) SQLite 캐시"""
+
+    def __init__(self, path: str = None):
+        self.path = path or embedding_config.CACHE_PATH
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(unique), 500):  # SQLite 변수 개수 제한
+                chunk = unique[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+            )
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class OnnxEmbedder:
+    """
+    onnxruntime CPU 배치 임베딩
+
+    Example:
+        embedder = OnnxEmbedder(batch_size=64, threads=4)
+        collection.add(ids=ids, documents=documents, embeddings=embedder.embed(documents))
+    """
+
+    def __init__(self, model_dir: str = None, batch_size: int = None, threads: int = None,
+                 cache_path: str = None, use_cache: bool = True):
+        self.model_dir = model_dir or embedding_config.MODEL_DIR
+        self.batch_size = batch_size or embedding_config.BATCH_SIZE
+        self.threads = embedding_config.THREADS if threads is None else threads
+        self.max_tokens = embedding_config.MAX_TOKENS
+        self.cache = EmbeddingCache(cache_path) if use_cache else None
+
+        missing = [name for name in MODEL_FILES if not os.path.exists(os.path.join(self.model_dir, name))]
+        if missing:
+            raise FileNotFoundError(
+                f"임베딩 모델 파일 없음: {self.model_dir} ({', '.join(missing)}) - "
+                f"{embedding_config.MODEL_NAME} ONNX 모델을 받아 EMBEDDING_MODEL_DIR로 지정하세요"
+            )
+
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        start = time.perf_counter()
+        options = ort.SessionOptions()
+        options.log_severity_level = 3
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = self.threads
+        self.session = ort.InferenceSession(
+            os.path.join(self.model_dir, "model.onnx"), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        # 배치별 최장 길이까지만 패딩 (Chroma는 항상 256까지 패딩 - mean pooling은 마스크 기준이라 결과 동일)
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_tokens)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        # 모델 식별자: 모델 이름 + 최대 토큰 + 모델 파일 크기 (캐시 키 접두어 - 모델 교체 시 캐시 무효)
+        model_size = os.path.getsize(os.path.join(self.model_dir, "model.onnx"))
+        self.model_id = f"{embedding_config.MODEL_NAME}:{self.max_tokens}:{model_size}"
+        self._key_prefix = f"{self.model_id}:"
+        self.stats = {'documents': 0, 'cache_hits': 0, 'computed': 0, 'batches': 0, 'seconds': 0.0}
+        print(f"🧠 ONNX 임베딩 모델 로드: {self.model_dir} "
+              f"(배치 {self.batch_size}, 스레드 {self.threads or '자동'}, {time.perf_counter() - start:.2f}초)")
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256((self._key_prefix + text).encode('utf-8')).hexdigest()
+
+    def _forward(self, texts: List[str]) -> np.ndarray:
+        """토큰화 → 추론 → attention mask 가중 mean pooling → L2 정규화"""
+        encoded = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feed = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feed['token_type_ids'] = np.zeros_like(input_ids)
+
+        last_hidden_state = self.session.run(None, feed)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.where(norms == 0, 1e-12, norms)).astype(np.float32)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """문서 목록 임베딩 (캐시 적중분 제외하고 길이순 배치 추론, 입력 순서대로 반환)"""
+        start = time.perf_counter()
+        keys = [self._key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = self.cache.get_many(keys) if self.cache else {}
+        hits = sum(1 for key in keys if key in vectors)
+
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                pending.setdefault(key, text)
+
+        # 비슷한 길이끼리 묶어 패딩 낭비 최소화
+        order = sorted(pending, key=lambda key: len(pending[key]))
+        batches = 0
+        computed = {}
+        for i in range(0, len(order), self.batch_size):
+            batch_keys = order[i:i + self.batch_size]
+            for key, vector in zip(batch_keys, self._forward([pending[key] for key in batch_keys])):
+                computed[key] = vector
+            batches += 1
+        if computed and self.cache:
+            self.cache.put_many(computed)
+        vectors.update(computed)
+
+        elapsed = time.perf_counter() - start
+        for name, value in (('documents', len(texts)), ('cache_hits', hits), ('computed', len(computed)),
+                            ('batches', batches), ('seconds', elapsed)):
+            self.stats[name] += value
+        print(f"  🧠 임베딩 {len(texts)}개: 캐시 {hits}개, 계산 {len(computed)}개 "
+              f"(배치 {batches}회, {elapsed:.2f}초)")
+        return [vectors[key].tolist() for key in keys]
+
+    def __call__(self, texts: Sequence[str]) -> List[List[float]]:
+        return self.embed(texts)
@@ -0,0 +1,224 @@
+# rag/pdf_page_cache.py
+"""
+가이드라인 PDF 페이지 텍스트 추출 단계 (scripts 01/02/04 공용)
+- pdfplumber 추출을 페이지 범위 단위로 프로세스 풀에서 병렬 실행
+- 페이지별 텍스트(추출 옵션별) + 레이아웃 메타데이터(크기, 글꼴, 줄 위치)를 PDF 해시별 JSONL로 저장
+- 같은 PDF는 스크립트를 다시 실행해도 캐시에서 읽음 (겹치는 페이지 범위도 1회만 추출)
+- CachedPage.extract_text(**옵션)는 pdfplumber Page.extract_text와 같은 호출 형태
+"""
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from config import pdf_extract_config
+
+EXTRACTOR_VERSION = 1
+
+# 캐시에 저장할 extract_text 옵션 (01/04: 기본값, 02: x_tolerance=2)
+TEXT_VARIANTS = ({}, {'x_tolerance': 2})
+
+# pdfplumber extract_text 기본값 (기본값과 같은 옵션은 변형 키에서 제외)
+_DEFAULT_OPTIONS = {'layout': False, 'x_tolerance': 3, 'y_tolerance': 3}
+
+
+def variant_key(options: Dict) -> str:
+    """extract_text 옵션 → 캐시 변형 키 (예: 'default', 'x_tolerance=2')"""
+    normalized = {k: v for k, v in options.items() if _DEFAULT_OPTIONS.get(k, object()) != v}
+    return ",".join(f"{k}={normalized[k]}" for k in sorted(normalized)) or "default"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_range(pdf_path: str, start: int, end: int, variants: Sequence[Dict]) -> List[Dict]:
+    """프로세스 작업: 페이지 [start, end) 추출 (0부터 시작하는 인덱스)"""
+    import pdfplumber
+
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for index in range(start, end):
+            page = pdf.pages[index]
+            record = {'page': index + 1, 'width': float(page.width), 'height': float(page.height),
+                      'rotation': page.rotation or 0}
+            try:
+                record['text'] = {variant_key(options): page.extract_text(**options) or "" for options in variants}
+                chars = page.chars
+                record['char_count'] = len(chars)
+                record['font_sizes'] = [[size, count] for size, count in
+                                        Counter(round(c['size'], 1) for c in chars).most_common(5)]
+                record['fonts'] = [name for name, _ in Counter(c.get('fontname') for c in chars).most_common(5)]
+                extract_lines = getattr(page, 'extract_text_lines', None)  # pdfplumber 0.10+
+                record['lines'] = [
+                    {'text': line['text'], 'x0': round(line['x0'], 1), 'top': round(line['top'], 1),
+                     'x1': round(line['x1'], 1), 'bottom': round(line['bottom'], 1)}
+                    for line in (extract_lines(return_chars=False) if extract_lines else [])
+                ]
+            except Exception as e:
+                # 페이지 단위 실패는 기록만 (읽을 때 extract_text에서 다시 발생)
+                record.update({'text': {}, 'error': str(e)})
+            page.flush_cache()
+            pages.append(record)
+    return pages
+
+
+class CachedPage:
+    """캐시된 페이지 (pdfplumber Page 대신 사용)"""
+
+    def __init__(self, record: Dict):
+        self.page_number = record['page']
+        self.width = record['width']
+        self.height = record['height']
+        self.rotation = record.get('rotation', 0)
+        self.char_count = record.get('char_count', 0)
+        self.font_sizes = record.get('font_sizes', [])
+        self.fonts = record.get('fonts', [])
+        self.lines = record.get('lines', [])
+        self.error = record.get('error')
+        self._texts = record.get('text', {})
+
+    def extract_text(self, **options) -> str:
+        """추출 옵션별 캐시 텍스트 (TEXT_VARIANTS에 없는 옵션은 KeyError)"""
+        if self.error:
+            raise RuntimeError(f"페이지 {self.page_number} 추출 실패: {self.error}")
+        key = variant_key(options)
+        if key not in self._texts:
+            raise KeyError(f"캐시에 없는 추출 옵션: {key} (rag/pdf_page_cache.py TEXT_VARIANTS에 추가)")
+        return self._texts[key]
+
+
+class CachedPDF:
+    """캐시된 PDF (with 문으로 pdfplumber.open 대신 사용 가능)"""
+
+    def __init__(self, path: Path, sha256: str, pages: List[CachedPage], from_cache: bool):
+        self.path = path
+        self.sha256 = sha256
+        self.pages = pages
+        self.from_cache = from_cache
+
+    def __enter__(self) -> "CachedPDF":
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _read_cache(cache_path: Path, sha256: str, keys: set) -> Optional[List[Dict]]:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            meta = json.loads(f.readline())
+            if (meta.get('pdf_sha256') != sha256 or meta.get('extractor_version') != EXTRACTOR_VERSION
+                    or not keys <= set(meta.get('variants', []))):
+                return None
+            records = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 페이지 캐시 읽기 실패, 다시 추출: {e}")
+        return None
+    return records if len(records) == meta.get('pages') else None
+
+
+def _write_cache(cache_path: Path, meta: Dict, records: List[Dict]):
+    """임시 파일에 쓰고 교체 (동시에 읽는 스크립트가 쓰다 만 파일을 읽지 않도록)"""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_name(f".{cache_path.name}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp, cache_path)
+
+
+def extract_pages(pdf_path: Path, variants: Sequence[Dict] = TEXT_VARIANTS, workers: int = None) -> List[Dict]:
+    """전체 페이지 추출 (페이지 범위별 프로세스 풀, 결과는 페이지 순)"""
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        total = len(pdf.pages)
+    workers = workers or pdf_extract_config.WORKERS or os.cpu_count() or 1
+    # 작업마다 PDF를 다시 열므로 범위는 최소 PAGES_PER_TASK, 부하 분산을 위해 프로세스당 2개 정도
+    size = max(pdf_extract_config.PAGES_PER_TASK, -(-total // (workers * 2)), 1)
+    ranges = [(start, min(start + size, total)) for start in range(0, total, size)]
+    workers = min(workers, len(ranges))
+
+    records = []
+    if workers <= 1:
+        records = _extract_range(str(pdf_path), 0, total, variants)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_extract_range, str(pdf_path), start, end, list(variants))
+                       for start, end in ranges]
+            for done, future in enumerate(futures, 1):
+                records.extend(future.result())
+                if done % 5 == 0 or done == len(futures):
+                    print(f"  추출 중... {len(records)}/{total} 페이지")
+    return records
+
+
+def load_pdf_pages(pdf_path, variants: Sequence[Dict] = TEXT_VARIANTS, workers: int = None,
+                   cache_dir: str = None, refresh: bool = False) -> CachedPDF:
+    """
+    PDF 페이지 텍스트 로드 (캐시 우선, 없거나 PDF가 바뀌었으면 병렬 추출 후 저장)
+
+    Example:
+        with load_pdf_pages(pdf_path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+    """
+    pdf_path = Path(pdf_path)
+    start = time.perf_counter()
+    sha256 = file_sha256(pdf_path)
+    cache_path = Path(cache_dir or pdf_extract_config.CACHE_DIR) / f"{sha256[:16]}.jsonl"
+
+    # 요청 옵션 + 기본 변형을 함께 저장 (다른 스크립트가 다시 추출하지 않도록)
+    variants = list({variant_key(v): v for v in list(TEXT_VARIANTS) + list(variants)}.values())
+    keys = {variant_key(v) for v in variants}
+
+    records = None if refresh else _read_cache(cache_path, sha256, keys)
+    if records is not None:
+        print(f"📄 페이지 캐시 사용: {pdf_path.name} ({len(records)}페이지, "
+              f"{(time.perf_counter() - start) * 1000:.0f}ms)")
+        return CachedPDF(pdf_path, sha256, [CachedPage(r) for r in records], from_cache=True)
+
+    print(f"📄 PDF 페이지 추출: {pdf_path.name}")
+    records = extract_pages(pdf_path, variants, workers)
+    meta = {
+        'pdf': pdf_path.name,
+        'pdf_sha256': sha256,
+        'pages': len(records),
+        'variants': sorted(keys),
+        'extractor_version': EXTRACTOR_VERSION,
+        'created_at': datetime.now().isoformat()
+    }
+    _write_cache(cache_path, meta, records)
+    failed = sum(1 for r in records if r.get('error'))
+    print(f"✅ 페이지 추출 완료: {len(records)}페이지{f' (실패 {failed})' if failed else ''}, "
+          f"{time.perf_counter() - start:.1f}초 → {cache_path}")
+    return CachedPDF(pdf_path, sha256, [CachedPage(r) for r in records], from_cache=False)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="가이드라인 PDF 페이지 텍스트 추출 (scripts 01/02/04 공용 캐시)")
+    parser.add_argument('pdf_paths', nargs='*', default=["data/guidelines/Python_시큐어코딩_가이드(2023년_개정본).pdf"])
+    parser.add_argument('--workers', type=int, default=None, help="추출 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument('--refresh', action='store_true', help="캐시를 무시하고 다시 추출")
+    args = parser.parse_args()
+
+    for path in args.pdf_paths:
+        if not Path(path).exists():
+            print(f"❌ PDF 파일을 찾을 수 없습니다: {path}")
+            continue
+        load_pdf_pages(path, workers=args.workers, refresh=args.refresh)
@@ -0,0 +1,258 @@
+# rag/qa_context.py
+"""
+Q&A 프롬프트 컨텍스트 조립 (세션별 증분 유지 + 토큰 예산)
+- 분석 정보 / 취약점 / 코드 / SBOM 섹션은 입력 지문(fingerprint)이 같으면 캐시된 텍스트 재사용
+- 분석 코드 청크 색인(rag.code_index)은 분석 코드가 바뀔 때만 다시 생성
+- 대화 기록은 최근 N개 메시지 원문 + 창 밖으로 밀려난 메시지의 누적 요약 (요약은 새로 밀려난 메시지만 추가)
+- 전체 프롬프트를 토큰 예산에 맞춰 섹션별로 배분 (작은 섹션이 남긴 몫은 큰 섹션에 재분배)
+"""
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import qa_context_config
+from core.prompt_compactor import PromptCompactor, CHARS_PER_TOKEN
+from rag.code_index import CodeIndex
+
+# 대화 기록에서 제거할 답변 푸터 구분자 (SimpleRAG.ask가 붙이는 출처 표시)
+ANSWER_FOOTER = '\n\n---\n'
+
+_compactor: Optional[PromptCompactor] = None
+_compactor_lock = threading.Lock()
+
+
+def _get_compactor() -> PromptCompactor:
+    global _compactor
+    with _compactor_lock:
+        if _compactor is None:
+            _compactor = PromptCompactor()
+    return _compactor
+
+
+def count_tokens(text: str) -> int:
+    """토큰 수 (코드 압축기와 같은 tiktoken 인코딩, 미설치 시 추정)"""
+    return _get_compactor().count_tokens(text)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = 'head') -> str:
+    """
+    토큰 예산에 맞게 자르기
+
+    keep: 'head' (앞부분 유지, 코드/취약점) / 'tail' (뒷부분 유지, 대화 기록)
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    marker = "\n... (예산 초과로 생략) ...\n"
+    budget = max(max_tokens - count_tokens(marker), 1)
+    encoding = _get_compactor().encoding
+    if encoding is None:
+        chars = int(budget * CHARS_PER_TOKEN)
+        return text[:chars] + marker if keep == 'head' else marker + text[-chars:]
+
+    # 아주 긴 입력은 인코딩 전에 문자 단위로 먼저 잘라 tiktoken 비용 제한
+    window = budget * 12
+    if keep == 'head':
+        tokens = encoding.encode(text[:window], disallowed_special=())[:budget]
+        return encoding.decode(tokens) + marker
+    tokens = encoding.encode(text[-window:], disallowed_special=())[-budget:]
+    return marker + encoding.decode(tokens)
+
+
+def fingerprint(value: Any) -> str:
+    """섹션 입력 지문 (내용이 같으면 같은 값)"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def allocate_budget(sizes: Dict[str, int], shares: Dict[str, float], budget: int) -> Dict[str, int]:
+    """
+    섹션별 토큰 배분 (water-filling)
+
+    비중대로 나눈 몫보다 작은 섹션은 전체를 주고, 남은 예산을 나머지 섹션에 비중대로 다시 배분
+    """
+    allocation = {}
+    pending = {name: size for name, size in sizes.items() if size > 0}
+    remaining = max(budget, 0)
+    while pending:
+        total_share = sum(shares.get(name, 0.1) for name in pending)
+        fits = {
+            name: size for name, size in pending.items()
+            if size <= remaining * shares.get(name, 0.1) / total_share
+        }
+        if not fits:
+            for name in pending:
+                allocation[name] = int(remaining * shares.get(name, 0.1) / total_share)
+            break
+        for name, size in fits.items():
+            allocation[name] = size
+            remaining -= size
+            del pending[name]
+    for name in sizes:
+        allocation.setdefault(name, 0)
+    return allocation
+
+
+def _one_line(text: str, limit: int) -> str:
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+class QAContextBuilder:
+    """
+    세션별 Q&A 컨텍스트 (st.session_state에 보관 - SimpleRAG는 세션 간 공용)
+
+    Example:
+        builder = QAContextBuilder()
+        text = builder.section('sbom_info', sbom, lambda: format_sbom(sbom))
+        history = builder.conversation(messages, question)
+        prompt = builder.assemble(template, sections, fixed)
+    """
+
+    def __init__(self):
+        self._sections: Dict[str, Tuple[str, str, int]] = {}  # 이름 → (지문, 텍스트, 토큰 수)
+        self._summary: List[Tuple[str, int]] = []            # (요약 줄, 토큰 수)
+        self._summarized = 0          # 요약에 반영된 메시지 수
+        self._summary_dropped = 0     # 요약 예산 초과로 버린 줄 수
+        self._anchor = None           # 첫 메시지 (대화 초기화 감지)
+        self._code_index: Optional[Tuple[str, CodeIndex]] = None  # (분석 코드 지문, 색인)
+        self.last_stats: Dict = {}
+
+    # ------------------------------------------------------------------
+    # 분석 결과 섹션
+    # ------------------------------------------------------------------
+
+    def section(self, name: str, inputs: Any, build: Callable[[], str]) -> str:
+        """입력 지문이 같으면 캐시된 섹션 반환, 바뀌었으면 build()로 다시 생성"""
+        key = fingerprint(inputs)
+        cached = self._sections.get(name)
+        if cached and cached[0] == key:
+            self.last_stats.setdefault('cache_hits', []).append(name)
+            return cached[1]
+        text = build()
+        self._sections[name] = (key, text, count_tokens(text))
+        return text
+
+    def code_index(self, code: str) -> CodeIndex:
+        """분석 코드 청크 색인 (같은 분석 코드면 재사용)"""
+        key = fingerprint(code)
+        if self._code_index is None or self._code_index[0] != key:
+            self._code_index = (key, CodeIndex(code))
+        else:
+            self.last_stats.setdefault('cache_hits', []).append('code_index')
+        return self._code_index[1]
+
+    def section_tokens(self, name: str, text: str) -> int:
+        """섹션 토큰 수 (캐시된 텍스트면 저장된 값)"""
+        cached = self._sections.get(name)
+        if cached and cached[1] is text:
+            return cached[2]
+        return count_tokens(text)
+
+    # ------------------------------------------------------------------
+    # 대화 기록 (최근 창 + 누적 요약)
+    # ------------------------------------------------------------------
+
+    def _reset_conversation(self):
+        self._summary = []
+        self._summarized = 0
+        self._summary_dropped = 0
+        self._anchor = None
+
+    def _summary_line(self, message: Dict) -> str:
+        content = message.get('content', '')
+        if message.get('role') == 'user':
+            return f"- 사용자: {_one_line(content, qa_context_config.SUMMARY_QUESTION_CHARS)}"
+        content = content.split(ANSWER_FOOTER)[0]
+        return f"  AI: {_one_line(content, qa_context_config.SUMMARY_ANSWER_CHARS)}"
+
+    def conversation(self, messages: List[Dict], question: str = None) -> str:
+        """
+        이전 대화 텍스트 (현재 질문 제외)
+
+        창 밖으로 밀려난 메시지만 요약 줄로 추가하므로 턴마다 비용이 일정
+        """
+        # UI가 현재 질문을 먼저 기록에 넣으므로 제외
+        if messages and question is not None and messages[-1].get('role') == 'user' \
+                and messages[-1].get('content') == question:
+            messages = messages[:-1]
+
+        # 대화 초기화(목록 교체/축소) 감지
+        if not messages or messages[0] is not self._anchor or len(messages) < self._summarized:
+            self._reset_conversation()
+            self._anchor = messages[0] if messages else None
+
+        window = qa_context_config.HISTORY_WINDOW
+        evict_until = max(len(messages) - window, 0)
+        for message in messages[self._summarized:evict_until]:
+            line = self._summary_line(message)
+            self._summary.append((line, count_tokens(line)))
+        self._summarized = max(self._summarized, evict_until)
+
+        # 요약 예산 초과 시 오래된 줄부터 제거
+        while self._summary and sum(t for _, t in self._summary) > qa_context_config.SUMMARY_MAX_TOKENS:
+            self._summary.pop(0)
+            self._summary_dropped += 1
+
+        parts = []
+        if self._summary:
+            omitted = f" (초기 {self._summary_dropped}줄 생략)" if self._summary_dropped else ""
+            parts.append(f"[이전 대화 요약{omitted}]")
+            parts.extend(line for line, _ in self._summary)
+        recent = messages[evict_until:]
+        if recent:
+            parts.append("[최근 대화]")
+            for message in recent:
+                if message.get('role') == 'user':
+                    parts.append(f"\n사용자: {message['content']}")
+                else:
+                    parts.append(f"\nAI: {message['content'].split(ANSWER_FOOTER)[0]}")
+
+        self.last_stats['history'] = {
+            'messages': len(messages), 'summarized': self._summarized,
+            'summary_lines': len(self._summary), 'recent': len(recent)
+        }
+        return "\n".join(parts) if parts else "이전 대화 없음"
+
+    # ------------------------------------------------------------------
+    # 예산 조립
+    # ------------------------------------------------------------------
+
+    def assemble(self, template: str, sections: Dict[str, str], fixed: Dict[str, str],
+                 max_tokens: int = None) -> str:
+        """
+        template.format(**sections, **fixed)를 토큰 예산 안으로 조립
+
+        fixed(질문, 가이드 문서 등)는 그대로 두고 남은 예산을 sections에 SECTION_SHARES 비중으로 배분
+        """
+        max_tokens = max_tokens or qa_context_config.MAX_PROMPT_TOKENS
+        skeleton = template.format(**{name: "" for name in sections}, **fixed)
+        available = max_tokens - count_tokens(skeleton)
+
+        sizes = {name: self.section_tokens(name, text) for name, text in sections.items()}
+        allocation = allocate_budget(sizes, qa_context_config.SECTION_SHARES, available)
+
+        fitted = {}
+        for name, text in sections.items():
+            if sizes[name] <= allocation[name]:
+                fitted[name] = text
+            else:
+                keep = 'tail' if name == 'conversation_history' else 'head'
+                fitted[name] = truncate_to_tokens(text, allocation[name], keep=keep)
+
+        prompt = template.format(**fitted, **fixed)
+        self.last_stats.update({
+            'budget': max_tokens,
+            'fixed_tokens': max_tokens - available,
+            'sections': {name: (min(sizes[name], allocation[name]), sizes[name]) for name in sections},
+            'truncated': [name for name in sections if sizes[name] > allocation[name]]
+        })
+        return prompt
+
+    def begin(self):
+        """질문 1건 처리 시작 (통계 초기화)"""
+        self.last_stats = {'cache_hits': []}
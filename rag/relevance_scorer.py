@@ -0,0 +1,250 @@
+# rag/relevance_scorer.py
+"""
+RAG 문서 관련성 점수 계산
+- 모든 키워드 목록을 하나의 정규식으로 미리 컴파일해 문서를 한 번만 스캔
+- 문서별 소문자/토큰/키워드 적중 뷰를 LRU 캐시로 재사용
+- ImprovedSecurityAnalyzer의 기존 점수 계산과 같은 결과
+"""
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+
+from config import rag_config
+
+# 취약점 유형별 문서 순위 키워드 (_find_most_relevant_document)
+RANK_SECRET_BONUS = ['환경변수', '환경 변수', 'environment', 'env', '하드코딩', '노출']
+RANK_SECRET_PENALTY = ['rsa', '암호화 키', '대칭키']
+RANK_SQL = ['파라미터', 'parameter', '바인딩', 'binding', 'prepared']
+RANK_XSS = ['이스케이프', 'escape', 'sanitize', '삭제', 'html']
+
+# 관련성 점수 키워드 (_calculate_relevance_score)
+SCORE_SECRET = ['환경변수', '환경 변수', 'environment', '.env', 'config', '설정 파일', '하드코딩']
+SCORE_INJECTION = ['파라미터', 'parameter', '바인딩', 'binding', 'prepared', 'statement', '?', '%s']
+SCORE_XSS = ['이스케이프', 'escape', 'sanitize', '삭제', 'html', 'script', '스크립트']
+SCORE_GENERAL = ['취약', '공격', '방어', '보안', '안전', '위험', '검증', '확인']
+
+# 설명에서 뽑을 보안 키워드 (순서대로 최대 3개)
+SECURITY_TERMS = [
+    '암호화', '해시', '패스워드', '비밀번호', '시크릿', 'secret', 'key',
+    'SQL', 'XSS', 'CSRF', '인젝션', 'injection', '세션', 'session',
+    '인증', '인가', 'authentication', 'authorization', '토큰', 'token',
+    '파일', 'file', '경로', 'path', '명령어', 'command', 'os',
+    '직렬화', 'serialize', 'pickle', 'yaml', 'eval', 'exec'
+]
+
+# 설명 추출용 라인 마커 (_extract_description_only)
+CODE_START_MARKERS = [
+    '[안전하지 않은 코드]', '[안전한 코드]',
+    '안전하지 않은 코드 예시', '안전한 코드 예시',
+    '```python', '```', 'def ', 'class ', 'import '
+]
+TEXT_START_MARKERS = ['[권장사항]', '[설명]', '[취약점']
+CODE_LIKE_PATTERNS = ['__', 'self.', '()', '{}', '[]', '= ']
+
+
+def _compile_any(patterns: List[str]) -> "re.Pattern":
+    """패턴 중 하나라도 포함되는지 검사하는 정규식"""
+    return re.compile('|'.join(re.escape(p) for p in patterns))
+
+
+class _MultiPatternMatcher:
+    """
+    여러 부분 문자열의 포함 여부를 정규식 1회 스캔으로 판정
+
+    각 위치에서 가장 긴 패턴만 잡히는 정규식 특성상, 같은 위치에서 시작하는 짧은 패턴은
+    잡힌 패턴의 접두사이므로 접두사 관계를 미리 계산해 함께 적중 처리
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = sorted(set(patterns), key=len, reverse=True)
+        # 첫 글자 문자 클래스로 후보 위치만 빠르게 거른 뒤 전방 탐색으로 패턴 확인
+        first_chars = ''.join(re.escape(c) for c in sorted({p[0] for p in self.patterns}))
+        self.regex = re.compile('(?=[' + first_chars + '])(?=('
+                                + '|'.join(re.escape(p) for p in self.patterns) + '))')
+        self.implied = {
+            p: frozenset(q for q in self.patterns if p.startswith(q))
+            for p in self.patterns
+        }
+
+    def find(self, text: str) -> FrozenSet[str]:
+        found = set()
+        for longest in set(self.regex.findall(text)):
+            found |= self.implied[longest]
+        return frozenset(found)
+
+
+class DocumentView(NamedTuple):
+    """문서 한 건의 캐시된 뷰"""
+    lower: str
+    words: FrozenSet[str]
+    hits: FrozenSet[str]
+
+
+_ALL_KEYWORDS = [k.lower() for k in (
+    RANK_SECRET_BONUS + RANK_SECRET_PENALTY + RANK_SQL + RANK_XSS
+    + SCORE_SECRET + SCORE_INJECTION + SCORE_XSS + SCORE_GENERAL + SECURITY_TERMS
+)]
+
+
+class RelevanceScorer:
+    """미리 컴파일된 키워드 매처 기반 관련성 점수 계산기"""
+
+    def __init__(self, cache_size: int = None):
+        self.matcher = _MultiPatternMatcher(_ALL_KEYWORDS)
+        self.code_start = _compile_any(CODE_START_MARKERS)
+        self.text_start = _compile_any(TEXT_START_MARKERS)
+        self.code_like = _compile_any(CODE_LIKE_PATTERNS)
+        self.line_number = re.compile(r'^\d+:')
+        self.whitespace = re.compile(r'\s+')
+
+        size = cache_size or rag_config.RELEVANCE_VIEW_CACHE_SIZE
+        self.view = lru_cache(maxsize=size)(self._build_view)
+        self.extract_description = lru_cache(maxsize=size)(self._extract_description)
+
+    def _build_view(self, text: str) -> DocumentView:
+        lower = text.lower()
+        return DocumentView(lower, frozenset(lower.split()), self.matcher.find(lower))
+
+    @staticmethod
+    def _count(hits: FrozenSet[str], keywords: List[str]) -> int:
+        return sum(1 for k in keywords if k in hits)
+
+    # ------------------------------------------------------------------
+    # 점수 계산
+    # ------------------------------------------------------------------
+
+    def relevance_score(self, content: str, vuln_type: str, description: str) -> float:
+        """컨텐츠와 취약점 간 관련성 점수 (0~1)"""
+        view = self.view(content)
+        type_lower = vuln_type.lower()
+        score = 0.0
+
+        # 1. 취약점 타입 언급 확인 (30%)
+        if type_lower in view.lower:
+            score += 0.3
+
+        # 2. 취약점별 특정 키워드 확인 (50%)
+        if 'hardcoded' in type_lower or 'secret' in type_lower:
+            keyword_score = min(self._count(view.hits, SCORE_SECRET) * 0.1, 0.5)
+        elif 'sql' in type_lower or 'injection' in type_lower:
+            keyword_score = min(self._count(view.hits, SCORE_INJECTION) * 0.1, 0.5)
+        elif 'xss' in type_lower:
+            keyword_score = min(self._count(view.hits, SCORE_XSS) * 0.1, 0.5)
+        else:
+            keyword_score = min(self._count(view.hits, SCORE_GENERAL) * 0.08, 0.5)
+        score += keyword_score
+
+        # 3. 설명과의 유사성 (20%)
+        if description:
+            desc_words = self.view(description).words
+            if desc_words and view.words:
+                similarity = len(desc_words & view.words) / min(len(desc_words), 20)  # 최대 20단어 비교
+                score += min(similarity * 0.2, 0.2)
+
+        return min(score, 1.0)
+
+    def find_most_relevant(self, documents: List[str], metadatas: List[Dict],
+                           vuln_type: str, standard_type: str) -> Optional[int]:
+        """가장 관련성 높은 문서 인덱스 (최소 점수 미달 시 None)"""
+        if not documents:
+            return None
+
+        type_lower = vuln_type.lower()
+        standard_lower = standard_type.lower()
+        is_secret = 'hardcoded' in type_lower or 'secret' in type_lower
+        is_sql = 'sql' in type_lower
+        is_xss = 'xss' in type_lower
+
+        best_score = -1
+        best_idx = 0
+        for i, (doc, meta) in enumerate(zip(documents, metadatas if metadatas else [{}] * len(documents))):
+            score = 0
+
+            # 1. 메타데이터의 vulnerability_types 확인
+            if meta and 'vulnerability_types' in meta:
+                doc_vuln_types = meta['vulnerability_types'].lower()
+                if standard_lower in doc_vuln_types:
+                    score += 3
+                elif type_lower in doc_vuln_types:
+                    score += 2
+
+            # 2. 문서 내용에 취약점 타입 언급 확인
+            view = self.view(doc)
+            if type_lower in view.lower:
+                score += 1
+
+            # 3. 취약점별 키워드 매칭
+            if is_secret:
+                if self._count(view.hits, RANK_SECRET_BONUS):
+                    score += 2
+                if self._count(view.hits, RANK_SECRET_PENALTY):
+                    score -= 1  # RSA 관련 내용은 Hardcoded Secret과 관련 낮음
+            elif is_sql:
+                if self._count(view.hits, RANK_SQL):
+                    score += 2
+            elif is_xss:
+                if self._count(view.hits, RANK_XSS):
+                    score += 2
+
+            if score > best_score:
+                best_score = score
+                best_idx = i
+
+        if best_score < 1:
+            return None
+        return best_idx
+
+    def extract_keywords(self, description: str) -> List[str]:
+        """설명에서 보안 관련 키워드 추출 (최대 3개)"""
+        hits = self.view(description).hits
+        keywords = []
+        for term in SECURITY_TERMS:
+            if term.lower() in hits:
+                keywords.append(term)
+                if len(keywords) >= 3:
+                    break
+        return keywords
+
+    def _extract_description(self, text: str) -> str:
+        """텍스트에서 코드 부분을 제거하고 설명만 추출"""
+        cleaned_lines = []
+        in_code_block = False
+
+        for line in text.split('\n'):
+            # 코드 블록 시작 마커 또는 코드 라인 번호 ("1:", "2:" 등)
+            if self.code_start.search(line):
+                in_code_block = True
+                continue
+            stripped = line.strip()
+            if self.line_number.match(stripped):
+                in_code_block = True
+                continue
+
+            # 권장사항이나 설명 섹션 시작
+            if self.text_start.search(line):
+                in_code_block = False
+
+            # 코드처럼 보이는 라인 제외
+            if not in_code_block and stripped and not self.code_like.search(line):
+                cleaned_lines.append(stripped)
+
+        cleaned_text = self.whitespace.sub(' ', ' '.join(cleaned_lines))
+
+        # 섹션 제목과 설명 부분만 추출
+        if '[설명]' in cleaned_text:
+            parts = cleaned_text.split('[설명]')
+            if len(parts) > 1:
+                cleaned_text = parts[1].split('[')[0].strip()
+
+        return cleaned_text
+
+
+# 프로세스 공용 인스턴스
+relevance_scorer = RelevanceScorer()
+
+
+# 간단한 사용 헬퍼 함수
+def rank_documents(documents: List[str], vuln_type: str, description: str = "") -> List[int]:
+    """관련성 점수 내림차순 문서 인덱스 헬퍼 함수"""
+    scores = [relevance_scorer.relevance_score(doc, vuln_type, description) for doc in documents]
+    return sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
@@ -1,25 +1,82 @@
 # rag/simple_rag.py
 # 전체 파일 교체
 
+import hashlib
+import json
 import os
-from typing import List, Dict
-from openai import OpenAI
+import re
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 from prompts.all_prompts import RAG_PROMPTS, SYSTEM_PROMPTS
+from config import rag_config, qa_context_config
+from core.resource_registry import get_openai_client, get_anthropic_client
+from core.telemetry import trace_span
+from core.usage_ledger import record_llm_usage
+from rag.qa_context import QAContextBuilder
+
+
+class _LRUCache:
+    """스레드 안전 LRU 캐시 (공용 SimpleRAG를 여러 세션이 함께 사용)"""
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        return None
+    
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def normalize_query(query: str) -> str:
+    """질문 정규화 (유니코드 NFKC, 대소문자, 공백, 끝 문장부호) - 사실상 같은 질문을 같은 키로"""
+    text = unicodedata.normalize('NFKC', query).lower()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.rstrip('?!.。 ')
+
 
 class SimpleRAG:
-    def __init__(self):
+    def __init__(self, vector_db_path: str = "data/vector_db"):
         self.collection = None
         self.chroma_available = False
+        self.vector_db_path = vector_db_path
+        
+        # 질문 임베딩 / 검색 결과 캐시 (벡터 DB 파일이 바뀌면 함께 비움)
+        self.embedding_function = None
+        self._embedding_cache = _LRUCache(rag_config.QUERY_EMBEDDING_CACHE_SIZE)
+        self._result_cache = _LRUCache(rag_config.QUERY_RESULT_CACHE_SIZE)
+        self._cache_version = None
+        self._version_lock = threading.Lock()
         
-        # ChromaDB 로드 시도 (실패해도 계속 진행)
+        # 벡터 DB 로드 시도 (VECTOR_BACKEND: chroma / numpy, 실패해도 계속 진행)
         try:
-            import chromadb
-            self.chroma_client = chromadb.PersistentClient(path="data/vector_db")
+            from rag.vector_backend import open_collections
             
             try:
-                self.collection = self.chroma_client.get_collection("kisia_vulnerabilities")
+                self.collection = open_collections(vector_db_path, ["kisia_vulnerabilities"])["kisia_vulnerabilities"]
                 self.chroma_available = True
-                print(f"✅ 벡터 DB 로드 완료 (문서 수: {self.collection.count()})")
+                print(f"✅ 벡터 DB 로드 완료 ({self.collection.backend}, 문서 수: {self.collection.count()})")
+                self.embedding_function = self._load_embedding_function()
+            except ImportError:
+                raise
             except Exception as e:
                 print(f"⚠️ ChromaDB Collection 없음: {e}")
                 print("RAG 없이 일반 Q&A 모드로 작동합니다.")
@@ -33,13 +90,16 @@ class SimpleRAG:
         if not api_key:
             raise ValueError("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다.")
         
-        self.client = OpenAI(api_key=api_key)
+        # 프로세스 공용 클라이언트 재사용
+        self.client = get_openai_client()
+        if self.client is None:
+            raise ValueError("OpenAI 클라이언트 초기화에 실패했습니다.")
         
     # rag/simple_rag.py
 # search_similar 메서드 수정
 
     def search_similar(self, query: str, top_k: int = 5, filter_metadata: Dict = None) -> Dict:
-        """유사한 문서 검색 - 메타데이터 필터링 추가"""
+        """유사한 문서 검색 - 메타데이터 필터링 추가 (질문 임베딩 / 검색 결과 캐시)"""
         if self.chroma_available and self.collection:
             try:
                 # 메타데이터 필터 구성
@@ -47,28 +107,89 @@ class SimpleRAG:
                 if filter_metadata:
                     where_clause = filter_metadata
                 
-                # ChromaDB 쿼리 실행
-                if where_clause:
-                    results = self.collection.query(
-                        query_texts=[query],
-                        n_results=top_k,
-                        where=where_clause  # 메타데이터 필터 추가
-                    )
-                else:
-                    results = self.collection.query(
-                        query_texts=[query],
-                        n_results=top_k
-                    )
+                self._check_cache_version()
+                embedding = self._embed_query(query)
+                result_key = self._result_key(query, embedding, top_k, where_clause)
                 
-                # 컬렉션 이름 추가
-                results['collection_name'] = self.collection.name if hasattr(self.collection, 'name') else 'unknown'
-                return results
+                # ChromaDB 쿼리 실행 (같은 임베딩/top_k/필터 결과가 캐시에 있으면 생략)
+                with trace_span('rag.search', {'rag.top_k': top_k, 'rag.filtered': bool(where_clause),
+                                               'rag.backend': self.collection.backend,
+                                               'query.bytes': len(query.encode('utf-8'))}) as span:
+                    results = self._result_cache.get(result_key)
+                    span.set_attribute('rag.cache_hit', results is not None)
+                    if results is None:
+                        # 임베딩을 미리 계산했으면 컬렉션에서 다시 임베딩하지 않도록 벡터로 조회
+                        query_args = {'query_embeddings': [embedding]} if embedding is not None else {'query_texts': [query]}
+                        results = self.collection.query(
+                            **query_args,
+                            n_results=top_k,
+                            where=where_clause  # 메타데이터 필터 추가
+                        )
+                        
+                        # 컬렉션 이름 추가
+                        results['collection_name'] = self.collection.name or 'unknown'
+                        self._result_cache.put(result_key, results)
+                    span.set_attribute('rag.results', len((results.get('documents') or [[]])[0]))
+                
+                # 캐시 항목이 호출자 수정에 영향받지 않도록 얕은 복사본 반환
+                return dict(results)
                 
             except Exception as e:
                 print(f"검색 오류: {e}")
                 return {'documents': [[]], 'metadatas': [[]], 'collection_name': 'error'}
         else:
             return {'documents': [[]], 'metadatas': [[]], 'collection_name': 'none'}
+    
+    def clear_query_cache(self):
+        """질문 임베딩 / 검색 결과 캐시 비우기"""
+        self._embedding_cache.clear()
+        self._result_cache.clear()
+    
+    def _load_embedding_function(self):
+        """컬렉션과 같은 임베딩 함수 (scripts/03_build_vector_db.py는 Chroma 기본 임베딩으로 생성)"""
+        try:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+            return DefaultEmbeddingFunction()
+        except Exception as e:
+            print(f"⚠️ 임베딩 함수 로드 실패, 질문 임베딩 캐시 없이 검색: {e}")
+            return None
+    
+    def _embed_query(self, query: str) -> Optional[List[float]]:
+        """정규화된 질문 기준으로 캐시된 임베딩 반환 (임베딩 불가 시 None → 텍스트로 조회)"""
+        if self.embedding_function is None:
+            return None
+        
+        key = normalize_query(query)
+        embedding = self._embedding_cache.get(key)
+        if embedding is None:
+            try:
+                embedding = [float(x) for x in self.embedding_function([key])[0]]
+            except Exception as e:
+                print(f"⚠️ 질문 임베딩 실패, 텍스트로 검색: {e}")
+                return None
+            self._embedding_cache.put(key, embedding)
+        return embedding
+    
+    @staticmethod
+    def _result_key(query: str, embedding: Optional[List[float]], top_k: int, where: Optional[Dict]) -> Tuple:
+        """검색 결과 캐시 키 (임베딩 해시 + top_k + 필터)"""
+        if embedding is not None:
+            query_key = hashlib.blake2b(struct.pack(f'{len(embedding)}f', *embedding), digest_size=16).hexdigest()
+        else:
+            query_key = normalize_query(query)
+        where_key = json.dumps(where, sort_keys=True, ensure_ascii=False, default=str) if where else None
+        return query_key, top_k, where_key
+    
+    def _check_cache_version(self):
+        """벡터 DB가 바뀌었으면 질문 캐시 초기화 (백엔드 저장 파일 버전 기준)"""
+        version = self.collection.version()
+        with self._version_lock:
+            if version == self._cache_version:
+                return
+            if self._cache_version is not None:
+                print("🔄 벡터 DB 변경 감지, 질문 캐시 초기화")
+            self.clear_query_cache()
+            self._cache_version = version
 
 
 # rag/simple_rag.py
@@ -78,31 +199,39 @@ class SimpleRAG:
     # ask() 함수 수정
 
     def ask(self, question: str) -> str:
-        """질문에 대한 답변 생성 - 완전한 컨텍스트 제공"""
-        
-        from prompts.all_prompts import RAG_PROMPTS, SYSTEM_PROMPTS
-        import streamlit as st
-        import time
+        """질문에 대한 답변 생성 - 완전한 컨텍스트 제공 (스트리밍 답변을 끝까지 모아 반환)"""
+        _, chunks = self.ask_stream(question)
+        return "".join(chunks)
+    
+    def ask_stream(self, question: str) -> Tuple[List[Dict], Iterator[str]]:
+        """
+        스트리밍 답변 - 검색이 끝나면 출처를 바로 반환하고 답변은 생성되는 대로 전달
+        
+        Returns:
+            (출처 목록, 답변 텍스트 조각 생성기 - 마지막 조각은 출처 푸터)
+        
+        Example:
+            sources, chunks = rag.ask_stream(question)
+            response = st.write_stream(chunks)
+        """
+        prompt, rag_metadata, rag_note, history = self._prepare_prompt(question)
+        return rag_metadata or [], self._stream_with_footer(prompt, rag_metadata, rag_note, history)
+    
+    def _prepare_prompt(self, question: str) -> Tuple[str, Optional[List[Dict]], str, Dict]:
+        """컨텍스트 수집 + RAG 검색 + 프롬프트 조립 (LLM 호출 전 단계)"""
         
-        # 1. 완전한 컨텍스트 수집 (함수명 수정)
-        context = {
-            'analysis_info': self._get_analysis_info(),
-            'vulnerabilities_detail': self._get_vulnerabilities_detail(),
-            'code_context': self._get_code_context(),
-            'sbom_info': self._get_sbom_info(),
-            'conversation_history': self._get_full_conversation_history()
-        }
+        # 1. 컨텍스트 수집 (세션별 캐시 - 분석 결과가 그대로면 섹션 재사용, 대화는 최근 창 + 요약)
+        builder, context = self._gather_complete_context(question)
         
-        # 2. RAG 검색 (선택적, 빠르게)
+        # 2. RAG 검색 (반복/유사 질문은 임베딩·결과 캐시로 즉시 반환)
         rag_note = ""
         rag_metadata = None
         
         if self.chroma_available:
             try:
-                start_time = time.time()
                 search_results = self.search_similar(question, top_k=3)
                 
-                if time.time() - start_time < 1.0 and search_results['documents'][0]:
+                if search_results['documents'][0]:
                     docs = search_results['documents'][0]
                     metadatas = search_results.get('metadatas', [[]])[0]
                     
@@ -149,65 +278,69 @@ class SimpleRAG:
             except Exception as e:
                 print(f"⚠️ RAG 검색 스킵: {e}")
         
-        # 3. 스마트 프롬프트 구성 (모든 정보 포함)
-        prompt = RAG_PROMPTS["qa_smart_context"].format(
-            analysis_info=context['analysis_info'],
-            vulnerabilities_detail=context['vulnerabilities_detail'],
-            code_context=context['code_context'],
-            sbom_info=context['sbom_info'],
-            conversation_history=context['conversation_history'],
-            question=question,
-            rag_note=rag_note
-        )
-        
-        # 프롬프트 길이 체크
-        prompt_length = len(prompt)
-        if prompt_length > 30000:  # 너무 길면 일부 축소
-            print(f"⚠️ 프롬프트가 너무 김 ({prompt_length}자), 일부 축소")
-            # 코드 컨텍스트를 줄임
-            context['code_context'] = context['code_context'][:5000] + "\n... (생략) ..."
-            prompt = RAG_PROMPTS["qa_smart_context"].format(
-                analysis_info=context['analysis_info'],
-                vulnerabilities_detail=context['vulnerabilities_detail'],
-                code_context=context['code_context'],
-                sbom_info=context['sbom_info'],
-                conversation_history=context['conversation_history'][-5000:],  # 대화도 축소
-                question=question,
-                rag_note=rag_note
+        # 3. 스마트 프롬프트 구성 (토큰 예산 안에서 섹션별 배분)
+        with trace_span('rag.qa_context', {'qa.budget_tokens': qa_context_config.MAX_PROMPT_TOKENS}) as span:
+            prompt = builder.assemble(
+                RAG_PROMPTS["qa_smart_context"],
+                context,
+                {'question': question, 'rag_note': rag_note}
             )
+            stats = builder.last_stats
+            used = stats['fixed_tokens'] + sum(fitted for fitted, _ in stats['sections'].values())
+            span.set_attribute('qa.prompt_tokens', used)
+            span.set_attribute('qa.cache_hits', len(stats['cache_hits']))
+            span.set_attribute('qa.truncated', ",".join(stats['truncated']))
+        history = stats.get('history', {})
+        truncated = f", 축소: {', '.join(stats['truncated'])}" if stats['truncated'] else ""
+        code = f", 코드 청크 {stats['code']['selected']}/{stats['code']['chunks']}개" if 'code' in stats else ""
+        print(f"🧮 Q&A 컨텍스트: {used:,}/{stats['budget']:,} 토큰 "
+              f"(캐시 적중 {len(stats['cache_hits'])}개, 대화 요약 {history.get('summary_lines', 0)}줄 "
+              f"+ 최근 {history.get('recent', 0)}개{code}{truncated})")
+        
+        return prompt, rag_metadata, rag_note, history
+    
+    def _stream_with_footer(self, prompt: str, rag_metadata: Optional[List[Dict]], rag_note: str,
+                            history: Dict) -> Iterator[str]:
+        """4. AI 답변 스트리밍 + 5. 출처 표시"""
+        answered = False
+        for chunk in self._stream_ai_answer(prompt):
+            answered = True
+            yield chunk
+        
+        if not answered:
+            yield "죄송합니다. AI 서비스를 사용할 수 없습니다."
+            return
+        
+        yield self._format_footer(rag_metadata, rag_note, history)
+    
+    @staticmethod
+    def _format_footer(rag_metadata: Optional[List[Dict]], rag_note: str, history: Dict) -> str:
+        """출처 표시 (더 상세하게)"""
+        footer_parts = ["\n\n---"]
+        
+        # RAG 메타데이터가 있으면 상세 출처 표시
+        if rag_metadata:
+            footer_parts.append("\n**📚 참고 문서:**")
+            footer_parts.append("*Python_시큐어코딩_가이드(2023년_개정본).pdf*")
+            
+            for source in rag_metadata:
+                if source['page_range'] and source['page_range'] != "p.?":
+                    footer_parts.append(f"• {source['page_range']}")
+                    if source['title']:
+                        footer_parts.append(f"  - {source['title']}")
+                    if source['vulnerability_types']:
+                        footer_parts.append(f"  - 관련: {source['vulnerability_types']}")
         
-        # 4. AI 답변 생성
-        answer = self._generate_ai_answer(prompt)
+        elif rag_note:
+            footer_parts.append("*📚 Python 시큐어코딩 가이드(2023년 개정본) 참조*")
         
-        # 5. 출처 표시 (더 상세하게)
-        if answer:
-            footer_parts = ["\n\n---"]
-            
-            # RAG 메타데이터가 있으면 상세 출처 표시
-            if rag_metadata:
-                footer_parts.append("\n**📚 참고 문서:**")
-                footer_parts.append("*Python_시큐어코딩_가이드(2023년_개정본).pdf*")
-                
-                for source in rag_metadata:
-                    if source['page_range'] and source['page_range'] != "p.?":
-                        footer_parts.append(f"• {source['page_range']}")
-                        if source['title']:
-                            footer_parts.append(f"  - {source['title']}")
-                        if source['vulnerability_types']:
-                            footer_parts.append(f"  - 관련: {source['vulnerability_types']}")
-            
-            elif rag_note:
-                footer_parts.append("*📚 Python 시큐어코딩 가이드(2023년 개정본) 참조*")
-            
-            if "이전 대화" in context['conversation_history'] and len(context['conversation_history']) > 50:
-                footer_parts.append("*💬 대화 맥락 유지*")
-            
-            if len(footer_parts) == 1:  # 특별한 참조 없음
-                footer_parts.append("*💡 일반 보안 지식 기반*")
-            
-            return answer + "\n".join(footer_parts)
-        else:
-            return "죄송합니다. AI 서비스를 사용할 수 없습니다."
+        if history.get('messages'):
+            footer_parts.append("*💬 대화 맥락 유지*")
+        
+        if len(footer_parts) == 1:  # 특별한 참조 없음
+            footer_parts.append("*💡 일반 보안 지식 기반*")
+        
+        return "\n".join(footer_parts)
     
     def get_stats(self) -> Dict:
         """시스템 상태 정보"""
@@ -229,17 +362,43 @@ class SimpleRAG:
 # rag/simple_rag.py
 # 새로운 헬퍼 함수들 추가
 
-    def _gather_complete_context(self) -> dict:
-        """모든 컨텍스트 정보를 완전하게 수집"""
+    def _gather_complete_context(self, question: str) -> Tuple[QAContextBuilder, dict]:
+        """
+        컨텍스트 섹션 수집 (세션별 QAContextBuilder 사용)
+
+        - 분석 결과 섹션: 입력 지문이 바뀐 경우에만 다시 생성
+        - 코드: 질문 관련 청크 + 언급된 취약점 위치 청크 (작은 코드는 전체)
+        - 대화 기록: 최근 메시지 원문 + 창 밖 메시지의 누적 요약 (현재 질문 제외)
+        """
         import streamlit as st
         
-        return {
-            'analysis_info': self._get_analysis_info(),
-            'vulnerabilities_detail': self._get_vulnerabilities_detail(),
-            'code_context': self._get_code_context(),
-            'sbom_info': self._get_sbom_info(),
-            'conversation_history': self._get_full_conversation_history()
+        # SimpleRAG는 세션 간 공용이므로 빌더는 세션 상태에 보관
+        if 'qa_context_builder' not in st.session_state:
+            st.session_state.qa_context_builder = QAContextBuilder()
+        builder = st.session_state.qa_context_builder
+        builder.begin()
+        
+        analysis_results = st.session_state.get('analysis_results', {}) or {}
+        ai_result = analysis_results.get('ai_analysis', {}) or {}
+        vulnerabilities = ai_result.get('vulnerabilities', [])
+        
+        context = {
+            'analysis_info': builder.section('analysis_info', [
+                bool(analysis_results), analysis_results.get('analysis_time'), analysis_results.get('analyzed_files'),
+                st.session_state.get('analysis_mode'), 'ai_analysis' in analysis_results,
+                ai_result.get('analyzed_by'), ai_result.get('security_score'), len(vulnerabilities),
+                st.session_state.get('analysis_file_list')
+            ], self._get_analysis_info),
+            # 취약점 상세는 제자리 수정될 수 있어 내용 전체를 지문으로 사용
+            'vulnerabilities_detail': builder.section(
+                'vulnerabilities_detail', ['ai_analysis' in analysis_results, vulnerabilities],
+                self._get_vulnerabilities_detail
+            ),
+            'code_context': self._get_code_context(builder, question, vulnerabilities),
+            'sbom_info': builder.section('sbom_info', analysis_results.get('sbom'), self._get_sbom_info),
+            'conversation_history': builder.conversation(st.session_state.get('qa_messages', []), question)
         }
+        return builder, context
 
     def _get_analysis_info(self) -> str:
         """분석 메타데이터 정보"""
@@ -325,8 +484,12 @@ class SimpleRAG:
         
         return "\n".join(vuln_details)
 
-    def _get_code_context(self) -> str:
-        """분석한 코드의 일부 제공"""
+    def _get_code_context(self, builder: QAContextBuilder, question: str, vulnerabilities: List[Dict]) -> str:
+        """
+        분석한 코드 제공
+
+        작은 코드는 전체, 큰 코드는 세션 청크 색인에서 질문 관련 청크와 언급된 취약점 위치 청크만
+        """
         import streamlit as st
         
         # 분석한 코드 가져오기
@@ -334,19 +497,23 @@ class SimpleRAG:
         if not analysis_code:
             return "코드 컨텍스트 없음"
         
-        # 너무 길면 주요 부분만
-        max_length = 3000
-        if len(analysis_code) > max_length:
-            # 처음 부분과 취약점 관련 부분 포함
-            code_preview = analysis_code[:max_length] + "\n... (코드 생략) ..."
-        else:
-            code_preview = analysis_code
-        
-        # 파일별로 구분된 경우 표시
-        if "# ===== File:" in code_preview:
-            return f"분석한 코드 (일부):\n\n{code_preview}"
-        else:
-            return f"분석한 코드:\n```python\n{code_preview}\n```"
+        def full_code() -> str:
+            # 파일별로 구분된 경우 표시
+            if "# ===== File:" in analysis_code:
+                return f"분석한 코드:\n\n{analysis_code}"
+            return f"분석한 코드:\n```python\n{analysis_code}\n```"
+        
+        code_text = builder.section('code_context', analysis_code, full_code)
+        if builder.section_tokens('code_context', code_text) <= qa_context_config.CODE_INLINE_TOKENS:
+            return code_text
+        
+        # 후속 질문은 직전 질문의 취약점 언급까지 반영
+        previous = [m['content'] for m in st.session_state.get('qa_messages', [])
+                    if m.get('role') == 'user' and m.get('content') != question]
+        index = builder.code_index(analysis_code)
+        code_context, stats = index.context(question, vulnerabilities, previous[-1] if previous else None)
+        builder.last_stats['code'] = stats
+        return f"분석한 코드 중 질문 관련 부분 ({stats['selected']}/{stats['chunks']}개 청크):\n\n{code_context}"
 
     def _get_sbom_info(self) -> str:
         """SBOM 정보 제공"""
@@ -390,84 +557,94 @@ class SimpleRAG:
         
         return "\n".join(sbom_parts)
 
-    def _get_full_conversation_history(self) -> str:
-        """완전한 대화 기록 (잘리지 않음)"""
-        import streamlit as st
-        
-        qa_messages = st.session_state.get('qa_messages', [])
-        if not qa_messages:
-            return "이전 대화 없음"
-        
-        history = []
-        
-        # 모든 대화 포함 (제한 없음)
-        for i, msg in enumerate(qa_messages):
-            if msg["role"] == "user":
-                history.append(f"\n사용자: {msg['content']}")
-            else:
-                # 전체 답변 포함 (잘리지 않음)
-                content = msg['content']
-                # 푸터만 제거
-                if '\n\n---\n' in content:
-                    content = content.split('\n\n---\n')[0]
-                history.append(f"\nAI: {content}")
-        
-        return "\n".join(history) if history else "이전 대화 없음"
-    
     # rag/simple_rag.py
 # SimpleRAG 클래스 안에 추가 (다른 메서드들 아래에)
 
-    def _generate_ai_answer(self, prompt: str) -> str:
-        """AI 답변 생성 (Claude 우선, GPT 폴백)"""
-        from prompts.all_prompts import SYSTEM_PROMPTS
-        import os
-        
-        answer = None
+    def _stream_ai_answer(self, prompt: str) -> Iterator[str]:
+        """
+        AI 답변 스트리밍 (Claude 우선, GPT 폴백)
         
+        첫 토큰 전에 실패한 경우에만 GPT로 폴백 (이미 보낸 답변과 섞이지 않도록)
+        """
         # Claude 시도
-        if os.getenv("ANTHROPIC_API_KEY"):
+        claude_client = get_anthropic_client() if os.getenv("ANTHROPIC_API_KEY") else None
+        if claude_client:
+            model = os.getenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")
+            
+            # Claude는 system을 user에 포함
+            system_prompt = SYSTEM_PROMPTS.get("qa_expert", "")
+            full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+            
+            start = time.perf_counter()
+            first_token = None
             try:
-                from anthropic import Anthropic
-                claude_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-                model = os.getenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")
-                
-                # Claude는 system을 user에 포함
-                system_prompt = SYSTEM_PROMPTS.get("qa_expert", "")
-                full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-                
-                response = claude_client.messages.create(
+                with claude_client.messages.stream(
                     model=model,
                     max_tokens=1500,
                     temperature=0.3,
                     messages=[{"role": "user", "content": full_prompt}]
-                )
+                ) as stream:
+                    for text in stream.text_stream:
+                        if not text:
+                            continue
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        yield text
+                    response = stream.get_final_message()
+                record_llm_usage('anthropic', model, response, time.perf_counter() - start, 'qa')
                 
-                answer = response.content[0].text
-                print("✅ Claude 답변 생성")
+                if first_token is not None:
+                    print(f"✅ Claude 답변 생성 (첫 토큰 {first_token:.2f}초, "
+                          f"전체 {time.perf_counter() - start:.2f}초)")
+                    return
                 
             except Exception as e:
+                if first_token is not None:
+                    print(f"❌ Claude 스트리밍 중단: {e}")
+                    yield "\n\n*⚠️ 답변 생성이 중단되었습니다.*"
+                    return
                 print(f"⚠️ Claude 실패, GPT로 폴백: {e}")
         
         # GPT 폴백
-        if not answer and os.getenv("OPENAI_API_KEY"):
+        if os.getenv("OPENAI_API_KEY"):
+            model = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
+            
+            start = time.perf_counter()
+            first_token = None
             try:
-                model = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
-                
-                response = self.client.chat.completions.create(
+                stream = self.client.chat.completions.create(
                     model=model,
                     messages=[
                         {"role": "system", "content": SYSTEM_PROMPTS.get("qa_expert", "Python 보안 전문가입니다.")},
                         {"role": "user", "content": prompt}
                     ],
                     temperature=0.3,
-                    max_tokens=1500
+                    max_tokens=1500,
+                    stream=True,
+                    stream_options={"include_usage": True}  # 마지막 청크에 usage 포함
                 )
                 
-                answer = response.choices[0].message.content
-                print("✅ GPT 답변 생성")
+                usage_chunk = None
+                for chunk in stream:
+                    if getattr(chunk, 'usage', None):
+                        usage_chunk = chunk
+                    if not chunk.choices:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if not text:
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    yield text
+                record_llm_usage('openai', model, usage_chunk, time.perf_counter() - start, 'qa')
+                
+                if first_token is not None:
+                    print(f"✅ GPT 답변 생성 (첫 토큰 {first_token:.2f}초, "
+                          f"전체 {time.perf_counter() - start:.2f}초)")
                 
             except Exception as e:
+                if first_token is not None:
+                    print(f"❌ GPT 스트리밍 중단: {e}")
+                    yield "\n\n*⚠️ 답변 생성이 중단되었습니다.*"
+                    return
                 print(f"❌ GPT도 실패: {e}")
-                answer = None
-        
-        return answer if answer else "AI 서비스를 사용할 수 없습니다."
\ No newline at end of file
@@ -0,0 +1,415 @@
+# rag/vector_backend.py
+"""
+벡터 DB 백엔드 (rag_config.VECTOR_BACKEND로 선택)
+- chroma: ChromaDB PersistentClient 컬렉션 (HNSW 인덱스 + SQLite)
+- numpy: 정규화 임베딩 행렬(.npy, 메모리 맵)에서 정확 top-k 검색 - 행렬-벡터 곱 1회 + argpartition
+- 두 백엔드 모두 Chroma 컬렉션과 같은 형식의 query()/get()/count() 결과를 반환
+- numpy 파일은 Chroma 컬렉션에서 내보냄: <벡터 DB 폴더>/numpy/<컬렉션>.npy + .json (03/05 스크립트가 빌드 후 갱신)
+- 빌드 스크립트 증분 동기화(upsert_changed): 문서 해시가 바뀐 문서만 임베딩해 upsert, 빠진 문서는 삭제
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import rag_config
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 증분 빌드용 문서 해시 메타데이터 키
+HASH_FIELD = "content_hash"
+
+
+class VectorCollection:
+    """벡터 컬렉션 인터페이스 (Chroma Collection의 query/get/count 부분 집합)"""
+
+    backend = ''
+    name = ''
+    id = ''
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def query(self, query_texts: Sequence[str] = None, query_embeddings: Sequence[Sequence[float]] = None,
+              n_results: int = 10, where: Dict = None) -> Dict:
+        """유사도 검색 → {'ids', 'documents', 'metadatas', 'distances'} (질의별 리스트)"""
+        raise NotImplementedError
+
+    def get(self, ids: Sequence[str] = None, where: Dict = None, limit: int = None) -> Dict:
+        """ID/메타데이터 조건 조회 → {'ids', 'documents', 'metadatas'}"""
+        raise NotImplementedError
+
+    def version(self) -> Tuple:
+        """저장 파일 버전 (재구축/문서 추가 시 바뀜) - 검색 캐시 무효화용"""
+        raise NotImplementedError
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ChromaCollection(VectorCollection):
+    """ChromaDB 컬렉션 래퍼"""
+
+    backend = 'chroma'
+
+    def __init__(self, collection, db_path: str):
+        self.collection = collection
+        self.db_path = Path(db_path)
+        self.name = collection.name
+        self.id = str(collection.id)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def query(self, query_texts: Sequence[str] = None, query_embeddings: Sequence[Sequence[float]] = None,
+              n_results: int = 10, where: Dict = None) -> Dict:
+        args = {'query_embeddings': query_embeddings} if query_embeddings is not None else {'query_texts': query_texts}
+        if where:
+            args['where'] = where
+        return self.collection.query(**args, n_results=n_results)
+
+    def get(self, ids: Sequence[str] = None, where: Dict = None, limit: int = None) -> Dict:
+        return self.collection.get(ids=ids, where=where or None, limit=limit)
+
+    def version(self) -> Tuple:
+        """컬렉션 ID + SQLite 파일(WAL 포함) 수정 시각"""
+        return (self.id, _mtime_ns(self.db_path / 'chroma.sqlite3'), _mtime_ns(self.db_path / 'chroma.sqlite3-wal'))
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        if op == '$eq':
+            ok = value == operand
+        elif op == '$ne':
+            ok = value != operand
+        elif op == '$in':
+            ok = value in operand
+        elif op == '$nin':
+            ok = value not in operand
+        elif op in ('$gt', '$gte', '$lt', '$lte'):
+            if value is None:
+                return False
+            ok = {'$gt': value > operand, '$gte': value >= operand,
+                  '$lt': value < operand, '$lte': value <= operand}[op]
+        else:
+            raise ValueError(f"지원하지 않는 where 연산자: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def match_where(metadata: Optional[Dict], where: Optional[Dict]) -> bool:
+    """Chroma where 필터 평가 (필드 일치, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte, $and/$or)"""
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(match_where(metadata, clause) for clause in condition):
+                return False
+        elif key == '$or':
+            if not any(match_where(metadata, clause) for clause in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+class _Snapshot:
+    """로드된 numpy 컬렉션 데이터 (다시 로드 시 통째로 교체 - 검색 중인 스레드는 이전 스냅숏을 계속 사용)"""
+
+    def __init__(self, meta: Dict, matrix, stamps: Tuple):
+        self.matrix = matrix
+        self.ids: List[str] = meta['ids']
+        self.documents: List[Optional[str]] = meta['documents']
+        self.metadatas: List[Optional[Dict]] = meta['metadatas']
+        self.positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.stamps = stamps
+
+
+class NumpyCollection(VectorCollection):
+    """
+    메모리 맵 .npy 정확 검색 컬렉션
+
+    - 임베딩은 행 단위 L2 정규화된 float32 행렬 → 질의와의 내적이 곧 코사인 유사도
+    - 질의 배치도 행렬 곱 1회로 계산, 질의별 argpartition으로 top-k만 정렬
+    - distances는 원본 Chroma 컬렉션의 거리 공간(l2 / cosine / ip) 척도로 변환해 반환
+    """
+
+    backend = 'numpy'
+
+    def __init__(self, matrix_path: Path, embedding_function=None):
+        self.matrix_path = Path(matrix_path)
+        self.meta_path = self.matrix_path.with_suffix('.json')
+        self._embedding_function = embedding_function
+        self._ef_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._data = self._load()
+
+    def _file_stamps(self) -> Tuple:
+        return _mtime_ns(self.matrix_path), _mtime_ns(self.meta_path)
+
+    def _load(self) -> _Snapshot:
+        """행렬(메모리 맵) + ID/문서/메타데이터 로드"""
+        stamps = self._file_stamps()
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        matrix = np.load(self.matrix_path, mmap_mode='r')
+        if matrix.ndim != 2 or matrix.shape[0] != len(meta['ids']):
+            raise ValueError(f"임베딩 행렬 크기 불일치: {matrix.shape} / 문서 {len(meta['ids'])}개")
+
+        self.name = meta['collection']
+        self.id = meta.get('id', '')
+        self.space = meta.get('space', 'l2')
+        return _Snapshot(meta, matrix, stamps)
+
+    def count(self) -> int:
+        return len(self._data.ids)
+
+    def _embed(self, texts: Sequence[str]) -> List[Sequence[float]]:
+        """질의 텍스트 임베딩 (내보낸 컬렉션과 같은 Chroma 기본 임베딩 모델, 처음 사용 시 로드)"""
+        with self._ef_lock:
+            if self._embedding_function is None:
+                from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+                self._embedding_function = DefaultEmbeddingFunction()
+        return self._embedding_function(list(texts))
+
+    def _distances(self, similarity: 'np.ndarray') -> 'np.ndarray':
+        if self.space == 'l2':
+            # 정규화 벡터의 제곱 L2 거리 = 2 - 2·cos (Chroma l2 공간과 같은 척도)
+            return np.maximum(2.0 - 2.0 * similarity, 0.0)
+        return 1.0 - similarity
+
+    def query(self, query_texts: Sequence[str] = None, query_embeddings: Sequence[Sequence[float]] = None,
+              n_results: int = 10, where: Dict = None) -> Dict:
+        data = self._data
+        if query_embeddings is None:
+            query_embeddings = self._embed(query_texts or [])
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+
+        # where 필터를 통과한 행만 후보로 (필터 없으면 전체 행렬)
+        rows = None
+        if where:
+            rows = np.fromiter((i for i, meta in enumerate(data.metadatas) if match_where(meta, where)), dtype=np.intp)
+        matrix = data.matrix if rows is None else data.matrix[rows]
+        scores = matrix @ queries.T if len(matrix) else np.empty((0, len(queries)), dtype=np.float32)
+        k = min(n_results, scores.shape[0])
+
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': [], 'embeddings': None}
+        for column in scores.T:
+            if k < len(column):
+                top = np.argpartition(-column, k - 1)[:k]
+            else:
+                top = np.arange(len(column))
+            top = top[np.argsort(-column[top], kind='stable')]
+            positions = top if rows is None else rows[top]
+            results['ids'].append([data.ids[i] for i in positions])
+            results['documents'].append([data.documents[i] for i in positions])
+            results['metadatas'].append([data.metadatas[i] for i in positions])
+            results['distances'].append(self._distances(column[top]).tolist())
+        return results
+
+    def get(self, ids: Sequence[str] = None, where: Dict = None, limit: int = None) -> Dict:
+        data = self._data
+        if ids is not None:
+            positions = [data.positions[doc_id] for doc_id in ids if doc_id in data.positions]
+        else:
+            positions = range(len(data.ids))
+        positions = [i for i in positions if match_where(data.metadatas[i], where)]
+        if limit is not None:
+            positions = positions[:limit]
+        return {
+            'ids': [data.ids[i] for i in positions],
+            'documents': [data.documents[i] for i in positions],
+            'metadatas': [data.metadatas[i] for i in positions],
+            'embeddings': None
+        }
+
+    def version(self) -> Tuple:
+        """파일이 다시 내보내졌으면 새로 로드 (Chroma 컬렉션처럼 재구축 결과가 바로 반영되도록)"""
+        stamps = self._file_stamps()
+        if stamps != self._data.stamps:
+            with self._load_lock:
+                if stamps != self._data.stamps:
+                    try:
+                        self._data = self._load()
+                        print(f"🔄 numpy 벡터 파일 변경 감지, 다시 로드: {self.name} ({self.count()}개)")
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"⚠️ numpy 벡터 파일 다시 로드 실패, 기존 데이터 사용: {e}")
+                        self._data.stamps = stamps
+        return (self.id, *self._data.stamps)
+
+
+def numpy_dir(db_path: str) -> Path:
+    """벡터 DB 폴더 안의 numpy 백엔드 파일 폴더"""
+    return Path(db_path) / rag_config.NUMPY_VECTOR_DIR
+
+
+def _chroma_client(db_path: str):
+    import chromadb
+    return chromadb.PersistentClient(path=str(db_path))
+
+
+def open_collections(db_path: str, names: Sequence[str], backend: str = None) -> Dict[str, VectorCollection]:
+    """
+    컬렉션 이름 목록 → {이름: VectorCollection}
+
+    numpy 백엔드 파일이 없거나 numpy를 쓸 수 없으면 경고 후 Chroma로 대체
+    """
+    backend = (backend or rag_config.VECTOR_BACKEND).lower()
+    if backend == 'numpy':
+        if not NUMPY_AVAILABLE:
+            print("⚠️ numpy가 설치되지 않아 Chroma 백엔드 사용")
+        else:
+            try:
+                collections = {name: NumpyCollection(numpy_dir(db_path) / f"{name}.npy") for name in names}
+                print(f"🧮 numpy 벡터 백엔드 로드: {', '.join(f'{n}({c.count()})' for n, c in collections.items())}")
+                return collections
+            except FileNotFoundError as e:
+                print(f"⚠️ numpy 벡터 파일 없음 ({e.filename}), Chroma 백엔드 사용 "
+                      f"- python -m rag.vector_backend {db_path} 로 내보내기")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ numpy 벡터 파일 로드 실패, Chroma 백엔드 사용: {e}")
+    elif backend != 'chroma':
+        print(f"⚠️ 알 수 없는 벡터 백엔드 '{backend}', Chroma 백엔드 사용")
+
+    client = _chroma_client(db_path)
+    return {name: ChromaCollection(client.get_collection(name), db_path) for name in names}
+
+
+def content_hash(document: str, metadata: Optional[Dict], salt: str = '') -> str:
+    """문서 + 메타데이터(+ 임베딩 모델 식별자) 해시 - 증분 빌드에서 변경 여부 판단"""
+    payload = json.dumps([salt, document, metadata or {}], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def upsert_changed(collection, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict],
+                   embed: Callable[[List[str]], List[List[float]]], salt: str = '') -> Dict[str, int]:
+    """
+    Chroma 컬렉션 증분 동기화
+
+    - 문서별 content_hash를 메타데이터에 저장하고 기존 해시와 비교
+    - 새 문서/바뀐 문서만 임베딩해 upsert, 목록에서 빠진 문서는 delete
+    - 해시가 없는 기존 문서(이전 방식으로 빌드)는 바뀐 문서로 취급
+
+    Returns:
+        {'added', 'updated', 'deleted', 'unchanged'} 문서 수
+    """
+    hashed = [
+        {**(metadata or {}), HASH_FIELD: content_hash(document, metadata, salt)}
+        for document, metadata in zip(documents, metadatas)
+    ]
+    existing = collection.get(include=['metadatas'])
+    stored = {doc_id: (meta or {}).get(HASH_FIELD) for doc_id, meta in zip(existing['ids'], existing['metadatas'] or [])}
+
+    changed = [i for i, doc_id in enumerate(ids) if stored.get(doc_id) != hashed[i][HASH_FIELD]]
+    removed = sorted(set(stored) - set(ids))
+    if changed:
+        collection.upsert(
+            ids=[ids[i] for i in changed],
+            documents=[documents[i] for i in changed],
+            embeddings=embed([documents[i] for i in changed]),
+            metadatas=[hashed[i] for i in changed]
+        )
+    if removed:
+        collection.delete(ids=removed)
+
+    added = sum(1 for i in changed if ids[i] not in stored)
+    return {'added': added, 'updated': len(changed) - added, 'deleted': len(removed),
+            'unchanged': len(ids) - len(changed)}
+
+
+def _collection_space(collection) -> str:
+    """Chroma 컬렉션 거리 공간 (기본 l2)"""
+    configuration = getattr(collection, 'configuration_json', None) or {}
+    space = (configuration.get('hnsw') or {}).get('space')
+    return space or (collection.metadata or {}).get('hnsw:space', 'l2')
+
+
+def _atomic_write(path: Path, write):
+    """임시 파일에 쓰고 교체 (검색 중인 프로세스가 쓰다 만 파일을 읽지 않도록)"""
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def export_numpy_collection(collection, out_dir: Path) -> Dict:
+    """Chroma 컬렉션 1개 → <out_dir>/<이름>.npy (정규화 float32 행렬) + .json (ID/문서/메타데이터)"""
+    data = collection.get(include=['embeddings', 'documents', 'metadatas'])
+    embeddings = data.get('embeddings')
+    ids = list(data['ids'])
+    matrix = np.asarray(embeddings if embeddings is not None and len(embeddings) else np.empty((0, 0)), dtype=np.float32)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(ids), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+    meta = {
+        'collection': collection.name,
+        'id': str(collection.id),
+        'space': _collection_space(collection),
+        'dimension': int(matrix.shape[1]) if matrix.size else 0,
+        'count': len(ids),
+        'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'ids': ids,
+        'documents': list(data['documents'] or [None] * len(ids)),
+        'metadatas': list(data['metadatas'] or [None] * len(ids))
+    }
+    out_dir.mkdir(parents=True, exist_ok=True)
+    _atomic_write(out_dir / f"{collection.name}.json",
+                  lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode('utf-8')))
+    _atomic_write(out_dir / f"{collection.name}.npy", lambda f: np.save(f, matrix))
+    return {'collection': collection.name, 'count': len(ids), 'dimension': meta['dimension']}
+
+
+# 간단한 사용 헬퍼 함수
+def export_numpy_collections(db_path: str, names: Sequence[str] = None, client=None) -> List[Dict]:
+    """
+    벡터 DB 폴더의 Chroma 컬렉션(기본: 전체)을 numpy 백엔드 파일로 내보내기
+
+    client: 이미 연 PersistentClient (빌드 스크립트처럼 다른 Settings로 연 경우 전달)
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy 백엔드 내보내기에는 numpy가 필요합니다.")
+    client = client or _chroma_client(db_path)
+    names = list(names) if names else [getattr(c, 'name', c) for c in client.list_collections()]
+    out_dir = numpy_dir(db_path)
+    exported = []
+    for name in names:
+        info = export_numpy_collection(client.get_collection(name), out_dir)
+        print(f"  ✓ numpy 내보내기: {info['collection']} ({info['count']}개, {info['dimension']}차원)")
+        exported.append(info)
+    return exported
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chroma 컬렉션을 numpy 벡터 백엔드 파일로 내보내기")
+    parser.add_argument('db_paths', nargs='*', default=["data/vector_db", "data/vector_db_v2"],
+                        help="벡터 DB 폴더 (기본: data/vector_db, data/vector_db_v2)")
+    parser.add_argument('--collection', action='append', dest='collections', help="내보낼 컬렉션 (반복 가능)")
+    args = parser.parse_args()
+
+    for path in args.db_paths:
+        if not Path(path).exists():
+            print(f"⚠️ 벡터 DB 없음: {path}")
+            continue
+        print(f"📤 {path} → {numpy_dir(path)}")
+        export_numpy_collections(path, args.collections)
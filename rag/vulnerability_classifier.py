@@ -0,0 +1,190 @@
+# rag/vulnerability_classifier.py
+"""
+취약점 타입 분류기
+- KISIAVulnerabilityMapper(KISIA 타입)와 VulnerabilityTypeMapper(표준 타입) 매핑을 하나로 통합
+- 모든 별칭/키워드를 Aho-Corasick 오토마톤 하나로 컴파일해 입력 문자열을 한 번만 스캔
+- 매핑 테이블 순서가 곧 우선순위 (기존 선형 스캔과 같은 결과)
+- 원본 타입 문자열 단위 LRU 캐시
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from config import rag_config
+from rag.kisia_vulnerability_mapping import KISIAVulnerabilityMapper
+from rag.vulnerability_type_mapper import VulnerabilityTypeMapper
+
+# 매칭 종류 (출처별 별칭/키워드)
+KISIA_ALIAS, KISIA_KEYWORD, STANDARD_ALIAS, STANDARD_KEYWORD = range(4)
+
+
+class AhoCorasick:
+    """다중 패턴 부분 문자열 검색 오토마톤"""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[int, int]]] = [[]]
+
+    def add(self, pattern: str, payload: Tuple[int, int]):
+        """패턴과 (종류, 우선순위) 등록 - compile() 전에 호출"""
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append(payload)
+
+    def compile(self):
+        """실패 링크 계산 및 출력 병합 (BFS)"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def best_matches(self, text: str, kinds: int) -> List[Optional[int]]:
+        """종류별로 text에 포함된 패턴 중 가장 높은 우선순위(작은 값)"""
+        best: List[Optional[int]] = [None] * kinds
+        state = 0
+        for ch in text:
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for kind, priority in self.output[state]:
+                if best[kind] is None or priority < best[kind]:
+                    best[kind] = priority
+        return best
+
+
+class VulnerabilityClassifier:
+    """KISIA 타입 + 표준 타입 통합 분류기"""
+
+    def __init__(self, kisia_mapper: KISIAVulnerabilityMapper = None,
+                 type_mapper: VulnerabilityTypeMapper = None,
+                 cache_size: int = None):
+        kisia_mapper = kisia_mapper or KISIAVulnerabilityMapper()
+        type_mapper = type_mapper or VulnerabilityTypeMapper()
+
+        self.kisia_exact = dict(kisia_mapper.AI_TO_KISIA_MAPPING)
+        self.standard_exact = dict(type_mapper.TYPE_MAPPING)
+        self.standard_types = set(type_mapper.STANDARD_TYPES)
+        self.standard_default = type_mapper.DEFAULT_TYPE
+
+        # 우선순위 = 테이블 순서
+        self.kisia_aliases = list(self.kisia_exact.items())
+        self.standard_aliases = list(self.standard_exact.items())
+        self.kisia_rules = list(kisia_mapper.KEYWORD_RULES)
+        self.standard_rules = list(type_mapper.KEYWORD_RULES)
+
+        self.automaton = AhoCorasick()
+        # "입력이 별칭의 부분 문자열" 조건용: 별칭의 모든 부분 문자열 → 출처별 최우선 인덱스
+        self.substrings: Dict[str, List[Optional[int]]] = {}
+
+        for kind, aliases in ((KISIA_ALIAS, self.kisia_aliases), (STANDARD_ALIAS, self.standard_aliases)):
+            slot = 0 if kind == KISIA_ALIAS else 1
+            for index, (alias, _) in enumerate(aliases):
+                alias_lower = alias.lower()
+                self.automaton.add(alias_lower, (kind, index))
+                for start in range(len(alias_lower) + 1):
+                    for end in range(start, len(alias_lower) + 1):
+                        entry = self.substrings.setdefault(alias_lower[start:end], [None, None])
+                        if entry[slot] is None:
+                            entry[slot] = index
+
+        for kind, rules in ((KISIA_KEYWORD, self.kisia_rules), (STANDARD_KEYWORD, self.standard_rules)):
+            for index, rule in enumerate(rules):
+                for keyword in rule[0]:
+                    self.automaton.add(keyword, (kind, index))
+
+        self.automaton.compile()
+        self._classify_cached = lru_cache(maxsize=cache_size or rag_config.CLASSIFIER_CACHE_SIZE)(self._classify)
+
+    def classify(self, raw_type: str) -> Dict[str, Optional[str]]:
+        """
+        AI가 생성한 취약점 타입 분류
+
+        Returns:
+            {'kisia_type': KISIA 타입 또는 None, 'standard_type': STANDARD_TYPES 중 하나}
+        """
+        kisia_type, standard_type = self._classify_cached(raw_type)
+        return {'kisia_type': kisia_type, 'standard_type': standard_type}
+
+    def get_kisia_type(self, raw_type: str) -> Optional[str]:
+        return self._classify_cached(raw_type)[0]
+
+    def get_standard_type(self, raw_type: str) -> str:
+        return self._classify_cached(raw_type)[1]
+
+    def cache_info(self):
+        return self._classify_cached.cache_info()
+
+    def _classify(self, raw_type: str) -> Tuple[Optional[str], str]:
+        lower = raw_type.lower()
+        best = self.automaton.best_matches(lower, 4)
+        contained_in = self.substrings.get(lower, (None, None))
+
+        # KISIA: 정확 매칭 → 부분 매칭 → 키워드 규칙
+        kisia_type = self.kisia_exact.get(raw_type)
+        if kisia_type is None:
+            index = self._first(best[KISIA_ALIAS], contained_in[0])
+            if index is not None:
+                kisia_type = self.kisia_aliases[index][1]
+            elif best[KISIA_KEYWORD] is not None:
+                kisia_type = self._apply_rule(self.kisia_rules[best[KISIA_KEYWORD]], lower)
+
+        # 표준 타입: 표준 타입명 → 정확 매칭 → 부분 매칭 → 키워드 규칙 → 기본값
+        if raw_type in self.standard_types:
+            standard_type = raw_type
+        elif raw_type in self.standard_exact:
+            standard_type = self.standard_exact[raw_type]
+        else:
+            index = self._first(best[STANDARD_ALIAS], contained_in[1])
+            if index is not None:
+                standard_type = self.standard_aliases[index][1]
+            elif best[STANDARD_KEYWORD] is not None:
+                standard_type = self._apply_rule(self.standard_rules[best[STANDARD_KEYWORD]], lower)
+            else:
+                standard_type = self.standard_default
+
+        return kisia_type, standard_type
+
+    @staticmethod
+    def _first(*indexes: Optional[int]) -> Optional[int]:
+        candidates = [i for i in indexes if i is not None]
+        return min(candidates) if candidates else None
+
+    @staticmethod
+    def _apply_rule(rule: Tuple, lower: str) -> str:
+        """(키워드 목록, 타입[, (보조 키워드, 대체 타입)]) 규칙 적용"""
+        if len(rule) > 2 and rule[2][0] in lower:
+            return rule[2][1]
+        return rule[1]
+
+
+# 프로세스 공용 인스턴스 (최초 사용 시 컴파일)
+_classifier: Optional[VulnerabilityClassifier] = None
+
+
+def get_vulnerability_classifier() -> VulnerabilityClassifier:
+    """공용 분류기 반환"""
+    global _classifier
+    if _classifier is None:
+        _classifier = VulnerabilityClassifier()
+    return _classifier
+
+
+# 간단한 사용 헬퍼 함수
+def classify_vulnerability_type(raw_type: str) -> Dict[str, Optional[str]]:
+    """취약점 타입 분류 헬퍼 함수"""
+    return get_vulnerability_classifier().classify(raw_type)
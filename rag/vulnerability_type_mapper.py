@@ -16,6 +16,7 @@ class VulnerabilityTypeMapper:
             'Deserialization',
             'General'
         }
+        self.DEFAULT_TYPE = 'General'
         
         # 70개 취약점을 표준 타입으로 매핑 (최대한 많은 변형 포함)
         self.TYPE_MAPPING = {
@@ -266,6 +267,14 @@ class VulnerabilityTypeMapper:
             '메모리 릭': 'General',
         }
         
+        # 부분 매칭 실패 시 키워드 기반 추측 규칙 (순서 = 우선순위)
+        self.KEYWORD_RULES = [
+            (['sql', 'query', 'database', '쿼리'], 'SQL_Injection'),
+            (['xss', 'script', 'cross-site', 'cross site'], 'XSS'),
+            (['path', 'traversal', 'directory', '경로', '디렉'], 'Path_Traversal'),
+            (['deserial', 'pickle', 'yaml', '역직렬'], 'Deserialization'),
+        ]
+        
         # 각 타입별 우선 검색 컬렉션 (중요도 순)
         self.COLLECTION_PRIORITY = {
             'SQL_Injection': ['kisia_vulnerabilities', 'kisia_code_examples', 'kisia_chunks'],
@@ -313,6 +322,11 @@ class VulnerabilityTypeMapper:
         Returns:
             표준 취약점 타입 (STANDARD_TYPES 중 하나)
         """
+        from rag.vulnerability_classifier import get_vulnerability_classifier
+        return get_vulnerability_classifier().get_standard_type(vuln_type)
+    
+    def _normalize_vuln_type_linear(self, vuln_type: str) -> str:
+        """기존 선형 스캔 구현 (분류기 일치 검증용 기준)"""
         # 정확한 매칭 먼저 시도
         if vuln_type in self.STANDARD_TYPES:
             return vuln_type
@@ -328,17 +342,12 @@ class VulnerabilityTypeMapper:
                 return standard_type
         
         # 키워드 기반 추측 (더 많은 키워드)
-        if any(keyword in vuln_type_lower for keyword in ['sql', 'query', 'database', '쿼리']):
-            return 'SQL_Injection'
-        elif any(keyword in vuln_type_lower for keyword in ['xss', 'script', 'cross-site', 'cross site']):
-            return 'XSS'
-        elif any(keyword in vuln_type_lower for keyword in ['path', 'traversal', 'directory', '경로', '디렉']):
-            return 'Path_Traversal'
-        elif any(keyword in vuln_type_lower for keyword in ['deserial', 'pickle', 'yaml', '역직렬']):
-            return 'Deserialization'
+        for keywords, standard_type in self.KEYWORD_RULES:
+            if any(keyword in vuln_type_lower for keyword in keywords):
+                return standard_type
         
         # 기본값
-        return 'General'
+        return self.DEFAULT_TYPE
     
     def get_search_collections(self, vuln_type: str) -> list:
         """
@@ -3,12 +3,14 @@
 KISIA PDF 정밀 분석 - 정확한 레이블 패턴 사용
 '안전하지 않은 코드 예시' / '안전한 코드 예시' 패턴 매칭
 """
-import pdfplumber
 import json
 import re
 from pathlib import Path
 from collections import Counter, defaultdict
 import time
+import sys
+sys.path.append('.')
+from rag.pdf_page_cache import load_pdf_pages
 
 class PDFAnalyzerFixed:
     def __init__(self, pdf_path):
@@ -61,7 +63,8 @@ class PDFAnalyzerFixed:
         print(f"📄 PDF 정밀 분석 시작 (수정된 패턴): {self.pdf_path.name}")
         start_time = time.time()
         
-        with pdfplumber.open(self.pdf_path) as pdf:
+        # 페이지 텍스트는 공용 캐시에서 (02/04 스크립트와 공유)
+        with load_pdf_pages(self.pdf_path) as pdf:
             self.analysis["total_pages"] = len(pdf.pages)
             print(f"📊 총 페이지: {self.analysis['total_pages']}")
             
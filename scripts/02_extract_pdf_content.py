@@ -1,8 +1,10 @@
-import pdfplumber
 import json
 import re
 from pathlib import Path
 from typing import List, Dict, Tuple
+import sys
+sys.path.append('.')
+from rag.pdf_page_cache import load_pdf_pages
 
 class PDFStructureExtractor:
     def __init__(self, pdf_path: str):
@@ -15,7 +17,8 @@ class PDFStructureExtractor:
         print(f"📄 PDF 구조 기반 추출을 시작합니다 (페이지 오프셋: {self.PAGE_OFFSET})")
         structured_data = {"vulnerabilities": []}
 
-        with pdfplumber.open(self.pdf_path) as pdf:
+        # 페이지 텍스트는 공용 캐시에서 (01/04 스크립트와 공유)
+        with load_pdf_pages(self.pdf_path) as pdf:
             for i, current_section in enumerate(self.TOC):
                 start_page = current_section['page']
                 next_page_in_toc = self.TOC[i + 1]['page'] if i + 1 < len(self.TOC) else (len(pdf.pages) - self.PAGE_OFFSET + 1)
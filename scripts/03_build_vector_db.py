@@ -11,6 +11,10 @@ from typing import List, Dict
 import hashlib
 from datetime import datetime
 import os
+import sys
+sys.path.append('.')
+from rag.vector_backend import export_numpy_collections, upsert_changed
+from rag.onnx_embedder import OnnxEmbedder
 
 class VectorDBBuilder:
     def __init__(self, persist_directory: str = "data/vector_db"):
@@ -26,6 +30,9 @@ class VectorDBBuilder:
             )
         )
         
+        # 로컬 ONNX 배치 임베딩 (모델 파일이 없으면 빌드 시작 전에 실패)
+        self.embedder = OnnxEmbedder()
+        
         # 컬렉션 정의
         self.collections = {}
         
@@ -33,15 +40,21 @@ class VectorDBBuilder:
         self.stats = {
             "collections_created": [],
             "documents_added": {},
+            "sync": {},
             "errors": []
         }
     
-    def build(self):
-        """벡터 DB 구축 메인 함수"""
-        print("🚀 벡터 DB 구축 시작")
+    def build(self, full_rebuild: bool = False):
+        """
+        벡터 DB 구축 메인 함수
+        
+        full_rebuild: 컬렉션을 모두 삭제하고 전체 재임베딩 (기본은 바뀐 문서만 upsert / 빠진 문서 삭제)
+        """
+        print(f"🚀 벡터 DB 구축 시작 ({'전체 재구축' if full_rebuild else '증분 갱신'})")
         
-        # 1. 기존 컬렉션 정리
-        self._cleanup_existing_collections()
+        # 1. 전체 재구축이면 기존 컬렉션 정리 (기본: 문서 해시 비교 증분 갱신)
+        if full_rebuild:
+            self._cleanup_existing_collections()
         
         # 2. 데이터 로드
         vuln_sections = self._load_vulnerability_sections()
@@ -58,10 +71,31 @@ class VectorDBBuilder:
         # 5. 인덱스 생성
         self._create_indexes()
         
+        # 6. numpy 벡터 백엔드 파일 내보내기 (VECTOR_BACKEND=numpy에서 사용)
+        self._export_numpy_backend()
+        
+        self.stats["embedding"] = dict(self.embedder.stats)
         print("✅ 벡터 DB 구축 완료")
         
         return self.stats
     
+    def _sync(self, collection, name: str, ids: List[str], documents: List[str], metadatas: List[Dict]):
+        """바뀐 문서만 임베딩해 upsert, 빠진 문서 삭제 (문서 해시는 메타데이터 content_hash에 저장)"""
+        sync = upsert_changed(collection, ids, documents, metadatas, self.embedder.embed, salt=self.embedder.model_id)
+        self.stats["sync"][name] = sync
+        print(f"  ↻ 추가 {sync['added']} / 변경 {sync['updated']} / 삭제 {sync['deleted']} / 유지 {sync['unchanged']}")
+    
+    def _export_numpy_backend(self):
+        """컬렉션 임베딩을 정규화 행렬(.npy) + 문서/메타데이터(.json)로 내보내기"""
+        print("📤 numpy 벡터 백엔드 파일 내보내기...")
+        try:
+            self.stats["numpy_export"] = export_numpy_collections(
+                str(self.persist_dir), [c.name for c in self.collections.values()], client=self.client
+            )
+        except Exception as e:
+            print(f"  ❌ numpy 내보내기 실패: {e}")
+            self.stats["errors"].append(f"numpy export: {e}")
+    
     def _cleanup_existing_collections(self):
         """기존 컬렉션 삭제"""
         print("🧹 기존 컬렉션 정리 중...")
@@ -75,36 +109,36 @@ class VectorDBBuilder:
                 print(f"  ❌ 삭제 실패: {collection.name} - {e}")
     
     def _create_collections(self):
-        """컬렉션 생성"""
-        print("📦 컬렉션 생성 중...")
+        """컬렉션 생성 (이미 있으면 재사용)"""
+        print("📦 컬렉션 준비 중...")
         
         # 1. 취약점 섹션 컬렉션 (메인)
-        self.collections['vulnerabilities'] = self.client.create_collection(
+        self.collections['vulnerabilities'] = self.client.get_or_create_collection(
             name="kisia_vulnerabilities",
             metadata={"description": "KISIA 취약점 섹션 (설명 + 코드 쌍)"}
         )
-        print("  ✓ kisia_vulnerabilities 생성")
+        print("  ✓ kisia_vulnerabilities 준비")
         
         # 2. 코드 예제 컬렉션
-        self.collections['code_examples'] = self.client.create_collection(
+        self.collections['code_examples'] = self.client.get_or_create_collection(
             name="kisia_code_examples",
             metadata={"description": "안전/불안전 코드 예제"}
         )
-        print("  ✓ kisia_code_examples 생성")
+        print("  ✓ kisia_code_examples 준비")
         
         # 3. 일반 청크 컬렉션
-        self.collections['chunks'] = self.client.create_collection(
+        self.collections['chunks'] = self.client.get_or_create_collection(
             name="kisia_chunks",
             metadata={"description": "의미 단위 텍스트 청크"}
         )
-        print("  ✓ kisia_chunks 생성")
+        print("  ✓ kisia_chunks 준비")
         
         # 4. 권장사항 컬렉션
-        self.collections['recommendations'] = self.client.create_collection(
+        self.collections['recommendations'] = self.client.get_or_create_collection(
             name="kisia_recommendations",
             metadata={"description": "보안 권장사항 및 가이드라인"}
         )
-        print("  ✓ kisia_recommendations 생성")
+        print("  ✓ kisia_recommendations 준비")
         
         self.stats["collections_created"] = list(self.collections.keys())
     
@@ -167,11 +201,7 @@ class VectorDBBuilder:
         
         # ChromaDB에 추가
         try:
-            collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
+            self._sync(collection, "vulnerabilities", ids, documents, metadatas)
             print(f"  ✓ {len(documents)}개 취약점 섹션 임베딩 완료")
             self.stats["documents_added"]["vulnerabilities"] = len(documents)
         except Exception as e:
@@ -216,11 +246,7 @@ class VectorDBBuilder:
                 ids.append(f"chunk_{i}")
             
             try:
-                chunks_collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
-                )
+                self._sync(chunks_collection, "chunks", ids, documents, metadatas)
                 print(f"  ✓ {len(documents)}개 일반 청크 임베딩 완료")
                 self.stats["documents_added"]["chunks"] = len(documents)
             except Exception as e:
@@ -245,11 +271,7 @@ class VectorDBBuilder:
                 ids.append(f"reco_{i}")
             
             try:
-                reco_collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
-                )
+                self._sync(reco_collection, "recommendations", ids, documents, metadatas)
                 print(f"  ✓ {len(documents)}개 권장사항 임베딩 완료")
                 self.stats["documents_added"]["recommendations"] = len(documents)
             except Exception as e:
@@ -293,11 +315,7 @@ class VectorDBBuilder:
         
         if documents:
             try:
-                collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
-                )
+                self._sync(collection, "code_examples", ids, documents, metadatas)
                 print(f"  ✓ {len(documents)}개 코드 예제 임베딩 완료")
                 self.stats["documents_added"]["code_examples"] = len(documents)
             except Exception as e:
@@ -408,11 +426,16 @@ class VectorDBBuilder:
                 print(f"  • {error[:100]}")
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="KISIA 벡터 DB 구축 (기본: 바뀐 문서만 증분 갱신)")
+    parser.add_argument('--full', action='store_true', help="컬렉션을 모두 삭제하고 전체 재구축")
+    args = parser.parse_args()
+    
     # 벡터 DB 빌더 생성
     builder = VectorDBBuilder()
     
     # 빌드 실행
-    stats = builder.build()
+    stats = builder.build(full_rebuild=args.full)
     
     # 검증
     builder.verify_build()
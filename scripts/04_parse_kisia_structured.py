@@ -3,7 +3,6 @@
 KISIA 가이드라인 구조화된 파싱
 목차 기반으로 정확한 취약점 섹션 추출
 """
-import pdfplumber
 import json
 import re
 from pathlib import Path
@@ -11,6 +10,7 @@ from typing import Dict, List, Tuple, Optional
 import sys
 sys.path.append('.')
 from rag.kisia_vulnerability_mapping import KISIAVulnerabilityMapper
+from rag.pdf_page_cache import load_pdf_pages
 
 class KISIAStructuredParser:
     """KISIA 가이드라인 구조화 파서"""
@@ -50,7 +50,8 @@ class KISIAStructuredParser:
         """메인 파싱 함수"""
         print(f"📄 KISIA 가이드라인 구조화 파싱 시작: {self.pdf_path.name}")
         
-        with pdfplumber.open(self.pdf_path) as pdf:
+        # 페이지 텍스트는 공용 캐시에서 (섹션 범위가 겹쳐도 페이지당 1회 추출)
+        with load_pdf_pages(self.pdf_path) as pdf:
             # 각 섹션별로 파싱
             for section_name, section_items in self.mapper.GUIDELINE_STRUCTURE.items():
                 print(f"\n📂 {section_name} 파싱 중...")
@@ -13,6 +13,10 @@ from datetime import datetime
 import sys
 sys.path.append('.')
 from rag.kisia_vulnerability_mapping import KISIAVulnerabilityMapper
+from rag.bm25_index import vulnerability_document, vulnerability_metadata
+from config import rag_config
+from rag.vector_backend import export_numpy_collections, upsert_changed
+from rag.onnx_embedder import OnnxEmbedder
 
 class ImprovedVectorDBBuilder:
     """개선된 벡터 DB 빌더"""
@@ -30,20 +34,29 @@ class ImprovedVectorDBBuilder:
             )
         )
         
+        # 로컬 ONNX 배치 임베딩 (모델 파일이 없으면 빌드 시작 전에 실패)
+        self.embedder = OnnxEmbedder()
+        
         self.mapper = KISIAVulnerabilityMapper()
         self.collections = {}
         self.stats = {
             "collections_created": [],
             "documents_added": {},
+            "sync": {},
             "errors": []
         }
     
-    def build(self):
-        """벡터 DB 구축"""
-        print("🚀 개선된 벡터 DB 구축 시작")
+    def build(self, full_rebuild: bool = False):
+        """
+        벡터 DB 구축
+        
+        full_rebuild: 컬렉션을 모두 삭제하고 전체 재임베딩 (기본은 바뀐 문서만 upsert / 빠진 문서 삭제)
+        """
+        print(f"🚀 개선된 벡터 DB 구축 시작 ({'전체 재구축' if full_rebuild else '증분 갱신'})")
         
-        # 1. 기존 컬렉션 정리
-        self._cleanup_existing_collections()
+        # 1. 전체 재구축이면 기존 컬렉션 정리 (기본: 문서 해시 비교 증분 갱신)
+        if full_rebuild:
+            self._cleanup_existing_collections()
         
         # 2. 구조화된 데이터 로드
         structured_data = self._load_structured_data()
@@ -56,10 +69,34 @@ class ImprovedVectorDBBuilder:
         self._embed_code_examples(structured_data['vulnerabilities'])
         self._embed_recommendations(structured_data['vulnerabilities'])
         
+        # 5. 근거 테이블 생성 (매핑된 타입은 벡터 DB 조회 없이 제공)
+        self._write_evidence_table(structured_data['vulnerabilities'])
+        
+        # 6. numpy 벡터 백엔드 파일 내보내기 (VECTOR_BACKEND=numpy에서 사용)
+        self._export_numpy_backend()
+        
+        self.stats["embedding"] = dict(self.embedder.stats)
         print("✅ 벡터 DB 구축 완료")
         
         return self.stats
     
+    def _sync(self, collection, name: str, ids: List[str], documents: List[str], metadatas: List[Dict]):
+        """바뀐 문서만 임베딩해 upsert, 빠진 문서 삭제 (문서 해시는 메타데이터 content_hash에 저장)"""
+        sync = upsert_changed(collection, ids, documents, metadatas, self.embedder.embed, salt=self.embedder.model_id)
+        self.stats["sync"][name] = sync
+        print(f"  ↻ 추가 {sync['added']} / 변경 {sync['updated']} / 삭제 {sync['deleted']} / 유지 {sync['unchanged']}")
+    
+    def _export_numpy_backend(self):
+        """컬렉션 임베딩을 정규화 행렬(.npy) + 문서/메타데이터(.json)로 내보내기"""
+        print("📤 numpy 벡터 백엔드 파일 내보내기...")
+        try:
+            self.stats["numpy_export"] = export_numpy_collections(
+                str(self.persist_dir), [c.name for c in self.collections.values()], client=self.client
+            )
+        except Exception as e:
+            print(f"  ❌ numpy 내보내기 실패: {e}")
+            self.stats["errors"].append(f"numpy export: {e}")
+    
     def _cleanup_existing_collections(self):
         """기존 컬렉션 삭제"""
         print("🧹 기존 컬렉션 정리 중...")
@@ -78,28 +115,28 @@ class ImprovedVectorDBBuilder:
             return json.load(f)
     
     def _create_collections(self):
-        """컬렉션 생성"""
-        print("📦 컬렉션 생성 중...")
+        """컬렉션 생성 (이미 있으면 재사용)"""
+        print("📦 컬렉션 준비 중...")
         
         # 1. 취약점 섹션 컬렉션
-        self.collections['vulnerabilities'] = self.client.create_collection(
+        self.collections['vulnerabilities'] = self.client.get_or_create_collection(
             name="kisia_vulnerabilities",
             metadata={"description": "KISIA 취약점 섹션 (전체 내용)"}
         )
         
         # 2. 코드 예제 컬렉션
-        self.collections['code_examples'] = self.client.create_collection(
+        self.collections['code_examples'] = self.client.get_or_create_collection(
             name="kisia_code_examples",
             metadata={"description": "안전/불안전 코드 예제"}
         )
         
         # 3. 권장사항 컬렉션
-        self.collections['recommendations'] = self.client.create_collection(
+        self.collections['recommendations'] = self.client.get_or_create_collection(
             name="kisia_recommendations",
             metadata={"description": "보안 권장사항"}
         )
         
-        print(f"  ✓ {len(self.collections)}개 컬렉션 생성 완료")
+        print(f"  ✓ {len(self.collections)}개 컬렉션 준비 완료")
     
     def _embed_vulnerability_sections(self, vulnerabilities: List[Dict]):
         """취약점 섹션 임베딩"""
@@ -112,50 +149,13 @@ class ImprovedVectorDBBuilder:
         ids = []
         
         for vuln in vulnerabilities:
-            # 문서 생성 (전체 내용)
-            doc_text = f"""
-[취약점: {vuln['korean_name']}]
-섹션: {vuln['section']}
-
-[설명]
-{vuln['description']}
-
-[안전하지 않은 코드 예시]
-{self._format_code_examples(vuln['unsafe_codes'])}
-
-[안전한 코드 예시]
-{self._format_code_examples(vuln['safe_codes'])}
-
-[권장사항]
-{' '.join(vuln['recommendations'])}
-"""
-            
-            documents.append(doc_text)
-            
-            # ChromaDB 호환 메타데이터
-            metadatas.append({
-                "section": vuln['section'],
-                "section_number": str(vuln['number']),  # 문자열로 변환
-                "korean_name": vuln['korean_name'],
-                "english_type": vuln['english_type'],
-                "start_page": vuln['start_page'],
-                "end_page": vuln['end_page'],
-                "has_unsafe_code": len(vuln['unsafe_codes']) > 0,
-                "has_safe_code": len(vuln['safe_codes']) > 0,
-                "unsafe_code_count": len(vuln['unsafe_codes']),
-                "safe_code_count": len(vuln['safe_codes'])
-            })
-            
-            # ID 생성
+            documents.append(self._vulnerability_document(vuln))
+            metadatas.append(self._vulnerability_metadata(vuln))
             ids.append(f"vuln_{vuln['english_type']}")
         
         # ChromaDB에 추가
         try:
-            collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
+            self._sync(collection, "vulnerabilities", ids, documents, metadatas)
             print(f"  ✓ {len(documents)}개 취약점 섹션 임베딩 완료")
             self.stats["documents_added"]["vulnerabilities"] = len(documents)
         except Exception as e:
@@ -173,39 +173,14 @@ class ImprovedVectorDBBuilder:
         ids = []
         
         for vuln in vulnerabilities:
-            # 안전하지 않은 코드
-            for i, code_info in enumerate(vuln['unsafe_codes']):
-                documents.append(code_info['code'])
-                metadatas.append({
-                    "code_type": "unsafe",
-                    "vulnerability_type": vuln['english_type'],
-                    "korean_name": vuln['korean_name'],
-                    "page": code_info['page'],
-                    "section": vuln['section'],
-                    "label": code_info.get('label', '안전하지 않은 코드 예시')
-                })
-                ids.append(f"unsafe_{vuln['english_type']}_{i}")
-            
-            # 안전한 코드
-            for i, code_info in enumerate(vuln['safe_codes']):
-                documents.append(code_info['code'])
-                metadatas.append({
-                    "code_type": "safe",
-                    "vulnerability_type": vuln['english_type'],
-                    "korean_name": vuln['korean_name'],
-                    "page": code_info['page'],
-                    "section": vuln['section'],
-                    "label": code_info.get('label', '안전한 코드 예시')
-                })
-                ids.append(f"safe_{vuln['english_type']}_{i}")
+            for code_id, code, metadata in self._code_example_entries(vuln):
+                documents.append(code)
+                metadatas.append(metadata)
+                ids.append(code_id)
         
         if documents:
             try:
-                collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
-                )
+                self._sync(collection, "code_examples", ids, documents, metadatas)
                 print(f"  ✓ {len(documents)}개 코드 예제 임베딩 완료")
                 self.stats["documents_added"]["code_examples"] = len(documents)
             except Exception as e:
@@ -224,45 +199,99 @@ class ImprovedVectorDBBuilder:
         
         for vuln in vulnerabilities:
             if vuln['recommendations']:
-                # 모든 권장사항을 하나의 문서로
-                doc_text = f"""
-[{vuln['korean_name']} 권장사항]
-
-{chr(10).join(f'• {rec}' for rec in vuln['recommendations'])}
-"""
-                
-                documents.append(doc_text)
-                metadatas.append({
-                    "vulnerability_type": vuln['english_type'],
-                    "korean_name": vuln['korean_name'],
-                    "section": vuln['section'],
-                    "recommendation_count": len(vuln['recommendations'])
-                })
+                documents.append(self._recommendation_document(vuln))
+                metadatas.append(self._recommendation_metadata(vuln))
                 ids.append(f"rec_{vuln['english_type']}")
         
         if documents:
             try:
-                collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
-                )
+                self._sync(collection, "recommendations", ids, documents, metadatas)
                 print(f"  ✓ {len(documents)}개 권장사항 임베딩 완료")
                 self.stats["documents_added"]["recommendations"] = len(documents)
             except Exception as e:
                 print(f"  ❌ 권장사항 임베딩 실패: {e}")
                 self.stats["errors"].append(str(e))
     
-    def _format_code_examples(self, code_list: List[Dict]) -> str:
-        """코드 예제 포맷팅"""
-        if not code_list:
-            return "코드 예제 없음"
+    def _vulnerability_document(self, vuln: Dict) -> str:
+        """취약점 섹션 문서 (전체 내용, BM25 색인과 같은 문서)"""
+        return vulnerability_document(vuln)
+    
+    def _vulnerability_metadata(self, vuln: Dict) -> Dict:
+        """취약점 섹션 메타데이터 (ChromaDB 호환)"""
+        return vulnerability_metadata(vuln)
+    
+    def _code_example_entries(self, vuln: Dict) -> List[tuple]:
+        """코드 예제 (ID, 코드, 메타데이터) 목록 - 안전하지 않은 코드 먼저"""
+        entries = []
+        for code_type, default_label in (("unsafe", "안전하지 않은 코드 예시"), ("safe", "안전한 코드 예시")):
+            for i, code_info in enumerate(vuln[f'{code_type}_codes']):
+                entries.append((f"{code_type}_{vuln['english_type']}_{i}", code_info['code'], {
+                    "code_type": code_type,
+                    "vulnerability_type": vuln['english_type'],
+                    "korean_name": vuln['korean_name'],
+                    "page": code_info['page'],
+                    "section": vuln['section'],
+                    "label": code_info.get('label', default_label)
+                }))
+        return entries
+    
+    def _recommendation_document(self, vuln: Dict) -> str:
+        """권장사항 문서 (모든 권장사항을 하나로)"""
+        return f"""
+[{vuln['korean_name']} 권장사항]
+
+{chr(10).join(f'• {rec}' for rec in vuln['recommendations'])}
+"""
+    
+    def _recommendation_metadata(self, vuln: Dict) -> Dict:
+        return {
+            "vulnerability_type": vuln['english_type'],
+            "korean_name": vuln['korean_name'],
+            "section": vuln['section'],
+            "recommendation_count": len(vuln['recommendations'])
+        }
+    
+    def _write_evidence_table(self, vulnerabilities: List[Dict]):
+        """
+        KISIA 타입별 근거 테이블 저장
         
-        formatted = []
-        for code_info in code_list[:2]:  # 최대 2개만
-            formatted.append(f"```python\n{code_info['code']}\n```")
+        ImprovedRAGSearch._get_exact_evidence()가 get()으로 얻는 결과와 같은 형식을
+        미리 계산해 두어, 매핑된 타입은 벡터 DB를 조회하지 않고 바로 제공
+        """
+        print("🗂️ 근거 테이블 생성 중...")
         
-        return '\n\n'.join(formatted)
+        table = {}
+        for vuln in vulnerabilities:
+            unsafe_codes, safe_codes = [], []
+            # get(limit=4)과 같이 삽입 순서대로 최대 4개
+            for _, code, metadata in self._code_example_entries(vuln)[:4]:
+                item = {'code': code, 'metadata': metadata}
+                (unsafe_codes if metadata['code_type'] == 'unsafe' else safe_codes).append(item)
+            
+            table[vuln['english_type']] = {
+                'vulnerability': {
+                    'content': self._vulnerability_document(vuln),
+                    'metadata': self._vulnerability_metadata(vuln)
+                },
+                'unsafe_codes': unsafe_codes,
+                'safe_codes': safe_codes,
+                'recommendations': {
+                    'content': self._recommendation_document(vuln),
+                    'metadata': self._recommendation_metadata(vuln)
+                } if vuln['recommendations'] else None
+            }
+        
+        source = Path("data/processed/kisia_structured.json")
+        path = self.persist_dir / rag_config.EVIDENCE_TABLE_FILE
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'built_at': datetime.now().isoformat(),
+                'source_hash': hashlib.sha256(source.read_bytes()).hexdigest()[:16],
+                'types': table
+            }, f, ensure_ascii=False)
+        
+        print(f"  ✓ {len(table)}개 타입 근거 테이블 저장: {path}")
+        self.stats["evidence_table"] = {"path": str(path), "types": len(table)}
     
     def verify_build(self):
         """빌드 검증"""
@@ -302,11 +331,16 @@ class ImprovedVectorDBBuilder:
                 print(f"  ❌ '{query}' → {expected_type}: 못찾음")
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="개선된 벡터 DB 구축 (기본: 바뀐 문서만 증분 갱신)")
+    parser.add_argument('--full', action='store_true', help="컬렉션을 모두 삭제하고 전체 재구축")
+    args = parser.parse_args()
+    
     # 벡터 DB 빌더 생성
     builder = ImprovedVectorDBBuilder()
     
     # 빌드 실행
-    stats = builder.build()
+    stats = builder.build(full_rebuild=args.full)
     
     # 검증
     builder.verify_build()
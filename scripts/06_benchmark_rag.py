@@ -0,0 +1,319 @@
+# scripts/06_benchmark_rag.py
+"""
+RAG 검색 품질 / 지연 벤치마크
+- 정답 질의 세트(data/benchmarks/rag_queries.json): 취약점 타입 문자열 / 한국어 질문 → KISIA 섹션(english_type)과 페이지
+- 백엔드별(chroma, numpy, bm25, hybrid) recall@k, MRR, 페이지 적중률, p50/p95/p99 지연
+- cold(백엔드 생성 + 첫 회차, 임베딩 모델 로드 포함)와 warm(이후 반복 회차) 분리 측정
+- 결과 JSON 저장 (--baseline으로 이전 결과와 비교해 회귀 표시)
+- API 키 불필요 (05 스크립트로 만든 벡터 DB와 04 스크립트의 구조화 데이터만 사용)
+"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.append('.')
+from config import rag_config
+from rag.bm25_index import build_guideline_index, reciprocal_rank_fusion
+from rag.vector_backend import open_collections
+
+COLLECTION = "kisia_vulnerabilities"
+BACKENDS = ("chroma", "numpy", "bm25", "hybrid")
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """nearest-rank 백분위수"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def latency_summary(latencies_ms: Sequence[float]) -> Dict:
+    if not latencies_ms:
+        return {}
+    return {
+        'count': len(latencies_ms),
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p95_ms': round(percentile(latencies_ms, 95), 3),
+        'p99_ms': round(percentile(latencies_ms, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies_ms), 3),
+        'max_ms': round(max(latencies_ms), 3)
+    }
+
+
+def _hit(doc_id: str, metadata: Optional[Dict]) -> Dict:
+    """검색 결과 1건 → 평가용 정보 (BM25 / 05 스크립트 ID는 vuln_<english_type>)"""
+    metadata = metadata or {}
+    english_type = metadata.get('english_type') or (doc_id[5:] if doc_id.startswith('vuln_') else None)
+    return {
+        'id': doc_id,
+        'english_type': english_type,
+        'start_page': metadata.get('start_page', metadata.get('page_start')),
+        'end_page': metadata.get('end_page', metadata.get('page_end'))
+    }
+
+
+# ============================================================================
+# 검색 대상 (백엔드별 생성 = cold 준비 단계, search = 질의 1건)
+# ============================================================================
+
+class VectorRetriever:
+    """벡터 DB 컬렉션 검색 (query_texts - 질의 임베딩 포함)"""
+
+    def __init__(self, db_path: str, backend: str):
+        self.name = backend
+        if not Path(db_path).exists():
+            raise RuntimeError(f"벡터 DB 없음: {db_path} (05 스크립트로 생성)")
+        self.collection = open_collections(db_path, [COLLECTION], backend=backend)[COLLECTION]
+        # open_collections는 numpy 파일이 없으면 Chroma로 폴백 - 벤치마크에서는 건너뛰기
+        if self.collection.backend != backend:
+            raise RuntimeError(f"{backend} 백엔드를 열 수 없음 (python -m rag.vector_backend {db_path} 로 내보내기 필요)")
+        if not self.collection.count():
+            raise RuntimeError(f"{COLLECTION} 컬렉션이 비어 있음")
+
+    def search_ranked(self, query: str, depth: int) -> List[Dict]:
+        results = self.collection.query(query_texts=[query], n_results=depth)
+        ids = results['ids'][0] if results['ids'] else []
+        metadatas = (results.get('metadatas') or [[]])[0] or [None] * len(ids)
+        return [_hit(doc_id, meta) for doc_id, meta in zip(ids, metadatas)]
+
+    def search(self, query: str, k: int) -> List[Dict]:
+        return self.search_ranked(query, k)
+
+
+class BM25Retriever:
+    """구조화 데이터 BM25 색인 검색"""
+
+    def __init__(self):
+        self.name = 'bm25'
+        self.index = build_guideline_index()
+
+    def search(self, query: str, k: int) -> List[Dict]:
+        return [_hit(doc_id, self.index.get(doc_id)['metadata']) for doc_id, _ in self.index.search(query, k)]
+
+
+class HybridRetriever:
+    """BM25 + 벡터 RRF 결합 (ImprovedRAGSearch 폴백 검색과 같은 방식)"""
+
+    def __init__(self, db_path: str, vector_backend: str):
+        self.name = 'hybrid'
+        self.vector = VectorRetriever(db_path, vector_backend)
+        self.lexical = BM25Retriever()
+
+    def search(self, query: str, k: int) -> List[Dict]:
+        depth = max(k, rag_config.RRF_DEPTH)
+        lexical = self.lexical.search(query, depth)
+        vector = self.vector.search_ranked(query, depth)
+        hits = {hit['id']: hit for hit in lexical}
+        hits.update({hit['id']: hit for hit in vector if hit['english_type']})
+        fused = reciprocal_rank_fusion([[hit['id'] for hit in lexical], [hit['id'] for hit in vector]])
+        return [hits[doc_id] for doc_id, _ in fused[:k]]
+
+
+# ============================================================================
+# 평가
+# ============================================================================
+
+def _pages_overlap(hit: Dict, expected_pages: Sequence[Sequence[int]]) -> bool:
+    try:
+        start, end = int(hit['start_page']), int(hit['end_page'])
+    except (TypeError, ValueError):
+        return False
+    return any(start <= page_end and page_start <= end for page_start, page_end in expected_pages)
+
+
+def evaluate(query: Dict, hits: List[Dict], ks: Sequence[int]) -> Dict:
+    """질의 1건 평가: recall@k(정답 섹션 중 상위 k에 포함된 비율), 역순위, 1위 페이지 적중"""
+    expected = set(query['expected_types'])
+    types = [hit['english_type'] for hit in hits]
+    rank = next((i for i, t in enumerate(types, 1) if t in expected), None)
+    return {
+        'id': query['id'],
+        'kind': query.get('kind', 'question'),
+        'recall': {k: len(expected & set(types[:k])) / len(expected) for k in ks},
+        'reciprocal_rank': 1.0 / rank if rank else 0.0,
+        'rank': rank,
+        'page_hit_at_1': bool(hits) and _pages_overlap(hits[0], query.get('expected_pages', [])),
+        'top': types[:max(ks)]
+    }
+
+
+def quality_summary(evaluations: List[Dict], ks: Sequence[int]) -> Dict:
+    if not evaluations:
+        return {}
+    summary = {f'recall@{k}': round(statistics.fmean(e['recall'][k] for e in evaluations), 4) for k in ks}
+    summary['mrr'] = round(statistics.fmean(e['reciprocal_rank'] for e in evaluations), 4)
+    summary['page_hit@1'] = round(statistics.fmean(e['page_hit_at_1'] for e in evaluations), 4)
+    return summary
+
+
+class RAGBenchmark:
+    """백엔드별 cold / warm 측정"""
+
+    def __init__(self, queries: List[Dict], db_path: str, ks: Sequence[int] = (1, 3, 5), repeat: int = 3,
+                 hybrid_backend: str = None):
+        self.queries = queries
+        self.db_path = db_path
+        self.ks = sorted(set(ks))
+        self.repeat = repeat
+        self.hybrid_backend = hybrid_backend or rag_config.VECTOR_BACKEND
+
+    def _create(self, backend: str):
+        if backend in ('chroma', 'numpy'):
+            return VectorRetriever(self.db_path, backend)
+        if backend == 'bm25':
+            return BM25Retriever()
+        if backend == 'hybrid':
+            return HybridRetriever(self.db_path, self.hybrid_backend)
+        raise ValueError(f"알 수 없는 백엔드: {backend}")
+
+    def _run_pass(self, retriever, k: int) -> Tuple[List[float], List[List[Dict]]]:
+        latencies, results = [], []
+        for query in self.queries:
+            start = time.perf_counter()
+            hits = retriever.search(query['query'], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            results.append(hits)
+        return latencies, results
+
+    def run_backend(self, backend: str) -> Dict:
+        print(f"\n⏱️ {backend} 벤치마크...")
+        k = max(self.ks)
+        start = time.perf_counter()
+        try:
+            retriever = self._create(backend)
+        except Exception as e:
+            print(f"  ⏭️ 건너뜀: {e}")
+            return {'status': 'skipped', 'reason': str(e)}
+        setup_ms = (time.perf_counter() - start) * 1000
+
+        # cold: 생성 직후 첫 회차 (질의 임베딩 모델 지연 로드 포함), warm: 이후 반복 회차
+        cold_latencies, results = self._run_pass(retriever, k)
+        warm_latencies = []
+        unstable = set()
+        for _ in range(self.repeat):
+            latencies, repeat_results = self._run_pass(retriever, k)
+            warm_latencies.extend(latencies)
+            for query, first, again in zip(self.queries, results, repeat_results):
+                if [hit['id'] for hit in first] != [hit['id'] for hit in again]:
+                    unstable.add(query['id'])
+
+        evaluations = [evaluate(query, hits, self.ks) for query, hits in zip(self.queries, results)]
+        kinds = sorted({e['kind'] for e in evaluations})
+        report = {
+            'status': 'ok',
+            'setup_ms': round(setup_ms, 3),
+            'cold': {**latency_summary(cold_latencies), 'first_query_ms': round(cold_latencies[0], 3),
+                     'total_ms': round(setup_ms + sum(cold_latencies), 3)},
+            'warm': latency_summary(warm_latencies),
+            'quality': quality_summary(evaluations, self.ks),
+            'by_kind': {kind: quality_summary([e for e in evaluations if e['kind'] == kind], self.ks)
+                        for kind in kinds},
+            'misses': [{'id': e['id'], 'top': e['top']} for e in evaluations if not e['rank']],
+            'unstable': sorted(unstable)
+        }
+        if backend == 'hybrid':
+            report['vector_backend'] = self.hybrid_backend
+        quality = report['quality']
+        print(f"  📊 recall@{k} {quality[f'recall@{k}']:.3f}, MRR {quality['mrr']:.3f}, "
+              f"페이지@1 {quality['page_hit@1']:.3f} | 준비 {setup_ms:.1f}ms, "
+              f"cold p50 {report['cold']['p50_ms']:.2f}ms (첫 질의 {cold_latencies[0]:.1f}ms), "
+              f"warm p50/p95/p99 {report['warm'].get('p50_ms', 0):.2f}/{report['warm'].get('p95_ms', 0):.2f}/"
+              f"{report['warm'].get('p99_ms', 0):.2f}ms")
+        return report
+
+    def run(self, backends: Sequence[str]) -> Dict:
+        return {backend: self.run_backend(backend) for backend in backends}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare_with_baseline(current: Dict, baseline: Dict, latency_tolerance: float = 0.2) -> List[str]:
+    """이전 결과 대비 회귀 목록 (품질 하락, warm p95 지연 증가율 초과)"""
+    regressions = []
+    print("\n📈 기준 결과 비교")
+    for backend, report in current['backends'].items():
+        before = baseline.get('backends', {}).get(backend)
+        if report.get('status') != 'ok' or not before or before.get('status') != 'ok':
+            continue
+        for metric, value in report['quality'].items():
+            previous = before['quality'].get(metric)
+            if previous is None:
+                continue
+            mark = "⚠️" if value < previous else " "
+            print(f"  {mark} {backend} {metric}: {previous:.3f} → {value:.3f}")
+            if value < previous:
+                regressions.append(f"{backend} {metric} {previous:.3f} → {value:.3f}")
+        previous_p95, p95 = before['warm'].get('p95_ms'), report['warm'].get('p95_ms')
+        if previous_p95 and p95:
+            slower = p95 > previous_p95 * (1 + latency_tolerance)
+            print(f"  {'⚠️' if slower else ' '} {backend} warm p95: {previous_p95:.2f}ms → {p95:.2f}ms")
+            if slower:
+                regressions.append(f"{backend} warm p95 {previous_p95:.2f}ms → {p95:.2f}ms")
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="RAG 검색 품질 / 지연 벤치마크")
+    parser.add_argument('--db', default="data/vector_db_v2", help="벡터 DB 경로 (05 스크립트 출력)")
+    parser.add_argument('--queries', default=rag_config.BENCHMARK_QUERIES_FILE, help="정답 질의 세트 JSON")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--k', nargs='+', type=int, default=[1, 3, 5], help="recall@k의 k 목록")
+    parser.add_argument('--repeat', type=int, default=3, help="warm 측정 반복 회차")
+    parser.add_argument('--hybrid-backend', default=None, choices=('chroma', 'numpy'),
+                        help="hybrid의 벡터 백엔드 (기본: VECTOR_BACKEND)")
+    parser.add_argument('--output', default=None, help="결과 JSON 경로 (기본: BENCHMARK_RESULTS_DIR/rag_<시각>.json)")
+    parser.add_argument('--baseline', default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument('--fail-on-regression', action='store_true', help="기준 대비 회귀가 있으면 종료 코드 1")
+    args = parser.parse_args()
+
+    with open(args.queries, 'r', encoding='utf-8') as f:
+        query_set = json.load(f)
+    queries = query_set['queries']
+    print(f"🧪 RAG 벤치마크: 질의 {len(queries)}개, 백엔드 {', '.join(args.backends)}, "
+          f"k={args.k}, warm {args.repeat}회")
+
+    benchmark = RAGBenchmark(queries, args.db, ks=args.k, repeat=args.repeat, hybrid_backend=args.hybrid_backend)
+    result = {
+        'created_at': datetime.now().isoformat(),
+        'git_commit': _git_commit(),
+        'queries_file': args.queries,
+        'queries_version': query_set.get('version'),
+        'query_count': len(queries),
+        'db_path': args.db,
+        'k': benchmark.ks,
+        'repeat': args.repeat,
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'backends': benchmark.run(args.backends)
+    }
+
+    output = Path(args.output or Path(rag_config.BENCHMARK_RESULTS_DIR) /
+                  f"rag_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_with_baseline(result, json.load(f))
+        if regressions:
+            print(f"\n⚠️ 회귀 {len(regressions)}건")
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print("\n✅ 회귀 없음")
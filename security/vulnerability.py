@@ -8,6 +8,7 @@ import requests
 from typing import List, Dict, Optional, Set
 from config import vulnerability_config
 from core.models import VulnerabilityInfo
+from core.telemetry import trace_span, in_current_context
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
@@ -25,10 +26,22 @@ class VulnerabilityChecker:
         if not version or not package_name:
             return []
         
-        # 캐시 확인
+        with trace_span('osv.lookup', {'package.name': package_name, 'package.version': version}) as span:
+            # 캐시 확인
+            cache_key = f"{package_name}:{version}"
+            cached = self.checked_packages.get(cache_key)
+            span.set_attribute('cache.hit', cached is not None)
+            if cached is not None:
+                span.set_attribute('vulnerabilities', len(cached))
+                return cached
+            
+            vulnerabilities = self._query_osv(package_name, version, span)
+            span.set_attribute('vulnerabilities', len(vulnerabilities))
+            return vulnerabilities
+    
+    def _query_osv(self, package_name: str, version: str, span) -> List[VulnerabilityInfo]:
+        """OSV API 조회 후 캐시 저장"""
         cache_key = f"{package_name}:{version}"
-        if cache_key in self.checked_packages:
-            return self.checked_packages[cache_key]
         
         # 버전 정규화
         clean_version = re.sub(r'[><=!~^]', '', version).strip()
@@ -52,6 +65,7 @@ class VulnerabilityChecker:
             )
             
             self.api_call_count += 1
+            span.set_attributes({'osv.api_call': True, 'http.status_code': response.status_code})
             
             if response.status_code != 200:
                 self.api_errors.append({
@@ -116,6 +130,21 @@ class VulnerabilityChecker:
         
         print(f"🔍 총 {len(all_packages_to_check)}개 패키지 취약점 검사 시작...")
         
+        with trace_span('osv.scan', {'packages': len(all_packages_to_check), 'max_workers': max_workers}) as span:
+            results = self._check_packages_parallel(all_packages_to_check, max_workers)
+            span.set_attributes({
+                'vulnerabilities': results['statistics']['total_vulnerabilities'],
+                'osv.api_calls': results['statistics']['api_calls'],
+                'osv.api_errors': results['statistics']['api_errors']
+            })
+        
+        # 취약점 요약
+        self._print_vulnerability_summary(results)
+        
+        return results
+    
+    def _check_packages_parallel(self, all_packages_to_check: List[Dict], max_workers: int) -> Dict:
+        """패키지 목록을 스레드 풀로 병렬 조회"""
         # 병렬 처리
         results = {
             'direct_vulnerabilities': {},
@@ -138,7 +167,7 @@ class VulnerabilityChecker:
             
             for pkg_info in all_packages_to_check:
                 future = executor.submit(
-                    self.check_package,
+                    in_current_context(self.check_package),
                     pkg_info['name'],
                     pkg_info['version']
                 )
@@ -194,9 +223,6 @@ class VulnerabilityChecker:
         results['statistics']['api_calls'] = self.api_call_count
         results['statistics']['api_errors'] = len(self.api_errors)
         
-        # 취약점 요약
-        self._print_vulnerability_summary(results)
-        
         return results
     
     def _get_severity(self, vuln_data: dict) -> str:
@@ -0,0 +1,370 @@
+# test/batch_standin_server.py
+"""
+배치 API 로컬 대역 서버 (테스트용)
+- Anthropic Message Batches: POST /v1/messages/batches, GET /v1/messages/batches/{id}, GET .../{id}/results
+- OpenAI Batch: POST /v1/files, POST /v1/batches, GET /v1/batches/{id}, GET /v1/files/{id}/content
+- 응답은 프롬프트의 "분석할 코드:" 부분을 오프라인 오염 분석기(TaintAnalyzer)로 분석해 생성
+- 제출 후 delay초가 지나면 완료 처리, 코드에 FAIL_MARKER가 있는 요청은 오류 결과 반환
+
+SDK는 ANTHROPIC_BASE_URL / OPENAI_BASE_URL 환경변수로 이 서버를 가리키게 해서 사용:
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.taint_analyzer import TaintAnalyzer
+
+# 주석은 프롬프트 압축에서 지워지므로 코드 식별자로 표시
+FAIL_MARKER = "BATCH_STANDIN_FAIL"
+
+# 응답에 넣을 필드 (analyze_security 발견 단계 형식)
+RESPONSE_FIELDS = ('type', 'severity', 'confidence', 'location', 'description', 'vulnerable_code')
+
+
+def extract_code(prompt: str) -> str:
+    """발견 프롬프트에서 분석 대상 코드 부분만 추출"""
+    start = prompt.find("분석할 코드:")
+    end = prompt.find("주의: JSON만 출력", start)
+    if start < 0:
+        return ""
+    code = prompt[start + len("분석할 코드:"):end if end > 0 else None].lstrip("\n")
+    # 템플릿의 "    {code}" 들여쓰기는 첫 줄에만 붙음
+    if code.startswith("    "):
+        code = code[4:]
+    return code.rstrip()
+
+
+def respond(prompt: str) -> Tuple[Optional[str], Optional[str]]:
+    """프롬프트 → (응답 JSON 텍스트, 오류 메시지)"""
+    code = extract_code(prompt)
+    if FAIL_MARKER in code:
+        return None, "stand-in forced failure"
+    result = TaintAnalyzer(parallel_threshold=10 ** 6).analyze_security(code)
+    vulnerabilities = [{key: v.get(key) for key in RESPONSE_FIELDS} for v in result['vulnerabilities']]
+    return json.dumps({'vulnerabilities': vulnerabilities}, ensure_ascii=False), None
+
+
+def prompt_text(messages) -> str:
+    """messages의 user 내용을 하나의 문자열로 (content가 블록 목록인 경우 포함)"""
+    texts = []
+    for message in messages:
+        if message.get('role') != 'user':
+            continue
+        content = message.get('content')
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.extend(block.get('text', '') for block in content or [])
+    return "\n".join(texts)
+
+
+def usage_for(prompt: str, text: str) -> Tuple[int, int]:
+    return len(prompt) // 4 + 1, len(text or '') // 4 + 1
+
+
+class StandinState:
+    """제출된 배치/파일 상태"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.anthropic_batches: Dict[str, Dict] = {}
+        self.openai_batches: Dict[str, Dict] = {}
+        self.files: Dict[str, Dict] = {}
+
+    def ended(self, batch: Dict) -> bool:
+        return time.time() >= batch['submitted'] + self.delay
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = "BatchStandin/1.0"
+
+    @property
+    def state(self) -> StandinState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    # ------------------------------------------------------------------
+    # 공통
+    # ------------------------------------------------------------------
+
+    def _send(self, status: int, body, content_type: str = 'application/json'):
+        data = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self):
+        self._send(404, {'error': {'type': 'not_found_error', 'message': self.path}})
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def do_POST(self):
+        path = self.path.split('?')[0].rstrip('/')
+        if path == '/v1/messages/batches':
+            self._anthropic_create(json.loads(self._read_body()))
+        elif path == '/v1/files':
+            self._openai_upload(self._read_body())
+        elif path == '/v1/batches':
+            self._openai_create(json.loads(self._read_body()))
+        else:
+            self._not_found()
+
+    def do_GET(self):
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if parts[:3] == ['v1', 'messages', 'batches'] and len(parts) == 4:
+            self._anthropic_retrieve(parts[3])
+        elif parts[:3] == ['v1', 'messages', 'batches'] and len(parts) == 5 and parts[4] == 'results':
+            self._anthropic_results(parts[3])
+        elif parts[:2] == ['v1', 'batches'] and len(parts) == 3:
+            self._openai_retrieve(parts[2])
+        elif parts[:2] == ['v1', 'files'] and len(parts) == 4 and parts[3] == 'content':
+            self._openai_file_content(parts[2])
+        else:
+            self._not_found()
+
+    # ------------------------------------------------------------------
+    # Anthropic Message Batches
+    # ------------------------------------------------------------------
+
+    def _anthropic_create(self, payload: Dict):
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        with self.state.lock:
+            self.state.anthropic_batches[batch_id] = {
+                'requests': payload.get('requests', []),
+                'submitted': time.time(),
+                'results': None
+            }
+        self._send(200, self._anthropic_batch(batch_id))
+
+    def _anthropic_batch(self, batch_id: str) -> Dict:
+        batch = self.state.anthropic_batches[batch_id]
+        ended = self.state.ended(batch)
+        total = len(batch['requests'])
+        succeeded = errored = 0
+        if ended:
+            results = self._anthropic_compute(batch)
+            errored = sum(1 for r in results if r['result']['type'] != 'succeeded')
+            succeeded = total - errored
+        created = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(batch['submitted']))
+        return {
+            'id': batch_id,
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': {
+                'processing': 0 if ended else total,
+                'succeeded': succeeded,
+                'errored': errored,
+                'canceled': 0,
+                'expired': 0
+            },
+            'created_at': created,
+            'expires_at': created,
+            'ended_at': created if ended else None,
+            'archived_at': None,
+            'cancel_initiated_at': None,
+            'results_url': f"{self._base_url()}/v1/messages/batches/{batch_id}/results" if ended else None
+        }
+
+    def _anthropic_compute(self, batch: Dict):
+        with self.state.lock:
+            if batch['results'] is None:
+                results = []
+                for request in batch['requests']:
+                    params = request['params']
+                    prompt = prompt_text(params.get('messages', []))
+                    text, error = respond(prompt)
+                    if error:
+                        result = {'type': 'errored',
+                                  'error': {'type': 'error', 'error': {'type': 'api_error', 'message': error}}}
+                    else:
+                        input_tokens, output_tokens = usage_for(prompt, text)
+                        result = {'type': 'succeeded', 'message': {
+                            'id': f"msg_{uuid.uuid4().hex[:24]}",
+                            'type': 'message',
+                            'role': 'assistant',
+                            'model': params.get('model'),
+                            'content': [{'type': 'text', 'text': text}],
+                            'stop_reason': 'end_turn',
+                            'stop_sequence': None,
+                            'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens}
+                        }}
+                    results.append({'custom_id': request['custom_id'], 'result': result})
+                batch['results'] = results
+            return batch['results']
+
+    def _anthropic_retrieve(self, batch_id: str):
+        if batch_id not in self.state.anthropic_batches:
+            return self._not_found()
+        self._send(200, self._anthropic_batch(batch_id))
+
+    def _anthropic_results(self, batch_id: str):
+        batch = self.state.anthropic_batches.get(batch_id)
+        if batch is None or not self.state.ended(batch):
+            return self._not_found()
+        lines = [json.dumps(r, ensure_ascii=False) for r in self._anthropic_compute(batch)]
+        self._send(200, ('\n'.join(lines) + '\n').encode('utf-8'), 'application/binary')
+
+    # ------------------------------------------------------------------
+    # OpenAI Batch
+    # ------------------------------------------------------------------
+
+    def _file_object(self, file_id: str) -> Dict:
+        entry = self.state.files[file_id]
+        return {
+            'id': file_id,
+            'object': 'file',
+            'bytes': len(entry['content']),
+            'created_at': int(entry['created_at']),
+            'filename': entry['filename'],
+            'purpose': entry['purpose'],
+            'status': 'processed'
+        }
+
+    def _store_file(self, content: bytes, filename: str, purpose: str) -> str:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        with self.state.lock:
+            self.state.files[file_id] = {'content': content, 'filename': filename,
+                                         'purpose': purpose, 'created_at': time.time()}
+        return file_id
+
+    def _openai_upload(self, body: bytes):
+        header = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode('utf-8')
+        message = BytesParser(policy=default_policy).parsebytes(header + body)
+        fields = {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            fields[name] = (part.get_filename(), part.get_payload(decode=True))
+        filename, content = fields.get('file', ('upload.jsonl', b''))
+        purpose = (fields.get('purpose') or (None, b'batch'))[1].decode('utf-8')
+        self._send(200, self._file_object(self._store_file(content, filename, purpose)))
+
+    def _openai_create(self, payload: Dict):
+        input_file = self.state.files.get(payload.get('input_file_id'))
+        if input_file is None:
+            return self._not_found()
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        requests = [json.loads(line) for line in input_file['content'].decode('utf-8').splitlines() if line.strip()]
+        with self.state.lock:
+            self.state.openai_batches[batch_id] = {
+                'payload': payload,
+                'requests': requests,
+                'submitted': time.time(),
+                'output_file_id': None,
+                'error_file_id': None,
+                'failed': 0
+            }
+        self._send(200, self._openai_batch(batch_id))
+
+    def _openai_batch(self, batch_id: str) -> Dict:
+        batch = self.state.openai_batches[batch_id]
+        ended = self.state.ended(batch)
+        if ended:
+            self._openai_compute(batch)
+        total = len(batch['requests'])
+        return {
+            'id': batch_id,
+            'object': 'batch',
+            'endpoint': batch['payload'].get('endpoint'),
+            'input_file_id': batch['payload'].get('input_file_id'),
+            'completion_window': batch['payload'].get('completion_window'),
+            'status': 'completed' if ended else 'in_progress',
+            'created_at': int(batch['submitted']),
+            'output_file_id': batch['output_file_id'],
+            'error_file_id': batch['error_file_id'],
+            'request_counts': {
+                'total': total,
+                'completed': total - batch['failed'] if ended else 0,
+                'failed': batch['failed'] if ended else 0
+            },
+            'metadata': batch['payload'].get('metadata')
+        }
+
+    def _openai_compute(self, batch: Dict):
+        with self.state.lock:
+            if batch['output_file_id'] is not None:
+                return
+        outputs, errors = [], []
+        for request in batch['requests']:
+            body = request['body']
+            prompt = prompt_text(body.get('messages', []))
+            text, error = respond(prompt)
+            record = {'id': f"batch_req_{uuid.uuid4().hex[:24]}", 'custom_id': request['custom_id']}
+            if error:
+                record.update(response={'status_code': 500, 'body': {'error': {'message': error}}}, error=None)
+                errors.append(record)
+                continue
+            prompt_tokens, completion_tokens = usage_for(prompt, text)
+            record.update(error=None, response={'status_code': 200, 'body': {
+                'id': f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                'object': 'chat.completion',
+                'model': body.get('model'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': text}}],
+                'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                          'total_tokens': prompt_tokens + completion_tokens,
+                          'prompt_tokens_details': {'cached_tokens': 0}}
+            }})
+            outputs.append(record)
+
+        def jsonl(records) -> bytes:
+            return ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+
+        output_file_id = self._store_file(jsonl(outputs), 'batch_output.jsonl', 'batch_output')
+        error_file_id = self._store_file(jsonl(errors), 'batch_errors.jsonl', 'batch_output') if errors else None
+        with self.state.lock:
+            if batch['output_file_id'] is None:
+                batch.update(output_file_id=output_file_id, error_file_id=error_file_id, failed=len(errors))
+
+    def _openai_retrieve(self, batch_id: str):
+        if batch_id not in self.state.openai_batches:
+            return self._not_found()
+        self._send(200, self._openai_batch(batch_id))
+
+    def _openai_file_content(self, file_id: str):
+        entry = self.state.files.get(file_id)
+        if entry is None:
+            return self._not_found()
+        self._send(200, entry['content'], 'application/octet-stream')
+
+
+def start_standin_server(port: int = 0, delay: float = 2.0) -> ThreadingHTTPServer:
+    """백그라운드 스레드로 대역 서버 시작 (port=0이면 빈 포트 사용)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandinHandler)
+    server.state = StandinState(delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    server = start_standin_server(port, delay)
+    print(f"🧪 배치 API 대역 서버: http://127.0.0.1:{server.server_address[1]} (완료 지연 {delay}초)")
+    print(f"   ANTHROPIC_BASE_URL=http://127.0.0.1:{server.server_address[1]}")
+    print(f"   OPENAI_BASE_URL=http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
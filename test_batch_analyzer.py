@@ -0,0 +1,121 @@
+# test_batch_analyzer.py
+"""
+배치 API 일괄 분석 테스트
+- 로컬 대역 서버(test/batch_standin_server.py)로 Anthropic / OpenAI 배치 흐름 확인
+- 제출 → 상태 확인 → 수집 후 프로젝트별 결과 형식, 라인 복원, 실패 청크 처리 확인
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+# test 폴더는 표준 라이브러리 test 패키지와 이름이 겹쳐 경로로 추가
+sys.path.insert(0, str(Path(__file__).parent / "test"))
+
+from batch_standin_server import start_standin_server, FAIL_MARKER
+
+# 대역 서버를 먼저 띄우고 SDK가 그쪽으로 요청하도록 환경변수 설정 (클라이언트 생성 전에)
+server = start_standin_server(delay=2.0)
+base_url = f"http://127.0.0.1:{server.server_address[1]}"
+os.environ["ANTHROPIC_BASE_URL"] = base_url
+os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+os.environ.setdefault("ANTHROPIC_API_KEY", "standin-key")
+os.environ.setdefault("OPENAI_API_KEY", "standin-key")
+os.environ["USAGE_LEDGER_ENABLED"] = "false"
+
+from core.batch_analyzer import BatchSecurityAnalyzer, BatchJobStore
+
+PROJECTS = {
+    'flask-app': (
+        "# ===== File: app.py =====\n"
+        '"""예제 앱"""\n'
+        "import os\n"
+        "from flask import request\n"
+        "\n"
+        "\n"
+        "def run():\n"
+        "    # 사용자 입력으로 명령 실행\n"
+        "    cmd = request.args.get('cmd')\n"
+        "    os.system(cmd)\n"
+    ),
+    'db-tool': (
+        "# ===== File: db.py =====\n"
+        "import sqlite3\n"
+        "\n"
+        "def find(name):\n"
+        "    conn = sqlite3.connect('a.db')\n"
+        "    name = input()\n"
+        "    return conn.execute(f\"SELECT * FROM users WHERE name = '{name}'\")\n"
+        "\n"
+        "# ===== File: broken.py =====\n"
+        "import subprocess\n"
+        "\n"
+        "def run():\n"
+        f"    {FAIL_MARKER} = True\n"
+        "    subprocess.call(input(), shell=True)\n"
+    ),
+}
+
+
+def run_flow(use_claude: bool):
+    engine = "Anthropic" if use_claude else "OpenAI"
+    print("\n" + "=" * 80)
+    print(f"📦 {engine} 배치 흐름")
+    print("=" * 80)
+
+    # 청크를 작게 잡아 파일별로 요청이 나뉘도록 함
+    store = BatchJobStore(tempfile.mkdtemp(prefix="batch_jobs_"))
+    analyzer = BatchSecurityAnalyzer(use_claude=use_claude, store=store, chunk_tokens=60)
+    job_id = analyzer.submit(PROJECTS)
+
+    status = analyzer.poll(job_id)
+    print(f"⏳ 제출 직후 상태: {status['status']} ({status.get('provider_status')})")
+
+    # 다른 프로세스에서 이어받는 것처럼 새 인스턴스로 대기/수집
+    resumed = BatchSecurityAnalyzer(use_claude=use_claude, store=store, chunk_tokens=60)
+    resumed.wait(job_id, poll_interval=0.5, max_wait=60)
+    results = resumed.collect(job_id)
+
+    ok = True
+    for name, result in results.items():
+        lines = [v['location'].get('line') for v in result['vulnerabilities'] if isinstance(v.get('location'), dict)]
+        print(f"📁 {name}: {result['analyzed_by']}, 취약점 {len(result['vulnerabilities'])}개, "
+              f"점수 {result['security_score']}, 라인 {lines}")
+        print(f"   요청 {result['batch']['requests']}건, 실패 {len(result['batch']['failed_requests'])}건")
+        for key in ('success', 'vulnerabilities', 'security_score', 'summary', 'analyzed_by', 'has_error'):
+            if key not in result:
+                print(f"❌ 결과에 {key} 없음")
+                ok = False
+
+    # 배치에는 상세 정보를 나중에 생성하는 단계가 없으므로 발견 결과에 상세 필드까지 포함되어야 함
+    pending = [v for r in results.values() for v in r['vulnerabilities'] if v.get('details_pending')]
+    if pending:
+        print(f"❌ 상세 정보 미생성 취약점 {len(pending)}개")
+        ok = False
+
+    # 압축으로 docstring/주석이 빠져도 원본 라인(os.system = app.py 9번째 줄)으로 복원되어야 함
+    flask_lines = [v['location'].get('line') for v in results['flask-app']['vulnerabilities']]
+    if 9 not in flask_lines:
+        print(f"❌ 라인 복원 실패: {flask_lines}")
+        ok = False
+
+    # broken.py 요청만 실패하고 db.py 결과는 남아야 함
+    db = results['db-tool']
+    if not db['batch']['failed_requests'] or not db['vulnerabilities']:
+        print("❌ 부분 실패 처리 확인 실패")
+        ok = False
+
+    # 수집된 작업은 다시 수집해도 저장된 결과 반환
+    if resumed.collect(job_id) != results:
+        print("❌ 재수집 결과 불일치")
+        ok = False
+
+    print("✅ 통과" if ok else "❌ 실패")
+    return ok
+
+
+if __name__ == "__main__":
+    passed = [run_flow(True), run_flow(False)]
+    server.shutdown()
+    print(f"\n결과: {sum(passed)}/{len(passed)} 통과")
@@ -0,0 +1,111 @@
+# test_finding_dedup.py
+"""
+취약점 중복 제거 테스트
+- 청크/엔진별로 같은 취약점을 보고한 결과는 병합
+- 같은 스니펫이라도 다른 함수 / 먼 라인의 취약점은 별개로 유지
+- 문구만 다른 근접 중복은 MinHash 유사도 기준(SIMILARITY)으로 병합 여부 결정
+"""
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.finding_dedup import FindingDeduplicator
+
+CODE = (
+    "# ===== File: app.py =====\n"
+    "import sqlite3\n"
+    "\n"
+    "def get_user(cursor, user_id):\n"
+    "    query = f\"SELECT * FROM users WHERE id = {user_id}\"\n"
+    "    cursor.execute(query)\n"
+    "    return cursor.fetchone()\n"
+    "\n"
+    "def get_order(cursor, order_id):\n"
+    "    query = f\"SELECT * FROM orders WHERE id = {order_id}\"\n"
+    "    cursor.execute(query)\n"
+    "    rows = cursor.fetchall()\n"
+    "    if not rows:\n"
+    "        return None\n"
+    "    log = f\"SELECT * FROM audit WHERE id = {order_id}\"\n"
+    "    cursor.execute(log)\n"
+    "    cursor.execute(query)\n"
+    "    return rows\n"
+)
+
+
+def finding(line, code="cursor.execute(query)", function=None, severity="HIGH", **extra):
+    location = {'file': 'app.py', 'line': line}
+    if function:
+        location['function'] = function
+    return {'type': 'SQL Injection', 'severity': severity, 'location': location,
+            'vulnerable_code': code, 'description': 'SQL 인젝션', **extra}
+
+
+def run(title, vulnerabilities, expected):
+    merged = FindingDeduplicator().deduplicate(vulnerabilities, CODE)
+    lines = [v['location']['line'] for v in merged]
+    ok = len(merged) == expected
+    print(f"  {'✅' if ok else '❌'} {title}: {len(vulnerabilities)}개 → {len(merged)}개 (라인 {lines})")
+    return ok
+
+
+def test_same_snippet_in_different_functions_kept():
+    """get_user / get_order의 같은 cursor.execute(query)는 별개 취약점"""
+    assert run("다른 함수의 같은 스니펫", [finding(5), finding(10)], 2)
+
+
+def test_same_snippet_far_apart_in_function_kept():
+    """같은 함수라도 라인 차이가 크면 별개 취약점"""
+    assert run("같은 함수의 먼 라인", [finding(10), finding(16)], 2)
+
+
+def test_reported_twice_merged():
+    """청크 경계/폴백 엔진이 같은 취약점을 다시 보고한 경우 병합 (라인 오차, 문구 차이 허용)"""
+    vulnerabilities = [
+        finding(10, severity="MEDIUM"),
+        finding(11, code="cursor.execute(query)  # 사용자 입력", fixed_code="cursor.execute(sql, (order_id,))"),
+        finding(10, function="get_order"),
+    ]
+    merged = FindingDeduplicator().deduplicate(vulnerabilities, CODE)
+    assert run("같은 취약점 중복 보고", vulnerabilities, 1)
+    assert merged[0]['severity'] == 'HIGH'
+    assert merged[0]['fixed_code'] and merged[0]['related_lines'] == [10, 11]
+
+
+ORDER_QUERY = 'query = f"SELECT * FROM orders WHERE id = {order_id}"\ncursor.execute(query)'
+
+
+def test_reworded_snippet_merged():
+    """스니펫 문구가 달라도 (지문 다름) MinHash 유사도가 SIMILARITY 이상이면 근접 중복으로 병합"""
+    reworded = ORDER_QUERY.replace('WHERE id', 'WHERE order_id')
+    vulnerabilities = [finding(10, code=ORDER_QUERY), finding(10, code=reworded)]
+    dedup = FindingDeduplicator()
+    assert dedup.fingerprint(vulnerabilities[0]) != dedup.fingerprint(vulnerabilities[1])
+    assert run("문구만 다른 근접 중복 (유사도 0.83)", vulnerabilities, 1)
+
+
+def test_below_similarity_kept():
+    """유사도가 SIMILARITY 바로 아래면 (스니펫 + 한 줄, 0.656) 별개로 유지"""
+    extended = ORDER_QUERY + '\nrows = cursor.fetchall()'
+    assert run("유사도 기준 미만 (0.656)", [finding(10, code=ORDER_QUERY), finding(10, code=extended)], 2)
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("🧬 취약점 중복 제거 테스트")
+    print("=" * 80)
+
+    tests = [test_same_snippet_in_different_functions_kept, test_same_snippet_far_apart_in_function_kept,
+             test_reported_twice_merged, test_reworded_snippet_merged, test_below_similarity_kept]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+
+    print(f"\n결과: {passed}/{len(tests)} 통과")
+    sys.exit(0 if passed == len(tests) else 1)
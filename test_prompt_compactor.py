@@ -0,0 +1,75 @@
+# test_prompt_compactor.py
+"""
+프롬프트 압축 라인 맵 테스트
+- AST 사전 필터가 남긴 import 라인(첫 단위 헤더 위)도 원본 라인 번호로 복원
+- 압축 결과 라인 번호 → 원본 라인 번호 되돌리기 (압축 없이 사전 필터만 쓴 경우 포함)
+"""
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.ast_prefilter import ASTPreFilter
+from core.prompt_compactor import PromptCompactor
+
+CODE = (
+    "# ===== File: app.py =====\n"
+    '"""주문 처리 모듈"""\n'
+    "# 외부 명령 실행\n"
+    "import os\n"
+    "import subprocess\n"
+    "\n"
+    "def helper():\n"
+    "    return 1\n"
+    "\n"
+    "def run(cmd):\n"
+    "    os.system(cmd)\n"
+)
+
+
+def test_prefilter_line_map():
+    """사전 필터 결과의 각 라인(헤더 포함)이 원본 라인 번호를 가짐"""
+    result = ASTPreFilter(min_unit_score=1).filter_code(CODE)
+    print(f"  사전 필터 라인 맵: {result['line_maps']}")
+    assert result['line_maps']['app.py'] == [3, 4, 9, 9, 10]
+
+
+def test_imports_above_first_header_keep_original_lines():
+    """docstring/주석 아래 원본 3-4행의 import가 필터링 행 번호(1-2)로 바뀌지 않음"""
+    prefiltered = ASTPreFilter(min_unit_score=1).filter_code(CODE)
+    compaction = PromptCompactor().compact(prefiltered['code'], prefiltered['line_maps'])
+    line_map = compaction['line_maps']['app.py']
+    print(f"  압축 라인 맵: {line_map}")
+    assert line_map == [3, 4, 9, 10]
+
+    found = [{'type': 'Command Injection', 'location': {'file': 'app.py', 'line': 4}}]
+    assert PromptCompactor().remap_locations(found, compaction)[0]['location']['line'] == 10
+
+
+def test_prefilter_only_remap():
+    """압축을 끄고 사전 필터만 쓴 경우에도 필터링 행 번호(5행 = os.system)를 원본(10행)으로 복원"""
+    prefiltered = ASTPreFilter(min_unit_score=1).filter_code(CODE)
+    found = [{'type': 'Command Injection', 'location': {'file': 'app.py', 'line': 5}}]
+    remapped = PromptCompactor.remap_locations(found, {'line_maps': prefiltered['line_maps']})
+    assert remapped[0]['location']['line'] == 10
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("🗜️ 프롬프트 압축 라인 맵 테스트")
+    print("=" * 80)
+
+    tests = [test_prefilter_line_map, test_imports_above_first_header_keep_original_lines,
+             test_prefilter_only_remap]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError:
+            print(f"❌ {test.__name__}")
+
+    print(f"\n결과: {passed}/{len(tests)} 통과")
+    sys.exit(0 if passed == len(tests) else 1)
@@ -0,0 +1,189 @@
+# test_relevance_scorer.py
+"""
+RAG 관련성 점수 계산기 테스트
+- 미리 컴파일한 RelevanceScorer가 기존 선형 스캔 계산(ImprovedSecurityAnalyzer 원래 구현)과 같은 결과인지
+  무작위 문서/취약점 조합으로 차등 검증 (점수, 문서 순위, 키워드, 설명 추출)
+"""
+import random
+import re
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag import relevance_scorer as rs
+from rag.relevance_scorer import RelevanceScorer
+
+
+# ============================================================================
+# 기존 선형 스캔 구현 (비교 기준)
+# ============================================================================
+
+def baseline_relevance_score(content, vuln_type, description):
+    score = 0.0
+    content_lower = content.lower()
+    if vuln_type.lower() in content_lower:
+        score += 0.3
+    if 'hardcoded' in vuln_type.lower() or 'secret' in vuln_type.lower():
+        keyword_score = min(sum(1 for k in rs.SCORE_SECRET if k in content_lower) * 0.1, 0.5)
+    elif 'sql' in vuln_type.lower() or 'injection' in vuln_type.lower():
+        keyword_score = min(sum(1 for k in rs.SCORE_INJECTION if k in content_lower) * 0.1, 0.5)
+    elif 'xss' in vuln_type.lower():
+        keyword_score = min(sum(1 for k in rs.SCORE_XSS if k in content_lower) * 0.1, 0.5)
+    else:
+        keyword_score = min(sum(1 for k in rs.SCORE_GENERAL if k in content_lower) * 0.08, 0.5)
+    score += keyword_score
+    if description:
+        desc_words = set(description.lower().split())
+        content_words = set(content_lower.split())
+        if desc_words and content_words:
+            similarity = len(desc_words & content_words) / min(len(desc_words), 20)
+            score += min(similarity * 0.2, 0.2)
+    return min(score, 1.0)
+
+
+def baseline_most_relevant(documents, metadatas, vuln_type, standard_type):
+    if not documents:
+        return None
+    best_score = -1
+    best_idx = 0
+    for i, (doc, meta) in enumerate(zip(documents, metadatas if metadatas else [{}] * len(documents))):
+        score = 0
+        if meta and 'vulnerability_types' in meta:
+            doc_vuln_types = meta['vulnerability_types'].lower()
+            if standard_type.lower() in doc_vuln_types:
+                score += 3
+            elif vuln_type.lower() in doc_vuln_types:
+                score += 2
+        doc_lower = doc.lower()
+        if vuln_type.lower() in doc_lower:
+            score += 1
+        if 'hardcoded' in vuln_type.lower() or 'secret' in vuln_type.lower():
+            if any(word in doc_lower for word in rs.RANK_SECRET_BONUS):
+                score += 2
+            if any(word in doc_lower for word in rs.RANK_SECRET_PENALTY):
+                score -= 1
+        elif 'sql' in vuln_type.lower():
+            if any(word in doc_lower for word in rs.RANK_SQL):
+                score += 2
+        elif 'xss' in vuln_type.lower():
+            if any(word in doc_lower for word in rs.RANK_XSS):
+                score += 2
+        if score > best_score:
+            best_score = score
+            best_idx = i
+    if best_score < 1:
+        return None
+    return best_idx
+
+
+def baseline_keywords(description):
+    keywords = []
+    description_lower = description.lower()
+    for term in rs.SECURITY_TERMS:
+        if term.lower() in description_lower:
+            keywords.append(term)
+            if len(keywords) >= 3:
+                break
+    return keywords
+
+
+def baseline_description(text):
+    cleaned_lines = []
+    in_code_block = False
+    for line in text.split('\n'):
+        if any(marker in line for marker in rs.CODE_START_MARKERS):
+            in_code_block = True
+            continue
+        if re.match(r'^\d+:', line.strip()):
+            in_code_block = True
+            continue
+        if any(marker in line for marker in rs.TEXT_START_MARKERS):
+            in_code_block = False
+        if not in_code_block and line.strip():
+            if not any(pattern in line for pattern in rs.CODE_LIKE_PATTERNS):
+                cleaned_lines.append(line.strip())
+    cleaned_text = re.sub(r'\s+', ' ', ' '.join(cleaned_lines))
+    if '[설명]' in cleaned_text:
+        parts = cleaned_text.split('[설명]')
+        if len(parts) > 1:
+            cleaned_text = parts[1].split('[')[0].strip()
+    return cleaned_text
+
+
+# ============================================================================
+# 무작위 입력
+# ============================================================================
+
+VULN_TYPES = ['SQL Injection', 'Hardcoded Secret', 'XSS', 'Command Injection', 'Path Traversal',
+              'hardcoded_password', 'Weak Cryptography', 'sql', 'secret key', 'Insecure Deserialization']
+FILLER = ['the', 'code', '코드', '사용자', '입력', 'data', 'value', '\n', '\n', ' ', '1:', '12:', '[설명]',
+          '[권장사항]', 'def f():', 'x = 1', 'self.a', '[', ']', '.', 'Env', 'SQL', 'HTML', 'Prepared']
+VOCABULARY = sorted(set(
+    rs.RANK_SECRET_BONUS + rs.RANK_SECRET_PENALTY + rs.RANK_SQL + rs.RANK_XSS + rs.SCORE_SECRET
+    + rs.SCORE_INJECTION + rs.SCORE_XSS + rs.SCORE_GENERAL + rs.SECURITY_TERMS + rs.CODE_START_MARKERS
+    + rs.TEXT_START_MARKERS + rs.CODE_LIKE_PATTERNS + VULN_TYPES + FILLER
+))
+
+
+def random_text(rng, max_parts=30):
+    parts = []
+    for _ in range(rng.randint(0, max_parts)):
+        word = rng.choice(VOCABULARY)
+        if rng.random() < 0.2:
+            word = word.upper()
+        elif rng.random() < 0.1 and len(word) > 2:
+            cut = rng.randrange(1, len(word))
+            word = word[:cut]  # 키워드 접두사 (부분 일치 경계 검사)
+        parts.append(word)
+        parts.append(rng.choice([' ', '', '\n', ', ']))
+    return ''.join(parts)
+
+
+def check_agreement(cases=30000, seed=11):
+    """무작위 cases건에서 기존 계산과 결과가 모두 같은지 (불일치 목록 반환)"""
+    rng = random.Random(seed)
+    scorer = RelevanceScorer(cache_size=256)
+    mismatches = []
+    for _ in range(cases):
+        content = random_text(rng)
+        description = random_text(rng, 12) if rng.random() < 0.8 else ''
+        vuln_type = rng.choice(VULN_TYPES)
+        standard_type = rng.choice(VULN_TYPES)
+        documents = [random_text(rng) for _ in range(rng.randint(0, 4))]
+        metadatas = [{'vulnerability_types': rng.choice(VULN_TYPES)} if rng.random() < 0.5 else {}
+                     for _ in documents] if rng.random() < 0.8 else []
+
+        checks = [
+            ('relevance_score', scorer.relevance_score(content, vuln_type, description),
+             baseline_relevance_score(content, vuln_type, description)),
+            ('find_most_relevant', scorer.find_most_relevant(documents, metadatas, vuln_type, standard_type),
+             baseline_most_relevant(documents, metadatas, vuln_type, standard_type)),
+            ('extract_keywords', scorer.extract_keywords(description), baseline_keywords(description)),
+            ('extract_description', scorer.extract_description(content), baseline_description(content)),
+        ]
+        for name, actual, expected in checks:
+            if actual != expected:
+                mismatches.append((name, content, vuln_type, expected, actual))
+    return mismatches
+
+
+def test_scorer_matches_baseline():
+    """pytest용: 무작위 3,000건에서 기존 선형 스캔 계산과 결과 일치"""
+    assert check_agreement(cases=3000) == []
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("🔄 관련성 점수 계산기 - 기존 계산과 결과 일치")
+    print("=" * 80)
+
+    mismatches = check_agreement()
+    if mismatches:
+        print(f"❌ 불일치 {len(mismatches)}건")
+        for name, content, vuln_type, expected, actual in mismatches[:10]:
+            print(f"  - {name} ({vuln_type}): 기존 {expected!r} / 계산기 {actual!r}\n    {content[:120]!r}")
+        sys.exit(1)
+
+    print("✅ 무작위 30,000건 모두 일치 (점수, 문서 순위, 키워드, 설명 추출)")
@@ -0,0 +1,173 @@
+# test_taint_analyzer.py
+"""
+정적 오염 분석 함수 간 추적 테스트
+- 여러 파일에 같은 이름의 함수가 있어도 import 경로대로 요약 적용 (파일 순서와 무관)
+- 상대 import / 모듈 별칭 호출 / self 메소드 호출
+- 여러 파일을 거치는 호출 체인 (a → b.wrap → c.run → os.system)
+- shell 없이 인자 목록으로 실행하는 subprocess 호출은 명령 주입 아님
+"""
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.taint_analyzer import TaintAnalyzer
+
+FILES = {
+    'app/tainted.py': (
+        "from flask import request\n"
+        "\n"
+        "def get_data():\n"
+        "    return request.args.get('q')\n"
+    ),
+    'app/constant.py': (
+        "def get_data():\n"
+        "    return 'SELECT 1'\n"
+    ),
+    'app/orders.py': (
+        "from app.tainted import get_data\n"
+        "\n"
+        "def list_orders(cursor):\n"
+        "    cursor.execute(get_data())\n"
+    ),
+    'app/health.py': (
+        "from app.constant import get_data\n"
+        "\n"
+        "def ping(cursor):\n"
+        "    cursor.execute(get_data())\n"
+    ),
+    'app/db.py': (
+        "def run_query(cursor, sql):\n"
+        "    cursor.execute(sql)\n"
+    ),
+    'app/shell.py': (
+        "import os\n"
+        "\n"
+        "def run(cmd):\n"
+        "    os.system(cmd)\n"
+    ),
+    'app/views.py': (
+        "from flask import request\n"
+        "from . import shell\n"
+        "from .db import run_query\n"
+        "\n"
+        "class Report:\n"
+        "    def build(self, cursor):\n"
+        "        run_query(cursor, request.args.get('sql'))\n"
+        "        self.export(request.args.get('cmd'))\n"
+        "\n"
+        "    def export(self, cmd):\n"
+        "        shell.run(cmd)\n"
+    ),
+}
+
+
+def build_code(order):
+    return "\n".join(f"# ===== File: {path} =====\n{FILES[path]}" for path in order)
+
+
+def findings(order):
+    result = TaintAnalyzer(max_workers=1).analyze_security(build_code(order))
+    return sorted((v['location']['file'], v['location']['function'], v['type']) for v in result['vulnerabilities'])
+
+
+def test_same_function_name_in_two_files():
+    """app.tainted.get_data만 오염 - app.constant.get_data를 쓰는 ping은 안전 (파일 순서와 무관)"""
+    forward = findings(list(FILES))
+    backward = findings(list(reversed(FILES)))
+    print(f"  정방향: {forward}\n  역방향: {backward}")
+    assert forward == backward
+    assert ('app/orders.py', 'list_orders', 'SQL Injection') in forward
+    assert not any(path == 'app/health.py' for path, _, _ in forward)
+
+
+def test_relative_import_alias_and_self_method():
+    """from .db import / from . import shell + shell.run() / self.export() 경로 추적"""
+    result = findings(list(FILES))
+    assert ('app/views.py', 'Report.build', 'SQL Injection') in result
+    assert ('app/views.py', 'Report.build', 'Command Injection') in result
+
+
+CHAIN = {
+    'svc/a.py': (
+        "from flask import request\n"
+        "from svc import b\n"
+        "\n"
+        "def handle():\n"
+        "    b.wrap(request.args.get('cmd'))\n"
+    ),
+    'svc/b.py': (
+        "from svc.c import run\n"
+        "\n"
+        "def wrap(cmd):\n"
+        "    run('sh -c ' + cmd)\n"
+    ),
+    'svc/c.py': (
+        "import os\n"
+        "\n"
+        "def run(cmd):\n"
+        "    os.system(cmd)\n"
+    ),
+}
+
+
+def test_multi_hop_chain_across_files():
+    """a.handle → b.wrap → c.run → os.system 체인 (파일 순서와 무관)"""
+    for order in (list(CHAIN), list(reversed(CHAIN))):
+        code = "\n".join(f"# ===== File: {path} =====\n{CHAIN[path]}" for path in order)
+        result = TaintAnalyzer(max_workers=1).analyze_security(code)['vulnerabilities']
+        found = [(v['location']['file'], v['location']['function'], v['type']) for v in result]
+        print(f"  {order[0]} 먼저: {found}")
+        assert ('svc/a.py', 'handle', 'Command Injection') in found
+
+
+SUBPROCESS = (
+    "import subprocess\n"
+    "from flask import request\n"
+    "\n"
+    "def listing():\n"
+    "    subprocess.run(['ls', request.args.get('d')])\n"
+    "\n"
+    "def listing_args():\n"
+    "    args = ('ls', '-l', request.args.get('d'))\n"
+    "    subprocess.check_output(args, shell=False)\n"
+    "\n"
+    "def shell_string():\n"
+    "    subprocess.run('ls ' + request.args.get('d'), shell=True)\n"
+    "\n"
+    "def shell_list():\n"
+    "    subprocess.Popen(['ls', request.args.get('d')], shell=True)\n"
+    "\n"
+    "def program():\n"
+    "    subprocess.call([request.args.get('tool'), '--version'])\n"
+)
+
+
+def test_subprocess_argument_list_not_sink():
+    """인자 목록 + shell 없음은 안전, shell=True 또는 실행 파일 자리가 오염되면 명령 주입"""
+    code = f"# ===== File: tools.py =====\n{SUBPROCESS}"
+    result = TaintAnalyzer(max_workers=1).analyze_security(code)['vulnerabilities']
+    functions = sorted(v['location']['function'] for v in result if v['type'] == 'Command Injection')
+    print(f"  명령 주입: {functions}")
+    assert functions == ['program', 'shell_list', 'shell_string']
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("🧪 정적 오염 분석 함수 간 추적 테스트")
+    print("=" * 80)
+
+    tests = [test_same_function_name_in_two_files, test_relative_import_alias_and_self_method,
+             test_multi_hop_chain_across_files, test_subprocess_argument_list_not_sink]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError:
+            print(f"❌ {test.__name__}")
+
+    print(f"\n결과: {passed}/{len(tests)} 통과")
+    sys.exit(0 if passed == len(tests) else 1)
@@ -0,0 +1,117 @@
+# test_vulnerability_classifier.py
+"""
+취약점 타입 분류기 테스트
+- 기존 선형 스캔 매퍼(KISIA / 표준 타입)와 결과 일치 검증
+- 선형 스캔 vs 컴파일 오토마톤 vs LRU 캐시 성능 비교
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag.kisia_vulnerability_mapping import KISIAVulnerabilityMapper
+from rag.vulnerability_type_mapper import VulnerabilityTypeMapper
+from rag.vulnerability_classifier import VulnerabilityClassifier
+
+
+def build_corpus(kisia_mapper, type_mapper, size=3000, seed=7):
+    """AI 응답에서 나올 법한 취약점 타입 문자열 생성"""
+    rng = random.Random(seed)
+
+    base = set(kisia_mapper.AI_TO_KISIA_MAPPING) | set(type_mapper.TYPE_MAPPING)
+    base |= set(kisia_mapper.KOREAN_TO_ENGLISH) | set(kisia_mapper.ENGLISH_TO_KOREAN)
+    base |= set(type_mapper.STANDARD_TYPES)
+    for rules in (kisia_mapper.KEYWORD_RULES, type_mapper.KEYWORD_RULES):
+        for rule in rules:
+            base.update(rule[0])
+    base |= {"", "Unknown", "Other", "Missing Auth Check", "Auth Bypass", "OS Injection",
+             "API Misuse", "Exec Call", "Insecure YAML load", "Potential SQLi"}
+    base = sorted(base)
+
+    prefixes = ["", "", "Potential ", "Possible ", "Critical ", "잠재적 "]
+    suffixes = ["", "", " Vulnerability", " in login()", " (CWE-89)", " 취약점"]
+    corpus = list(base)
+    for text in base:
+        corpus.extend([text.lower(), text.upper(), text.replace(' ', '_'), text[: max(1, len(text) // 2)]])
+    while len(corpus) < size:
+        text = rng.choice(base)
+        corpus.append(rng.choice(prefixes) + text + rng.choice(suffixes))
+    return corpus
+
+
+def check_agreement(corpus, kisia_mapper, type_mapper, classifier):
+    """분류기 결과가 기존 매퍼와 완전히 같은지 확인"""
+    print("\n" + "="*80)
+    print("🔄 테스트 1: 기존 매퍼와 결과 일치")
+    print("="*80)
+
+    mismatches = []
+    for text in corpus:
+        expected = (kisia_mapper._get_kisia_type_linear(text), type_mapper._normalize_vuln_type_linear(text))
+        result = classifier.classify(text)
+        actual = (result['kisia_type'], result['standard_type'])
+        if expected != actual:
+            mismatches.append((text, expected, actual))
+
+    print(f"  검사 문자열: {len(corpus)}개 (고유 {len(set(corpus))}개)")
+    if mismatches:
+        print(f"  ❌ 불일치 {len(mismatches)}건")
+        for text, expected, actual in mismatches[:10]:
+            print(f"    - {text!r}: 기존 {expected} / 분류기 {actual}")
+        return False
+
+    print("  ✅ KISIA 타입, 표준 타입 모두 일치")
+    return True
+
+
+def test_classifier_matches_linear_mappers():
+    """pytest용: 분류기 결과가 기존 선형 스캔 매퍼와 일치"""
+    kisia_mapper = KISIAVulnerabilityMapper()
+    type_mapper = VulnerabilityTypeMapper()
+    classifier = VulnerabilityClassifier(kisia_mapper, type_mapper)
+    corpus = build_corpus(kisia_mapper, type_mapper, size=500)
+    assert check_agreement(corpus, kisia_mapper, type_mapper, classifier)
+
+
+def run_benchmark(corpus, kisia_mapper, type_mapper, classifier, repeat=5):
+    """선형 스캔 / 오토마톤 / 캐시 성능 비교"""
+    print("\n" + "="*80)
+    print("⏱️ 테스트 2: 성능 비교")
+    print("="*80)
+
+    def measure(func):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in corpus:
+                func(text)
+        return (time.perf_counter() - start) / (repeat * len(corpus)) * 1e6
+
+    linear = measure(lambda t: (kisia_mapper._get_kisia_type_linear(t), type_mapper._normalize_vuln_type_linear(t)))
+    compiled = measure(classifier._classify)
+    cached = measure(classifier.classify)
+
+    start = time.perf_counter()
+    VulnerabilityClassifier()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"  선형 스캔 (두 매퍼):  {linear:8.2f} µs/건")
+    print(f"  컴파일 오토마톤:      {compiled:8.2f} µs/건 ({linear / compiled:.1f}배)")
+    print(f"  LRU 캐시 적중:        {cached:8.2f} µs/건 ({linear / cached:.1f}배)")
+    print(f"  분류기 컴파일 시간:   {build_ms:8.1f} ms (프로세스당 1회)")
+    print(f"  캐시 상태: {classifier.cache_info()}")
+
+
+if __name__ == "__main__":
+    kisia_mapper = KISIAVulnerabilityMapper()
+    type_mapper = VulnerabilityTypeMapper()
+    classifier = VulnerabilityClassifier(kisia_mapper, type_mapper, cache_size=8192)
+    corpus = build_corpus(kisia_mapper, type_mapper)
+
+    ok = check_agreement(corpus, kisia_mapper, type_mapper, classifier)
+    run_benchmark(corpus, kisia_mapper, type_mapper, classifier)
+
+    print("\n✅ 테스트 완료" if ok else "\n❌ 일치 검증 실패")
+    sys.exit(0 if ok else 1)
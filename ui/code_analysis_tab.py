@@ -14,6 +14,7 @@ from core.analyzer import SBOMAnalyzer
 from core.formatter import SBOMFormatter
 from core.project_downloader import ProjectDownloader
 from security.vulnerability import check_vulnerabilities_enhanced
+from config import dedup_config
 
 # LLM 분석기는 조건부 임포트
 try:
@@ -802,11 +803,11 @@ def analyze_code_common(code: str, requirements: str, project_name: str):
         {
             "key": "빠른 분석",
             "title": "빠른 분석",
-            "desc": "SBOM 생성만",
+            "desc": "SBOM + 정적 오염 분석",
             "time": "1-5초",
             "icon": "",
             "color": "var(--accent-amber)",
-            "features": ["패키지 의존성", "SBOM 생성", "라이선스 정보"]
+            "features": ["패키지 의존성", "SBOM 생성", "오프라인 취약점 탐지"]
         },
         {
             "key": "AI 보안 분석",
@@ -1028,6 +1029,34 @@ def run_analysis(code: str, requirements: str, project_name: str, mode: str, sca
             
             progress.progress(50)
         
+        # 1-1. 정적 오염 분석 (빠른 분석, 네트워크 불필요)
+        if mode == "빠른 분석":
+            status.text("🧪 정적 오염 분석 중...")
+            from core.taint_analyzer import TaintAnalyzer
+            taint_result = TaintAnalyzer().analyze_security(code)
+            results['ai_analysis'] = {
+                'success': True,
+                'analysis': {
+                    'code_vulnerabilities': [
+                        {
+                            'type': v['type'],
+                            'severity': v['severity'],
+                            'confidence': v['confidence'],
+                            'description': v['description'],
+                            'vulnerable_code': v['vulnerable_code'],
+                            'recommendation': v['recommendation'],
+                            'attack_scenario': v['data_flow'],
+                            'line_numbers': [v['location']['line']],
+                            'source_file': v['location']['file']
+                        }
+                        for v in taint_result['vulnerabilities']
+                    ],
+                    'security_score': taint_result['security_score'],
+                    'summary': taint_result['summary']
+                }
+            }
+            progress.progress(60)
+        
         # 2. 취약점 검사
         if mode == "🔥 전체 분석" and results.get('sbom'):
             status.text("🛡️ 취약점 검사 중...")
@@ -1125,7 +1154,11 @@ def analyze_large_code_with_llm(llm_analyzer, code: str) -> Dict:
             st.warning(f"⚠️ {file_info['path']} 분석 실패: {e}")
             continue
     
-    # 결과 통합
+    # 결과 통합 (파일 간/청크 간 중복 병합)
+    if all_vulnerabilities and dedup_config.ENABLED:
+        from core.finding_dedup import deduplicate_findings
+        all_vulnerabilities = deduplicate_findings(all_vulnerabilities, code)
+    
     if all_vulnerabilities:
         security_score = _compute_security_score_from_vulns(all_vulnerabilities)
         summary = f"대용량 프로젝트에서 {len(all_vulnerabilities)}개 취약점 발견"
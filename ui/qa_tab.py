@@ -5,7 +5,8 @@
 import streamlit as st
 import time
 import os
-from rag.simple_rag import SimpleRAG
+from core.resource_registry import registry, get_simple_rag, get_openai_client
+from core.usage_ledger import record_llm_usage
 from prompts.security_prompts import get_qa_prompt
 
 def render_qa_tab():
@@ -25,7 +26,11 @@ def render_qa_tab():
     if 'rag_system' not in st.session_state:
         with st.spinner("Q&A 시스템 초기화 중..."):
             try:
-                st.session_state.rag_system = SimpleRAG()
+                # 프로세스 공용 인스턴스 (세션마다 벡터 DB를 다시 열지 않음)
+                rag_system = get_simple_rag()
+                if rag_system is None:
+                    raise RuntimeError(registry.status()['simple_rag']['last_error'])
+                st.session_state.rag_system = rag_system
                 stats = st.session_state.rag_system.get_stats()
                 
                 # 모드에 따른 다른 메시지
@@ -39,7 +44,9 @@ def render_qa_tab():
                 st.info("OpenAI API 키를 확인해주세요.")
                 return
     
-    rag = st.session_state.rag_system
+    # 재연결된 공용 인스턴스가 있으면 그것을 사용
+    rag = get_simple_rag() or st.session_state.rag_system
+    st.session_state.rag_system = rag
     stats = rag.get_stats()
     
     col1, col2, col3 = st.columns(3)
@@ -201,7 +208,7 @@ def render_qa_tab():
 # process_question() 함수의 RAG 검색 부분 제거/수정 (라인 250-300 근처)
 
 def process_question(question: str, rag):
-    """전문적인 질문 처리 - AI 중심, RAG 보조"""
+    """전문적인 질문 처리 - AI 중심, RAG 보조 (답변은 생성되는 대로 표시)"""
     
     # 사용자 메시지 추가
     st.session_state.qa_messages.append({"role": "user", "content": question})
@@ -210,91 +217,71 @@ def process_question(question: str, rag):
         st.markdown(question)
     
     with st.chat_message("assistant"):
-        # 전문적인 로딩 인디케이터
-        progress_bar = st.progress(0)
         status_text = st.empty()
         
         try:
             start_time = time.time()
+            status_text.text("관련 문서 검색 중...")
             
-            # 1단계: 질문 분석 중
-            status_text.text("질문 분석 중...")
-            progress_bar.progress(30)
-            time.sleep(0.3)
+            # 검색/컨텍스트 조립까지 끝나면 출처를 바로 받고, 답변은 토큰 단위로 스트리밍
+            sources, chunks = rag.ask_stream(question)
+            source_docs = [
+                f"{source['page_range']} {source['title']}".strip()
+                for source in sources if source.get('page_range') and source['page_range'] != "p.?"
+            ]
+            if source_docs:
+                status_text.text(f"답변 생성 중... (참고: {', '.join(doc.split()[0] for doc in source_docs)})")
+            else:
+                status_text.text("답변 생성 중...")
             
-            # 2단계: 답변 생성 (RAG는 ask() 내부에서 처리)
-            status_text.text("답변 생성 중...")
-            progress_bar.progress(70)
+            first_token_time = None
             
-            # ask() 함수가 RAG 검색과 AI 답변을 모두 처리
-            response = rag.ask(question)
+            def timed_chunks():
+                # 첫 토큰이 도착하면 상태 표시 제거 (체감 대기 시간 = 첫 토큰까지)
+                nonlocal first_token_time
+                for chunk in chunks:
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                        status_text.empty()
+                    yield chunk
             
-            # 출처 정보 파싱 (있으면)
-            source_docs = []
-            if "참고 문서:" in response:
-                # 응답에서 출처 정보 추출
-                lines = response.split('\n')
-                for i, line in enumerate(lines):
-                    if "Python_시큐어코딩_가이드" in line:
-                        # 다음 줄들에서 페이지 정보 수집
-                        j = i + 1
-                        while j < len(lines) and (lines[j].startswith('•') or lines[j].startswith('  -')):
-                            page_info = lines[j].strip('• -')
-                            if page_info and page_info != "p.?":
-                                source_docs.append(page_info)
-                            j += 1
-
-            # 완료
-            progress_bar.progress(100)
+            response = st.write_stream(timed_chunks())
+            if not isinstance(response, str):
+                response = "".join(str(part) for part in response)
             elapsed = time.time() - start_time
-            status_text.text(f"답변 완료 ({elapsed:.2f}초)")
-            
-            # 답변 표시
-            st.markdown(response)
             
             # 출처가 있으면 별도 박스로 표시
             if source_docs:
                 with st.expander("가이드라인 출처 상세", expanded=False):
                     st.info("**Python_시큐어코딩_가이드(2023년_개정본).pdf**")
                     for doc in source_docs:
-                        if doc and doc != "p.?":
-                            st.caption(f"• {doc}")
-            elif "참고 문서:" in response:
-                # 출처 정보가 있지만 파싱되지 않은 경우
-                with st.expander("가이드라인 참조", expanded=False):
-                    st.info("**Python 시큐어코딩 가이드(2023년 개정본)를 참조하여 답변했습니다.**")
-                    st.caption("상세 페이지 정보는 답변 하단을 확인하세요.")
+                        st.caption(f"• {doc}")
             
             # 성능 정보
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.caption(f"응답시간: {elapsed:.2f}초")
+                st.caption(f"첫 응답: {first_token_time or elapsed:.2f}초")
             with col2:
                 # 답변 유형 판단
-                if "KISIA" in response or "가이드" in response:
+                if source_docs or "KISIA" in response or "가이드" in response:
                     st.caption(f"가이드라인 참조")
                 else:
                     st.caption(f"일반 지식 기반")
             with col3:
-                st.caption(f"답변 완료")
+                st.caption(f"답변 완료 ({elapsed:.2f}초)")
             
             # 대화 기록에 추가
             st.session_state.qa_messages.append({
                 "role": "assistant",
                 "content": response,
-                "elapsed_time": elapsed
+                "sources": source_docs,
+                "elapsed_time": elapsed,
+                "first_token_time": first_token_time
             })
             
         except Exception as e:
-            progress_bar.progress(100)
-            status_text.text("오류 발생")
-            st.error(f"답변 생성 중 오류가 발생했습니다: {e}")
-            
-        finally:
-            # UI 정리
-            time.sleep(0.5)
-            progress_bar.empty()
             status_text.empty()
+            st.error(f"답변 생성 중 오류가 발생했습니다: {e}")
 
 # ui/qa_tab.py
 # generate_answer_with_sources() 함수 수정 (라인 380-420 근처)
@@ -302,7 +289,6 @@ def process_question(question: str, rag):
 def generate_answer_with_sources(question: str, documents: list, sources: list) -> str:
     """근거 기반 답변 생성"""
     
-    from openai import OpenAI
     from prompts.all_prompts import RAG_PROMPTS, SYSTEM_PROMPTS
     
     # 문서 컨텍스트 생성
@@ -315,9 +301,12 @@ def generate_answer_with_sources(question: str, documents: list, sources: list)
     )
     
     try:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        client = get_openai_client()
+        if client is None:
+            raise ValueError("OpenAI 클라이언트를 사용할 수 없습니다")
         model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
         
+        start = time.perf_counter()
         response = client.chat.completions.create(
             model=model,
             messages=[
@@ -330,6 +319,7 @@ def generate_answer_with_sources(question: str, documents: list, sources: list)
             temperature=0.3,
             max_tokens=1000
         )
+        record_llm_usage('openai', model, response, time.perf_counter() - start, 'qa')
         
         answer = response.choices[0].message.content
         
@@ -22,6 +22,8 @@ from core.project_downloader import ProjectDownloader
 from core.mcp_github_client import MCPGithubClient
 from core.github_branch_analyzer import GitHubBranchAnalyzer
 from core.agent_slot_filler import AgentSlotFiller
+from core.telemetry import telemetry, trace_span
+from core.usage_ledger import usage_ledger
 
 
 def _inject_analysis_css():
@@ -675,6 +677,7 @@ def handle_github_input():
  
 
 
+@telemetry.traced('ingest.github_project')
 def download_github_project(github_url: str) -> tuple[bool, List[Dict]]:
     """GitHub 프로젝트 다운로드 및 파일 정보 추출"""
     downloader = ProjectDownloader()
@@ -909,7 +912,7 @@ def render_file_selection_stage():
             analysis_mode = st.selectbox(
                 "분석 모드:",
                 ["전체 분석", "AI 보안 분석", "빠른 분석"],
-                help="• 전체 분석: AI 보안 분석 + SBOM 생성\n• AI 보안 분석: 취약점 탐지\n• 빠른 분석: SBOM만 생성"
+                help="• 전체 분석: AI 보안 분석 + SBOM 생성\n• AI 보안 분석: 취약점 탐지\n• 빠른 분석: 정적 오염 분석(오프라인) + SBOM 생성"
             )
             st.session_state.analysis_mode = analysis_mode
         
@@ -930,6 +933,13 @@ def render_file_selection_stage():
                     st.caption("Claude → GPT")
                 else:
                     st.caption("GPT 전용")
+                
+                use_hedging = st.checkbox(
+                    "응답 지연 시 동시 요청",
+                    value=st.session_state.get('use_hedging', False),
+                    help="우선 엔진이 평소 응답 시간(90 백분위)을 넘기면 다른 엔진에도 요청하고 먼저 도착한 결과를 사용합니다"
+                )
+                st.session_state.use_hedging = use_hedging
             elif has_claude:
                 # Claude만 있을 때
                 st.session_state.use_claude = True
@@ -965,7 +975,7 @@ def render_file_selection_stage():
         elif analysis_mode == "AI 보안 분석":
             st.warning("AI 보안 분석만")
         elif analysis_mode == "빠른 분석":
-            st.info("빠른 분석 모드: SBOM만 생성")
+            st.info("빠른 분석 모드: AI 없이 정적 오염 분석으로 취약점 탐지 (API 키 불필요)")
         
         # 분석 시작 버튼
         st.divider()
@@ -1072,6 +1082,14 @@ def render_results_stage():
         st.divider()
         st.markdown('#### 🔍 심층 분석 리포트')
         
+        # 2단계 모드: 리포트에 들어갈 상세 정보가 아직 없으면 생성 버튼 제공
+        ai_for_report = st.session_state.analysis_results.get('ai_analysis', {})
+        if _has_pending_details(ai_for_report):
+            st.caption("리포트의 수정 코드와 공격 시나리오는 요청 시 생성됩니다.")
+            if st.button("수정 코드·공격 시나리오 생성 후 리포트 갱신", key="btn_details_for_report"):
+                ensure_vulnerability_details(ai_for_report)
+                st.rerun()
+        
         # 심층 리포트 생성
         deep_report = generate_deep_refactoring_report(st.session_state.analysis_results)
         
@@ -1124,6 +1142,7 @@ def render_results_stage():
             # AI 취약점 목록
             ai = st.session_state.get('analysis_results', {}).get('ai_analysis', {})
             vulns = ai.get('vulnerabilities', []) if isinstance(ai, dict) else []
+            ensure_vulnerability_details(ai, vulns)
             if not vulns:
                 st.warning('적용할 수정 코드가 없습니다.')
                 return
@@ -1352,6 +1371,7 @@ def render_results_stage():
     # 심층 분석 리포트 생성 및 표시
     st.divider()
     if st.button("심층 분석 리포트 생성", type="secondary"):
+        ensure_vulnerability_details(results.get('ai_analysis', {}))
         deep_report = generate_deep_refactoring_report(results)
         st.markdown(deep_report)
         st.download_button(
@@ -1394,6 +1414,29 @@ def render_results_stage():
 
 
 def run_analysis(code: str, file_list: List[Dict], mode: str, use_claude: bool, include_sbom: bool) -> Dict:
+    """분석 실행 - 전체 구간을 하나의 trace로 기록, LLM 사용량은 분석 ID로 원장에 기록"""
+    project = st.session_state.get('project_name', 'Project')
+    with trace_span('analysis.run', {
+        'analysis.mode': mode,
+        'analysis.use_claude': use_claude,
+        'analysis.include_sbom': include_sbom,
+        'code.bytes': len(code.encode('utf-8')),
+        'files': len(file_list)
+    }) as span, usage_ledger.analysis(project, mode) as analysis_id:
+        span.set_attribute('analysis.id', analysis_id)
+        results = _run_analysis(code, file_list, mode, use_claude, include_sbom)
+        results['analysis_id'] = analysis_id
+        ai_result = results.get('ai_analysis')
+        if isinstance(ai_result, dict):
+            span.set_attributes({
+                'vulnerabilities': len(ai_result.get('vulnerabilities', [])),
+                'analysis.engine': ai_result.get('analyzed_by'),
+                'analysis.has_error': ai_result.get('has_error', False)
+            })
+    return results
+
+
+def _run_analysis(code: str, file_list: List[Dict], mode: str, use_claude: bool, include_sbom: bool) -> Dict:
     """분석 실행 - 수정된 버전"""
     from core.formatter import SBOMFormatter
     
@@ -1413,10 +1456,11 @@ def run_analysis(code: str, file_list: List[Dict], mode: str, use_claude: bool,
                         formatter = SBOMFormatter()
                         project_name = st.session_state.get('project_name', 'Project')
                         packages = sbom_result.get('packages', [])
-                        results['sbom_formats'] = {
-                            'spdx': formatter.to_spdx(packages, {'project_name': project_name}),
-                            'cyclonedx': formatter.to_cyclonedx(packages, {'project_name': project_name})
-                        }
+                        with trace_span('report.sbom_formats', {'packages': len(packages)}):
+                            results['sbom_formats'] = {
+                                'spdx': formatter.to_spdx(packages, {'project_name': project_name}),
+                                'cyclonedx': formatter.to_cyclonedx(packages, {'project_name': project_name})
+                            }
                     except Exception as fmt_error:
                         st.warning(f"⚠️ SBOM 표준 형식 생성 실패: {fmt_error}")
                 else:
@@ -1447,8 +1491,15 @@ def run_analysis(code: str, file_list: List[Dict], mode: str, use_claude: bool,
         else:
             try:
                 print(f"🔍 AI 분석 시작 (use_claude={use_claude})")
-                ai_analyzer = ImprovedSecurityAnalyzer(use_claude=use_claude)
+                # 상세 정보(수정 코드·공격 시나리오)는 ensure_vulnerability_details로 요청 시 생성
+                ai_analyzer = ImprovedSecurityAnalyzer(
+                    use_claude=use_claude,
+                    two_phase=True,
+                    use_hedging=st.session_state.get('use_hedging', False)
+                )
                 ai_result = ai_analyzer.analyze_security(code, None)
+                # 2단계 모드의 상세 정보 생성에 재사용
+                st.session_state.detail_analyzer = ai_analyzer
             except Exception as e:
                 ai_result = {
                     'success': False,
@@ -1462,6 +1513,21 @@ def run_analysis(code: str, file_list: List[Dict], mode: str, use_claude: bool,
             results['ai_analysis'] = ai_result
         vuln_count = len(ai_result.get('vulnerabilities', [])) if isinstance(ai_result, dict) else 0
         print(f"📊 분석 완료: {vuln_count}개 취약점 발견")
+    elif mode == "빠른 분석":
+        # 정적 오염 분석 (네트워크/API 키 불필요)
+        try:
+            from core.taint_analyzer import TaintAnalyzer
+            results['ai_analysis'] = TaintAnalyzer().analyze_security(code, file_list)
+        except Exception as e:
+            results['ai_analysis'] = {
+                'success': False,
+                'vulnerabilities': [],
+                'security_score': 0,
+                'summary': f'정적 분석 오류: {e}',
+                'analyzed_by': 'Static Taint',
+                'has_error': True,
+                'error_type': 'Static Analysis Failed'
+            }
     
     results['analysis_time'] = time.time() - start_time
     results['analyzed_files'] = len(file_list)
@@ -1469,6 +1535,38 @@ def run_analysis(code: str, file_list: List[Dict], mode: str, use_claude: bool,
     return results
 
 
+def _has_pending_details(ai_result: Dict) -> bool:
+    """2단계 모드에서 아직 상세 정보가 생성되지 않은 취약점이 있는지"""
+    return any(v.get('details_pending') for v in (ai_result or {}).get('vulnerabilities', []))
+
+
+def _get_detail_analyzer() -> ImprovedSecurityAnalyzer:
+    """상세 정보 생성용 분석기 (세션 내 재사용)"""
+    analyzer = st.session_state.get('detail_analyzer')
+    if analyzer is None:
+        analyzer = ImprovedSecurityAnalyzer(use_claude=st.session_state.get('use_claude', True))
+        st.session_state.detail_analyzer = analyzer
+    return analyzer
+
+
+def ensure_vulnerability_details(ai_result: Dict, vulnerabilities: List[Dict] = None):
+    """상세 정보가 없는 취약점의 수정 코드/공격 시나리오 등을 병렬 생성 (결과 dict를 직접 갱신)"""
+    vulnerabilities = vulnerabilities if vulnerabilities is not None else (ai_result or {}).get('vulnerabilities', [])
+    pending = [v for v in vulnerabilities if v.get('details_pending')]
+    if not pending:
+        return
+    
+    # 상세 정보 생성 비용도 원래 분석 ID로 기록
+    analysis_id = (st.session_state.get('analysis_results') or {}).get('analysis_id')
+    project = st.session_state.get('project_name', 'Project')
+    with st.spinner(f"취약점 {len(pending)}건의 수정 코드와 공격 시나리오 생성 중..."), \
+            usage_ledger.analysis(project, analysis_id=analysis_id):
+        try:
+            _get_detail_analyzer().generate_details_batch(pending, st.session_state.get('analysis_code', ''))
+        except Exception as e:
+            st.error(f"상세 정보 생성 실패: {e}")
+
+
 def display_ai_results(ai_result: Dict):
     """AI 분석 결과 표시 - 에러 처리 개선"""
     
@@ -1602,7 +1700,46 @@ def display_ai_results(ai_result: Dict):
     
     # 요약
     st.info(ai_result.get('summary', ''))
-    
+
+    # AST 사전 필터 통계
+    prefilter = ai_result.get('prefilter')
+    if prefilter:
+        st.caption(
+            f"AST 사전 필터: {prefilter['selected_units']}/{prefilter['total_units']}개 단위, "
+            f"{prefilter['selected_files']}/{prefilter['total_files']}개 파일 → LLM 전달 "
+            f"({prefilter['original_chars']:,} → {prefilter['filtered_chars']:,}자, "
+            f"{prefilter['reduction'] * 100:.0f}% 절감)"
+        )
+
+    # 헤징 결과
+    hedge = ai_result.get('hedging')
+    if hedge and hedge.get('hedged'):
+        st.caption(f"헤징: {hedge['hedged_at']}초에 보조 엔진 동시 요청 → {hedge['winner']} 응답 채택 ({hedge.get('elapsed', '?')}초)")
+
+    # 프롬프트 압축 / 토큰 예산 사용량
+    compaction = ai_result.get('compaction')
+    if compaction:
+        st.caption(
+            f"프롬프트 압축: {compaction['original_tokens']:,} → {compaction['compact_tokens']:,} 토큰 "
+            f"(예산 {compaction['budget_tokens']:,}의 {compaction['budget_used'] * 100:.0f}% 사용, "
+            f"중복 파일 {compaction['duplicate_files']}개 생략)"
+        )
+        with st.expander("파일별 토큰 예산", expanded=False):
+            status_labels = {'included': '포함', 'truncated': '일부 잘림', 'skipped': '예산 초과 제외', 'duplicate': '중복'}
+            st.dataframe(
+                [
+                    {
+                        '파일': f['path'],
+                        '원본 토큰': f['original_tokens'],
+                        '압축 토큰': f['compact_tokens'],
+                        '예산 비율': f"{f['budget_share'] * 100:.1f}%",
+                        '상태': status_labels.get(f['status'], f['status']) + (f" ({f['duplicate_of']})" if f.get('duplicate_of') else '')
+                    }
+                    for f in compaction.get('files', [])
+                ],
+                use_container_width=True
+            )
+
     # 이하 취약점 상세 표시 코드...
     
     # 취약점 상세 표시
@@ -1611,6 +1748,12 @@ def display_ai_results(ai_result: Dict):
     if vulnerabilities:
         st.markdown('<h3><span class="material-symbols-outlined">bug_report</span> 발견된 취약점</h3>', unsafe_allow_html=True)
         
+        # 2단계 모드: 상세 정보는 요청 시 병렬 생성
+        if _has_pending_details(ai_result):
+            if st.button("모든 취약점의 수정 코드·공격 시나리오 생성", key="btn_generate_all_details"):
+                ensure_vulnerability_details(ai_result)
+                st.rerun()
+        
         for idx, vuln in enumerate(vulnerabilities, 1):
             severity = vuln.get('severity', 'MEDIUM')
             severity_icon = {
@@ -1630,6 +1773,13 @@ def display_ai_results(ai_result: Dict):
                 st.write("### 설명")
                 st.write(vuln.get('description', ''))
                 
+                if vuln.get('details_pending'):
+                    if vuln.get('details_error'):
+                        st.warning(f"상세 정보 생성 실패: {vuln['details_error']}")
+                    if st.button("수정 코드·공격 시나리오 생성", key=f"btn_generate_details_{idx}"):
+                        ensure_vulnerability_details(ai_result, [vuln])
+                        st.rerun()
+                
                 # 취약한 코드와 수정 코드를 나란히 표시
                 col1, col2 = st.columns(2)
                 
@@ -1644,6 +1794,8 @@ def display_ai_results(ai_result: Dict):
                     st.write("#### 수정된 코드")
                     if vuln.get('fixed_code'):
                         st.code(vuln['fixed_code'], language='python')
+                    elif vuln.get('details_pending'):
+                        st.info("아직 생성되지 않았습니다")
                     else:
                         st.warning("수정 코드를 생성할 수 없습니다")
                 
@@ -1845,6 +1997,11 @@ def display_download_options(results: Dict):
     """다운로드 옵션"""
     st.markdown('<h3><span class="material-symbols-outlined">download</span> 다운로드</h3>', unsafe_allow_html=True)
     
+    if _has_pending_details(results.get('ai_analysis', {})):
+        if st.button("보고서용 수정 코드·공격 시나리오 생성", key="btn_details_for_download"):
+            ensure_vulnerability_details(results['ai_analysis'])
+            st.rerun()
+    
     json_str = json.dumps(results, indent=2, default=str, ensure_ascii=False)
     
     col1, col2 = st.columns(2)
@@ -1906,6 +2063,7 @@ def display_download_options(results: Dict):
                 )
 
 
+@telemetry.traced('report.security')
 def generate_security_report(results: Dict) -> str:
     """보안 보고서 생성"""
     report = []
@@ -1931,6 +2089,7 @@ def generate_security_report(results: Dict) -> str:
     
     return ''.join(report)
 
+@telemetry.traced('report.ai_explanation')
 def generate_ai_explanation_report(results: Dict) -> str:
     """AI 판단 근거 설명 보고서 생성"""
     report = []
@@ -2120,6 +2279,7 @@ def _calculate_confidence_score(vuln: Dict) -> Dict:
     }
 
 
+@telemetry.traced('report.deep_refactoring')
 def generate_deep_refactoring_report(results: Dict) -> str:
     """심층 분석 리포트 생성: 사이드이펙트 최소화 중심 리팩토링 제안 (Markdown)"""
     import difflib
@@ -0,0 +1,75 @@
+# ui/usage_panel.py
+"""
+LLM 사용량/비용 사이드바 패널
+토큰/비용 원장(core/usage_ledger.py)을 조회해 오늘/최근 분석/프로젝트별/일별 비용 표시
+"""
+import sqlite3
+from datetime import datetime
+
+import streamlit as st
+
+from core.usage_ledger import usage_ledger
+
+
+def _format_cost(cost: float) -> str:
+    return f"${cost:,.4f}" if cost < 1 else f"${cost:,.2f}"
+
+
+def _token_row(row: dict) -> dict:
+    """표 표시용 행 (토큰 수 + 비용)"""
+    return {
+        '입력': f"{row['input_tokens']:,}",
+        '캐시 읽기': f"{row['cache_read_tokens']:,}",
+        '출력': f"{row['output_tokens']:,}",
+        '호출': row['calls'],
+        '비용': _format_cost(row['cost_usd'])
+    }
+
+
+def render_usage_sidebar():
+    """사이드바 LLM 사용량 섹션"""
+    st.markdown("### LLM 사용량")
+
+    if not usage_ledger.enabled:
+        st.caption("사용량 원장 비활성화 (USAGE_LEDGER_ENABLED=false)")
+        return
+
+    try:
+        today = datetime.now().strftime('%Y-%m-%d')
+        today_totals = usage_ledger.totals(since=today)
+        month_days = usage_ledger.cost_by_day(days=30)
+    except sqlite3.Error as e:
+        st.caption(f"사용량 조회 실패: {e}")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("오늘", _format_cost(today_totals['cost_usd']), help=f"LLM 호출 {today_totals['calls']}회")
+    with col2:
+        st.metric("최근 30일", _format_cost(sum(d['cost_usd'] for d in month_days)))
+
+    # 현재 세션의 마지막 분석
+    analysis_id = (st.session_state.get('analysis_results') or {}).get('analysis_id')
+    if analysis_id:
+        summary = usage_ledger.analysis_summary(analysis_id)
+        if summary['calls']:
+            cached = summary['cache_read_tokens']
+            total_input = summary['input_tokens'] + cached
+            cache_ratio = f" · 캐시 {cached / total_input:.0%}" if total_input and cached else ""
+            st.caption(
+                f"마지막 분석: {_format_cost(summary['cost_usd'])} · 호출 {summary['calls']}회 · "
+                f"입력 {total_input:,} / 출력 {summary['output_tokens']:,} 토큰{cache_ratio}"
+            )
+            with st.expander("단계별 비용", expanded=False):
+                st.table([{'단계': row['stage'], **_token_row(row)} for row in summary['stages']])
+
+    with st.expander("프로젝트별 / 일별 비용", expanded=False):
+        projects = usage_ledger.cost_by_project(limit=10)
+        if projects:
+            st.markdown("**프로젝트별**")
+            st.table([{'프로젝트': row['project'], '분석': row['analyses'], **_token_row(row)} for row in projects])
+        if month_days:
+            st.markdown("**일별 (USD)**")
+            st.bar_chart({'비용': {d['day']: d['cost_usd'] for d in month_days}})
+        if not projects and not month_days:
+            st.caption("기록된 LLM 호출이 없습니다.")